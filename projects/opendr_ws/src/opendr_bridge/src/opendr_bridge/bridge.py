@@ -428,15 +428,9 @@ class ROSBridge:
         :rtype mesh_ROS: shape_msgs.msg.Mesh
         """
         mesh_ROS = Mesh()
-        for i in range(vertices.shape[0]):
-            point = Point(vertices[i, 0], vertices[i, 1], vertices[i, 2])
-            mesh_ROS.vertices.append(point)
-        for i in range(faces.shape[0]):
-            mesh_triangle = MeshTriangle()
-            mesh_triangle.vertex_indices[0] = int(faces[i][0])
-            mesh_triangle.vertex_indices[1] = int(faces[i][1])
-            mesh_triangle.vertex_indices[2] = int(faces[i][2])
-            mesh_ROS.triangles.append(mesh_triangle)
+        # The arrays are converted to Python scalars at once and the messages are built directly from their rows
+        mesh_ROS.vertices = [Point(x, y, z) for x, y, z in np.asarray(vertices, dtype=np.float64)[:, :3].tolist()]
+        mesh_ROS.triangles = [MeshTriangle(triangle) for triangle in np.asarray(faces, dtype=np.int64)[:, :3].tolist()]
         return mesh_ROS
 
     def to_ros_colors(self, colors):
@@ -446,10 +440,7 @@ class ROSBridge:
         :return colors: a list of the colors of the vertices
         :rtype ros_colors: std_msgs.msg.ColorRGBA[]
         """
-        ros_colors = []
-        for i in range(colors.shape[0]):
-            color = ColorRGBA(colors[i, 0], colors[i, 1], colors[i, 2], 0)
-            ros_colors.append(color)
+        ros_colors = [ColorRGBA(r, g, b, 0) for r, g, b in np.asarray(colors, dtype=np.float64)[:, :3].tolist()]
         return ros_colors
 
     def from_ros_mesh(self, mesh_ROS, vertex_colors_ROS=None):
@@ -466,13 +457,8 @@ class ROSBridge:
         :return vertex_colors: the colors of the vertices of the 3D model
         :rtype vertex_colors: numpy array (Nx3)
         """
-        vertices = np.zeros([len(mesh_ROS.vertices), 3])
-        faces = np.zeros([len(mesh_ROS.triangles), 3]).astype(int)
-        for i in range(len(mesh_ROS.vertices)):
-            vertices[i] = np.array([mesh_ROS.vertices[i].x, mesh_ROS.vertices[i].y, mesh_ROS.vertices[i].z])
-        for i in range(len(mesh_ROS.triangles)):
-            faces[i] = np.array([int(mesh_ROS.triangles[i].vertex_indices[0]), int(mesh_ROS.triangles[i].vertex_indices[1]),
-                                 int(mesh_ROS.triangles[i].vertex_indices[2])]).astype(int)
+        vertices = np.array([[point.x, point.y, point.z] for point in mesh_ROS.vertices], dtype=np.float64).reshape(-1, 3)
+        faces = np.array([triangle.vertex_indices for triangle in mesh_ROS.triangles], dtype=int).reshape(-1, 3)
         return vertices, faces
 
     def from_ros_colors(self, ros_colors):
@@ -483,9 +469,7 @@ class ROSBridge:
         :return colors: the colors of the vertices of the 3D model
         :rtype colors: numpy array (Nx3)
         """
-        colors = np.zeros([len(ros_colors), 3])
-        for i in range(len(ros_colors)):
-            colors[i] = np.array([ros_colors[i].r, ros_colors[i].g, ros_colors[i].b])
+        colors = np.array([[color.r, color.g, color.b] for color in ros_colors], dtype=np.float64).reshape(-1, 3)
         return colors
 
     def from_ros_image_to_depth(self, message, encoding='mono16'):
@@ -15,7 +15,6 @@
 
 import argparse
 import torch
-import numpy as np
 import cv2
 from torchvision import transforms
 import PIL
@@ -116,21 +115,15 @@ class FacialEmotionEstimationNode:
             if bounding_boxes:
                 bounding_boxes = BoundingBoxListToNumpyArray()(bounding_boxes)
                 boxes = bounding_boxes[:, :4]
-                for idx, box in enumerate(boxes):
-                    (startX, startY, endX, endY) = int(box[0]), int(box[1]), int(box[2]), int(box[3])
-                    face_crop = image[startY:endY, startX:endX]
+                boxes = [(int(box[0]), int(box[1]), int(box[2]), int(box[3])) for box in boxes]
 
-                    # Preprocess detected face
-                    input_face = _pre_process_input_image(face_crop)
-
-                    # Recognize facial expression
-
-                    emotion, affect = self.facial_emotion_estimator.infer(input_face)
-                    # Converts from Tensor to ndarray
-                    affect = np.array([a.cpu().detach().numpy() for a in affect])
-                    affect = affect[0]  # a numpy array of valence and arousal values
-                    emotion = emotion[0]  # the emotion class with confidence tensor
+                # Preprocess the detected faces and recognize their facial expressions in a single batch
+                input_faces = torch.cat([_pre_process_input_image(image[startY:endY, startX:endX])
+                                         for (startX, startY, endX, endY) in boxes])
+                emotions, affects = self.facial_emotion_estimator.infer(input_faces)
+                affects = affects.numpy()  # valence and arousal values of each face
 
+                for (startX, startY, endX, endY), emotion, affect in zip(boxes, emotions, affects):
                     cv2.rectangle(image, (startX, startY), (endX, endY), (0, 255, 255), thickness=2)
                     cv2.putText(image, "Valence: %.2f" % affect[0], (startX, endY - 30), cv2.FONT_HERSHEY_SIMPLEX,
                                 0.5, (0, 255, 255), 1, cv2.LINE_AA)
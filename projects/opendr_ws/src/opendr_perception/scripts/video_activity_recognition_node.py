@@ -16,14 +16,11 @@
 import argparse
 import rospy
 import torch
-import torchvision
-import cv2
 from pathlib import Path
 from std_msgs.msg import String
 from vision_msgs.msg import ObjectHypothesis
 from sensor_msgs.msg import Image as ROS_Image
 from opendr_bridge import ROSBridge
-from opendr.engine.data import Video, Image
 from opendr.perception.activity_recognition import CLASSES as KINETICS400_CLASSES
 from opendr.perception.activity_recognition import CoX3DLearner
 from opendr.perception.activity_recognition import X3DLearner
@@ -72,17 +69,6 @@ class HumanActivityRecognitionNode:
         self.learner.download(path="model_weights", model_names={model_size})
         self.learner.load(Path("model_weights") / f"x3d_{model_size}.pyth")
 
-        # Set up preprocessing
-        if model_name == "cox3d":
-            self.preprocess = _image_preprocess(
-                image_size=self.learner.model_hparams["image_size"]
-            )
-        else:  # == x3d
-            self.preprocess = _video_preprocess(
-                image_size=self.learner.model_hparams["image_size"],
-                window_size=self.learner.model_hparams["frames_per_clip"],
-            )
-
         # Set up ROS topics and bridge
         self.input_rgb_image_topic = input_rgb_image_topic
         self.hypothesis_publisher = (
@@ -123,11 +109,10 @@ class HumanActivityRecognitionNode:
         if image is None:
             return
 
-        x = self.preprocess(image.convert("channels_first", "rgb"))
-
-        result = self.learner.infer(x)
-        assert len(result) == 1
-        category = result[0]
+        # Frames are preprocessed once and buffered on the device by the learner
+        category = self.learner.infer_online(image)
+        if category is None:
+            return
         category.confidence = float(category.confidence.max())  # Confidence for predicted class
         category.description = KINETICS400_CLASSES[category.data]  # Class name
 
@@ -140,72 +125,6 @@ class HumanActivityRecognitionNode:
             )
 
 
-def _resize(image, size=None, inter=cv2.INTER_AREA):
-    # initialize the dimensions of the image to be resized and
-    # grab the image size
-    dim = None
-    (h, w) = image.shape[:2]
-
-    if h > w:
-        # calculate the ratio of the width and construct the
-        # dimensions
-        r = size / float(w)
-        dim = (size, int(h * r))
-    else:
-        # calculate the ratio of the height and construct the
-        # dimensions
-        r = size / float(h)
-        dim = (int(w * r), size)
-
-    # resize the image
-    resized = cv2.resize(image, dim, interpolation=inter)
-
-    # return the resized image
-    return resized
-
-
-def _image_preprocess(image_size: int):
-    standardize = torchvision.transforms.Normalize(
-        mean=(0.45, 0.45, 0.45), std=(0.225, 0.225, 0.225)
-    )
-
-    def wrapped(frame):
-        nonlocal standardize
-        frame = frame.transpose((1, 2, 0))  # C, H, W -> H, W, C
-        frame = _resize(frame, size=image_size)
-        frame = torch.tensor(frame).permute((2, 0, 1))  # H, W, C -> C, H, W
-        frame = frame / 255.0  # [0, 255] -> [0.0, 1.0]
-        frame = standardize(frame)
-        return Image(frame, dtype=float)
-
-    return wrapped
-
-
-def _video_preprocess(image_size: int, window_size: int):
-    frames = []
-
-    standardize = torchvision.transforms.Normalize(
-        mean=(0.45, 0.45, 0.45), std=(0.225, 0.225, 0.225)
-    )
-
-    def wrapped(frame):
-        nonlocal frames, standardize
-        frame = frame.transpose((1, 2, 0))  # C, H, W -> H, W, C
-        frame = _resize(frame, size=image_size)
-        frame = torch.tensor(frame).permute((2, 0, 1))  # H, W, C -> C, H, W
-        frame = frame / 255.0  # [0, 255] -> [0.0, 1.0]
-        frame = standardize(frame)
-        if not frames:
-            frames = [frame for _ in range(window_size)]
-        else:
-            frames.pop(0)
-            frames.append(frame)
-        vid = Video(torch.stack(frames, dim=1))
-        return vid
-
-    return wrapped
-
-
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("-i", "--input_rgb_image_topic", help="Topic name for input rgb image",
@@ -433,13 +433,8 @@ class ROS2Bridge:
         :return faces: Numpy array Nx3 representing the IDs of the vertices of each face of the 3D model
         :rtype faces: numpy array (Nx3)
         """
-        vertices = np.zeros([len(mesh_ROS.vertices), 3])
-        faces = np.zeros([len(mesh_ROS.triangles), 3]).astype(int)
-        for i in range(len(mesh_ROS.vertices)):
-            vertices[i] = np.array([mesh_ROS.vertices[i].x, mesh_ROS.vertices[i].y, mesh_ROS.vertices[i].z])
-        for i in range(len(mesh_ROS.triangles)):
-            faces[i] = np.array([int(mesh_ROS.triangles[i].vertex_indices[0]), int(mesh_ROS.triangles[i].vertex_indices[1]),
-                                 int(mesh_ROS.triangles[i].vertex_indices[2])]).astype(int)
+        vertices = np.array([[point.x, point.y, point.z] for point in mesh_ROS.vertices], dtype=np.float64).reshape(-1, 3)
+        faces = np.array([triangle.vertex_indices for triangle in mesh_ROS.triangles], dtype=int).reshape(-1, 3)
         return vertices, faces
 
     def to_ros_mesh(self, vertices, faces):
@@ -453,18 +448,10 @@ class ROS2Bridge:
         :rtype mesh_ROS: shape_msgs.msg.Mesh
         """
         mesh_ROS = Mesh()
-        for i in range(vertices.shape[0]):
-            point = Point()
-            point.x = vertices[i, 0]
-            point.y = vertices[i, 1]
-            point.z = vertices[i, 2]
-            mesh_ROS.vertices.append(point)
-        for i in range(faces.shape[0]):
-            mesh_triangle = MeshTriangle()
-            mesh_triangle.vertex_indices[0] = int(faces[i][0])
-            mesh_triangle.vertex_indices[1] = int(faces[i][1])
-            mesh_triangle.vertex_indices[2] = int(faces[i][2])
-            mesh_ROS.triangles.append(mesh_triangle)
+        # The arrays are converted to Python scalars at once and the messages are built directly from their rows
+        mesh_ROS.vertices = [Point(x=x, y=y, z=z) for x, y, z in np.asarray(vertices, dtype=np.float64)[:, :3].tolist()]
+        mesh_ROS.triangles = [MeshTriangle(vertex_indices=triangle)
+                              for triangle in np.asarray(faces, dtype=np.int64)[:, :3].tolist()]
         return mesh_ROS
 
     def from_ros_colors(self, ros_colors):
@@ -475,9 +462,7 @@ class ROS2Bridge:
         :return colors: the colors of the vertices of the 3D model
         :rtype colors: numpy array (Nx3)
         """
-        colors = np.zeros([len(ros_colors), 3])
-        for i in range(len(ros_colors)):
-            colors[i] = np.array([ros_colors[i].r, ros_colors[i].g, ros_colors[i].b])
+        colors = np.array([[color.r, color.g, color.b] for color in ros_colors], dtype=np.float64).reshape(-1, 3)
         return colors
 
     def to_ros_colors(self, colors):
@@ -488,14 +473,7 @@ class ROS2Bridge:
         :return ros_colors: a list of the colors of the vertices
         :rtype ros_colors: std_msgs.msg.ColorRGBA[]
         """
-        ros_colors = []
-        for i in range(colors.shape[0]):
-            color = ColorRGBA()
-            color.r = colors[i, 0]
-            color.g = colors[i, 1]
-            color.b = colors[i, 2]
-            color.a = 0.0
-            ros_colors.append(color)
+        ros_colors = [ColorRGBA(r=r, g=g, b=b, a=0.0) for r, g, b in np.asarray(colors, dtype=np.float64)[:, :3].tolist()]
         return ros_colors
 
     def from_ros_pose_3D(self, ros_pose):
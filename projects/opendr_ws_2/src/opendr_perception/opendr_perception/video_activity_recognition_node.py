@@ -15,8 +15,6 @@
 
 import argparse
 import torch
-import torchvision
-import cv2
 import rclpy
 from rclpy.node import Node
 from pathlib import Path
@@ -26,7 +24,6 @@ from vision_msgs.msg import ObjectHypothesis
 from sensor_msgs.msg import Image as ROS_Image
 from opendr_bridge import ROS2Bridge
 
-from opendr.engine.data import Video, Image
 from opendr.perception.activity_recognition import CLASSES as KINETICS400_CLASSES
 from opendr.perception.activity_recognition import CoX3DLearner
 from opendr.perception.activity_recognition import X3DLearner
@@ -75,17 +72,6 @@ class HumanActivityRecognitionNode(Node):
         self.learner.download(path="model_weights", model_names={model_size})
         self.learner.load(Path("model_weights") / f"x3d_{model_size}.pyth")
 
-        # Set up preprocessing
-        if model_name == "cox3d":
-            self.preprocess = _image_preprocess(
-                image_size=self.learner.model_hparams["image_size"]
-            )
-        else:  # == x3d
-            self.preprocess = _video_preprocess(
-                image_size=self.learner.model_hparams["image_size"],
-                window_size=self.learner.model_hparams["frames_per_clip"],
-            )
-
         # Set up ROS topics and bridge
         self.image_subscriber = self.create_subscription(
             ROS_Image, input_rgb_image_topic, self.callback, 1
@@ -113,11 +99,10 @@ class HumanActivityRecognitionNode(Node):
         if image is None:
             return
 
-        x = self.preprocess(image.convert("channels_first", "rgb"))
-
-        result = self.learner.infer(x)
-        assert len(result) == 1
-        category = result[0]
+        # Frames are preprocessed once and buffered on the device by the learner
+        category = self.learner.infer_online(image)
+        if category is None:
+            return
         # Confidence for predicted class
         category.confidence = float(category.confidence.max())
         category.description = KINETICS400_CLASSES[category.data]  # Class name
@@ -131,72 +116,6 @@ class HumanActivityRecognitionNode(Node):
             )
 
 
-def _resize(image, size=None, inter=cv2.INTER_AREA):
-    # initialize the dimensions of the image to be resized and
-    # grab the image size
-    dim = None
-    (h, w) = image.shape[:2]
-
-    if h > w:
-        # calculate the ratio of the width and construct the
-        # dimensions
-        r = size / float(w)
-        dim = (size, int(h * r))
-    else:
-        # calculate the ratio of the height and construct the
-        # dimensions
-        r = size / float(h)
-        dim = (int(w * r), size)
-
-    # resize the image
-    resized = cv2.resize(image, dim, interpolation=inter)
-
-    # return the resized image
-    return resized
-
-
-def _image_preprocess(image_size: int):
-    standardize = torchvision.transforms.Normalize(
-        mean=(0.45, 0.45, 0.45), std=(0.225, 0.225, 0.225)
-    )
-
-    def wrapped(frame):
-        nonlocal standardize
-        frame = frame.transpose((1, 2, 0))  # C, H, W -> H, W, C
-        frame = _resize(frame, size=image_size)
-        frame = torch.tensor(frame).permute((2, 0, 1))  # H, W, C -> C, H, W
-        frame = frame / 255.0  # [0, 255] -> [0.0, 1.0]
-        frame = standardize(frame)
-        return Image(frame, dtype=float)
-
-    return wrapped
-
-
-def _video_preprocess(image_size: int, window_size: int):
-    frames = []
-
-    standardize = torchvision.transforms.Normalize(
-        mean=(0.45, 0.45, 0.45), std=(0.225, 0.225, 0.225)
-    )
-
-    def wrapped(frame):
-        nonlocal frames, standardize
-        frame = frame.transpose((1, 2, 0))  # C, H, W -> H, W, C
-        frame = _resize(frame, size=image_size)
-        frame = torch.tensor(frame).permute((2, 0, 1))  # H, W, C -> C, H, W
-        frame = frame / 255.0  # [0, 255] -> [0.0, 1.0]
-        frame = standardize(frame)
-        if not frames:
-            frames = [frame for _ in range(window_size)]
-        else:
-            frames.pop(0)
-            frames.append(frame)
-        vid = Video(torch.stack(frames, dim=1))
-        return vid
-
-    return wrapped
-
-
 def main(args=None):
     rclpy.init(args=args)
 
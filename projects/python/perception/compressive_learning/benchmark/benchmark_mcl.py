@@ -0,0 +1,94 @@
+# Copyright 2020-2023 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import numpy as np
+import yaml
+from pytorch_benchmark import benchmark
+import logging
+import argparse
+
+# opendr imports
+from opendr.perception.compressive_learning import MultilinearCompressiveLearner
+from opendr.engine.data import Image
+
+
+logger = logging.getLogger("benchmark")
+logging.basicConfig()
+logger.setLevel("DEBUG")
+
+# (backbone, input_shape, compressed_shape)
+CONFIGURATIONS = [
+    ("cifar_allcnn", (32, 32, 3), (20, 19, 2)),
+    ("cifar_allcnn", (32, 32, 3), (9, 6, 1)),
+    ("imagenet_resnet18", (224, 224, 3), (28, 27, 1)),
+]
+
+
+def benchmark_mcl(args):
+    results_dir = "./results"
+    if not os.path.exists(results_dir):
+        os.makedirs(results_dir)
+    device = args.device
+
+    for backbone, input_shape, compressed_shape in CONFIGURATIONS:
+        name = "{}_{}_{}".format(backbone, "x".join(map(str, input_shape)), "x".join(map(str, compressed_shape)))
+        print(f"==== Benchmarking MultilinearCompressiveLearner ({name}) ====")
+
+        learner = MultilinearCompressiveLearner(input_shape=input_shape,
+                                                compressed_shape=compressed_shape,
+                                                backbone=backbone,
+                                                n_class=10,
+                                                device=device)
+
+        images = [Image(np.float32(np.random.rand(*input_shape)), dtype=np.float32) for _ in range(args.batch_size)]
+        measurements = [Image(np.float32(np.random.rand(*compressed_shape)), dtype=np.float32) for _ in range(args.batch_size)]
+
+        def get_device_fn(*args):
+            return next(learner.model.parameters()).device
+
+        def transfer_to_device_fn(sample, device):
+            # Image.data is a numpy array, which is always on CPU
+            return sample
+
+        results = {}
+        for mode in ["module_graph", "optimized"]:
+            if mode == "optimized":
+                learner.optimize()
+            for fn_name, fn, sample in [("infer", learner.infer, images),
+                                        ("infer_from_compressed_measurement",
+                                         learner.infer_from_compressed_measurement, measurements)]:
+                print(f"== Benchmarking learner.{fn_name} ({mode}) ==")
+                results[f"{fn_name} ({mode})"] = benchmark(model=fn,
+                                                           sample=sample,
+                                                           sample_with_batch_size1=sample[:1],
+                                                           num_runs=args.num_runs,
+                                                           get_device_fn=get_device_fn,
+                                                           transfer_to_device_fn=transfer_to_device_fn,
+                                                           batch_size=args.batch_size,
+                                                           print_fn=print,
+                                                           )
+
+        with open(results_dir + f"/benchmark_mcl_{name}_{device}.txt", "a") as f:
+            print(yaml.dump(results), file=f)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--device", help="Device to use (cpu, cuda)", type=str, default="cuda")
+    parser.add_argument("--batch_size", help="Number of samples per inference call", type=int, default=32)
+    parser.add_argument("--num_runs", help="Number of timed runs", type=int, default=100)
+
+    args = parser.parse_args()
+    benchmark_mcl(args)
@@ -0,0 +1,77 @@
+# Copyright 2020-2023 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import time
+
+import torch
+
+from opendr.engine.datasets import ExternalDataset
+from opendr.perception.object_detection_2d import NanodetLearner
+from opendr.perception.object_detection_2d.nanodet.algorithm.nanodet.data.dataset import build_dataset
+
+
+def benchmark_epoch(dataset, batch_size, num_workers, epochs):
+    dataloader = torch.utils.data.DataLoader(
+        dataset,
+        batch_size=batch_size,
+        shuffle=True,
+        num_workers=num_workers,
+        collate_fn=dataset.pipeline.collate_fn,
+        drop_last=True,
+    )
+    throughputs = []
+    for _ in range(epochs):
+        start = time.perf_counter()
+        num_images = 0
+        for batch in dataloader:
+            num_images += len(batch["img"])
+        throughputs.append(num_images / (time.perf_counter() - start))
+    return throughputs
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dataset", help="Dataset to load", type=str, default="coco", choices=["voc", "coco"])
+    parser.add_argument("--data-root", help="Dataset root folder", type=str)
+    parser.add_argument("--model", help="Model whose data config is used", type=str, default="m")
+    parser.add_argument("--pack-path", help="Folder in which the packs are written", type=str, default="./nanodet_packs")
+    parser.add_argument("--batch-size", help="Batch size of the dataloader", type=int, default=32)
+    parser.add_argument("--num-workers", help="Number of dataloader workers", type=int, default=4)
+    parser.add_argument("--epochs", help="Number of timed epochs", type=int, default=3)
+    parser.add_argument("--batch-augment", help="Warp and augment the images of each batch at collate time",
+                        action="store_true")
+    args = parser.parse_args()
+
+    dataset = ExternalDataset(args.data_root, args.dataset)
+    nanodet = NanodetLearner(model_to_use=args.model, device="cpu")
+    data_cfg = dict(nanodet.cfg.data.train)
+    if args.batch_augment:
+        data_cfg["pipeline"] = dict(data_cfg["pipeline"], batch_augment="collate")
+
+    variants = [("source files", dict(data_cfg))]
+    for storage in ["encoded", "resized"]:
+        variants.append(("pack ({})".format(storage),
+                         dict(data_cfg, pack_path="{}/{}".format(args.pack_path, storage), pack_storage=storage)))
+
+    for name, cfg in variants:
+        print("==== Benchmarking {} ====".format(name))
+        start = time.perf_counter()
+        train_dataset = build_dataset(cfg, dataset, nanodet.cfg.class_names, "train", verbose=False)
+        print("Dataset construction (including a pack that is out of date): {:.2f}s".format(time.perf_counter() - start))
+        start = time.perf_counter()
+        build_dataset(cfg, dataset, nanodet.cfg.class_names, "train", verbose=False)
+        print("Dataset construction: {:.2f}s".format(time.perf_counter() - start))
+        throughputs = benchmark_epoch(train_dataset, args.batch_size, args.num_workers, args.epochs)
+        print("Epoch throughput: " + ", ".join("{:.1f} img/s".format(t) for t in throughputs))
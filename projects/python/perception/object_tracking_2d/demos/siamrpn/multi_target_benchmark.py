@@ -0,0 +1,83 @@
+# Copyright 2020-2023 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import time
+
+import cv2
+from gluoncv.model_zoo.siamrpn.siamrpn_tracker import SiamRPNTracker
+from opendr.engine.target import TrackingAnnotation
+from opendr.perception.object_tracking_2d import SiamRPNLearner
+
+
+def grid_boxes(frame, num_targets, size=80):
+    """Initial boxes of the targets, spread over the frame"""
+    height, width = frame.shape[:2]
+    cols = int(num_targets ** 0.5 + 0.999)
+    rows = (num_targets + cols - 1) // cols
+    return [TrackingAnnotation(left=int((i % cols + 0.5) * width / cols - size / 2),
+                               top=int((i // cols + 0.5) * height / rows - size / 2),
+                               width=size, height=size, name=0, id=i)
+            for i in range(num_targets)]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--device", help="Device to use (cpu, cuda)", type=str, default="cpu", choices=["cuda", "cpu"])
+    parser.add_argument("--num-targets", help="Numbers of targets to benchmark", type=int, nargs="+",
+                        default=[1, 2, 4, 8, 16])
+    parser.add_argument("--frames", help="Number of frames to track", type=int, default=30)
+
+    args = parser.parse_args()
+
+    learner = SiamRPNLearner(device=args.device)
+    learner.download(".", mode="pretrained")
+    learner.load("siamrpn_opendr")
+
+    learner.download(".", mode="video")
+    cap = cv2.VideoCapture("tc_Skiing_ce.mp4")
+    frames = []
+    while cap.isOpened() and len(frames) < args.frames + 1:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames.append(frame)
+
+    print("targets | single target trackers (ms/frame) | multi-target tracker (ms/frame) | ms/target")
+    for num_targets in args.num_targets:
+        init_boxes = grid_boxes(frames[0], num_targets)
+
+        # one tracker per target, as with SiamRPNLearner.infer. The trackers share the model, which only holds the
+        # template of the last initialized target, so their boxes are not meaningful, but their cost is the same
+        trackers = []
+        for box in init_boxes:
+            tracker = SiamRPNTracker(learner._model)
+            tracker.init(frames[0], [box.left, box.top, box.width, box.height], ctx=learner.ctx)
+            trackers.append(tracker)
+        start = time.time()
+        for frame in frames[1:]:
+            for tracker in trackers:
+                tracker.track(frame, ctx=learner.ctx)
+        single_time = (time.time() - start) / (len(frames) - 1)
+
+        multi_tracker = learner.multi_target_tracker()
+        for box in init_boxes:
+            multi_tracker.add(box.id, frames[0], box)
+        start = time.time()
+        for frame in frames[1:]:
+            multi_tracker.track(frame)
+        multi_time = (time.time() - start) / (len(frames) - 1)
+
+        print("{:7d} | {:34.1f} | {:31.1f} | {:9.1f}".format(num_targets, single_time * 1000, multi_time * 1000,
+                                                             multi_time * 1000 / num_targets))
@@ -0,0 +1,91 @@
+# Copyright 2020-2023 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import time
+from os.path import join
+
+import cv2
+import numpy as np
+import torch
+from tqdm import tqdm
+
+from opendr.perception.pose_estimation import LightweightOpenPoseLearner
+from opendr.perception.pose_estimation.lightweight_open_pose.algorithm.modules.keypoints import \
+    extract_keypoints, group_keypoints, extract_keypoints_batched, group_keypoints_vectorized
+from opendr.perception.pose_estimation.lightweight_open_pose.algorithm.val import normalize, pad_width
+
+
+def network_output(pose_estimator, img, upsample_ratio):
+    scale = pose_estimator.base_height / img.shape[0]
+    scaled_img = cv2.resize(img, (0, 0), fx=scale, fy=scale, interpolation=cv2.INTER_LINEAR)
+    scaled_img = normalize(scaled_img, pose_estimator.img_mean, pose_estimator.img_scale)
+    min_dims = [pose_estimator.base_height, max(scaled_img.shape[1], pose_estimator.base_height)]
+    padded_img, _ = pad_width(scaled_img, pose_estimator.stride, pose_estimator.pad_value, min_dims)
+    tensor_img = torch.from_numpy(padded_img).permute(2, 0, 1).unsqueeze(0).float().to(pose_estimator.device)
+    with torch.no_grad():
+        stages_output = pose_estimator.model(tensor_img)
+    heatmaps = np.transpose(stages_output[-2].squeeze().cpu().float().numpy(), (1, 2, 0))
+    heatmaps = cv2.resize(heatmaps, (0, 0), fx=upsample_ratio, fy=upsample_ratio, interpolation=cv2.INTER_CUBIC)
+    pafs = np.transpose(stages_output[-1].squeeze().cpu().float().numpy(), (1, 2, 0))
+    pafs = cv2.resize(pafs, (0, 0), fx=upsample_ratio, fy=upsample_ratio, interpolation=cv2.INTER_CUBIC)
+    return heatmaps, pafs
+
+
+def loop_postprocessing(heatmaps, pafs):
+    total_keypoints_num = 0
+    all_keypoints_by_type = []
+    for kpt_idx in range(18):
+        total_keypoints_num += extract_keypoints(heatmaps[:, :, kpt_idx], all_keypoints_by_type, total_keypoints_num)
+    return group_keypoints(all_keypoints_by_type, pafs)
+
+
+def vectorized_postprocessing(heatmaps, pafs):
+    all_keypoints_by_type, _ = extract_keypoints_batched(heatmaps, 18)
+    return group_keypoints_vectorized(all_keypoints_by_type, pafs)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--device", help="Device to use (cpu, cuda)", type=str, default="cpu")
+    parser.add_argument("--iterations", help="Number of timed post-processing runs", type=int, default=100)
+    parser.add_argument("--tile", help="Tile the image horizontally to increase the number of people", type=int,
+                        default=3)
+    args = parser.parse_args()
+
+    pose_estimator = LightweightOpenPoseLearner(device=args.device)
+    pose_estimator.download(path=".", verbose=True)
+    pose_estimator.load("openpose_default")
+    pose_estimator.model.eval()
+
+    pose_estimator.download(path=".", mode="test_data")
+    img = cv2.imread(join("temp", "dataset", "image", "000000000785.jpg"))
+    img = np.concatenate([img] * args.tile, axis=1)
+    heatmaps, pafs = network_output(pose_estimator, img, upsample_ratio=4)
+
+    # Both implementations must produce identical pose entries and keypoints
+    reference_entries, reference_keypoints = loop_postprocessing(heatmaps.copy(), pafs)
+    entries, keypoints = vectorized_postprocessing(heatmaps.copy(), pafs)
+    assert np.array_equal(reference_entries.reshape(-1, 20), entries.reshape(-1, 20))
+    assert np.array_equal(reference_keypoints.reshape(-1, 4), keypoints.reshape(-1, 4))
+    print("Detected poses: %d" % len(entries))
+
+    for name, postprocessing in [("loop", loop_postprocessing), ("vectorized", vectorized_postprocessing)]:
+        times = []
+        for _ in tqdm(range(args.iterations), desc=name):
+            heatmaps_copy = heatmaps.copy()
+            start_time = time.perf_counter()
+            postprocessing(heatmaps_copy, pafs)
+            times.append(time.perf_counter() - start_time)
+        print("%s post-processing: %.2f ms" % (name, 1000 * np.mean(times)))
@@ -19,7 +19,8 @@
 import torch
 import cv2
 from opendr.perception.pose_estimation.lightweight_open_pose.lightweight_open_pose_learner import Image, extract_keypoints,\
-    normalize, pad_width, group_keypoints, track_poses, FilteredPose, Pose, LightweightOpenPoseLearner
+    normalize, pad_width, group_keypoints, Pose, LightweightOpenPoseLearner
+from opendr.perception.pose_estimation.lightweight_open_pose.filtered_pose import FilteredPose
 import numpy as np
 
 
@@ -109,8 +110,7 @@ def infer_active(self, img, upsample_ratio=4, track=True, smooth=True):
         current_poses.append(pose)
 
     if track:
-        track_poses(self.previous_poses, current_poses, smooth=smooth)
-        self.previous_poses = current_poses
+        self.pose_tracker.update(current_poses, smooth=smooth)
 
     heatmaps = np.exp(heatmaps * 4)
     heatmaps = heatmaps / np.sum(heatmaps, -1, keepdims=True)
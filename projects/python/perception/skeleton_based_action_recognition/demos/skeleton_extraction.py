@@ -26,7 +26,6 @@ from opendr.engine.data import Image
 from opendr.engine.target import Pose
 import argparse
 from opendr.perception.pose_estimation.lightweight_open_pose.filtered_pose import FilteredPose
-from opendr.perception.pose_estimation.lightweight_open_pose.utilities import track_poses
 from opendr.perception.pose_estimation.lightweight_open_pose.algorithm.modules.keypoints import \
     extract_keypoints, group_keypoints
 from opendr.perception.pose_estimation.lightweight_open_pose.algorithm.val import normalize, pad_width
@@ -138,11 +137,10 @@ def infer3Dpose(pose_estimator, img, upsample_ratio=4, track=True, smooth=True):
         else:
             pose = Pose(pose_keypoints, pose_entries[n][18])
 
-        pose_estimator.previous_poses = current_poses
         current_poses.append(pose)
         current_kptscores.append(keypoints_scores)
     if track:
-        track_poses(pose_estimator.previous_poses, current_poses, smooth=smooth)
+        pose_estimator.pose_tracker.update(current_poses, smooth=smooth)
     return current_poses, current_kptscores
 
 
@@ -248,7 +246,7 @@ def data_gen(args, pose_estimator, out_path, benchmark, part):
         counter = 0
         poses_list = []
         kptscores_list = []
-        pose_estimator.previous_poses = []
+        pose_estimator.reset()
         for img in image_provider:
             poses, kptscores = infer3Dpose(pose_estimator, img)
             if len(poses) > 2:
@@ -0,0 +1,82 @@
+# Copyright 2020-2023 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+from opendr.engine.data import Image
+from opendr.engine.datasets import DatasetIterator, PrefetchDatasetIterator
+from opendr.engine.target import Category
+
+
+class ImageFolderDataset(DatasetIterator):
+    """Decodes the images of a folder, with an optional latency per image to emulate slow storage"""
+    def __init__(self, path, latency=0.0):
+        super().__init__()
+        self.path = path
+        self.latency = latency
+        self.files = sorted(os.listdir(path))
+
+    def __getitem__(self, idx):
+        if self.latency > 0:
+            time.sleep(self.latency)
+        return Image.open(os.path.join(self.path, self.files[idx])), Category(idx)
+
+    def __len__(self):
+        return len(self.files)
+
+
+def evaluate(dataset):
+    """Stand-in for the evaluation loop of a learner, which indexes the dataset serially"""
+    start = time.time()
+    checksum = 0
+    for i in range(len(dataset)):
+        image, target = dataset[i]
+        checksum += int(image.data.sum()) * (target.data + 1)
+    return len(dataset) / (time.time() - start), checksum
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", help="Number of images of the dataset", type=int, default=200)
+    parser.add_argument("--size", help="Height and width of the images", type=int, nargs=2, default=[720, 1280])
+    parser.add_argument("--latency", help="Latency of reading an image, in ms", type=float, default=10)
+    parser.add_argument("--num-workers", help="Numbers of workers to benchmark", type=int, nargs="+",
+                        default=[1, 2, 4])
+
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as path:
+        rng = np.random.RandomState(0)
+        for i in range(args.images):
+            # smooth images, so that their encoding and decoding cost is close to the one of real images
+            image = cv2.resize(rng.randint(0, 255, (args.size[0] // 16, args.size[1] // 16, 3), dtype=np.uint8),
+                               (args.size[1], args.size[0]))
+            cv2.imwrite(os.path.join(path, "%06d.png" % i), image)
+        dataset = ImageFolderDataset(path, args.latency / 1000)
+
+        throughput, reference = evaluate(dataset)
+        print("backend | workers | images/s | speedup | same results")
+        print("{:7s} | {:7d} | {:8.1f} | {:7.2f} | {}".format("serial", 0, throughput, 1.0, True))
+        for backend in ["thread", "process"]:
+            for num_workers in args.num_workers:
+                with PrefetchDatasetIterator(dataset, num_workers=num_workers, backend=backend) as prefetched:
+                    prefetch_throughput, checksum = evaluate(prefetched)
+                speedup = prefetch_throughput / throughput
+                print("{:7s} | {:7d} | {:8.1f} | {:7.2f} | {}".format(backend, num_workers, prefetch_throughput,
+                                                                      speedup, checksum == reference))
@@ -13,9 +13,13 @@
 # limitations under the License.
 
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import copy
+import multiprocessing as mp
 import os
 import numpy as np
-from opendr.engine.data import PointCloud
+from opendr.engine.data import Image, PointCloud
 
 
 class Dataset(ABC):
@@ -179,3 +183,190 @@ class PointCloudsDatasetIterator(DatasetIterator):
 
     def __len__(self):
         return len(self.files)
+
+
+# dataset of a prefetching worker process, set by the initializer of the process pool
+_worker_dataset = None
+
+
+class _SharedData:
+    """
+    Placeholder of an Image or PointCloud sent by a worker process, whose data is held in a shared memory block.
+    """
+    def __init__(self, shell, name, shape, dtype):
+        self.shell = shell
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+
+    @classmethod
+    def share(cls, value):
+        from multiprocessing import shared_memory
+
+        data = value._data
+        if not isinstance(data, np.ndarray) or data.nbytes == 0:
+            return value
+        block = shared_memory.SharedMemory(create=True, size=data.nbytes)
+        np.ndarray(data.shape, dtype=data.dtype, buffer=block.buf)[...] = data
+        block.close()
+        shell = copy.copy(value)
+        shell._data = None
+        return cls(shell, block.name, data.shape, data.dtype)
+
+    def restore(self):
+        from multiprocessing import shared_memory
+
+        block = shared_memory.SharedMemory(name=self.name)
+        try:
+            self.shell._data = np.ndarray(self.shape, dtype=self.dtype, buffer=block.buf).copy()
+        finally:
+            block.close()
+            block.unlink()
+        return self.shell
+
+
+def _map_sample(sample, function):
+    # samples are either a single Data object or a tuple of (Data, Target)
+    if isinstance(sample, tuple):
+        return tuple(function(value) for value in sample)
+    return function(sample)
+
+
+def _share(value):
+    if isinstance(value, (Image, PointCloud)):
+        return _SharedData.share(value)
+    return value
+
+
+def _restore(value):
+    if isinstance(value, _SharedData):
+        return value.restore()
+    return value
+
+
+def _init_worker(dataset):
+    global _worker_dataset
+    _worker_dataset = dataset
+
+
+def _load_shared(idx):
+    return _map_sample(_worker_dataset[idx], _share)
+
+
+def _release(future):
+    # frees the shared memory blocks of a prefetched sample which is not used
+    if not future.cancelled() and future.exception() is None:
+        _map_sample(future.result(), _restore)
+
+
+class PrefetchDatasetIterator(DatasetIterator):
+    """
+    PrefetchDatasetIterator loads the samples of the original DatasetIterator ahead of time in a pool of worker
+    processes or threads.
+
+    When the i-th sample is accessed, the samples i + 1, ..., i + prefetch are submitted to the workers, so that
+    sequential access, as in the evaluation loops of the learners, finds the next samples already loaded. Random
+    access is still supported, and returns the same samples as the original DatasetIterator.
+    With processes, the data of the Image and PointCloud objects of the samples is sent back through shared memory
+    instead of being pickled.
+
+    This class provides the following methods:
+    - __getitem__(i), a getter that allows for retrieving the i-th sample of the dataset, along with its annotation
+    - __len__(), which allows for getting the size of the dataset
+    - close(), which stops the workers
+    """
+    def __init__(self, original, num_workers=2, prefetch=None, backend="process"):
+        super().__init__()
+        self._executor = None
+        self._pending = OrderedDict()
+        if backend not in ("process", "thread"):
+            raise ValueError("backend should be one of 'process' or 'thread'")
+        self.original = original
+        self.num_workers = num_workers
+        self.prefetch = 2 * num_workers if prefetch is None else prefetch
+        self.backend = backend
+
+    def _submit(self, idx):
+        if self._executor is None:
+            if self.backend == "thread":
+                self._executor = ThreadPoolExecutor(max_workers=self.num_workers)
+            else:
+                from multiprocessing import resource_tracker
+
+                # the shared memory blocks are created by the workers and unlinked by this process, so that they
+                # have to be tracked by the same resource tracker, which the workers inherit if it is running
+                resource_tracker.ensure_running()
+                # forked workers inherit the original dataset, which does not need to be picklable then
+                method = "fork" if "fork" in mp.get_all_start_methods() else None
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.num_workers, mp_context=mp.get_context(method),
+                    initializer=_init_worker, initargs=(self.original,)
+                )
+        if self.backend == "thread":
+            return self._executor.submit(self.original.__getitem__, idx)
+        return self._executor.submit(_load_shared, idx)
+
+    def _discard(self, idx):
+        future = self._pending.pop(idx)
+        if not future.cancel() and self.backend == "process":
+            future.add_done_callback(_release)
+
+    def __getitem__(self, idx):
+        """
+        This method is used for loading the idx-th sample of a dataset along with its annotation.
+
+        :param idx: the index of the sample to load
+        :return: the idx-th sample and its annotation
+        :rtype: Tuple of (Data, Target)
+        """
+        size = len(self)
+        if self.num_workers <= 0 or not isinstance(idx, (int, np.integer)) or not -size <= idx < size:
+            return self.original[idx]
+        idx = int(idx) % size
+
+        future = self._pending.pop(idx, None)
+        window = range(idx + 1, min(idx + 1 + self.prefetch, size))
+        for pending_idx in [i for i in self._pending if i not in window]:
+            self._discard(pending_idx)
+        for next_idx in window:
+            if next_idx not in self._pending:
+                self._pending[next_idx] = self._submit(next_idx)
+
+        if future is None:
+            return self.original[idx]
+        sample = future.result()
+        if self.backend == "process":
+            sample = _map_sample(sample, _restore)
+        return sample
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def __len__(self):
+        """
+        This method returns the size of the dataset.
+
+        :return: the size of the dataset
+        :rtype: int
+        """
+        return len(self.original)
+
+    def close(self):
+        """
+        This method stops the workers, dropping the samples which are being prefetched.
+        """
+        for idx in list(self._pending):
+            self._discard(idx)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __del__(self):
+        self.close()
@@ -0,0 +1,82 @@
+# Copyright 2020-2023 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+import torch
+
+from opendr.engine.target import Category
+
+
+def place_model(model: torch.nn.Module, device) -> torch.nn.Module:
+    """Moves a model to a device, unless its parameters already reside there
+
+    Args:
+        model (torch.nn.Module): Model to place.
+        device (Union[str, torch.device]): Target device.
+
+    Returns:
+        torch.nn.Module: The placed model.
+    """
+    device = torch.device(device)
+    parameter = next(model.parameters(), None)
+    if parameter is not None and parameter.device.type == device.type and \
+            (device.index is None or parameter.device.index == device.index):
+        return model
+    return model.to(device)
+
+
+def stack_data(samples: Sequence, convert: Optional[Callable[[object], np.ndarray]] = None,
+               device=None) -> torch.Tensor:
+    """Stacks the data of a batch of samples into a single tensor
+
+    The arrays of the samples are stacked once in NumPy and wrapped with `torch.from_numpy`,
+    so that the batch is never copied through nested Python lists.
+
+    Args:
+        samples (Sequence): Samples, e.g. `engine.data.Image` or `engine.data.Timeseries` objects.
+        convert (Callable[[object], np.ndarray], optional): Function returning the array of a sample.
+            Defaults to the `data` attribute of the sample.
+        device (Union[str, torch.device], optional): Device to which the batch is transferred. Defaults to None.
+
+    Returns:
+        torch.Tensor: Batch of shape (len(samples), ...).
+    """
+    if convert is None:
+        arrays = [sample.data for sample in samples]
+    else:
+        arrays = [convert(sample) for sample in samples]
+    batch = torch.from_numpy(np.ascontiguousarray(np.stack(arrays)))
+    if device is not None:
+        batch = batch.to(device, non_blocking=True)
+    return batch
+
+
+def to_categories(logits: torch.Tensor) -> List[Category]:
+    """Converts a batch of classification logits to categories
+
+    The predictions and confidences of the whole batch are transferred to the host at once.
+
+    Args:
+        logits (torch.Tensor): Logits of shape (N, num_classes).
+
+    Returns:
+        List[Category]: Predicted class and its softmax confidence for each sample.
+    """
+    confidences, predictions = torch.softmax(logits.reshape(logits.shape[0], -1), dim=1).max(dim=1)
+    return [
+        Category(prediction, confidence=confidence)
+        for prediction, confidence in zip(predictions.tolist(), confidences.tolist())
+    ]
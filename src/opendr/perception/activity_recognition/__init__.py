@@ -3,6 +3,7 @@ from opendr.perception.activity_recognition.cox3d.cox3d_learner import CoX3DLear
 from opendr.perception.activity_recognition.continual_transformer_encoder.continual_transformer_encoder_learner import (
     CoTransEncLearner,
 )
+from opendr.perception.activity_recognition.continual_transformer_encoder.state_pool import CoTransEncStatePool
 
 from opendr.perception.activity_recognition.datasets.kinetics import (
     KineticsDataset,
@@ -13,6 +14,7 @@ __all__ = [
     "X3DLearner",
     "CoX3DLearner",
     "CoTransEncLearner",
+    "CoTransEncStatePool",
     "KineticsDataset",
     "CLASSES",
 ]
@@ -26,6 +26,7 @@ from collections import OrderedDict
 from opendr.engine.data import Timeseries, Vector
 from opendr.engine.datasets import Dataset
 from opendr.engine.target import Category
+from opendr.perception.activity_recognition.continual_transformer_encoder.state_pool import CoTransEncStatePool
 
 from logging import getLogger
 from typing import Any, Union, Dict
@@ -563,6 +564,19 @@ class CoTransEncLearner(Learner):
             )
         return result
 
+    def state_pool(self, max_streams: int = None) -> CoTransEncStatePool:
+        """Create a pool of continual inference states, which lets the learner serve many token streams.
+        All streams with a new token are stepped in a single forward pass of the PyTorch model.
+
+        Args:
+            max_streams (int, optional): Maximum number of streams in the pool. When it is exceeded, the least
+                recently stepped stream is evicted. If None, streams are only removed explicitly. Defaults to None.
+
+        Returns:
+            CoTransEncStatePool: Empty state pool.
+        """
+        return CoTransEncStatePool(self, max_streams=max_streams)
+
     def optimize(self, do_constant_folding=False):
         """Optimize model execution.
         This is accomplished by saving to the ONNX format and loading the optimized model.
@@ -0,0 +1,304 @@
+# Copyright 2020-2023 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import torch
+from collections import OrderedDict
+from logging import getLogger
+from pathlib import Path
+from typing import Any, Dict, Hashable, List, Optional, Union
+
+from opendr.engine.data import Vector
+from opendr.engine.target import Category
+
+logger = getLogger(__name__)
+
+
+def _flatten(state) -> List[Any]:
+    if isinstance(state, (tuple, list)):
+        return [leaf for s in state for leaf in _flatten(s)]
+    return [state]
+
+
+def _unflatten(leaves: List[Any], structure):
+    """Rebuild a nested state with the same structure as `structure` from its flattened leaves"""
+    leaves = iter(leaves)
+
+    def build(s):
+        if isinstance(s, (tuple, list)):
+            return type(s)(build(c) for c in s)
+        return next(leaves)
+
+    return build(structure)
+
+
+def _structure(state) -> Hashable:
+    """Nesting of a state with the number of dimensions of its tensors, which does not depend on the batch size"""
+    if isinstance(state, (tuple, list)):
+        return tuple(_structure(s) for s in state)
+    return state.dim() if isinstance(state, torch.Tensor) else None
+
+
+class CoTransEncStatePool:
+    def __init__(self, learner, max_streams: Optional[int] = None):
+        """Continual inference states of many input streams for a single CoTransEncLearner.
+
+        Each stream is identified by a hashable stream id and holds its own continual state, so that one learner
+        can serve any number of token streams. All streams that receive a new token in a `step` are advanced in a
+        single forward pass: the states of the streams are concatenated along the batch dimension, stepped with
+        the PyTorch model and split again.
+        The counters of the continual state (e.g. the position in the token sequence) are shared by the whole
+        batch, so streams are batched together when they have been stepped the same number of times since they
+        were started or reset.
+
+        Args:
+            learner (CoTransEncLearner): Learner whose model is used for the stepping.
+            max_streams (int, optional): Maximum number of streams held in the pool. When it is exceeded, the least
+                recently stepped stream is evicted. If None, streams are only removed explicitly. Defaults to None.
+        """
+        self.learner = learner
+        self.max_streams = max_streams
+        self._states = OrderedDict()
+        self._steps = {}
+        self._layouts = {}
+        self._probe_states = (None, None)
+
+    def __len__(self):
+        return len(self._states)
+
+    def __contains__(self, stream_id: Hashable):
+        return stream_id in self._states
+
+    @property
+    def stream_ids(self) -> List[Hashable]:
+        return list(self._states.keys())
+
+    def steps(self, stream_id: Hashable) -> int:
+        """Number of tokens a stream has been stepped with since it was started or reset
+
+        Args:
+            stream_id (Hashable): Id of the stream.
+
+        Returns:
+            int: Number of steps.
+        """
+        return self._steps.get(stream_id, 0)
+
+    def _layout(self, state) -> List[Optional[int]]:
+        """Find out along which dimension each leaf of a continual state is batched, or None if it is shared.
+        The structure of the state changes while the model warms up, so the layout is kept for each structure. It is
+        found by stepping zero tokens with batch sizes one and two until the structure is reached and comparing the
+        leaf shapes. Continual multi-head attention states hold num_heads rows per stream, so a batched leaf is
+        split and merged in blocks of leaf.shape[dim] // batch_size rows.
+        """
+        structure = _structure(state)
+        max_steps = 4 * self.learner._sequence_len
+        while structure not in self._layouts:
+            assert max_steps > 0, "The layout of the continual state could not be found"
+            max_steps -= 1
+            x = torch.zeros(2, self.learner._input_dims, device=self.learner.device)
+            state1, state2 = self._probe_states
+            with torch.no_grad():
+                _, state1 = self.learner.model._forward_step(x[:1], state1)
+                _, state2 = self.learner.model._forward_step(x, state2)
+            self._probe_states = (state1, state2)
+            self._layouts.setdefault(_structure(state1), [
+                next((d for d, (n1, n2) in enumerate(zip(l1.shape, l2.shape)) if n1 != n2), None)
+                if isinstance(l1, torch.Tensor) else None
+                for l1, l2 in zip(_flatten(state1), _flatten(state2))
+            ])
+        return self._layouts[structure]
+
+    def _group_key(self, stream_id: Hashable, state) -> Hashable:
+        # The counters of a state follow from its number of steps, which avoids reading them from the device
+        shapes = tuple(tuple(leaf.shape) if isinstance(leaf, torch.Tensor) else leaf for leaf in _flatten(state))
+        return self.steps(stream_id), shapes
+
+    def _merge(self, states: List[Any]):
+        if len(states) == 1 or states[0] is None:
+            return states[0]
+        flat = [_flatten(s) for s in states]
+        leaves = [
+            flat[0][i] if d is None else torch.cat([f[i] for f in flat], dim=d)
+            for i, d in enumerate(self._layout(states[0]))
+        ]
+        return _unflatten(leaves, states[0])
+
+    def _split(self, state, batch_size: int) -> List[Any]:
+        if batch_size == 1:
+            return [state]
+        layout = self._layout(state)
+        flat = _flatten(state)
+
+        def select(leaf, d, i):
+            if d is None:
+                return leaf
+            rows = leaf.shape[d] // batch_size
+            return leaf.narrow(d, i * rows, rows)
+
+        return [_unflatten([select(leaf, d, i) for leaf, d in zip(flat, layout)], state) for i in range(batch_size)]
+
+    def _to_category(self, r) -> Category:
+        if isinstance(r, torch.Tensor):
+            r = torch.nn.functional.softmax(r, dim=-1)
+            return Category(prediction=int(r.argmax(dim=0)), confidence=r)
+        # Streams which have seen fewer than "sequence_len" tokens output co.TensorPlaceholder values
+        return Category(prediction=-1, confidence=torch.zeros(self.learner._num_classes, dtype=torch.float))
+
+    def step(self, inputs: Dict[Hashable, Union[Vector, torch.Tensor]]) -> Dict[Hashable, Category]:
+        """Advance the streams which have a new token. Streams with an unknown id are started.
+
+        Args:
+            inputs (Dict[Hashable, Union[Vector, torch.Tensor]]): New token of each stream, keyed by stream id.
+                A token is a Vector or a torch.Tensor of shape (input_dims,).
+
+        Returns:
+            Dict[Hashable, Category]: Network output of each stream. Until a stream has seen "sequence_len" tokens,
+                its prediction is -1.
+        """
+        groups = OrderedDict()
+        for stream_id, x in inputs.items():
+            x = torch.as_tensor(x.data if isinstance(x, Vector) else x)
+            assert x.shape == (self.learner._input_dims,), \
+                f"Tokens must have shape ({self.learner._input_dims},), got {tuple(x.shape)} for stream {stream_id}"
+            state = self._states.get(stream_id)
+            group = groups.setdefault(self._group_key(stream_id, state), ([], [], []))
+            group[0].append(stream_id)
+            group[1].append(x)
+            group[2].append(state)
+
+        model = self.learner.model
+        model.eval()
+        results = {}
+        with torch.no_grad():
+            for stream_ids, xs, states in groups.values():
+                x = torch.stack(xs).to(device=self.learner.device, dtype=torch.float)
+                r, next_state = model._forward_step(x, self._merge(states))
+                for i, (stream_id, state) in enumerate(zip(stream_ids, self._split(next_state, len(stream_ids)))):
+                    self._states[stream_id] = state
+                    self._states.move_to_end(stream_id)
+                    self._steps[stream_id] = self._steps.get(stream_id, 0) + 1
+                    results[stream_id] = self._to_category(r[i] if isinstance(r, torch.Tensor) else r)
+
+        if self.max_streams is not None:
+            while len(self._states) > self.max_streams:
+                stream_id, _ = self._states.popitem(last=False)
+                self._steps.pop(stream_id, None)
+                logger.debug(f"Evicted the state of stream {stream_id}")
+
+        return {stream_id: results[stream_id] for stream_id in inputs.keys()}
+
+    def reset(self, stream_id: Optional[Hashable] = None):
+        """Reset the state of a stream, which then warms up again. If no stream id is given, all streams are reset.
+
+        Args:
+            stream_id (Hashable, optional): Id of the stream. Defaults to None.
+        """
+        if stream_id is None:
+            self._states = OrderedDict((s, None) for s in self._states.keys())
+            self._steps = {}
+        elif stream_id in self._states:
+            self._states[stream_id] = None
+            self._steps.pop(stream_id, None)
+
+    def remove(self, stream_id: Hashable):
+        """Remove a stream from the pool
+
+        Args:
+            stream_id (Hashable): Id of the stream.
+        """
+        self._states.pop(stream_id, None)
+        self._steps.pop(stream_id, None)
+
+    def _metadata(self) -> Dict[str, Any]:
+        return {
+            "num_layers": self.learner._num_layers,
+            "input_dims": self.learner._input_dims,
+            "hidden_dims": self.learner._hidden_dims,
+            "sequence_len": self.learner._sequence_len,
+            "num_heads": self.learner._num_heads,
+        }
+
+    def state_dict(self, stream_ids: Optional[List[Hashable]] = None) -> Dict[str, Any]:
+        """Snapshot of the stream states, with all tensors on the CPU
+
+        Args:
+            stream_ids (List[Hashable], optional): Streams to include. If None, all streams are included.
+                Defaults to None.
+
+        Returns:
+            Dict[str, Any]: Snapshot, which can be restored with `load_state_dict`.
+        """
+        stream_ids = self.stream_ids if stream_ids is None else stream_ids
+
+        def to_cpu(state):
+            if state is None:
+                return None
+            return _unflatten([
+                leaf.cpu() if isinstance(leaf, torch.Tensor) else leaf for leaf in _flatten(state)
+            ], state)
+
+        return {
+            "metadata": self._metadata(),
+            "streams": OrderedDict(
+                (s, {"state": to_cpu(self._states[s]), "steps": self.steps(s)}) for s in stream_ids
+            ),
+        }
+
+    def load_state_dict(self, state_dict: Dict[str, Any]):
+        """Restore stream states from a snapshot. Streams which are already in the pool are overwritten.
+
+        Args:
+            state_dict (Dict[str, Any]): Snapshot created with `state_dict`.
+        """
+        metadata = state_dict["metadata"]
+        assert metadata == self._metadata(), (
+            f"The snapshot was created for a model with parameters {metadata}, "
+            f"which do not match the parameters of the learner {self._metadata()}"
+        )
+        for stream_id, stream in state_dict["streams"].items():
+            state = stream["state"]
+            if state is not None:
+                state = _unflatten([
+                    leaf.to(self.learner.device) if isinstance(leaf, torch.Tensor) else leaf
+                    for leaf in _flatten(state)
+                ], state)
+            self._states[stream_id] = state
+            self._states.move_to_end(stream_id)
+            self._steps[stream_id] = stream["steps"]
+
+    def save(self, path: Union[str, Path], stream_ids: Optional[List[Hashable]] = None):
+        """Save a snapshot of the stream states to a file
+
+        Args:
+            path (Union[str, Path]): Path of the snapshot file.
+            stream_ids (List[Hashable], optional): Streams to include. If None, all streams are included.
+                Defaults to None.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        logger.info(f"Saving the states of {len(stream_ids or self._states)} streams to {str(path)}")
+        torch.save(self.state_dict(stream_ids), path)
+
+    def load(self, path: Union[str, Path]):
+        """Load a snapshot of the stream states from a file
+
+        Args:
+            path (Union[str, Path]): Path of the snapshot file.
+
+        Returns:
+            self
+        """
+        logger.info(f"Loading stream states from {str(path)}")
+        self.load_state_dict(torch.load(path, map_location="cpu"))
+        return self
@@ -22,9 +22,11 @@ from opendr.engine.target import Category
 from opendr.perception.activity_recognition.cox3d.algorithm.x3d import CoX3D
 from opendr.perception.activity_recognition.utils.lightning import _LightningModuleWithCrossEntropy
 from opendr.perception.activity_recognition.x3d.x3d_learner import X3DLearner
+from opendr.perception.activity_recognition.utils.streaming import FramePreprocessor
 from pathlib import Path
 from logging import getLogger
-from typing import Union, List
+from typing import Union, List, Optional
+import numpy as np
 import onnxruntime as ort
 
 
@@ -107,6 +109,8 @@ class CoX3DLearner(X3DLearner):
         )
         self.temporal_window_size = temporal_window_size
         self._ort_state = None
+        self._ort_initial_state = None
+        self._frame_count = 0
 
     def init_model(self) -> CoX3D:
         """Initialise model with random parameters
@@ -162,7 +166,7 @@ class CoX3DLearner(X3DLearner):
         if type(batch) is data.Image:
             batch = [batch]
         if type(batch) is list:
-            batch = torch.stack([torch.tensor(v.data) for v in batch])
+            batch = torch.stack([torch.as_tensor(v.data) for v in batch])
 
         batch = batch.to(device=self.device, dtype=torch.float)
 
@@ -181,6 +185,38 @@ class CoX3DLearner(X3DLearner):
             results = [Category(prediction=int(r.argmax(dim=0)), confidence=F.softmax(r, dim=-1)) for r in results]
         return results
 
+    def infer_online(self, frame: Union[data.Image, np.ndarray, torch.Tensor], temporal_stride: int = 1) -> Optional[Category]:
+        """Run inference on a stream of frames, one frame at a time.
+        Each frame is resized and standardized once on the device and the continual model is stepped with it,
+        so that no clip is ever assembled. Call `reset` before starting a new stream.
+
+        Args:
+            frame (Union[data.Image, np.ndarray, torch.Tensor]): RGB frame of shape (3, H, W) with values in [0, 255].
+            temporal_stride (int, optional): Number of frames between returned predictions.
+                The model is stepped with every frame regardless. Defaults to 1.
+
+        Returns:
+            Optional[Category]: Prediction for the current frame, or None during the initial warm-up of the model
+                and for frames in-between predictions.
+        """
+        if self._frame_preprocess is None:
+            self._frame_preprocess = FramePreprocessor(self.model_hparams["image_size"], self.device)
+
+        with torch.no_grad():
+            results = self.infer(self._frame_preprocess(frame).unsqueeze(0))
+        self._frame_count += 1
+        if results is None or (self._frame_count - 1) % temporal_stride != 0:
+            return None
+        return results[0]
+
+    def reset(self):
+        """Reset the state of online inference, clearing the internal state of the continual model"""
+        self._frame_count = 0
+        if self._ort_session is None:
+            self.model.clean_state()
+        elif self._ort_initial_state is not None:
+            self._ort_state = {k: v.copy() for k, v in self._ort_initial_state.items()}
+
     def optimize(self, do_constant_folding=False):
         """Optimize model execution.
         This is accomplished by saving to the ONNX format and loading the optimized model.
@@ -254,7 +290,8 @@ class CoX3DLearner(X3DLearner):
 
         logger.info(f"Loading ONNX state from {str(state_path)}")
         with open(state_path, "rb") as f:
-            self._ort_state = pickle.load(f)
+            self._ort_initial_state = pickle.load(f)
+        self._ort_state = {k: v.copy() for k, v in self._ort_initial_state.items()}
 
     def _load_model_weights(self, weights_path: Union[str, Path]):
         """Load pretrained model weights
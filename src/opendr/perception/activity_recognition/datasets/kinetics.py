@@ -26,6 +26,7 @@ from functools import partial
 from typing import List, Optional, Tuple, Union
 from joblib import Memory
 from opendr.perception.activity_recognition.datasets.utils import decoder
+from opendr.perception.activity_recognition.datasets.utils.frame_store import FrameStore, build_frame_store
 from opendr.perception.activity_recognition.datasets.utils.transforms import (
     standard_video_transforms,
 )
@@ -74,7 +75,8 @@ class KineticsDataset(ExternalDataset, DatasetIterator, torch.utils.data.Dataset
         video_transform=None,
         use_caching=False,
         decoder_backend="pyav",
-        spatial_pixels=224
+        spatial_pixels=224,
+        frame_store: Union[str, Path] = None,
     ):
         """
         Kinetics dataset
@@ -95,6 +97,10 @@ class KineticsDataset(ExternalDataset, DatasetIterator, torch.utils.data.Dataset
             use_caching (bool): Cache long-running operations. Defaults to False.
             decoder_backend (str): Name of library to use for video decoding
                 (Options are ["pyav", "torchvision"]). Defaults to "pyav".
+            spatial_pixels (int): Spatial size of the clips produced by the standard video transform. Defaults to 224.
+            frame_store (Union[str, Path], optional): Directory of a frame store created with
+                `KineticsDataset.preprocess` for this split. If given, clips are sliced from the pre-decoded frames
+                instead of decoding the videos, which are then not needed. Defaults to None.
         """
         ExternalDataset.__init__(self, path=str(path), dataset_type="kinetics")
         DatasetIterator.__init__(self)
@@ -127,6 +133,15 @@ class KineticsDataset(ExternalDataset, DatasetIterator, torch.utils.data.Dataset
                 train_transform if self.split == "train" else eval_transform
             )
 
+        if frame_store is not None:
+            self._frame_store = FrameStore(frame_store)
+            self.labels = self._frame_store.labels
+            self.file_paths = self._frame_store.file_paths
+            self.classes = self._frame_store.classes
+            self.target_fps = self._frame_store.target_fps
+            return
+        self._frame_store = None
+
         validate_splits = (
             Memory(Path(os.getcwd()) / ".cache", verbose=1).cache(_validate_splits)
             if use_caching
@@ -159,6 +174,9 @@ class KineticsDataset(ExternalDataset, DatasetIterator, torch.utils.data.Dataset
             video (Tensor[T, H, W, C]): the `T` video frames
             label (int): class of the video clip
         """
+        if self._frame_store is not None:
+            return self._get_stored_clip(idx)
+
         video_container = None
         frames = None
         for _ in range(self.num_retries):
@@ -218,6 +236,22 @@ class KineticsDataset(ExternalDataset, DatasetIterator, torch.utils.data.Dataset
 
         return sample
 
+    def _get_stored_clip(self, idx):
+        video = torch.from_numpy(
+            self._frame_store.clip(
+                idx,
+                self.frames_per_clip,
+                self.temporal_downsampling,
+                random_start=self.split == "train",
+            )
+        )
+        label = self.labels[idx]
+
+        if self.video_transform is not None:
+            video = self.video_transform(video)
+
+        return video, label
+
     def __len__(self):
         """
         This method returns the size of the dataset.
@@ -227,6 +261,43 @@ class KineticsDataset(ExternalDataset, DatasetIterator, torch.utils.data.Dataset
         """
         return len(self.file_paths)
 
+    @staticmethod
+    def preprocess(
+        path: Union[str, Path],
+        store_path: Union[str, Path],
+        split="train",
+        target_fps=30,
+        short_side=256,
+        chunk_bytes=2 ** 30,
+        num_workers=0,
+    ):
+        """Decode every video of a split once into a chunked, memory-mapped frame store.
+        The store can then be passed as `frame_store` to the constructor. Videos which fail to decode are recorded
+        in the index of the store and excluded from it.
+
+        Args:
+            path (Union[str, Path]): path directory of the Kinetics dataset folder, containing subfolders "data" and "splits"
+            store_path (Union[str, Path]): Directory in which to store the decoded frames.
+            split (str, optional): Which split to use (Options are ["train", "val", "test"]). Defaults to "train".
+            target_fps (int, optional): Frame rate to which videos are resampled. Defaults to 30.
+            short_side (int, optional): Size of the shorter side of the stored frames. Defaults to 256.
+            chunk_bytes (int, optional): Maximum size of each chunk file in bytes. Defaults to 1 GiB.
+            num_workers (int, optional): Number of decoding processes. Defaults to 0.
+        """
+        if split == "val":
+            split = "validate"
+        labels, file_paths, _, _, classes, _, _ = _validate_splits(Path(path) / "data", Path(path) / "splits", split)
+        build_frame_store(
+            store_path,
+            file_paths,
+            labels,
+            classes,
+            target_fps=target_fps,
+            short_side=short_side,
+            chunk_bytes=chunk_bytes,
+            num_workers=num_workers,
+        )
+
     @staticmethod
     def download_mini(path: Union[str, Path]):
         """Download mini version of dataset: One video of each class in Kinetics400
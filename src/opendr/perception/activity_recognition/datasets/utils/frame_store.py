@@ -0,0 +1,213 @@
+# Copyright 2020-2023 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import random
+import numpy as np
+from multiprocessing import Pool
+from pathlib import Path
+from logging import getLogger
+from tqdm import tqdm
+from typing import List, Sequence, Union
+
+logger = getLogger(__name__)
+
+_INDEX_NAME = "index.json"
+_CHUNK_NAME = "frames_{:05d}.bin"
+
+
+def _decode_video(args):
+    """Decode a whole video at target_fps, resizing its frames so that their shorter side is short_side.
+
+    Returns:
+        Tuple of the video path and either a (T, H, W, C) uint8 array or the error message if decoding failed.
+    """
+    path, target_fps, short_side = args
+    try:
+        import av
+
+        with av.open(str(path)) as container:
+            stream = container.streams.video[0]
+            stream.thread_type = "AUTO"
+            fps = float(stream.average_rate or target_fps)
+            width, height = stream.codec_context.width, stream.codec_context.height
+            scale = short_side / min(width, height)
+            width, height = int(round(width * scale / 2)) * 2, int(round(height * scale / 2)) * 2
+
+            frames = []
+            next_time = None
+            for i, frame in enumerate(container.decode(stream)):
+                time = frame.time if frame.time is not None else i / fps
+                if next_time is None:
+                    next_time = time
+                # Every frame is repeated for each target timestamp it reaches, which resamples the video to target_fps
+                repeats = 0
+                while next_time <= time + 1e-6:
+                    repeats += 1
+                    next_time += 1 / target_fps
+                if repeats:
+                    image = frame.to_ndarray(width=width, height=height, format="rgb24")
+                    frames.extend([image] * repeats)
+        if not frames:
+            return path, "no frames were decoded"
+        return path, np.stack(frames)
+    except Exception as e:
+        return path, f"{type(e).__name__}: {e}"
+
+
+def build_frame_store(
+    store_path: Union[str, Path],
+    file_paths: Sequence[str],
+    labels: Sequence[int],
+    classes: List[str],
+    target_fps: int = 30,
+    short_side: int = 256,
+    chunk_bytes: int = 2 ** 30,
+    num_workers: int = 0,
+):
+    """Decode each video once into a chunked uint8 frame store with an index.
+
+    Frames of consecutive videos are appended to raw chunk files of at most `chunk_bytes` bytes (a single video
+    larger than that gets its own chunk). The index records the chunk, offset and shape of every video, as well
+    as the videos that failed to decode, so that they are skipped instead of retried on every epoch.
+
+    Args:
+        store_path (Union[str, Path]): Directory in which the store is written.
+        file_paths (Sequence[str]): Paths of the videos.
+        labels (Sequence[int]): Label of each video.
+        classes (List[str]): Names of the classes.
+        target_fps (int, optional): Frame rate to which videos are resampled. Defaults to 30.
+        short_side (int, optional): Size of the shorter side of the stored frames. Defaults to 256.
+        chunk_bytes (int, optional): Maximum size of a chunk file in bytes. Defaults to 1 GiB.
+        num_workers (int, optional): Number of decoding processes. If 0, videos are decoded in the main process.
+            Defaults to 0.
+    """
+    store_path = Path(store_path)
+    store_path.mkdir(parents=True, exist_ok=True)
+
+    index = {
+        "target_fps": target_fps,
+        "short_side": short_side,
+        "classes": list(classes),
+        "videos": [],
+        "failures": {},
+    }
+    label_of = dict(zip(file_paths, labels))
+    jobs = [(p, target_fps, short_side) for p in file_paths]
+
+    chunk, offset, chunk_file = -1, 0, None
+    pool = Pool(num_workers) if num_workers > 0 else None
+    try:
+        results = pool.imap(_decode_video, jobs) if pool else map(_decode_video, jobs)
+        for path, frames in tqdm(results, total=len(jobs), desc="Decoding videos"):
+            if isinstance(frames, str):
+                logger.info(f"Failed to decode {path}: {frames}")
+                index["failures"][str(path)] = frames
+                continue
+            if chunk_file is None or (offset > 0 and offset + frames.nbytes > chunk_bytes):
+                if chunk_file is not None:
+                    chunk_file.close()
+                chunk, offset = chunk + 1, 0
+                chunk_file = open(store_path / _CHUNK_NAME.format(chunk), "wb")
+            chunk_file.write(np.ascontiguousarray(frames).tobytes())
+            index["videos"].append({
+                "path": str(path),
+                "label": int(label_of[path]),
+                "chunk": chunk,
+                "offset": offset,
+                "shape": list(frames.shape),
+            })
+            offset += frames.nbytes
+    finally:
+        if chunk_file is not None:
+            chunk_file.close()
+        if pool is not None:
+            pool.close()
+
+    with open(store_path / _INDEX_NAME, "w") as f:
+        json.dump(index, f)
+    logger.info(
+        f"Stored {len(index['videos'])} videos in {chunk + 1} chunks, {len(index['failures'])} videos failed to decode"
+    )
+    return index
+
+
+class FrameStore:
+    def __init__(self, store_path: Union[str, Path]):
+        """Read access to a frame store written by `build_frame_store`.
+        The chunks are memory-mapped lazily, so that the store can be shared by dataloader workers.
+
+        Args:
+            store_path (Union[str, Path]): Directory of the store.
+        """
+        self.store_path = Path(store_path)
+        with open(self.store_path / _INDEX_NAME, "r") as f:
+            index = json.load(f)
+        self.target_fps = index["target_fps"]
+        self.classes = index["classes"]
+        self.failures = index["failures"]
+        self.videos = index["videos"]
+        self.labels = [v["label"] for v in self.videos]
+        self.file_paths = [v["path"] for v in self.videos]
+        self._chunks = {}
+
+    def __len__(self):
+        return len(self.videos)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_chunks"] = {}
+        return state
+
+    def _chunk(self, chunk: int) -> np.memmap:
+        if chunk not in self._chunks:
+            # Copy-on-write mapping, so that views are writable without ever modifying the store
+            self._chunks[chunk] = np.memmap(self.store_path / _CHUNK_NAME.format(chunk), dtype=np.uint8, mode="c")
+        return self._chunks[chunk]
+
+    def video(self, idx: int) -> np.ndarray:
+        """Get all frames of a video as a view of the store
+
+        Args:
+            idx (int): Index of the video.
+
+        Returns:
+            np.ndarray: Frames of shape (T, H, W, C).
+        """
+        video = self.videos[idx]
+        shape = video["shape"]
+        return self._chunk(video["chunk"])[video["offset"]:video["offset"] + int(np.prod(shape))].reshape(shape)
+
+    def clip(self, idx: int, num_frames: int, sampling_rate: int = 1, random_start=True) -> np.ndarray:
+        """Sample a clip of a video. Unless the video is shorter than the clip, the clip is a view of the store.
+
+        Args:
+            idx (int): Index of the video.
+            num_frames (int): Number of frames in the clip.
+            sampling_rate (int, optional): Interval between sampled frames. Defaults to 1.
+            random_start (bool, optional): Whether the clip starts at a random frame or is centered in the video.
+                Defaults to True.
+
+        Returns:
+            np.ndarray: Frames of shape (num_frames, H, W, C).
+        """
+        video = self.video(idx)
+        span = num_frames * sampling_rate
+        delta = video.shape[0] - span
+        if delta < 0:
+            # Repeat the last frame to fill the clip
+            index = np.minimum(np.arange(0, span, sampling_rate), video.shape[0] - 1)
+            return video[index]
+        start = random.randint(0, delta) if random_start else delta // 2
+        return video[start:start + span:sampling_rate]
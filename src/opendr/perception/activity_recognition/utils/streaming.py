@@ -0,0 +1,112 @@
+# Copyright 2020-2023 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from opendr.engine.data import Image
+from typing import Union
+
+# Kinetics statistics used by the pretrained X3D models
+_MEAN = (0.45, 0.45, 0.45)
+_STD = (0.225, 0.225, 0.225)
+
+
+class FramePreprocessor:
+    def __init__(self, image_size: int, device="cuda", mean=_MEAN, std=_STD):
+        """Resizes and standardizes single frames on the inference device.
+
+        Args:
+            image_size (int): Size of the shorter side of the frames after resizing.
+            device (str, optional): Device on which frames are processed. Defaults to "cuda".
+            mean (tuple, optional): Per-channel mean used for standardization. Defaults to Kinetics mean.
+            std (tuple, optional): Per-channel std used for standardization. Defaults to Kinetics std.
+        """
+        self.image_size = image_size
+        self.device = device
+        self.mean = torch.tensor(mean, device=device).view(3, 1, 1)
+        self.std = torch.tensor(std, device=device).view(3, 1, 1)
+
+    def __call__(self, frame: Union[Image, np.ndarray, torch.Tensor]) -> torch.Tensor:
+        """Preprocess a frame
+
+        Args:
+            frame (Union[Image, np.ndarray, torch.Tensor]): RGB frame of shape (3, H, W) with values in [0, 255].
+
+        Returns:
+            torch.Tensor: Standardized frame of shape (3, H', W'), where the shorter side equals `image_size`.
+        """
+        if isinstance(frame, Image):
+            frame = frame.data
+        if isinstance(frame, np.ndarray):
+            frame = torch.from_numpy(np.ascontiguousarray(frame))
+        frame = frame.to(device=self.device, non_blocking=True).float()
+
+        _, height, width = frame.shape
+        if height > width:
+            size = (int(height * self.image_size / width), self.image_size)
+        else:
+            size = (self.image_size, int(width * self.image_size / height))
+        if size != (height, width):
+            mode = "area" if size[0] < height else "bilinear"
+            frame = F.interpolate(
+                frame.unsqueeze(0), size=size, mode=mode, **({"align_corners": False} if mode == "bilinear" else {})
+            )[0]
+        return (frame / 255.0 - self.mean) / self.std
+
+
+class FrameRingBuffer:
+    def __init__(self, num_frames: int, device="cuda"):
+        """Preallocated device-side buffer holding the last `num_frames` frames of a stream.
+
+        Every frame is written twice, at slots i and i + num_frames of a buffer of length 2 * num_frames,
+        so that the frames are always available in chronological order as a view of the buffer.
+
+        Args:
+            num_frames (int): Number of frames in a clip.
+            device (str, optional): Device on which the buffer is allocated. Defaults to "cuda".
+        """
+        self.num_frames = num_frames
+        self.device = device
+        self.reset()
+
+    def reset(self):
+        self._buffer = None
+        self.count = 0
+
+    def push(self, frame: torch.Tensor):
+        """Add a frame to the buffer. The first frame of a stream fills the whole clip.
+
+        Args:
+            frame (torch.Tensor): Frame of shape (C, H, W).
+        """
+        frame = frame.to(self.device)
+        if self._buffer is None or self._buffer.shape[2:] != frame.shape[1:]:
+            self._buffer = frame.unsqueeze(1).repeat(1, 2 * self.num_frames, 1, 1)
+            self.count = 0
+        else:
+            index = self.count % self.num_frames
+            self._buffer[:, index] = frame
+            self._buffer[:, index + self.num_frames] = frame
+        self.count += 1
+
+    def clip(self) -> torch.Tensor:
+        """Get the last `num_frames` frames in chronological order without copying them
+
+        Returns:
+            torch.Tensor: Clip of shape (C, T, H, W).
+        """
+        assert self._buffer is not None, "No frames have been added to the buffer."
+        start = self.count % self.num_frames
+        return self._buffer[:, start:start + self.num_frames]
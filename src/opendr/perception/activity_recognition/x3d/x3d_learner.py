@@ -22,16 +22,18 @@ from opendr.engine.learners import Learner
 from opendr.engine.helper.io import bump_version
 from torch import onnx
 import onnxruntime as ort
-from opendr.engine.data import Video
+from opendr.engine.data import Video, Image
 from opendr.engine.datasets import Dataset
 from opendr.engine.target import Category
 
 from opendr.perception.activity_recognition.x3d.algorithm.x3d import X3D
+from opendr.perception.activity_recognition.utils.streaming import FramePreprocessor, FrameRingBuffer
 import pytorch_lightning as pl
 
 from urllib.request import urlretrieve
 from logging import getLogger
-from typing import Any, Iterable, Union, Dict, List
+from typing import Any, Iterable, Union, Dict, List, Optional
+import numpy as np
 
 logger = getLogger(__name__)
 
@@ -116,6 +118,8 @@ class X3DLearner(Learner):
         self.num_classes = num_classes
         self.loss = loss
         self._ort_session = None
+        self._frame_preprocess = None
+        self._frame_buffer = None
         torch.manual_seed(self.seed)
 
         self._load_model_hparams(self.backbone)
@@ -327,7 +331,9 @@ class X3DLearner(Learner):
                 assert filename.is_file(), f"Something wen't wrong when downloading {str(filename)}"
 
     def reset(self):
-        pass
+        """Reset the state of online inference"""
+        if self._frame_buffer is not None:
+            self._frame_buffer.reset()
 
     def fit(
         self,
@@ -472,7 +478,7 @@ class X3DLearner(Learner):
         if type(batch) is Video:
             batch = [batch]
         if type(batch) is list:
-            batch = torch.stack([torch.tensor(v.data) for v in batch])
+            batch = torch.stack([torch.as_tensor(v.data) for v in batch])
 
         batch = batch.to(device=self.device, dtype=torch.float)
         if self._ort_session is not None:
@@ -483,6 +489,29 @@ class X3DLearner(Learner):
         results = [Category(prediction=int(r.argmax(dim=0)), confidence=r) for r in results]
         return results
 
+    def infer_online(self, frame: Union[Image, np.ndarray, torch.Tensor], temporal_stride: int = 1) -> Optional[Category]:
+        """Run inference on a stream of frames, one frame at a time.
+        Each frame is resized and standardized once on the device and added to a preallocated ring buffer holding the
+        last `frames_per_clip` frames, on which the model is run every `temporal_stride` frames.
+        The first frame of a stream fills the whole clip. Call `reset` before starting a new stream.
+
+        Args:
+            frame (Union[Image, np.ndarray, torch.Tensor]): RGB frame of shape (3, H, W) with values in [0, 255].
+            temporal_stride (int, optional): Number of frames between consecutive predictions. Defaults to 1.
+
+        Returns:
+            Optional[Category]: Prediction for the last clip, or None if no prediction is made for this frame.
+        """
+        if self._frame_buffer is None:
+            self._frame_preprocess = FramePreprocessor(self.model_hparams["image_size"], self.device)
+            self._frame_buffer = FrameRingBuffer(self.model_hparams["frames_per_clip"], self.device)
+        self._frame_buffer.push(self._frame_preprocess(frame))
+
+        if (self._frame_buffer.count - 1) % temporal_stride != 0:
+            return None
+        with torch.no_grad():
+            return self.infer(self._frame_buffer.clip().unsqueeze(0))[0]
+
     def optimize(self, do_constant_folding=False):
         """Optimize model execution.
         This is accomplished by saving to the ONNX format and loading the optimized model.
@@ -14,11 +14,12 @@
 
 from . import trainers
 from . import learner
-from .learner import CompressiveLearner, get_builtin_backbones
+from .learner import CompressiveLearner, FusedMultilinearTransform, get_builtin_backbones
 from . import backbones
 
 __all__ = ['trainers',
            'learner',
            'CompressiveLearner',
+           'FusedMultilinearTransform',
            'get_builtin_backbones',
            'backbones']
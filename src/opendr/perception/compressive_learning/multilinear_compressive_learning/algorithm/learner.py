@@ -13,6 +13,7 @@
 # limitations under the License.
 
 from . import backbones
+import numpy as np
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
@@ -81,6 +82,57 @@ class MultilinearMapping(nn.Module):
         return y
 
 
+class FusedMultilinearTransform(nn.Module):
+    def __init__(self, synthesis_module, sensing_module=None):
+        """
+        Inference-only transform that applies the synthesis module, optionally preceded by the sensing module,
+        to a batch with a single einsum. Since the mode-n products of different modes commute, the sensing and
+        synthesis matrices of each mode can be precomposed into a single matrix. This is done when it requires
+        fewer operations than compressing the tensor with all the sensing matrices and expanding it with all the
+        synthesis matrices, which is the case when the compressed shape is close to the input shape.
+        """
+        super(FusedMultilinearTransform, self).__init__()
+
+        # subscripts of the input, compressed and output dimension of each mode (channel, row, col)
+        subscripts = [('c', 'k', 'C'), ('h', 'i', 'H'), ('w', 'j', 'W')]
+        modes = []
+        for (src, mid, dst), name in zip(subscripts, ['W1', 'W2', 'W3']):
+            W_synth = getattr(synthesis_module, name)
+            if W_synth is not None:
+                W_sense = getattr(sensing_module, name) if sensing_module is not None else None
+                modes.append((src, mid, dst, W_synth.detach(), None if W_sense is None else W_sense.detach()))
+
+        if sensing_module is None:
+            operands = [(dst + src, W_synth) for src, _, dst, W_synth, _ in modes]
+        else:
+            # number of multiplications per sample of the two alternatives
+            size = float(np.prod([W_synth.shape[0] for _, _, _, W_synth, _ in modes]))
+            composed_cost = size * sum(W_synth.shape[0] for _, _, _, W_synth, _ in modes)
+            factorized_cost, compressed_size = 0., size
+            for _, _, _, W_synth, _ in modes:
+                factorized_cost += compressed_size * W_synth.shape[1]
+                compressed_size = compressed_size / W_synth.shape[0] * W_synth.shape[1]
+            for _, _, _, W_synth, _ in modes:
+                factorized_cost += compressed_size * W_synth.shape[0]
+                compressed_size = compressed_size / W_synth.shape[1] * W_synth.shape[0]
+
+            if composed_cost <= factorized_cost:
+                operands = [(dst + src, torch.matmul(W_synth, W_sense)) for src, _, dst, W_synth, W_sense in modes]
+            else:
+                operands = [(mid + src, W_sense) for src, mid, _, _, W_sense in modes] +\
+                    [(dst + mid, W_synth) for _, mid, dst, W_synth, _ in modes]
+
+        mapped = [src for src, _, _, _, _ in modes]
+        self.equation = 'bchw,' + ','.join(sub for sub, _ in operands) + '->b' +\
+            ''.join(dst if src in mapped else src for src, _, dst in subscripts)
+        for i, (_, W) in enumerate(operands):
+            self.register_buffer('W{}'.format(i), W)
+        self.n_operands = len(operands)
+
+    def forward(self, x):
+        return torch.einsum(self.equation, x, *[getattr(self, 'W{}'.format(i)) for i in range(self.n_operands)])
+
+
 class SenseSynth(nn.Module):
     def __init__(self, input_shape, compressed_shape):
         super(SenseSynth, self).__init__()
@@ -13,7 +13,6 @@
 # limitations under the License.
 
 # general imports
-import numpy as np
 import torch
 from torch.utils.data import DataLoader
 import tempfile
@@ -32,11 +31,13 @@ from opendr.engine.data import Image
 from opendr.engine.datasets import DatasetIterator
 from opendr.engine.target import Category
 from opendr.engine.constants import OPENDR_SERVER_URL
+from opendr.engine.helper.inference import place_model, stack_data, to_categories
 
 # OpenDR multilinear_compressive_learning imports
 from opendr.perception.compressive_learning.multilinear_compressive_learning.algorithm import (
     trainers,
     CompressiveLearner,
+    FusedMultilinearTransform,
     get_builtin_backbones
 )
 from opendr.perception.compressive_learning.multilinear_compressive_learning.algorithm.data import DataWrapper
@@ -125,6 +126,7 @@ class MultilinearCompressiveLearner(Learner):
         self.device = device
         self.test_mode = test_mode
         self.temp_path = temp_path
+        self.fused_transforms = None
 
     def _prepare_temp_dir(self,):
         if self.temp_path == '':
@@ -212,6 +214,8 @@ class MultilinearCompressiveLearner(Learner):
         self._validate_dataset(val_set)
         self._validate_dataset(test_set)
         self._prepare_temp_dir()
+        # the fused transforms of optimize() become stale during training
+        self.fused_transforms = None
 
         train_loader = DataLoader(DataWrapper(train_set),
                                   batch_size=self.batch_size,
@@ -334,40 +338,42 @@ class MultilinearCompressiveLearner(Learner):
 
     def infer(self, img):
         """
-        This method is used to generate class prediction given an image
+        This method is used to generate class prediction given an image.
+        A list of images is processed in a single forward pass.
 
-        :param img: image to generate class prediction
-        :type img: engine.data.Image
+        :param img: image to generate class prediction, or list of images
+        :type img: engine.data.Image or list of engine.data.Image
 
-        :return: predicted label
-        :rtype: engine.target.Category
+        :return: predicted label, or list of predicted labels if a list of images is given
+        :rtype: engine.target.Category or list of engine.target.Category
 
         """
+        single = not isinstance(img, (list, tuple))
+        imgs = [img] if single else img
 
-        if not isinstance(img, Image):
-            msg = 'Input to `infer()` must be an instance of engine.data.Image\n' +\
-                  'Received an instance of type: {}'.format(type(img))
-            raise TypeError(msg)
-
-        self.model.to(torch.device(self.device))
-        self.model.eval()
+        for sample in imgs:
+            if not isinstance(sample, Image):
+                msg = 'Input to `infer()` must be an instance of engine.data.Image\n' +\
+                      'Received an instance of type: {}'.format(type(sample))
+                raise TypeError(msg)
 
-        img = img.convert("channels_last", "rgb")
-
-        if not tuple(img.shape) == tuple(self.input_shape):
-            msg = 'Dimensions of the given input "{}"'.format(img.shape) +\
-                  'do not match input dimensions "{}" of the model'.format(tuple(self.input_shape))
-            raise ValueError(msg)
-
-        img = np.expand_dims(img.transpose(2, 0, 1), 0)
+            shape = sample.data.shape[1:] + sample.data.shape[:1]
+            if not tuple(shape) == tuple(self.input_shape):
+                msg = 'Dimensions of the given input "{}"'.format(shape) +\
+                      'do not match input dimensions "{}" of the model'.format(tuple(self.input_shape))
+                raise ValueError(msg)
 
         with torch.no_grad():
-            tensor_img = torch.tensor(img, device=torch.device(self.device)).float()
-            prob_prediction = torch.nn.functional.softmax(self.model(tensor_img).flatten(), dim=0)
-            class_prediction = prob_prediction.argmax(dim=-1).cpu().item()
-            prediction = Category(class_prediction, confidence=prob_prediction[class_prediction].cpu().item())
+            tensor_img = stack_data(imgs, device=self.device).float()
+            if self.fused_transforms is not None:
+                logits = self.model.backbone(self.fused_transforms[0](tensor_img))
+            else:
+                place_model(self.model, self.device)
+                self.model.eval()
+                logits = self.model(tensor_img)
+            predictions = to_categories(logits)
 
-        return prediction
+        return predictions[0] if single else predictions
 
     def get_sensing_parameters(self):
         """
@@ -387,41 +393,42 @@ class MultilinearCompressiveLearner(Learner):
 
     def infer_from_compressed_measurement(self, measurement):
         """
-        This method is used to generate class prediction given the compressed measurement
+        This method is used to generate class prediction given the compressed measurement.
+        A list of measurements is processed in a single forward pass.
 
-        :param measurement: compressed measurement to generate class prediction
-        :type measurement: engine.data.Image
+        :param measurement: compressed measurement to generate class prediction, or list of measurements
+        :type measurement: engine.data.Image or list of engine.data.Image
 
-        :return: predicted label
-        :rtype: engine.target.Category
+        :return: predicted label, or list of predicted labels if a list of measurements is given
+        :rtype: engine.target.Category or list of engine.target.Category
 
         """
+        single = not isinstance(measurement, (list, tuple))
+        measurements = [measurement] if single else measurement
 
-        if not isinstance(measurement, Image):
-            msg = 'Input to `infer_from_compressed_measurement()` must be an instance of engine.data.Image\n' +\
-                  'Received an instance of type: {}'.format(type(measurement))
-            raise TypeError(msg)
-
-        self.model.to(torch.device(self.device))
-        self.model.eval()
-
-        measurement = measurement.convert("channels_last")
-
-        if not tuple(measurement.shape) == tuple(self.compressed_shape):
-            msg = 'Dimensions of the given compressed measurement "{}"'.format(measurement.shape) +\
-                  'do not match `compressed_shape` "{}" of the model'.format(tuple(self.compressed_shape))
-            raise ValueError(msg)
+        for sample in measurements:
+            if not isinstance(sample, Image):
+                msg = 'Input to `infer_from_compressed_measurement()` must be an instance of engine.data.Image\n' +\
+                      'Received an instance of type: {}'.format(type(sample))
+                raise TypeError(msg)
 
-        measurement = np.expand_dims(measurement.transpose(2, 0, 1), 0)
+            shape = sample.data.shape[1:] + sample.data.shape[:1]
+            if not tuple(shape) == tuple(self.compressed_shape):
+                msg = 'Dimensions of the given compressed measurement "{}"'.format(shape) +\
+                      'do not match `compressed_shape` "{}" of the model'.format(tuple(self.compressed_shape))
+                raise ValueError(msg)
 
         with torch.no_grad():
-            tensor_measurement = torch.tensor(measurement, device=torch.device(self.device)).float()
-            prob_prediction = self.model.infer_from_measurement(tensor_measurement).flatten()
-            prob_prediction = torch.nn.functional.softmax(prob_prediction, dim=0)
-            class_prediction = prob_prediction.argmax(dim=-1).cpu().item()
-            prediction = Category(class_prediction, confidence=prob_prediction[class_prediction].cpu().item())
+            tensor_measurement = stack_data(measurements, device=self.device).float()
+            if self.fused_transforms is not None:
+                logits = self.model.backbone(self.fused_transforms[1](tensor_measurement))
+            else:
+                place_model(self.model, self.device)
+                self.model.eval()
+                logits = self.model.infer_from_measurement(tensor_measurement)
+            predictions = to_categories(logits)
 
-        return prediction
+        return predictions[0] if single else predictions
 
     def save(self, path, verbose=True):
         """
@@ -517,6 +524,7 @@ class MultilinearCompressiveLearner(Learner):
 
         self.model.cpu()
         self.model.load_state_dict(torch.load(model_weight_file, map_location=torch.device('cpu')))
+        self.fused_transforms = None
 
         if verbose:
             print('Pretrained model is loaded successfully')
@@ -658,7 +666,20 @@ class MultilinearCompressiveLearner(Learner):
             raise UserWarning('Only pretrained model for built-in backbone can be downloaded')
 
     def optimize(self):
-        pass
+        """
+        This method is used to optimize the model for inference. The sensing and synthesis matrices are
+        precomposed into a single multilinear transform, which `infer()` applies to a batch with a single einsum,
+        and the synthesis matrices into another one for `infer_from_compressed_measurement()`.
+        The transforms are discarded when the model is trained or loaded again.
+
+        """
+        place_model(self.model, self.device)
+        self.model.eval()
+        with torch.no_grad():
+            sensing_module = self.model.sense_synth_module.sensing_module
+            synthesis_module = self.model.sense_synth_module.synthesis_module
+            self.fused_transforms = (FusedMultilinearTransform(synthesis_module, sensing_module),
+                                     FusedMultilinearTransform(synthesis_module))
 
     def reset(self):
         pass
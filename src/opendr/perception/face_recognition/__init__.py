@@ -1,3 +1,4 @@
 from opendr.perception.face_recognition.face_recognition_learner import FaceRecognitionLearner
+from opendr.perception.face_recognition.face_analysis_pipeline import FaceAnalysisPipeline
 
-__all__ = ['FaceRecognitionLearner']
+__all__ = ['FaceRecognitionLearner', 'FaceAnalysisPipeline']
@@ -235,3 +235,48 @@ def warp_and_crop_face(src_img,
     face_img = cv2.warpAffine(src_img, tfm, (crop_size[0], crop_size[1]))
 
     return face_img
+
+
+def get_similarity_transforms_batch(src_pts, dst_pts):
+    """
+    Function:
+    ----------
+        get the non-reflective similarity transform matrices from the points
+        of each face in src_pts to dst_pts at once, in closed form. As in
+        get_similarity_transform_for_cv2(), the transform from dst_pts to
+        src_pts is fitted in the least squares sense and then inverted
+    Parameters:
+    ----------
+        @src_pts: NxKx2 np.array
+            source points of N faces, each row is a pair of coordinates (x, y)
+        @dst_pts: Kx2 np.array
+            destination points, each row is a pair of coordinates (x, y)
+    Returns:
+    ----------
+        @tfms: Nx2x3 np.array
+            transform matrices from src_pts to dst_pts, which could be directly
+            used for cv2.warpAffine()
+    """
+    src_pts = np.asarray(src_pts, dtype=np.float64)
+    dst_pts = np.asarray(dst_pts, dtype=np.float64)
+    src_mean = src_pts.mean(axis=1)
+    dst_mean = dst_pts.mean(axis=0)
+    src_c = src_pts - src_mean[:, None]
+    dst_c = dst_pts - dst_mean
+
+    # Least squares fit of u = a * x - b * y + tu, v = b * x + a * y + tv
+    dst_var = max((dst_c ** 2).sum(), np.finfo(np.float64).eps)
+    a = (dst_c * src_c).sum(axis=(1, 2)) / dst_var
+    b = (dst_c[:, 0] * src_c[..., 1] - dst_c[:, 1] * src_c[..., 0]).sum(axis=1) / dst_var
+    tu = src_mean[:, 0] - (a * dst_mean[0] - b * dst_mean[1])
+    tv = src_mean[:, 1] - (b * dst_mean[0] + a * dst_mean[1])
+
+    # Inverse of the fitted similarity
+    scale = np.maximum(a ** 2 + b ** 2, np.finfo(np.float64).eps)
+    a, b = a / scale, -b / scale
+    tx = -(a * tu - b * tv)
+    ty = -(b * tu + a * tv)
+
+    tfms = np.stack([np.stack([a, -b, tx], axis=1),
+                     np.stack([b, a, ty], axis=1)], axis=1)
+    return tfms.astype(np.float32)
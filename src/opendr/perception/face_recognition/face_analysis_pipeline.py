@@ -0,0 +1,153 @@
+# Copyright 2020-2023 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+from opendr.engine.data import Image
+from opendr.perception.face_recognition.algorithm.align.align_trans import get_reference_facial_points, \
+    get_similarity_transforms_batch
+
+
+def warp_faces(frame, tfms, crop_size):
+    """
+    Crops all the faces of a frame with a single batched warp on the device of the frame.
+    This is the batched equivalent of calling cv2.warpAffine() with each transform.
+
+    :param frame: frame of shape (C, H, W)
+    :type frame: torch.Tensor
+    :param tfms: transform matrices from the frame to the crops, as used by cv2.warpAffine()
+    :type tfms: numpy.ndarray (Nx2x3)
+    :param crop_size: size of the square crops
+    :type crop_size: int
+    :return: crops of shape (N, C, crop_size, crop_size)
+    :rtype: torch.Tensor
+    """
+    num_faces = tfms.shape[0]
+    _, height, width = frame.shape
+    # Map the pixel centers of the crops back to the frame
+    tfms = np.concatenate([tfms, np.tile([[[0, 0, 1]]], (num_faces, 1, 1))], axis=1)
+    inverse = torch.from_numpy(np.linalg.inv(tfms)[:, :2]).to(frame)
+    steps = torch.arange(crop_size, device=frame.device, dtype=frame.dtype)
+    points = torch.stack([steps.repeat(crop_size), steps.repeat_interleave(crop_size),
+                          torch.ones(crop_size * crop_size, device=frame.device, dtype=frame.dtype)], dim=1)
+    source = torch.matmul(points, inverse.transpose(1, 2))
+    # Normalized coordinates of grid_sample with align_corners=False
+    grid = torch.stack([(2 * source[..., 0] + 1) / width - 1, (2 * source[..., 1] + 1) / height - 1], dim=-1)
+    grid = grid.view(num_faces, crop_size, crop_size, 2)
+    return F.grid_sample(frame.unsqueeze(0).expand(num_faces, -1, -1, -1), grid, mode='bilinear',
+                         padding_mode='zeros', align_corners=False)
+
+
+class FaceAnalysisPipeline:
+    def __init__(self, detector, recognizer, emotion_estimator=None, detection_threshold=0.8,
+                 emotion_input_size=96):
+        """
+        Runs face detection, recognition and, optionally, facial emotion estimation on a frame. The faces are
+        aligned from the facial landmarks of the detector with a single batched warp per model, and every model
+        processes all the faces of the frame in a single batch.
+
+        :param detector: face detector that returns facial landmarks, e.g. a loaded RetinaFaceLearner
+        :type detector: RetinaFaceLearner
+        :param recognizer: face recognizer with a loaded model and reference database
+        :type recognizer: FaceRecognitionLearner
+        :param emotion_estimator: facial emotion estimator with a loaded model, defaults to None
+        :type emotion_estimator: FacialEmotionLearner, optional
+        :param detection_threshold: confidence threshold of the detector, defaults to 0.8
+        :type detection_threshold: float, optional
+        :param emotion_input_size: size of the faces given to the emotion estimator, defaults to 96
+        :type emotion_input_size: int, optional
+        """
+        self.detector = detector
+        self.recognizer = recognizer
+        self.emotion_estimator = emotion_estimator
+        self.detection_threshold = detection_threshold
+        self.emotion_input_size = emotion_input_size
+        self.device = recognizer.device
+        self.timings = {}
+
+        reference = get_reference_facial_points(default_square=True)
+        self.recognition_input_size = recognizer.input_size[0]
+        scale = self.recognition_input_size / 112.
+        # The recognizer resizes its input to 128 / 112 of input_size and center crops it (see
+        # FaceRecognitionLearner.infer()), which is folded into the alignment of the faces
+        self._recognition_reference = reference * scale * 128. / 112. - 8. * scale
+        self._emotion_reference = reference * emotion_input_size / 112.
+        self._mean = torch.tensor(recognizer.rgb_mean, device=self.device).view(1, 3, 1, 1)
+        self._std = torch.tensor(recognizer.rgb_std, device=self.device).view(1, 3, 1, 1)
+
+    def __synchronize(self):
+        if 'cuda' in str(self.device):
+            torch.cuda.synchronize()
+
+    def infer(self, img):
+        """
+        This method is used to detect, recognize and optionally estimate the emotion of all the faces of an image.
+        The time spent in each stage is stored in the timings attribute.
+
+        :param img: image to run inference on
+        :type img: engine.data.Image class object
+        :return: Returns a list with a dictionary per detected face, holding its bounding box ('detection'), its
+            identity as returned by FaceRecognitionLearner.infer() ('identity') and, if an emotion estimator is
+            used, its emotion as an engine.target.Category object ('emotion') and its valence and arousal
+            ('affect').
+        :rtype: list of dict
+        """
+        if not isinstance(img, Image):
+            img = Image(img)
+        timings = {}
+
+        start = time.perf_counter()
+        bounding_boxes, landmarks = self.detector.infer(img, threshold=self.detection_threshold,
+                                                        return_landmarks=True)
+        timings['detection'] = time.perf_counter() - start
+        results = [{'detection': box} for box in bounding_boxes]
+        if len(results) == 0:
+            self.timings = timings
+            return results
+        if landmarks is None:
+            raise UserWarning('The face detector does not provide facial landmarks, which are needed for alignment')
+
+        start = time.perf_counter()
+        with torch.no_grad():
+            # The frame is transferred to the device once and all the faces are cropped from it there
+            frame = torch.from_numpy(np.ascontiguousarray(img.data)).to(self.device).float()
+            tfms = get_similarity_transforms_batch(landmarks, self._recognition_reference)
+            faces = warp_faces(frame, tfms, self.recognition_input_size)
+            faces = (faces / 255. - self._mean) / self._std
+            if self.emotion_estimator is not None:
+                # The emotion estimator expects BGR faces in [0, 1]
+                tfms = get_similarity_transforms_batch(landmarks, self._emotion_reference)
+                emotion_faces = warp_faces(frame.flip(0), tfms, self.emotion_input_size) / 255.
+        self.__synchronize()
+        timings['alignment'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        identities = self.recognizer.infer_batch(faces)
+        timings['recognition'] = time.perf_counter() - start
+        for result, identity in zip(results, identities):
+            result['identity'] = identity
+
+        if self.emotion_estimator is not None:
+            start = time.perf_counter()
+            emotions, affects = self.emotion_estimator.infer(emotion_faces)
+            timings['emotion'] = time.perf_counter() - start
+            for result, emotion, affect in zip(results, emotions, affects.numpy()):
+                result['emotion'] = emotion
+                result['affect'] = affect
+
+        self.timings = timings
+        return results
@@ -534,6 +534,69 @@ class FaceRecognitionLearner(Learner):
         else:
             raise UserWarning('Infer should be called either with backbone_only mode or with a classifier head')
 
+    def infer_batch(self, faces):
+        """
+        This method is used to perform face recognition on a batch of faces that are already cropped, resized to
+        input_size and normalized with rgb_mean and rgb_std, e.g. by FaceAnalysisPipeline. All the faces go through
+        the backbone at once and are matched against the whole reference database with a single distance
+        computation.
+
+        :param faces: normalized RGB faces of shape (N, 3, input_size[0], input_size[1])
+        :type faces: torch.Tensor
+        :return: Returns a list with an engine.target.Category object per face, as returned by infer()
+        :rtype: list of engine.target.Category objects
+        """
+        if self._model is None and self.ort_backbone_session is None:
+            raise UserWarning('A model should be loaded first')
+        if faces.shape[0] == 0:
+            return []
+        with torch.no_grad():
+            if self.ort_backbone_session is not None:
+                features = torch.tensor(self.__run_onnx_batch(self.ort_backbone_session, 'data', faces))
+            else:
+                self.backbone_model.eval()
+                features = self.backbone_model(faces.to(self.device))
+            features = l2_norm(features)
+
+            if self.mode == 'backbone_only':
+                if self.database is None:
+                    raise UserWarning('A reference for comparison should be created first. '
+                                      'Try calling fit_reference()')
+                keys = list(self.database.keys())
+                reference = torch.cat([self.database[key][1].to(features.device) for key in keys])
+                distances = torch.cdist(features, reference) ** 2
+                distances = torch.nan_to_num(distances, nan=10)
+                distances, indices = distances.min(dim=1)
+                distances, indices = distances.cpu().numpy(), indices.cpu().numpy()
+            elif self.network_head == 'classifier':
+                if self.ort_head_session is not None:
+                    predicted = self.__run_onnx_batch(self.ort_head_session, 'features', features).argmax(axis=1)
+                else:
+                    self.network_head_model.eval()
+                    predicted = self.network_head_model(features).argmax(dim=1).cpu().numpy()
+                return [Category(self.classes[p]) for p in predicted]
+            else:
+                raise UserWarning('Infer should be called either with backbone_only mode or with a classifier head')
+
+        threshold = self.threshold if self.threshold != 0 else 10
+        persons = []
+        for distance, index in zip(distances, indices):
+            if distance < threshold:
+                person = keys[index]
+                persons.append(Category(person, self.database[person][0], 1 - (float(distance) / threshold)))
+            else:
+                persons.append(Category(-1, 'Not found', 0.0))
+        return persons
+
+    @staticmethod
+    def __run_onnx_batch(ort_session, input_name, inputs):
+        # the exported models have a fixed batch size of 1, so their batches are run one sample at a time
+        inputs = np.array(inputs.cpu())
+        if isinstance(ort_session.get_inputs()[0].shape[0], int):
+            return np.concatenate([ort_session.run(None, {input_name: inputs[i:i + 1]})[0]
+                                   for i in range(len(inputs))])
+        return ort_session.run(None, {input_name: inputs})[0]
+
     def eval(self, dataset=None, num_pairs=1000, silent=False, verbose=True):
         """
         This method is used to evaluate a trained model on an evaluation dataset.
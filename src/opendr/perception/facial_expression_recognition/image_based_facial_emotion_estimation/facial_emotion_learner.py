@@ -24,6 +24,7 @@ from torch.utils.data import DataLoader
 from torchvision import transforms
 import torch.optim as optim
 import torch.nn as nn
+import torch.nn.functional as F
 import PIL
 import numpy as np
 import zipfile
@@ -79,6 +80,9 @@ class FacialEmotionLearner(Learner):
         self.criterion_cat = nn.CrossEntropyLoss()
         self.criterion_dim = nn.MSELoss(reduction='mean')
         self.criterion_div = BranchDiversity()
+        # Statistics of the number of ensemble branches evaluated by infer()
+        self._num_faces = 0
+        self._num_branches = 0
 
     def init_model(self, num_branches):
         """
@@ -614,45 +618,112 @@ class FacialEmotionLearner(Learner):
         np.save(path.join(base_path_his, "Loss_Val_Branch_{}".format(branch_idx)), np.array(his_val_loss))
         np.save(path.join(base_path_his, "Acc_Val_Branch_{}".format(branch_idx)), np.array(his_val_acc))
 
-    def infer(self, input_batch):
+    def infer(self, input_batch, early_exit=False, exit_confidence=None, min_branches=3):
         """
-        This method is used to perform inference on a batch of images
+        This method is used to perform inference on a batch of images, e.g. all the faces detected in a frame.
+        The shared representations are computed once and the ensemble votes and valence/arousal values of all
+        the images are aggregated at once.
+
+        In early exit mode, the branches are evaluated in order only for the images whose vote can still change.
+        An image exits once the margin of its leading emotion cannot be overturned by the remaining branches, or,
+        if exit_confidence is given, once at least min_branches branches have been evaluated and the leading
+        emotion has received that fraction of their votes. The confidence and valence/arousal of an image are then
+        computed from the branches evaluated for it. The number of evaluated branches is reported by
+        branch_statistics().
 
         :param input_batch: a batch of images
+        :param early_exit: whether to stop evaluating the branches of an image once its emotion is decided
+        :type early_exit: bool
+        :param exit_confidence: fraction of agreeing votes in (0.5, 1] after which an image exits early. If None,
+            images only exit once the vote margin is decisive
+        :type exit_confidence: float, optional
+        :param min_branches: minimum number of branches evaluated before exit_confidence is checked
+        :type min_branches: int
         :return: dimensional and categorical emotion results.
         """
 
         if type(input_batch) is list:
-            input_batch = torch.stack([torch.tensor(v.data) for v in input_batch])
+            input_batch = torch.stack([torch.as_tensor(v.data) for v in input_batch])
         else:
-            input_batch = torch.tensor(input_batch)
-        cpu_device = torch.device('cpu')
-
+            input_batch = torch.as_tensor(input_batch)
         input_batch = input_batch.to(device=self.device, dtype=torch.float)
+
         self.model.eval()
-        out_emotions, out_va, _ = self.model(input_batch)
+        branches = self.model.convolutional_branches[:self.ensemble_size]
+        with torch.no_grad():
+            shared_representations = self.model.base(input_batch)
+            if early_exit:
+                votes, affect, num_branches = self.__infer_early_exit(shared_representations, branches,
+                                                                      exit_confidence, min_branches)
+            else:
+                outputs = [branch(shared_representations) for branch in branches]
+                preds = torch.stack([output[0].argmax(dim=1) for output in outputs])
+                votes = F.one_hot(preds, outputs[0][0].shape[1]).sum(dim=0).float()
+                affect = torch.stack([output[1] for output in outputs]).mean(dim=0)
+                num_branches = len(branches) * input_batch.shape[0]
+            confidences, predictions = torch.softmax(votes, dim=1).max(dim=1)
+
+        self._num_faces += input_batch.shape[0]
+        self._num_branches += int(num_branches if isinstance(num_branches, int) else num_branches.sum())
 
         # categorical result
-        softmax_ = nn.Softmax(dim=0)
-        categorical_results = out_emotions[:self.ensemble_size]  # a list of 9 or (n) torch tensors
-        overall_emotion_preds = torch.zeros(categorical_results[0].size()).to(self.device)  # size: batchsize * 8
-        for o_eval, outputs_per_branch_eval in enumerate(categorical_results, 0):
-            _, preds_indices = torch.max(outputs_per_branch_eval, 1)
-            for v_i, v_p in enumerate(preds_indices, 0):
-                overall_emotion_preds[v_i, v_p] += 1
-        ensemble_emotion_results = [Category(prediction=int(o.argmax(dim=0)), confidence=max(softmax_(o)),
-                                    description=datasets.AffectNetCategorical.get_class(int(o.argmax(dim=0))))
-                                    for o in overall_emotion_preds]
+        ensemble_emotion_results = [Category(prediction=p, confidence=c,
+                                             description=datasets.AffectNetCategorical.get_class(p))
+                                    for p, c in zip(predictions.tolist(), confidences.tolist())]
         # dimension result
-        dimensional_results = out_va[:self.ensemble_size]
-        overall_dimension_preds = torch.zeros(dimensional_results[0].size()).to(cpu_device)
-        for evaluate_branch in range(self.ensemble_size):
-            out_va_eval_cpu = out_va[evaluate_branch].detach().to(cpu_device)
-            overall_dimension_preds += out_va_eval_cpu
-        ensemble_dimension_results = overall_dimension_preds / self.ensemble_size
+        ensemble_dimension_results = affect.cpu()
 
         return ensemble_emotion_results, ensemble_dimension_results
 
+    @staticmethod
+    def __infer_early_exit(shared_representations, branches, exit_confidence, min_branches):
+        """
+        Evaluates the branches in order on the images whose ensemble vote is not decided yet.
+
+        :return: votes, mean valence/arousal and number of evaluated branches of each image
+        """
+        num_images = shared_representations.shape[0]
+        device = shared_representations.device
+        votes, affect, num_branches = None, None, torch.zeros(num_images, device=device)
+        active = torch.arange(num_images, device=device)
+        for i, branch in enumerate(branches, 1):
+            output_emotion, output_affect = branch(shared_representations[active])[:2]
+            if votes is None:
+                votes = output_emotion.new_zeros(num_images, output_emotion.shape[1])
+                affect = output_affect.new_zeros(num_images, output_affect.shape[1])
+            votes[active] += F.one_hot(output_emotion.argmax(dim=1), votes.shape[1]).float()
+            affect[active] += output_affect
+            num_branches[active] += 1
+
+            remaining = len(branches) - i
+            if remaining == 0:
+                break
+            top_votes = votes[active].topk(2, dim=1).values
+            # The leading emotion cannot be overturned by the remaining votes
+            decided = top_votes[:, 0] - top_votes[:, 1] > remaining
+            if exit_confidence is not None and i >= min_branches:
+                decided |= top_votes[:, 0] >= exit_confidence * i
+            active = active[~decided]
+            if active.numel() == 0:
+                break
+        return votes, affect / num_branches.unsqueeze(1), num_branches
+
+    def branch_statistics(self, reset=False):
+        """
+        Reports the number of ensemble branches evaluated per image by infer(), which is lower than the ensemble
+        size when early exit is used.
+
+        :param reset: whether to reset the statistics after reporting them
+        :type reset: bool
+        :return: number of images, number of evaluated branches and average number of branches per image
+        :rtype: dict
+        """
+        statistics = {"images": self._num_faces, "branches": self._num_branches,
+                      "average_branches": self._num_branches / self._num_faces if self._num_faces else 0.0}
+        if reset:
+            self._num_faces, self._num_branches = 0, 0
+        return statistics
+
     def optimize(self, do_constant_folding=False):
         """
         Optimize method converts the model to ONNX format and saves the
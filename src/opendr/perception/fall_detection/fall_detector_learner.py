@@ -27,10 +27,12 @@ from opendr.engine.data import Image
 
 
 class FallDetectorLearner(Learner):
-    def __init__(self, pose_estimator):
+    def __init__(self, pose_estimator, pose_tracker=None):
         super().__init__()
 
         self.pose_estimator = pose_estimator
+        # Optional PoseTracker, used instead of the pose estimator's internal tracking
+        self.pose_tracker = pose_tracker
 
     def fit(self, dataset, val_dataset=None, logging_path='', silent=True, verbose=True):
         raise NotImplementedError
@@ -185,7 +187,8 @@ class FallDetectorLearner(Learner):
         raise NotImplementedError
 
     def reset(self):
-        raise NotImplementedError
+        if self.pose_tracker is not None:
+            self.pose_tracker.reset()
 
     @staticmethod
     def download(path=None, mode="test_data", verbose=False,
@@ -217,7 +220,11 @@ class FallDetectorLearner(Learner):
                 print("Test data download complete.")
 
     def infer(self, img):
-        poses = self.pose_estimator.infer(img)
+        if self.pose_tracker is not None:
+            poses = self.pose_estimator.infer(img, track=False, smooth=False)
+            self.pose_tracker.update(poses)
+        else:
+            poses = self.pose_estimator.infer(img)
         results = []
         for pose in poses:
             results.append(self.__naive_fall_detection(pose))
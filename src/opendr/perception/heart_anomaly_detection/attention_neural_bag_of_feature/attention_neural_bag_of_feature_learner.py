@@ -13,7 +13,6 @@
 # limitations under the License.
 
 # general imports
-import numpy as np
 import torch
 from torch.utils.data import DataLoader
 import tempfile
@@ -32,6 +31,7 @@ from opendr.engine.learners import Learner
 from opendr.engine.data import Timeseries
 from opendr.engine.target import Category
 from opendr.engine.constants import OPENDR_SERVER_URL
+from opendr.engine.helper.inference import place_model, stack_data, to_categories
 
 # OpenDR imports
 from opendr.perception.heart_anomaly_detection.gated_recurrent_unit.algorithm import (
@@ -121,6 +121,7 @@ class AttentionNeuralBagOfFeatureLearner(Learner):
             self.model = models.ANBoF(in_channels, series_length, n_codeword, attention_type, n_class, dropout)
         else:
             self.model = models.ATNBoF(in_channels, series_length, n_codeword, attention_type, n_class, dropout)
+        place_model(self.model, device)
 
     def _prepare_temp_dir(self,):
         if self.temp_path == '':
@@ -325,42 +326,43 @@ class AttentionNeuralBagOfFeatureLearner(Learner):
 
     def infer(self, series):
         """
-        This method is used to generate class prediction given a time-series
+        This method is used to generate class prediction given a time-series.
+        A list of time-series is processed in a single forward pass.
 
-        :param series: the input series to generate class prediction
-        :type series: engine.data.Timeseries
+        :param series: the input series to generate class prediction, or list of time-series
+        :type series: engine.data.Timeseries or list of engine.data.Timeseries
 
-        """
+        :return: predicted label, or list of predicted labels if a list of time-series is given
+        :rtype: engine.target.Category or list of engine.target.Category
 
-        assert isinstance(series, Timeseries),\
-            'Input to `infer()` must be an instance of engine.data.Timeseries\n' +\
-            'Received an instance of type: {}'.format(type(series))
+        """
+        single = not isinstance(series, (list, tuple))
+        series_list = [series] if single else series
+        for sample in series_list:
+            assert isinstance(sample, Timeseries),\
+                'Input to `infer()` must be an instance of engine.data.Timeseries\n' +\
+                'Received an instance of type: {}'.format(type(sample))
+
+            data = sample.numpy()
+
+            assert data.shape[0] == self.in_channels,\
+                'Parameter `in_channels` provided during initialization does not match ' +\
+                'the first dimension of the input series\n' +\
+                'Parameter `in_channels` provided during model initialization: {}\n'.format(self.in_channels) +\
+                'First dimension of the input series : {}\n'.format(data.shape[0])
+
+            assert data.shape[1] == self.series_length,\
+                'Parameter `series_length` provided during initialization does not match ' +\
+                'the second dimension of input series\n' +\
+                'Parameter `series_length` provided during model initialization: {}\n'.format(self.series_length) +\
+                'Second dimension of the input series: {}\n'.format(data.shape[1])
 
-        self.model.to(torch.device(self.device))
         self.model.eval()
+        with torch.no_grad():
+            batch = stack_data(series_list, convert=Timeseries.numpy, device=self.device).float()
+            predictions = to_categories(self.model(batch))
 
-        series = series.numpy()
-
-        assert series.shape[0] == self.in_channels,\
-            'Parameter `in_channels` provided during initialization does not match ' +\
-            'the first dimension of the input series\n' +\
-            'Parameter `in_channels` provided during model initialization: {}\n'.format(self.in_channels) +\
-            'First dimension of the input series : {}\n'.format(series.shape[0])
-
-        assert series.shape[1] == self.series_length,\
-            'Parameter `series_length` provided during initialization does not match ' +\
-            'the second dimension of input series\n' +\
-            'Parameter `series_length` provided during model initialization: {}\n'.format(self.series_length) +\
-            'Second dimension of the input series: {}\n'.format(series.shape[1])
-
-        series = np.expand_dims(series, 0)
-
-        series = torch.tensor(series, device=torch.device(self.device)).float()
-        prob_prediction = torch.nn.functional.softmax(self.model(series).flatten(), dim=0)
-        class_prediction = prob_prediction.argmax().cpu().item()
-        prediction = Category(class_prediction, confidence=prob_prediction[class_prediction].cpu().item())
-
-        return prediction
+        return predictions[0] if single else predictions
 
     def save(self, path, verbose=True):
         """
@@ -470,8 +472,8 @@ class AttentionNeuralBagOfFeatureLearner(Learner):
             'Parameter `attention_type` provided during model initialization: {}\n'.format(self.attention_type) +\
             'Parameter `attention_type` of the saved model: {}\n'.format(metadata['attention_type'])
 
-        self.model.cpu()
         self.model.load_state_dict(torch.load(model_weight_file, map_location=torch.device('cpu')))
+        place_model(self.model, self.device)
 
         if verbose:
             print('Pretrained model is loaded successfully')
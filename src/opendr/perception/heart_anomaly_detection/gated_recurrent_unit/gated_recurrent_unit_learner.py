@@ -13,7 +13,6 @@
 # limitations under the License.
 
 # general imports
-import numpy as np
 import torch
 from torch.utils.data import DataLoader
 import tempfile
@@ -33,6 +32,7 @@ from opendr.engine.data import Timeseries
 from opendr.engine.target import Category
 from opendr.engine.datasets import DatasetIterator
 from opendr.engine.constants import OPENDR_SERVER_URL
+from opendr.engine.helper.inference import place_model, stack_data, to_categories
 
 # OpenDR imports
 from opendr.perception.compressive_learning.multilinear_compressive_learning.algorithm.trainers import (
@@ -103,6 +103,7 @@ class GatedRecurrentUnitLearner(Learner):
         self.temp_path = temp_path
 
         self.model = models.GRU(in_channels, series_length, recurrent_unit, n_class, dropout)
+        place_model(self.model, device)
 
     def _prepare_temp_dir(self,):
         if self.temp_path == '':
@@ -316,44 +317,44 @@ class GatedRecurrentUnitLearner(Learner):
 
     def infer(self, series):
         """
-        This method is used to generate class prediction given a time-series
+        This method is used to generate class prediction given a time-series.
+        A list of time-series is processed in a single forward pass.
 
-        :param series: time-series to generate class prediction
-        :type series: engine.data.Timeseries
+        :param series: time-series to generate class prediction, or list of time-series
+        :type series: engine.data.Timeseries or list of engine.data.Timeseries
 
-        :return: predicted label
-        :rtype: engine.target.Category
+        :return: predicted label, or list of predicted labels if a list of time-series is given
+        :rtype: engine.target.Category or list of engine.target.Category
 
         """
+        single = not isinstance(series, (list, tuple))
+        series_list = [series] if single else series
+        for sample in series_list:
+            if not isinstance(sample, Timeseries):
+                msg = 'Input to `infer()` must be an instance of engine.data.Timeseries\n' +\
+                      'Received an instance of type: {}'.format(type(sample))
+                raise TypeError(msg)
+
+            data = sample.numpy()
+
+            assert data.shape[0] == self.in_channels,\
+                'Parameter `in_channels` provided during initialization does not match ' +\
+                'the first dimension of the input series\n' +\
+                'Parameter `in_channels` provided during model initialization: {}\n'.format(self.in_channels) +\
+                'First dimension of the input series : {}\n'.format(data.shape[0])
+
+            assert data.shape[1] == self.series_length,\
+                'Parameter `series_length` provided during initialization does not match ' +\
+                'the second dimension of input series\n' +\
+                'Parameter `series_length` provided during model initialization: {}\n'.format(self.series_length) +\
+                'Second dimension of the input series: {}\n'.format(data.shape[1])
 
-        if not isinstance(series, Timeseries):
-            msg = 'Input to `infer()` must be an instance of engine.data.Timeseries\n' +\
-                  'Received an instance of type: {}'.format(type(series))
-            raise TypeError(msg)
-
-        series = series.numpy()
-
-        assert series.shape[0] == self.in_channels,\
-            'Parameter `in_channels` provided during initialization does not match ' +\
-            'the first dimension of the input series\n' +\
-            'Parameter `in_channels` provided during model initialization: {}\n'.format(self.in_channels) +\
-            'First dimension of the input series : {}\n'.format(series.shape[0])
-
-        assert series.shape[1] == self.series_length,\
-            'Parameter `series_length` provided during initialization does not match ' +\
-            'the second dimension of input series\n' +\
-            'Parameter `series_length` provided during model initialization: {}\n'.format(self.series_length) +\
-            'Second dimension of the input series: {}\n'.format(series.shape[1])
-
-        self.model.to(torch.device(self.device))
         self.model.eval()
-        series = np.expand_dims(series, 0)
         with torch.no_grad():
-            series = torch.tensor(series, device=torch.device(self.device)).float()
-            prob_prediction = torch.nn.functional.softmax(self.model(series).flatten(), dim=0)
-            class_prediction = prob_prediction.argmax().cpu().item()
-            prediction = Category(class_prediction, confidence=prob_prediction[class_prediction].cpu().item())
-        return prediction
+            batch = stack_data(series_list, convert=Timeseries.numpy, device=self.device).float()
+            predictions = to_categories(self.model(batch))
+
+        return predictions[0] if single else predictions
 
     def save(self, path, verbose=True):
         """
@@ -387,6 +388,7 @@ class GatedRecurrentUnitLearner(Learner):
 
         try:
             torch.save(self.model.cpu().state_dict(), model_weight_file)
+            place_model(self.model, self.device)
             if verbose:
                 print('Model weights saved to {}'.format(model_weight_file))
         except Exception as error:
@@ -454,8 +456,8 @@ class GatedRecurrentUnitLearner(Learner):
             'Parameter `recurrent_unit` provided during model initialization: {}\n'.format(self.recurrent_unit) +\
             'Parameter `recurrent_unit` of the saved model: {}\n'.format(metadata['recurrent_unit'])
 
-        self.model.cpu()
         self.model.load_state_dict(torch.load(model_weight_file, map_location=torch.device('cpu')))
+        place_model(self.model, self.device)
 
         if verbose:
             print('Pretrained model is loaded successfully')
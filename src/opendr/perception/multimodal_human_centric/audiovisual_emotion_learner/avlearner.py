@@ -27,6 +27,7 @@ from opendr.engine.data import Video, Timeseries
 from opendr.engine.datasets import DatasetIterator
 from opendr.engine.target import Category
 from opendr.engine.constants import OPENDR_SERVER_URL
+from opendr.engine.helper.inference import place_model, stack_data, to_categories
 
 # OpenDR imports
 from opendr.perception.multimodal_human_centric.audiovisual_emotion_learner.algorithm import (data,
@@ -66,6 +67,7 @@ class AudiovisualEmotionLearner(Learner):
         assert mod_drop in ['nodrop', 'noisedrop', 'zerodrop'], 'Unknown modlaity dropout type'
 
         self.model = models.MultiModalCNN(num_classes=num_class, fusion=fusion, seq_length=seq_length, pretr_ef=pretr_ef)
+        place_model(self.model, device)
 
         self.num_class = num_class
         self.fusion = fusion
@@ -297,33 +299,35 @@ class AudiovisualEmotionLearner(Learner):
 
     def infer(self, audio, video):
         """
-        This method is used to generate prediction given Audio and Visual data
+        This method is used to generate prediction given Audio and Visual data.
+        Lists of audio and video samples are processed in a single forward pass.
 
-        :param video: video of a fronal view of a face
-        :type video: engine.data.Video
-        :param audio: audio features to generate class prediction
-        :type audio: engine.data.Timeseries
-        :return: predicted label
-        :rtype: engine.target.Category
+        :param video: video of a fronal view of a face, or list of videos
+        :type video: engine.data.Video or list of engine.data.Video
+        :param audio: audio features to generate class prediction, or list of audio features
+        :type audio: engine.data.Timeseries or list of engine.data.Timeseries
+        :return: predicted label, or list of predicted labels if lists of samples are given
+        :rtype: engine.target.Category or list of engine.target.Category
 
         """
-        self._validate_x1(audio)
-        self._validate_x2(video)
-        self.model.to(self.device)
+        single = not isinstance(audio, (list, tuple))
+        audios = [audio] if single else audio
+        videos = [video] if single else video
+        assert len(audios) == len(videos), 'The number of audio and video samples must match'
+        for audio, video in zip(audios, videos):
+            self._validate_x1(audio)
+            self._validate_x2(video)
         self.model.eval()
 
-        video = torch.tensor([video.data]).permute(0, 2, 1, 3, 4)
+        video = stack_data(videos, device=self.device).permute(0, 2, 1, 3, 4)
         video = video.reshape(video.shape[0]*video.shape[1], video.shape[2],
-                              video.shape[3], video.shape[4]).to(self.device)
+                              video.shape[3], video.shape[4])
 
-        audio = torch.tensor(audio.data).unsqueeze(0).to(self.device)
+        audio = stack_data(audios, device=self.device)
         with torch.no_grad():
-            prob_prediction = torch.nn.functional.softmax(self.model(audio, video).flatten(), dim=0)
-            class_prediction = prob_prediction.argmax(dim=-1).cpu().item()
+            predictions = to_categories(self.model(audio, video))
 
-        prediction = Category(class_prediction, confidence=prob_prediction[class_prediction].cpu().item())
-
-        return prediction
+        return predictions[0] if single else predictions
 
     def pred_to_label(self, prediction):
         """
@@ -362,6 +366,7 @@ class AudiovisualEmotionLearner(Learner):
 
         try:
             torch.save(self.model.cpu().state_dict(), model_weight_file)
+            place_model(self.model, self.device)
             if verbose:
                 print('Model weights saved to {}'.format(model_weight_file))
         except Exception as error:
@@ -411,9 +416,9 @@ class AudiovisualEmotionLearner(Learner):
         assert os.path.exists(model_weight_file),\
             'Model weights "{}" does not exist'.format(model_weight_file)
 
-        self.model.cpu()
         self.model.load_state_dict(torch.load(model_weight_file,
                                    map_location=torch.device('cpu')))
+        place_model(self.model, self.device)
 
         if verbose:
             print('Pretrained model is loaded successfully')
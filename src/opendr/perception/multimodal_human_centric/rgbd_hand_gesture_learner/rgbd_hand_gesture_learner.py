@@ -13,7 +13,6 @@
 # limitations under the License.
 
 # general imports
-import numpy as np
 import torch
 from torch.utils.data import DataLoader
 import tempfile
@@ -33,6 +32,7 @@ from opendr.engine.data import Image
 from opendr.engine.datasets import DatasetIterator
 from opendr.engine.target import Category
 from opendr.engine.constants import OPENDR_SERVER_URL
+from opendr.engine.helper.inference import place_model, stack_data, to_categories
 
 # OpenDR imports
 from opendr.perception.multimodal_human_centric.rgbd_hand_gesture_learner.algorithm import (
@@ -95,6 +95,7 @@ class RgbdHandGestureLearner(Learner):
             self.model = architectures[architecture](num_classes=n_class, pretrained=pretrained)
         else:
             self.model = architecture
+        place_model(self.model, device)
 
         assert checkpoint_load_iter < iters,\
             '`checkpoint_load_iter` must be less than `iters`\n' +\
@@ -338,31 +339,28 @@ class RgbdHandGestureLearner(Learner):
 
     def infer(self, img):
         """
-        This method is used to generate class prediction given RGBD image
+        This method is used to generate class prediction given RGBD image.
+        A list of images is processed in a single forward pass.
 
-        :param img: img to generate class prediction
-        :type img: engine.data.Image
+        :param img: img to generate class prediction, or list of images
+        :type img: engine.data.Image or list of engine.data.Image
 
-        :return: predicted label
-        :rtype: engine.target.Category
+        :return: predicted label, or list of predicted labels if a list of images is given
+        :rtype: engine.target.Category or list of engine.target.Category
 
         """
+        single = not isinstance(img, (list, tuple))
+        imgs = [img] if single else img
+        for sample in imgs:
+            self._validate_x(sample)
 
-        self._validate_x(img)
-
-        self.model.to(torch.device(self.device))
         self.model.eval()
 
-        img = img.convert("channels_first")
-        img = np.expand_dims(img, 0)
-
         with torch.no_grad():
-            tensor_img = torch.tensor(img, device=torch.device(self.device)).float()
-            prob_prediction = torch.nn.functional.softmax(self.model(tensor_img).flatten(), dim=0)
-            class_prediction = prob_prediction.argmax(dim=-1).cpu().item()
-            prediction = Category(class_prediction, confidence=prob_prediction[class_prediction].cpu().item())
+            tensor_img = stack_data(imgs, device=self.device).float()
+            predictions = to_categories(self.model(tensor_img))
 
-        return prediction
+        return predictions[0] if single else predictions
 
     def save(self, path, verbose=True):
         """
@@ -402,6 +400,7 @@ class RgbdHandGestureLearner(Learner):
 
         try:
             torch.save(self.model.cpu().state_dict(), model_weight_file)
+            place_model(self.model, self.device)
             if verbose:
                 print('Model weights saved to {}'.format(model_weight_file))
         except Exception as error:
@@ -456,8 +455,8 @@ class RgbdHandGestureLearner(Learner):
         assert os.path.exists(model_weight_file),\
             'Model weights "{}" does not exist'.format(model_weight_file)
 
-        self.model.cpu()
         self.model.load_state_dict(torch.load(model_weight_file, map_location=torch.device('cpu')))
+        place_model(self.model, self.device)
 
         if verbose:
             print('Pretrained model is loaded successfully')
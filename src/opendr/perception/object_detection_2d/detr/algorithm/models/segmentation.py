@@ -268,7 +268,7 @@ class PostProcessPanoptic(nn.Module):
         self.threshold = threshold
         self.is_thing_map = is_thing_map
 
-    def forward(self, outputs, processed_sizes, target_sizes=None):
+    def forward(self, outputs, processed_sizes, target_sizes=None, label_maps=False):
         """ This function computes the panoptic prediction from the model's predictions.
         Parameters:
             outputs: This is a dict coming directly from the model. See the model doc for the content.
@@ -276,6 +276,8 @@ class PostProcessPanoptic(nn.Module):
                              model, ie the size after data augmentation but before batching.
             target_sizes: This is a list of tuples (or torch tensors) corresponding to the requested final size
                           of each prediction. If left to None, it will default to the processed_sizes
+            label_maps: If True, the segmentation of each prediction is returned as an integer "label_map" array
+                        of segment ids, instead of being encoded in a "png_string"
             """
         if target_sizes is None:
             target_sizes = processed_sizes
@@ -345,9 +347,9 @@ class PostProcessPanoptic(nn.Module):
                 area = []
                 for i in range(len(scores)):
                     area.append(m_id.eq(i).sum().item())
-                return area, seg_img
+                return area, seg_img, m_id
 
-            area, seg_img = get_ids_area(cur_masks, cur_scores, dedup=True)
+            area, seg_img, m_id = get_ids_area(cur_masks, cur_scores, dedup=True)
             if cur_classes.numel() > 0:
                 # We know filter empty masks as long as we find some
                 while True:
@@ -358,7 +360,7 @@ class PostProcessPanoptic(nn.Module):
                         cur_scores = cur_scores[~filtered_small]
                         cur_classes = cur_classes[~filtered_small]
                         cur_masks = cur_masks[~filtered_small]
-                        area, seg_img = get_ids_area(cur_masks, cur_scores)
+                        area, seg_img, m_id = get_ids_area(cur_masks, cur_scores)
                     else:
                         break
 
@@ -371,8 +373,11 @@ class PostProcessPanoptic(nn.Module):
                 segments_info.append({"id": i, "isthing": self.is_thing_map[cat], "category_id": cat, "area": a})
             del cur_classes
 
-            with io.BytesIO() as out:
-                seg_img.save(out, format="PNG")
-                predictions = {"png_string": out.getvalue(), "segments_info": segments_info}
+            if label_maps:
+                predictions = {"label_map": m_id.numpy(), "segments_info": segments_info}
+            else:
+                with io.BytesIO() as out:
+                    seg_img.save(out, format="PNG")
+                    predictions = {"png_string": out.getvalue(), "segments_info": segments_info}
             preds.append(predictions)
         return preds
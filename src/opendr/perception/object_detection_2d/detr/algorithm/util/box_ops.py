@@ -43,6 +43,16 @@ def rescale_bboxes(out_bbox, size, device):
     return b
 
 
+def rescale_bboxes_batch(out_bbox, sizes, device):
+    """
+    Batched version of rescale_bboxes(), for the [batch_size x num_queries x 4] boxes of a batch and the (width,
+    height) size of each image of the batch.
+    """
+    sizes = torch.tensor(sizes, dtype=torch.float32).to(torch.device(device)).repeat(1, 2)
+    b = box_cxcywh_to_xyxy(out_bbox)
+    return b * sizes[:, None, :]
+
+
 # modified from torchvision to also return the union
 def box_iou(boxes1, boxes2):
     area1 = box_area(boxes1)
@@ -17,63 +17,99 @@
 """
 Mostly copy-paste from https://colab.research.google.com/github/facebookresearch/detr/blob/colab/notebooks/detr_demo.ipynb
 """
-import torch
-from opendr.perception.object_detection_2d.detr.algorithm.util.box_ops import rescale_bboxes
+import cv2
 import numpy as np
-from PIL import Image
-from panopticapi.utils import rgb2id
-import io
-from imantics import Mask
+import torch
+from scipy.ndimage import find_objects
+from opendr.perception.object_detection_2d.detr.algorithm.util.box_ops import rescale_bboxes_batch
+from opendr.perception.object_detection_2d.detr.algorithm.util.misc import nested_tensor_from_tensor_list
 
 
-@torch.no_grad()
-def detect(im, transform, model, postprocessor, device, threshold, ort_session, masks):
+def label_map_polygons(label_map):
+    """
+    Extracts a polygon for each segment id of an integer label map, in the [x1, y1, x2, y2, ...] format of the
+    segmentations of CocoBoundingBox. The bounding slices of all the segments are found in a single pass over the
+    label map, and the contours of each segment are only searched within its own slice. As for imantics, the polygon
+    of a segment is the first of its contours, and segment ids without pixels get an empty polygon.
+    """
+    segmentations = []
+    for i, region in enumerate(find_objects(label_map + 1)):
+        if region is None:
+            segmentations.append([])
+            continue
+        mask = (label_map[region] == i).astype(np.uint8)
+        mask = cv2.copyMakeBorder(mask, 1, 1, 1, 1, cv2.BORDER_CONSTANT, value=0)
+        contours = cv2.findContours(mask, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE,
+                                    offset=(region[1].start - 1, region[0].start - 1))
+        contours = contours[0] if len(contours) == 2 else contours[1]
+        segmentations.append(contours[0].flatten().tolist() if len(contours) > 0 else [])
+    return segmentations
 
-    dev = torch.device(device)
 
-    # mean-std normalize the input image (batch-size: 1)
-    img = transform(im).unsqueeze(0)
-    if ort_session is not None:
-        # propagate through the onnx model
-        outputs = ort_session.run(['pred_logits', 'pred_boxes'], {'data': np.array(img)})
+def _run_onnx(ort_session, tensors):
+    # models exported with a fixed batch size are run over chunks of the batch, with a zero padded last chunk
+    batch_size = ort_session.get_inputs()[0].shape[0]
+    if not isinstance(batch_size, int):
+        batch_size = len(tensors)
+    pred_logits, pred_boxes = [], []
+    for start in range(0, len(tensors), batch_size):
+        chunk = tensors[start:start + batch_size]
+        data = np.zeros((batch_size,) + tuple(chunk.shape[1:]), dtype=np.float32)
+        data[:len(chunk)] = chunk.numpy()
+        outputs = ort_session.run(['pred_logits', 'pred_boxes'], {'data': data})
+        pred_logits.append(outputs[0][:len(chunk)])
+        pred_boxes.append(outputs[1][:len(chunk)])
+    return np.concatenate(pred_logits), np.concatenate(pred_boxes)
 
-        pred_logits = torch.tensor(outputs[0], device=dev)
-        pred_boxes = torch.tensor(outputs[1], device=dev)
 
-        # keep only predictions with threshold confidence
-        probas = pred_logits.softmax(-1)[0, :, :-1]
-        keep = probas.max(-1).values > threshold
-
-        # convert boxes from [0; 1] to image scales
-        bboxes_scaled = rescale_bboxes(pred_boxes[0, keep], im.size, device)
+@torch.no_grad()
+def detect_batch(ims, transform, model, postprocessor, device, threshold, ort_session, masks, polygons=True):
+    """
+    Detects the objects of a list of PIL images, which are run through the model as a single padded batch.
+    Returns a (probabilities, boxes, segmentations, label map) tuple for each image, where the label map is the
+    integer panoptic segmentation of the image, or None without masks.
+    """
+    dev = torch.device(device)
 
-        segmentations = []
-        return probas[keep], bboxes_scaled, segmentations
+    # mean-std normalize the input images and pad them into a batch
+    samples = nested_tensor_from_tensor_list([transform(im) for im in ims])
+    if ort_session is not None:
+        # propagate through the onnx model
+        pred_logits, pred_boxes = _run_onnx(ort_session, samples.tensors)
+        outputs = {'pred_logits': torch.tensor(pred_logits, device=dev),
+                   'pred_boxes': torch.tensor(pred_boxes, device=dev)}
+        masks = False
     else:
         # propagate through the pytorch model
-        img = img.to(dev)
         model.eval()
-        outputs = model(img)
+        outputs = model(samples.to(dev))
+
+    # keep only predictions with threshold confidence
+    probas = outputs['pred_logits'].softmax(-1)[:, :, :-1]
+    keep = probas.max(-1).values > threshold
 
-        # keep only predictions with threshold confidence
-        probas = outputs['pred_logits'].softmax(-1)[0, :, :-1]
-        keep = probas.max(-1).values > threshold
+    # convert boxes from [0; 1] to image scales
+    bboxes_scaled = rescale_bboxes_batch(outputs['pred_boxes'], [im.size for im in ims], device)
 
-        # convert boxes from [0; 1] to image scales
-        bboxes_scaled = rescale_bboxes(outputs['pred_boxes'][0, keep], im.size, device)
+    label_maps = [None] * len(ims)
+    if masks:
+        if isinstance(postprocessor, dict):
+            postprocessor = postprocessor['panoptic']
+        sizes = torch.as_tensor([[im.size[1], im.size[0]] for im in ims])
+        label_maps = [result['label_map'] for result in postprocessor(outputs, sizes, label_maps=True)]
 
+    results = []
+    for i, label_map in enumerate(label_maps):
         segmentations = []
-        if masks:
-            w, h = im.size
-            result = postprocessor(outputs, torch.as_tensor([h, w]).unsqueeze(0))[0]
-            # The segmentation is stored in a special-format png
-            panoptic_seg = Image.open(io.BytesIO(result['png_string']))
-            panoptic_seg = np.array(panoptic_seg, dtype=np.uint8).copy()
-            # We retrieve the ids corresponding to each mask
-            panoptic_seg_id = rgb2id(panoptic_seg)
-
-            for i in range(panoptic_seg_id.max()+1):
-                mask = (panoptic_seg_id == i).astype(np.uint8)
-                polygons = Mask(mask).polygons()
-                segmentations.append(polygons.segmentation[0])
-        return probas[keep], bboxes_scaled, segmentations
+        if label_map is not None and polygons:
+            segmentations = label_map_polygons(label_map)
+        results.append((probas[i, keep[i]], bboxes_scaled[i, keep[i]], segmentations, label_map))
+    return results
+
+
+@torch.no_grad()
+def detect(im, transform, model, postprocessor, device, threshold, ort_session, masks):
+    probas, bboxes_scaled, segmentations, _ = detect_batch(
+        [im], transform, model, postprocessor, device, threshold, ort_session, masks
+    )[0]
+    return probas, bboxes_scaled, segmentations
@@ -28,17 +28,18 @@ from torch.utils.tensorboard import SummaryWriter
 from pathlib import Path
 from urllib.request import urlretrieve
 
-from opendr.perception.object_detection_2d.detr.algorithm.util.detect import detect
+from opendr.perception.object_detection_2d.detr.algorithm.util.detect import detect_batch
 from opendr.perception.object_detection_2d.detr.algorithm.datasets import build_dataset, get_coco_api_from_dataset
 from opendr.perception.object_detection_2d.detr.algorithm.datasets.coco import map_bounding_box_list_to_coco
 from opendr.perception.object_detection_2d.detr.algorithm.engine import evaluate, train_one_epoch
 from opendr.perception.object_detection_2d.detr.algorithm.models import build_model, build_criterion, build_postprocessors
+from opendr.perception.object_detection_2d.detr.algorithm.models.segmentation import PostProcessPanoptic
 
 from opendr.engine.constants import OPENDR_SERVER_URL
 from opendr.engine.data import Image
 from opendr.engine.learners import Learner
 from opendr.engine.datasets import ExternalDataset, DatasetIterator, MappedDatasetIterator
-from opendr.engine.target import CocoBoundingBox, BoundingBoxList
+from opendr.engine.target import CocoBoundingBox, BoundingBoxList, Heatmap
 
 import torchvision.transforms as T
 import numpy as np
@@ -560,32 +561,70 @@ class DetrLearner(Learner):
 
         return test_stats
 
-    def infer(self, image):
+    def infer(self, image, return_label_map=False, polygons=True):
         """
-        This method is used to perform object detection on an image.
+        This method is used to perform object detection on an image, or on a
+        list of images, which are run through the model as a single padded
+        batch.
 
         Parameters
         ----------
-        image : engine.data.Image class object
-            Image to run inference on.
+        image : engine.data.Image class object or list of engine.data.Image class objects
+            Image or list of images to run inference on.
+        return_label_map : bool, optional
+            If True, the integer panoptic label map of each image is also
+            returned, in which each pixel holds the id of its segment. Only
+            available for panoptic segmentation models. The default is False.
+        polygons : bool, optional
+            If True, the segmentation polygons of the bounding boxes are
+            extracted from the label maps of panoptic segmentation models. The
+            default is True.
+
+        Raises
+        ------
+        UserWarning
+            If label maps are requested from a model that does not perform
+            panoptic segmentation.
 
         Returns
         -------
-        engine.target.BoundingBoxList
+        engine.target.BoundingBoxList or list of engine.target.BoundingBoxList
             The engine.target.BoundingBoxList contains bounding boxes that are
             described by the left-top corner and its width and height, or
-            returns an empty list if no detections were made.
+            returns an empty list if no detections were made. A list is
+            returned for a list of images. If return_label_map is True, a
+            (engine.target.BoundingBoxList, engine.target.Heatmap) tuple is
+            returned instead for each image.
 
         """
-        if not isinstance(image, Image):
-            image = Image(image)
-        img = im.fromarray(image.convert("channels_last", "rgb"))
-
-        scores, boxes, segmentations = detect(img, self.infer_transform, self.model,
-                                              self.postprocessors, self.device,
-                                              self.threshold, self.ort_session,
-                                              self.args.masks)
+        if return_label_map and (not self.args.masks or self.ort_session is not None):
+            raise UserWarning("Label maps can only be returned by panoptic segmentation models.")
+
+        images = image if isinstance(image, list) else [image]
+        imgs = []
+        for img in images:
+            if not isinstance(img, Image):
+                img = Image(img)
+            imgs.append(im.fromarray(img.convert("channels_last", "rgb")))
+
+        results = detect_batch(imgs, self.infer_transform, self.model,
+                               self.postprocessors, self.device,
+                               self.threshold, self.ort_session,
+                               self.args.masks, polygons)
+
+        outputs = []
+        for scores, boxes, segmentations, label_map in results:
+            boxlist = self.__to_bounding_box_list(scores, boxes, segmentations)
+            if return_label_map:
+                outputs.append((boxlist, Heatmap(label_map)))
+            else:
+                outputs.append(boxlist)
+        if isinstance(image, list):
+            return outputs
+        return outputs[0]
 
+    @staticmethod
+    def __to_bounding_box_list(scores, boxes, segmentations):
         boxlist = []
         if len(segmentations) == len(scores):
             for p, (xmin, ymin, xmax, ymax), segmentation in zip(scores.tolist(), boxes.tolist(), segmentations):
@@ -744,6 +783,7 @@ class DetrLearner(Learner):
                     return_postprocessor=True,
                     threshold=self.threshold
                     )
+                self.postprocessors = PostProcessPanoptic(self.postprocessors.is_thing_map, threshold=self.threshold)
                 if self.args.num_classes != 250:
                     self.model.detr.class_embed = torch.nn.Linear(
                         in_features=self.model.detr.class_embed.in_features,
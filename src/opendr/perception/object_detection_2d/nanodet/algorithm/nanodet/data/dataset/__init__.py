@@ -16,14 +16,20 @@
 
 
 import copy
+import os
 from opendr.engine.datasets import ExternalDataset
 
 from opendr.perception.object_detection_2d.nanodet.algorithm.nanodet.data.dataset.coco import CocoDataset
 from opendr.perception.object_detection_2d.nanodet.algorithm.nanodet.data.dataset.xml_dataset import XMLDataset
+from opendr.perception.object_detection_2d.nanodet.algorithm.nanodet.data.dataset.packed import PackedDataset
 
 
 def build_dataset(cfg, dataset, class_names, mode, verbose=True):
         dataset_cfg = copy.deepcopy(cfg)
+        # optional pack of pre-decoded images and annotations, see PackedDataset
+        pack_path = dataset_cfg.get("pack_path", None)
+        pack_storage = dataset_cfg.get("pack_storage", "resized")
+        dataset_cfg = {k: v for k, v in dataset_cfg.items() if k not in ["pack_path", "pack_storage"]}
         supported_datasets = ['coco', 'voc']
         if isinstance(dataset, ExternalDataset):
             if dataset.dataset_type.lower() not in supported_datasets:
@@ -40,8 +46,13 @@ def build_dataset(cfg, dataset, class_names, mode, verbose=True):
                 else:
                     img_path = "{}/val/JPEGImages".format(dataset.path)
                     ann_path = "{}/val/Annotations".format(dataset.path)
-                dataset = XMLDataset(img_path=img_path, ann_path=ann_path, mode=mode,
-                                     class_names=class_names, **dataset_cfg)
+                if pack_path:
+                    dataset = PackedDataset(cache_path=os.path.join(pack_path, mode), source_type="voc",
+                                            class_names=class_names, storage=pack_storage, img_path=img_path,
+                                            ann_path=ann_path, mode=mode, **dataset_cfg)
+                else:
+                    dataset = XMLDataset(img_path=img_path, ann_path=ann_path, mode=mode,
+                                         class_names=class_names, **dataset_cfg)
 
             elif dataset.dataset_type.lower() == 'coco':
                 if mode == "train":
@@ -50,7 +61,12 @@ def build_dataset(cfg, dataset, class_names, mode, verbose=True):
                 else:
                     img_path = "{}/val2017".format(dataset.path)
                     ann_path = "{}/annotations/instances_val2017.json".format(dataset.path)
-                dataset = CocoDataset(img_path=img_path, ann_path=ann_path, mode=mode, **dataset_cfg)
+                if pack_path:
+                    dataset = PackedDataset(cache_path=os.path.join(pack_path, mode), source_type="coco",
+                                            storage=pack_storage, img_path=img_path, ann_path=ann_path,
+                                            mode=mode, **dataset_cfg)
+                else:
+                    dataset = CocoDataset(img_path=img_path, ann_path=ann_path, mode=mode, **dataset_cfg)
             if verbose:
                 print("ExternalDataset loaded.")
             return dataset
@@ -0,0 +1,272 @@
+# Copyright 2020-2023 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import json
+import logging
+import os
+import time
+
+import cv2
+import numpy as np
+import torch
+
+from opendr.perception.object_detection_2d.nanodet.algorithm.nanodet.data.dataset.base import BaseDataset
+from opendr.perception.object_detection_2d.nanodet.algorithm.nanodet.data.dataset.coco import CocoDataset
+from opendr.perception.object_detection_2d.nanodet.algorithm.nanodet.data.dataset.xml_dataset import CocoXML, XMLDataset
+
+_SHARD_NAME = "shard.bin"
+_INDEX_NAME = "index.npz"
+_META_NAME = "meta.json"
+_COCO_NAME = "coco.json"
+
+
+def _file_stats(path, ext=None):
+    """
+    List (relative path, modification time, size) of all the files under a path, or of the path itself if it
+    is a file. Any change of these stats invalidates a pack.
+    """
+    if os.path.isfile(path):
+        stat = os.stat(path)
+        return [(os.path.basename(path), stat.st_mtime_ns, stat.st_size)]
+    stats = []
+    for root, _, file_names in os.walk(path):
+        for file_name in file_names:
+            if ext is not None and os.path.splitext(file_name)[1] != ext:
+                continue
+            file_path = os.path.join(root, file_name)
+            stat = os.stat(file_path)
+            stats.append((os.path.relpath(file_path, path), stat.st_mtime_ns, stat.st_size))
+    return sorted(stats)
+
+
+class PackedDataset(BaseDataset):
+    """
+    Dataset which reads the images and annotations of a COCO or XML (VOC) dataset from a pack, which is written
+    once by decoding the source dataset. The images are stored back to back in a memory-mapped shard file, either
+    decoded and pre-resized to fit the largest input size the pipeline can request ("resized"), or as the raw
+    bytes of the source files ("encoded"), and the annotations are stored as columnar numpy arrays, sliced by
+    image offsets. The pack is rebuilt when the modification time or size of any source file, the input size or
+    the storage format changes.
+    Pre-resized images are warped by the pipeline as if they had their original size, so that the boxes and warp
+    matrices are the same as the ones of the source dataset, and evaluation and post-processing are unaffected.
+    Args:
+        cache_path (str): folder of the pack
+        source_type (str): type of the source dataset, 'coco' or 'voc'
+        class_names (list): class names, required by 'voc' source datasets
+        storage (str): 'resized' to store decoded and pre-resized uint8 images, or 'encoded' to store
+            the bytes of the source image files
+        **kwargs: arguments of the source dataset, see BaseDataset
+    """
+
+    def __init__(self, cache_path, source_type="coco", class_names=None, storage="resized", **kwargs):
+        assert source_type in ["coco", "voc"], "source_type must be 'coco' or 'voc'"
+        assert storage in ["resized", "encoded"], "storage must be 'resized' or 'encoded'"
+        assert not kwargs.get("use_instance_mask", False) and not kwargs.get("use_keypoint", False), \
+            "Instance masks and keypoints are not supported by PackedDataset"
+        self.cache_path = cache_path
+        self.source_type = source_type
+        self.class_names = class_names
+        self.storage = storage
+        self._source_kwargs = kwargs
+        self._shard = None
+        self._coco_api = None
+        super(PackedDataset, self).__init__(**kwargs)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # the shard is mapped again by each dataloader worker
+        state["_shard"] = None
+        return state
+
+    def _max_scale(self):
+        """
+        Largest scale factor between the original images and the input of the network, which the pipeline
+        can request through multi-scale training and scale augmentation.
+        """
+        scale = max(self.multi_scale) if self.multi_scale else 1.0
+        pipeline_scale = self.pipeline.shape_transform.scale_ratio
+        scale *= max(pipeline_scale) if isinstance(pipeline_scale, (list, tuple)) else pipeline_scale
+        return max(scale, 1.0)
+
+    def _fingerprint(self, img_path, ann_path):
+        fingerprint = {
+            "images": _file_stats(img_path),
+            "annotations": _file_stats(ann_path, ext=".xml" if self.source_type == "voc" else None),
+            "input_size": list(self.input_size),
+            "max_scale": self._max_scale(),
+            "storage": self.storage,
+            "class_names": list(self.class_names) if self.class_names is not None else None,
+        }
+        return hashlib.sha1(json.dumps(fingerprint).encode()).hexdigest()
+
+    def get_data_info(self, ann_path):
+        fingerprint = self._fingerprint(self.img_path, ann_path)
+        meta_file = os.path.join(self.cache_path, _META_NAME)
+        meta = None
+        if os.path.exists(meta_file):
+            with open(meta_file, "r") as f:
+                meta = json.load(f)
+            if meta["fingerprint"] != fingerprint:
+                logging.info("The source dataset has changed, the pack in {} is rebuilt".format(self.cache_path))
+                meta = None
+        if meta is None:
+            meta = self.pack(fingerprint)
+
+        self.class_names = meta["class_names"]
+        self.cat_ids = meta["cat_ids"]
+        index = np.load(os.path.join(self.cache_path, _INDEX_NAME))
+        self.img_offsets = index["img_offsets"]
+        self.img_shapes = index["img_shapes"]
+        self.box_offsets = index["box_offsets"]
+        self.gt_bboxes = index["gt_bboxes"]
+        self.gt_labels = index["gt_labels"]
+        self.img_ids = index["img_ids"].tolist()
+        return [
+            {"file_name": file_name, "height": int(height), "width": int(width), "id": int(img_id)}
+            for file_name, (width, height), img_id in zip(meta["file_names"], index["img_sizes"], index["img_ids"])
+        ]
+
+    def pack(self, fingerprint):
+        """
+        Decode the source dataset once and write its images and annotations to the pack
+        :param fingerprint: fingerprint of the source files and settings
+        :return: metadata of the pack
+        """
+        logging.info("Packing dataset into {}...".format(self.cache_path))
+        tic = time.time()
+        os.makedirs(self.cache_path, exist_ok=True)
+        if self.source_type == "voc":
+            source = XMLDataset(class_names=self.class_names, **self._source_kwargs)
+        else:
+            source = CocoDataset(**self._source_kwargs)
+
+        max_width = self.input_size[0] * self._max_scale()
+        max_height = self.input_size[1] * self._max_scale()
+        img_offsets, img_shapes, img_sizes, img_ids, file_names = [0], [], [], [], []
+        box_offsets, gt_bboxes, gt_labels = [0], [], []
+        with open(os.path.join(self.cache_path, _SHARD_NAME + ".tmp"), "wb") as shard:
+            for idx in range(len(source)):
+                img_info = source.get_per_img_info(idx)
+                image_path = os.path.join(source.img_path, img_info["file_name"])
+                if self.storage == "encoded":
+                    with open(image_path, "rb") as f:
+                        data = f.read()
+                    img_shapes.append((0, 0, 0))
+                else:
+                    img = cv2.imread(image_path)
+                    if img is None:
+                        raise FileNotFoundError("Cant load image {}! Please check image path!".format(image_path))
+                    scale = min(max_width / img.shape[1], max_height / img.shape[0])
+                    if scale < 1:
+                        size = (max(int(round(img.shape[1] * scale)), 1), max(int(round(img.shape[0] * scale)), 1))
+                        img = cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+                    data = np.ascontiguousarray(img).tobytes()
+                    img_shapes.append(img.shape)
+                shard.write(data)
+                img_offsets.append(img_offsets[-1] + len(data))
+                img_sizes.append((img_info["width"], img_info["height"]))
+                img_ids.append(img_info["id"])
+                file_names.append(img_info["file_name"])
+
+                ann = source.get_img_annotation(idx)
+                gt_bboxes.append(ann["bboxes"])
+                gt_labels.append(ann["labels"])
+                box_offsets.append(box_offsets[-1] + len(ann["labels"]))
+
+        np.savez(
+            os.path.join(self.cache_path, _INDEX_NAME),
+            img_offsets=np.array(img_offsets, dtype=np.int64),
+            img_shapes=np.array(img_shapes, dtype=np.int64).reshape(-1, 3),
+            img_sizes=np.array(img_sizes, dtype=np.int64).reshape(-1, 2),
+            img_ids=np.array(img_ids, dtype=np.int64),
+            box_offsets=np.array(box_offsets, dtype=np.int64),
+            gt_bboxes=np.concatenate(gt_bboxes + [np.zeros((0, 4), dtype=np.float32)]).astype(np.float32),
+            gt_labels=np.concatenate(gt_labels + [np.zeros((0,), dtype=np.int64)]).astype(np.int64),
+        )
+        with open(os.path.join(self.cache_path, _COCO_NAME), "w") as f:
+            json.dump(source.coco_api.dataset, f)
+        os.replace(os.path.join(self.cache_path, _SHARD_NAME + ".tmp"), os.path.join(self.cache_path, _SHARD_NAME))
+
+        class_names = self.class_names
+        if class_names is None:
+            class_names = [cat["name"] for cat in source.coco_api.loadCats(source.cat_ids)]
+        meta = {
+            "fingerprint": fingerprint,
+            "storage": self.storage,
+            "input_size": list(self.input_size),
+            "class_names": list(class_names),
+            "cat_ids": list(source.cat_ids),
+            "file_names": file_names,
+        }
+        # the metadata is written last, so that an interrupted pack is never considered valid
+        with open(os.path.join(self.cache_path, _META_NAME), "w") as f:
+            json.dump(meta, f)
+        logging.info("Packed {} images in {:0.2f}s".format(len(file_names), time.time() - tic))
+        return meta
+
+    @property
+    def coco_api(self):
+        # the annotations in COCO format are only needed for evaluation
+        if self._coco_api is None:
+            with open(os.path.join(self.cache_path, _COCO_NAME), "r") as f:
+                self._coco_api = CocoXML(json.load(f))
+        return self._coco_api
+
+    def get_per_img_info(self, idx):
+        return self.data_info[idx]
+
+    def get_img(self, idx):
+        """
+        Read an image from the shard. Pre-resized images are returned as a view of the shard.
+        :param idx: index in dataloader
+        :return: image in BGR order
+        """
+        if self._shard is None:
+            # copy-on-write mapping, so that views are writable without ever modifying the shard
+            self._shard = np.memmap(os.path.join(self.cache_path, _SHARD_NAME), dtype=np.uint8, mode="c")
+        data = self._shard[self.img_offsets[idx]:self.img_offsets[idx + 1]]
+        if self.storage == "encoded":
+            return cv2.imdecode(data, cv2.IMREAD_COLOR)
+        return data.reshape(self.img_shapes[idx])
+
+    def get_img_annotation(self, idx):
+        start, end = self.box_offsets[idx], self.box_offsets[idx + 1]
+        return dict(bboxes=self.gt_bboxes[start:end], labels=self.gt_labels[start:end])
+
+    def get_train_data(self, idx):
+        """
+        Load image and annotation
+        :param idx:
+        :return: meta-data (a dict containing image, annotation and other information)
+        """
+        img_info = self.get_per_img_info(idx)
+        img = self.get_img(idx)
+        ann = self.get_img_annotation(idx)
+        meta = dict(
+            img=img, img_info=img_info, gt_bboxes=ann["bboxes"].copy(), gt_labels=ann["labels"].copy(),
+            raw_size=(img_info["width"], img_info["height"])
+        )
+
+        input_size = self.input_size
+        if self.multi_scale:
+            input_size = self.get_random_size(self.multi_scale, input_size)
+
+        meta = self.pipeline(self, meta, input_size)
+
+        meta["img"] = torch.from_numpy(meta["img"].transpose(2, 0, 1))
+        return meta
+
+    def get_val_data(self, idx):
+        return self.get_train_data(idx)
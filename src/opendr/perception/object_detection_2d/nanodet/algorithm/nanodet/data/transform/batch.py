@@ -0,0 +1,206 @@
+# Copyright 2020-2023 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Dict, List, Optional
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+from opendr.perception.object_detection_2d.nanodet.algorithm.nanodet.data.collate import naive_collate
+
+
+def warp_batch_img(imgs: List[torch.Tensor], matrices: np.ndarray, dst_shapes: List[tuple]) -> torch.Tensor:
+    """
+    Warp a batch of images with perspective matrices, as cv2.warpPerspective() does for each image, with a single
+    bilinear grid sampling. The images are padded to the largest image of the batch and the warped images to the
+    largest warped image, with zeros.
+    :param imgs: images of shape (C, H, W), which can have different sizes
+    :param matrices: matrices from each image to its warped image, of shape (N, 3, 3)
+    :param dst_shapes: (width, height) of each warped image
+    :return: warped images of shape (N, C, max height, max width), as float
+    """
+    batch_size = len(imgs)
+    channels = imgs[0].shape[0]
+    src_h = max(img.shape[1] for img in imgs)
+    src_w = max(img.shape[2] for img in imgs)
+    dst_w = max(shape[0] for shape in dst_shapes)
+    dst_h = max(shape[1] for shape in dst_shapes)
+
+    src = torch.empty((batch_size, channels, src_h, src_w), dtype=torch.float32, device=imgs[0].device)
+    for i, img in enumerate(imgs):
+        height, width = img.shape[1:]
+        src[i, :, :height, :width] = img
+        src[i, :, height:] = 0
+        src[i, :, :height, width:] = 0
+
+    # map the pixel centers of the warped images back to the images, in the normalized coordinates of
+    # grid_sample with align_corners=False, which are folded into the inverse matrices
+    inverse = np.linalg.inv(matrices)
+    normalize = np.array([[2 / src_w, 0, 1 / src_w - 1], [0, 2 / src_h, 1 / src_h - 1], [0, 0, 1]])
+    inverse = torch.from_numpy(normalize @ inverse).to(src)
+    xs = torch.arange(dst_w, dtype=src.dtype, device=src.device).repeat(dst_h)
+    ys = torch.arange(dst_h, dtype=src.dtype, device=src.device).repeat_interleave(dst_w)
+    points = torch.stack([xs, ys, torch.ones_like(xs)], dim=-1).view(1, -1, 3)
+    grid = torch.matmul(points, inverse.transpose(1, 2))
+    grid = grid[..., :2] / grid[..., 2:]
+    # pixels outside of each warped image are sampled outside of the image, which gives zeros
+    sizes = torch.tensor(dst_shapes, dtype=src.dtype, device=src.device)
+    outside = (xs[None] >= sizes[:, 0, None]) | (ys[None] >= sizes[:, 1, None])
+    grid = grid.masked_fill(outside[..., None], -2.0)
+    grid = grid.view(batch_size, dst_h, dst_w, 2)
+    return F.grid_sample(src, grid, mode="bilinear", padding_mode="zeros", align_corners=False)
+
+
+def warp_batch_boxes(boxes: List[np.ndarray], matrices: np.ndarray, dst_shapes: List[tuple]) -> List[np.ndarray]:
+    """
+    Warp the boxes of a batch of images, as warp_boxes() does for each image, with single tensor operations.
+    :param boxes: boxes of each image, of shape (n, 4) in [x1, y1, x2, y2] format
+    :param matrices: warp matrices of the images, of shape (N, 3, 3)
+    :param dst_shapes: (width, height) of each warped image, to which the boxes are clipped
+    :return: warped boxes of each image
+    """
+    counts = [len(b) for b in boxes]
+    if sum(counts) == 0:
+        return boxes
+    all_boxes = torch.from_numpy(np.concatenate([np.asarray(b, dtype=np.float64).reshape(-1, 4) for b in boxes]))
+    img_inds = torch.repeat_interleave(torch.arange(len(boxes)), torch.tensor(counts))
+    # x1y1, x2y2, x1y2, x2y1 corners
+    corners = all_boxes[:, [0, 1, 2, 3, 0, 3, 2, 1]].view(-1, 4, 2)
+    corners = torch.cat([corners, torch.ones_like(corners[..., :1])], dim=-1)
+    corners = torch.matmul(corners, torch.from_numpy(matrices)[img_inds].transpose(1, 2))
+    corners = corners[..., :2] / corners[..., 2:]
+    warped = torch.cat([corners.min(dim=1).values, corners.max(dim=1).values], dim=1)
+    sizes = torch.tensor(dst_shapes, dtype=warped.dtype)[img_inds]
+    warped = torch.min(warped.clamp(min=0), sizes.repeat(1, 2))
+    return [b.numpy().astype(np.float32) for b in warped.split(counts)]
+
+
+class BatchTransform:
+    """Shape transforms, color augmentation and normalization of a whole batch.
+
+    When the pipeline config sets `batch_augment`, the dataloader workers only decode the images and draw
+    their warp matrices, and this transform warps the images and boxes, applies the random brightness,
+    contrast and saturation and normalizes the images of the batch with tensor operations.
+    With `batch_augment: "collate"` (or True) the batch is transformed by the collate function of the
+    dataloader. With `batch_augment: "device"` the collate function attaches the transform to the batch,
+    and the training task transforms it once the raw images are on the training device, which is the
+    faster choice on GPUs, as the warp of cv2 outperforms grid sampling on a CPU core.
+    The color augmentation has the same distribution as color_aug_and_norm() and its random parameters
+    are drawn from the torch random generator, so the batches are deterministic for a seeded generator.
+    The warped images have the size of the largest warped image of the batch and are zero beyond their
+    own size, as if they had been padded by stack_batch_img().
+
+    Args:
+        cfg (Dict): Data pipeline config.
+    """
+
+    def __init__(self, cfg: Dict):
+        assert cfg.get("batch_augment") in [True, "collate", "device"], \
+            "batch_augment must be True, 'collate' or 'device'"
+        self.on_device = cfg.get("batch_augment") == "device"
+        self.brightness = cfg.get("brightness", None)
+        self.contrast = cfg.get("contrast", None)
+        self.saturation = cfg.get("saturation", None)
+        self.mean, self.std = cfg["normalize"]
+
+    def prepare(self, meta: Dict, shape_transform, dst_shape) -> Dict:
+        """
+        Draw the warp of an image in the dataloader worker, without warping it.
+        :param meta: meta-data of the image
+        :param shape_transform: shape transform of the pipeline
+        :param dst_shape: (width, height) of the input of the network
+        :return: meta-data with the warp matrices and the warped image size
+        """
+        assert "gt_masks" not in meta, "Instance masks are not supported by the batch augmentation"
+        M, img_M, dst_shape = shape_transform.get_warp_matrices(meta, dst_shape)
+        meta["warp_matrix"] = M
+        meta["img_warp_matrix"] = img_M
+        meta["dst_shape"] = dst_shape
+        return meta
+
+    @staticmethod
+    def _random_factors(batch_size, low, high, identity, generator):
+        # each augmentation is applied to an image with probability 0.5, as in color_aug_and_norm()
+        apply = torch.rand(batch_size, generator=generator) < 0.5
+        factors = torch.rand(batch_size, generator=generator) * (high - low) + low
+        return torch.where(apply, factors, torch.full_like(factors, identity))
+
+    def color_aug_and_norm(self, imgs: torch.Tensor, valid: torch.Tensor,
+                           generator: Optional[torch.Generator] = None) -> torch.Tensor:
+        """
+        Random brightness, contrast and saturation and normalization of a batch of BGR images.
+        The brightness delta d, contrast factor a and saturation factor s of an image are applied as
+        y = a * (x / 255 + d), followed by the saturation y' = v - s * (v - y) of the HSV color space, where v is
+        the largest channel, and the normalization. As the contrast factors are positive, the largest channel is
+        the same before and after the brightness and contrast, so that all of them are fused into
+        x * A + max_c(x) * B + C, with coefficients per image and channel.
+        :param imgs: images of shape (N, 3, H, W) in [0, 255]
+        :param valid: mask of the pixels inside each image, of shape (N, 1, H, W)
+        :param generator: random generator, defaults to the global torch generator
+        :return: normalized images, which are zero outside of each image
+        """
+        batch_size = imgs.shape[0]
+        delta = torch.zeros(batch_size)
+        contrast = torch.ones(batch_size)
+        saturation = torch.ones(batch_size)
+        if self.brightness is not None:
+            delta = self._random_factors(batch_size, -self.brightness, self.brightness, 0.0, generator)
+        if self.contrast is not None:
+            contrast = self._random_factors(batch_size, *self.contrast, 1.0, generator)
+        if self.saturation is not None:
+            saturation = self._random_factors(batch_size, *self.saturation, 1.0, generator)
+
+        mean = torch.tensor(self.mean, dtype=torch.float64).view(1, 3) / 255
+        std = torch.tensor(self.std, dtype=torch.float64).view(1, 3) / 255
+        delta, contrast, saturation = delta.double()[:, None], contrast.double()[:, None], saturation.double()[:, None]
+        scale = (contrast * saturation / 255 / std).to(imgs).view(-1, 3, 1, 1)
+        value_scale = (contrast * (1 - saturation) / 255 / std).to(imgs).view(-1, 3, 1, 1)
+        offset = ((delta * contrast - mean) / std).to(imgs).view(-1, 3, 1, 1)
+
+        out = imgs * scale
+        if self.saturation is not None:
+            out.addcmul_(imgs.max(dim=1, keepdim=True).values, value_scale)
+        return out.addcmul_(valid.to(imgs), offset)
+
+    def __call__(self, meta: Dict, generator: Optional[torch.Generator] = None) -> Dict:
+        """
+        Warp, augment and normalize a collated batch.
+        :param meta: batch meta-data, collated with naive_collate()
+        :param generator: random generator, defaults to the global torch generator
+        :return: batch meta-data with images of the same size
+        """
+        dst_shapes = meta.pop("dst_shape")
+        img_matrices = np.stack(meta.pop("img_warp_matrix"))
+        imgs = warp_batch_img(meta["img"], img_matrices, dst_shapes)
+        height, width = imgs.shape[2:]
+        sizes = torch.tensor(dst_shapes, device=imgs.device)
+        valid = (torch.arange(width, device=imgs.device).view(1, 1, 1, -1) < sizes[:, 0].view(-1, 1, 1, 1)) & \
+            (torch.arange(height, device=imgs.device).view(1, 1, -1, 1) < sizes[:, 1].view(-1, 1, 1, 1))
+        imgs = self.color_aug_and_norm(imgs, valid, generator)
+        meta["img"] = list(imgs.unbind(0))
+        if "gt_bboxes" in meta:
+            meta["gt_bboxes"] = warp_batch_boxes(meta["gt_bboxes"], np.stack(meta["warp_matrix"]), dst_shapes)
+        return meta
+
+    def collate(self, batch: List[Dict]) -> Dict:
+        """
+        Collate function of the dataloader, which collates a batch with naive_collate() and transforms it, or
+        attaches the transform to it when the batch is transformed on the training device.
+        """
+        meta = naive_collate(batch)
+        if self.on_device:
+            meta["batch_transform"] = self
+            return meta
+        return self(meta)
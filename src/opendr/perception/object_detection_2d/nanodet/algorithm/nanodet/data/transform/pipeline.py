@@ -18,6 +18,8 @@ from typing import Dict, Tuple
 
 from torch.utils.data import Dataset
 
+from opendr.perception.object_detection_2d.nanodet.algorithm.nanodet.data.collate import naive_collate
+from opendr.perception.object_detection_2d.nanodet.algorithm.nanodet.data.transform.batch import BatchTransform
 from opendr.perception.object_detection_2d.nanodet.algorithm.nanodet.data.transform.color import color_aug_and_norm
 from opendr.perception.object_detection_2d.nanodet.algorithm.nanodet.data.transform.warp import ShapeTransform, warp_and_resize
 
@@ -43,6 +45,11 @@ class Pipeline:
     """Data process pipeline. Apply augmentation and pre-processing on
     meta_data from dataset.
 
+    If the config sets `batch_augment`, the images are only decoded and their
+    warp matrices drawn for each sample, and the images are warped, color
+    augmented and normalized for the whole batch, see BatchTransform. The
+    dataloaders of the dataset must then use `collate_fn`.
+
     Args:
         cfg (Dict): Data pipeline config.
         keep_ratio (bool): Whether to keep aspect ratio when resizing image.
@@ -52,8 +59,18 @@ class Pipeline:
     def __init__(self, cfg: Dict, keep_ratio: bool):
         self.shape_transform = ShapeTransform(keep_ratio, **cfg)
         self.color = functools.partial(color_aug_and_norm, kwargs=cfg)
+        self.batch_transform = BatchTransform(cfg) if cfg.get("batch_augment", False) else None
+
+    @property
+    def collate_fn(self):
+        """Collate function of the dataloaders of the dataset"""
+        if self.batch_transform is not None:
+            return self.batch_transform.collate
+        return naive_collate
 
     def __call__(self, dataset: Dataset, meta: Dict, dst_shape: Tuple[int, int]):
+        if self.batch_transform is not None:
+            return self.batch_transform.prepare(meta, self.shape_transform, dst_shape)
         meta = self.shape_transform(meta, dst_shape=dst_shape)
         meta = self.color(meta=meta)
         return meta
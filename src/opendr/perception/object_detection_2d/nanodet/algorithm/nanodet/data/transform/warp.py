@@ -277,10 +277,21 @@ class ShapeTransform:
         self.flip_prob = flip
         self.translate_ratio = translate
 
-    def __call__(self, meta_data, dst_shape):
+    def get_warp_matrices(self, meta_data, dst_shape):
+        """
+        Draw a random warp of an image.
+        :param meta_data: meta-data of the image, with an optional raw_size for images that are stored downscaled
+        :param dst_shape: (width, height) of the input of the network
+        :return: warp matrix from the original image, warp matrix from the stored image and (width, height)
+            of the warped image
+        """
         raw_img = meta_data["img"]
         height = raw_img.shape[0]  # shape(h,w,c)
         width = raw_img.shape[1]
+        # images stored downscaled (e.g. by PackedDataset) are warped as if they had their original size
+        raw_width, raw_height = width, height
+        if "raw_size" in meta_data:
+            width, height = meta_data.pop("raw_size")
 
         # center
         C = np.eye(3)
@@ -315,7 +326,15 @@ class ShapeTransform:
 
         ResizeM = get_resize_matrix((width, height), dst_shape, self.keep_ratio)
         M = ResizeM @ M
-        img = cv2.warpPerspective(raw_img, M, dsize=tuple(dst_shape))
+        if (raw_width, raw_height) != (width, height):
+            img_M = M @ np.diag([width / raw_width, height / raw_height, 1.0])
+        else:
+            img_M = M
+        return M, img_M, tuple(dst_shape)
+
+    def __call__(self, meta_data, dst_shape):
+        M, img_M, dst_shape = self.get_warp_matrices(meta_data, dst_shape)
+        img = cv2.warpPerspective(meta_data["img"], img_M, dsize=dst_shape)
         meta_data["img"] = img
         meta_data["warp_matrix"] = M
         if "gt_bboxes" in meta_data:
@@ -324,7 +343,7 @@ class ShapeTransform:
         if "gt_masks" in meta_data:
             for i, mask in enumerate(meta_data["gt_masks"]):
                 meta_data["gt_masks"][i] = cv2.warpPerspective(
-                    mask, M, dsize=tuple(dst_shape)
+                    mask, M, dsize=dst_shape
                 )
 
         return meta_data
@@ -41,7 +41,8 @@ class Predictor(object):
 
         self.model = model.to(device).eval()
 
-        self.pipeline = Pipeline(self.cfg.data.val.pipeline, self.cfg.data.val.keep_ratio)
+        # The images are processed one at a time, so the batch level augmentation of the dataloaders is disabled
+        self.pipeline = Pipeline(dict(self.cfg.data.val.pipeline, batch_augment=False), self.cfg.data.val.keep_ratio)
 
     def inference(self, img, verbose=True):
         img_info = {"id": 0}
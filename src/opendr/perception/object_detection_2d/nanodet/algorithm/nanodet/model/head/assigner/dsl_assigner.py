@@ -152,3 +152,167 @@ class DynamicSoftLabelAssigner(BaseAssigner):
         matched_gt_inds = matching_matrix[fg_mask_inboxes, :].argmax(1)
         matched_pred_ious = (matching_matrix * pairwise_ious).sum(1)[fg_mask_inboxes]
         return matched_pred_ious, matched_gt_inds
+
+    def assign_batch(
+        self,
+        pred_scores,
+        priors,
+        decoded_bboxes,
+        gt_bboxes,
+        gt_labels,
+        gt_mask,
+    ):
+        """Assign gt to priors of a batch of images with dynamic soft label
+        assignment, in the same way as calling `assign` on each image.
+        The ground truths of the images are padded to the largest number of
+        ground truths in the batch, and the cost volume and the dynamic k
+        matching of all the images are computed at once.
+        Args:
+            pred_scores (Tensor): Classification scores, a 3D-Tensor with shape
+                [batch_size, num_priors, num_classes]
+            priors (Tensor): All priors, a 3D-Tensor with shape
+                [batch_size, num_priors, 4] in [cx, xy, stride_w, stride_y] format.
+            decoded_bboxes (Tensor): Predicted bboxes, a 3D-Tensor with shape
+                [batch_size, num_priors, 4] in [tl_x, tl_y, br_x, br_y] format.
+            gt_bboxes (Tensor): Padded ground truth bboxes, a 3D-Tensor with
+                shape [batch_size, max_num_gts, 4] in [tl_x, tl_y, br_x, br_y]
+                format.
+            gt_labels (Tensor): Padded ground truth labels, a 2D-Tensor with
+                shape [batch_size, max_num_gts].
+            gt_mask (Tensor): Mask of the ground truths which are not padding,
+                a 2D-Tensor with shape [batch_size, max_num_gts].
+
+        Returns:
+            list[:obj:`AssignResult`]: The assigned result of each image.
+        """
+        INF = 100000000
+        batch_size, num_bboxes = decoded_bboxes.shape[:2]
+        num_gts = gt_mask.sum(dim=1)
+        gt_labels = gt_labels.long().clamp(min=0)
+
+        prior_x = priors[..., 0, None]
+        prior_y = priors[..., 1, None]
+        gt_x1, gt_y1, gt_x2, gt_y2 = gt_bboxes[:, None].unbind(dim=-1)
+        is_in_gts = (
+            (prior_x > gt_x1) & (prior_y > gt_y1) & (gt_x2 > prior_x) & (gt_y2 > prior_y) & gt_mask[:, None, :]
+        )
+        valid_mask = is_in_gts.any(dim=2)
+
+        # As in `assign`, the costs are only computed for the valid priors,
+        # which are gathered to the front and padded to the largest number of
+        # valid priors in the batch
+        num_valid = valid_mask.sum(dim=1)
+        max_num_valid = int(num_valid.max())
+        if max_num_valid == 0:
+            valid_inds = valid_mask.new_zeros((batch_size, 0), dtype=torch.long)
+        else:
+            valid_inds = torch.sort(
+                valid_mask.to(torch.uint8), dim=1, descending=True, stable=True
+            ).indices[:, :max_num_valid]
+        prior_mask = torch.arange(max_num_valid, device=valid_mask.device)[None, :] < num_valid[:, None]
+        pair_mask = prior_mask[..., None] & gt_mask[:, None, :]
+
+        valid_decoded_bbox = decoded_bboxes.gather(1, valid_inds[..., None].expand(-1, -1, 4))
+        valid_pred_scores = pred_scores.gather(
+            1, valid_inds[..., None].expand(-1, -1, pred_scores.size(-1))
+        )
+
+        pairwise_ious = bbox_overlaps(valid_decoded_bbox, gt_bboxes)
+        pairwise_ious = torch.where(pair_mask, pairwise_ious, pairwise_ious.new_zeros(()))
+        iou_cost = -torch.log(pairwise_ious + 1e-7)
+
+        # The classification cost is the binary cross entropy with the soft
+        # label, weighted by the squared difference. It is computed as the cost
+        # of all classes with a zero label, corrected for the class of the gt,
+        # which avoids a [batch_size, num_valid, max_num_gts, num_classes] volume.
+        neg_cost = self._weighted_bce(valid_pred_scores, 0.0).sum(dim=-1, keepdim=True)
+        gt_scores = valid_pred_scores.gather(
+            2, gt_labels[:, None, :].expand(-1, max_num_valid, -1)
+        )
+        cls_cost = (
+            neg_cost
+            - self._weighted_bce(gt_scores, 0.0)
+            + self._weighted_bce(gt_scores, pairwise_ious)
+        )
+
+        cost = cls_cost + iou_cost * self.iou_factor
+        cost = torch.where(pair_mask, cost, cost.new_full((), INF))
+
+        matching_matrix, fg_mask = self.dynamic_k_matching_batch(
+            cost, pairwise_ious, pair_mask
+        )
+        matched_gt_inds = matching_matrix.to(torch.uint8).argmax(dim=2)
+        matched_pred_ious = (matching_matrix * pairwise_ious).sum(dim=2)
+
+        # convert to AssignResult format
+        assigned_gt_inds = decoded_bboxes.new_zeros((batch_size, num_bboxes), dtype=torch.long)
+        assigned_gt_inds.scatter_(
+            1, valid_inds, torch.where(fg_mask, matched_gt_inds + 1, matched_gt_inds.new_zeros(()))
+        )
+        assigned_labels = assigned_gt_inds.new_full((batch_size, num_bboxes), -1)
+        assigned_labels.scatter_(
+            1, valid_inds, torch.where(fg_mask, gt_labels.gather(1, matched_gt_inds), gt_labels.new_full((), -1))
+        )
+        max_overlaps = decoded_bboxes.new_full((batch_size, num_bboxes), -INF, dtype=torch.float32)
+        max_overlaps.scatter_(
+            1, valid_inds, torch.where(fg_mask, matched_pred_ious, matched_pred_ious.new_full((), -INF))
+        )
+        # Images without ground truth or without priors inside a ground truth
+        # get an empty assignment
+        empty = (num_gts == 0) | (num_valid == 0)
+        max_overlaps.masked_fill_(empty[:, None], 0.0)
+        return [
+            AssignResult(
+                num_gt, assigned_gt_inds[i], max_overlaps[i], labels=assigned_labels[i]
+            )
+            for i, num_gt in enumerate(num_gts.tolist())
+        ]
+
+    @staticmethod
+    def _weighted_bce(scores, soft_label):
+        """Binary cross entropy weighted by the squared difference of the scores
+        and the soft label, with the log clamping of `F.binary_cross_entropy`."""
+        log_scores = torch.log(scores).clamp(min=-100)
+        log_one_minus_scores = torch.log1p(-scores).clamp(min=-100)
+        bce = (soft_label - 1) * log_one_minus_scores - soft_label * log_scores
+        return bce * (soft_label - scores).pow(2.0)
+
+    def dynamic_k_matching_batch(self, cost, pairwise_ious, pair_mask):
+        """Dynamic k matching of a batch of images, see `dynamic_k_matching`.
+
+        Args:
+            cost (Tensor): Cost volume of shape [batch_size, num_priors,
+                max_num_gts], which is INF for the masked pairs.
+            pairwise_ious (Tensor): Pairwise iou volume, which is zero for the
+                masked pairs.
+            pair_mask (Tensor): Mask of the pairs of a valid prior and a gt.
+
+        Returns:
+            tuple[Tensor]: Matching volume of the priors to the gts, and mask
+                of the matched priors.
+        """
+        num_bboxes = cost.size(1)
+        # select candidate topk ious for dynamic-k calculation, the masked
+        # priors have zero iou and do not change the sums
+        candidate_topk = min(self.topk, num_bboxes)
+        topk_ious, _ = torch.topk(pairwise_ious, candidate_topk, dim=1)
+        # calculate dynamic k for each gt
+        dynamic_ks = torch.clamp(topk_ious.sum(1).int(), min=1)
+        # dynamic k is at most candidate_topk, so the priors of each gt are
+        # among its candidate_topk lowest costs
+        _, pos_idx = torch.topk(cost, candidate_topk, dim=1, largest=False)
+        ranks = torch.arange(candidate_topk, device=cost.device)[None, :, None]
+        matching_matrix = torch.zeros_like(pair_mask)
+        matching_matrix.scatter_(1, pos_idx, ranks < dynamic_ks[:, None, :])
+        matching_matrix &= pair_mask
+
+        prior_match_gt_mask = matching_matrix.sum(2) > 1
+        cost_argmin = cost.argmin(dim=2)
+        single_match = torch.zeros_like(matching_matrix)
+        single_match.scatter_(2, cost_argmin[..., None], True)
+        matching_matrix = torch.where(
+            prior_match_gt_mask[..., None], single_match, matching_matrix
+        )
+        # get foreground mask inside box and center prior
+        fg_mask = matching_matrix.sum(2) > 0
+        return matching_matrix, fg_mask
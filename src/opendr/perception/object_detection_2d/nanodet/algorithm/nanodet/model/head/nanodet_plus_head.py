@@ -197,8 +197,7 @@ class NanoDetPlusHead(nn.Module):
                 self.distribution_project(aux_reg_preds) * center_priors[..., 2, None]
             )
             aux_decoded_bboxes = distance2bbox(center_priors[..., :2], aux_dis_preds)
-            batch_assign_res = multi_apply(
-                self.target_assign_single_img,
+            batch_assign_res = self.target_assign_batch(
                 aux_cls_preds.detach(),
                 center_priors,
                 aux_decoded_bboxes.detach(),
@@ -207,8 +206,7 @@ class NanoDetPlusHead(nn.Module):
             )
         else:
             # use self prediction to assign
-            batch_assign_res = multi_apply(
-                self.target_assign_single_img,
+            batch_assign_res = self.target_assign_batch(
                 cls_preds.detach(),
                 center_priors,
                 decoded_bboxes.detach(),
@@ -337,6 +335,88 @@ class NanoDetPlusHead(nn.Module):
             num_pos_per_img,
         )
 
+    @torch.no_grad()
+    def target_assign_batch(
+        self, cls_preds, center_priors, decoded_bboxes, gt_bboxes, gt_labels
+    ):
+        """Compute classification, regression, and objectness targets for
+        priors in a batch of images, with the same results as calling
+        `target_assign_single_img` on each image. The ground truths are padded
+        to the largest number of ground truths in the batch and all the images
+        are assigned at once.
+        Args:
+            cls_preds (Tensor): Classification predictions, a 3D-Tensor with
+                shape [batch_size, num_priors, num_classes]
+            center_priors (Tensor): All priors, a 3D-Tensor with shape
+                [batch_size, num_priors, 4] in [cx, xy, stride_w, stride_y]
+                format.
+            decoded_bboxes (Tensor): Decoded bboxes predictions, a 3D-Tensor
+                with shape [batch_size, num_priors, 4] in [tl_x, tl_y, br_x,
+                br_y] format.
+            gt_bboxes (list[ndarray]): Ground truth bboxes of each image, with
+                shape [num_gts, 4] in [tl_x, tl_y, br_x, br_y] format.
+            gt_labels (list[ndarray]): Ground truth labels of each image, with
+                shape [num_gts].
+        """
+        batch_size, num_priors = center_priors.shape[:2]
+        device = center_priors.device
+        num_gts = [len(labels) for labels in gt_labels]
+        max_num_gts = max(num_gts)
+        if max_num_gts == 0:
+            return multi_apply(
+                self.target_assign_single_img,
+                cls_preds,
+                center_priors,
+                decoded_bboxes,
+                gt_bboxes,
+                gt_labels,
+            )
+
+        padded_bboxes = np.zeros((batch_size, max_num_gts, 4), dtype=np.float32)
+        padded_labels = np.zeros((batch_size, max_num_gts), dtype=np.int64)
+        gt_mask = np.zeros((batch_size, max_num_gts), dtype=bool)
+        for i, (bboxes, labels) in enumerate(zip(gt_bboxes, gt_labels)):
+            padded_bboxes[i, :len(labels)] = bboxes
+            padded_labels[i, :len(labels)] = labels
+            gt_mask[i, :len(labels)] = True
+        padded_bboxes = torch.from_numpy(padded_bboxes).to(device, decoded_bboxes.dtype)
+        padded_labels = torch.from_numpy(padded_labels).to(device)
+        gt_mask = torch.from_numpy(gt_mask).to(device)
+
+        assign_results = self.assigner.assign_batch(
+            cls_preds.sigmoid(), center_priors, decoded_bboxes, padded_bboxes, padded_labels, gt_mask
+        )
+        gt_inds = torch.stack([assign_result.gt_inds for assign_result in assign_results])
+        max_overlaps = torch.stack([assign_result.max_overlaps for assign_result in assign_results])
+        pos_mask = gt_inds > 0
+        pos_assigned_gt_inds = (gt_inds - 1).clamp(min=0)
+
+        pos_gt_bboxes = padded_bboxes.gather(
+            1, pos_assigned_gt_inds[..., None].expand(-1, -1, 4)
+        )
+        bbox_targets = torch.where(
+            pos_mask[..., None], pos_gt_bboxes, center_priors.new_zeros(())
+        )
+        dist_targets = bbox2distance(
+            center_priors[..., :2].reshape(-1, 2), pos_gt_bboxes.reshape(-1, 4)
+        ).reshape(batch_size, num_priors, 4) / center_priors[..., 2, None]
+        dist_targets = torch.where(
+            pos_mask[..., None], dist_targets, center_priors.new_zeros(())
+        ).clamp(min=0, max=self.reg_max - 0.1)
+        labels = torch.where(
+            pos_mask,
+            padded_labels.gather(1, pos_assigned_gt_inds),
+            padded_labels.new_full((), self.num_classes),
+        )
+        label_scores = torch.where(pos_mask, max_overlaps, max_overlaps.new_zeros(()))
+        return (
+            list(labels),
+            list(label_scores),
+            list(bbox_targets),
+            list(dist_targets),
+            pos_mask.sum(dim=1).tolist(),
+        )
+
     def sample(self, assign_result, gt_bboxes):
         """Sample positive and negative bboxes."""
         pos_inds = (
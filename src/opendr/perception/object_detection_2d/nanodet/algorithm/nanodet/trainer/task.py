@@ -54,6 +54,11 @@ class TrainingTask(LightningModule):
             self.avg_model = copy.deepcopy(self.model)
 
     def _preprocess_batch_input(self, batch):
+        batch_transform = batch.pop("batch_transform", None)
+        if batch_transform is not None:
+            # raw images are warped and augmented on the device, see BatchTransform
+            batch["img"] = [img.to(self.device) for img in batch["img"]]
+            batch = batch_transform(batch)
         batch_imgs = batch["img"]
         if isinstance(batch_imgs, list):
             batch_imgs = [img.to(self.device) for img in batch_imgs]
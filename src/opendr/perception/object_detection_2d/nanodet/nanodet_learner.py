@@ -23,7 +23,6 @@ from pytorch_lightning.callbacks import ProgressBar
 
 from opendr.perception.object_detection_2d.nanodet.algorithm.nanodet.util.check_point import save_model_state
 from opendr.perception.object_detection_2d.nanodet.algorithm.nanodet.model.arch import build_model
-from opendr.perception.object_detection_2d.nanodet.algorithm.nanodet.data.collate import naive_collate
 from opendr.perception.object_detection_2d.nanodet.algorithm.nanodet.data.dataset import build_dataset
 from opendr.perception.object_detection_2d.nanodet.algorithm.nanodet.trainer.task import TrainingTask
 from opendr.perception.object_detection_2d.nanodet.algorithm.nanodet.evaluator import build_evaluator
@@ -382,7 +381,7 @@ class NanodetLearner(Learner):
             shuffle=True,
             num_workers=self.cfg.device.workers_per_gpu,
             pin_memory=True,
-            collate_fn=naive_collate,
+            collate_fn=train_dataset.pipeline.collate_fn,
             drop_last=True,
         )
         val_dataloader = torch.utils.data.DataLoader(
@@ -391,7 +390,7 @@ class NanodetLearner(Learner):
             shuffle=False,
             num_workers=self.cfg.device.workers_per_gpu,
             pin_memory=True,
-            collate_fn=naive_collate,
+            collate_fn=val_dataset.pipeline.collate_fn,
             drop_last=False,
         )
 
@@ -459,7 +458,7 @@ class NanodetLearner(Learner):
             shuffle=False,
             num_workers=self.cfg.device.workers_per_gpu,
             pin_memory=True,
-            collate_fn=naive_collate,
+            collate_fn=val_dataset.pipeline.collate_fn,
             drop_last=False,
         )
         evaluator = build_evaluator(self.cfg.evaluator, val_dataset)
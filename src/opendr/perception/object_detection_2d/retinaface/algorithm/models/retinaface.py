@@ -20,7 +20,7 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-import datetime
+from collections import OrderedDict
 import numpy as np
 import mxnet as mx
 from mxnet import ndarray as nd
@@ -31,6 +31,8 @@ from opendr.perception.object_detection_2d.retinaface.algorithm.processing.gener
 from opendr.perception.object_detection_2d.retinaface.algorithm.processing.bbox_transform import clip_boxes
 from opendr.perception.object_detection_2d.retinaface.algorithm.processing.nms import cpu_nms_wrapper, gpu_nms_wrapper
 
+_ANCHOR_CACHE_SIZE = 32
+
 
 class RetinaFace:
     def __init__(self, prefix=None, epoch=0, ctx_id=0, network='net3', nms=0.4, nocrop=False, decay4=0.5, vote=False,
@@ -145,6 +147,7 @@ class RetinaFace:
             self._anchors_fpn[k] = v
 
         self._num_anchors = dict(zip(self.fpn_keys, [anchors.shape[0] for anchors in self._anchors_fpn.values()]))
+        self._anchor_cache = OrderedDict()
 
         if prefix is not None:
             sym, arg_params, aux_params = mx.model.load_checkpoint(prefix, epoch)
@@ -192,200 +195,185 @@ class RetinaFace:
             self.model.bind(data_shapes=[('data', (1, 3, image_size[0], image_size[1]))], for_training=False)
             self.model.set_params(arg_params, aux_params)
 
-    def detect(self, img, threshold=0.5, scales=[1.0], do_flip=False):
-        proposals_list = []
-        scores_list = []
-        mask_scores_list = []
-        landmarks_list = []
-        strides_list = []
-        timea = datetime.datetime.now()
-        flips = [0]
-        if do_flip:
-            flips = [0, 1]
+    def cached_anchors_plane(self, stride, height, width):
+        """
+        Anchors of a stride, which only depend on the size of its feature map, so that they are cached by
+        (stride, height, width). The least recently used planes are evicted beyond _ANCHOR_CACHE_SIZE.
+        :return: [height * width * A, 4] anchors
+        """
+        key = (stride, height, width)
+        anchors = self._anchor_cache.get(key)
+        if anchors is None:
+            anchors = anchors_plane(height, width, stride, self._anchors_fpn['stride%s' % stride])
+            anchors = anchors.reshape((-1, 4))
+            self._anchor_cache[key] = anchors
+            while len(self._anchor_cache) > _ANCHOR_CACHE_SIZE:
+                self._anchor_cache.popitem(last=False)
+        else:
+            self._anchor_cache.move_to_end(key)
+        return anchors
 
-        imgs = [img]
-        if isinstance(img, list):
-            imgs = img
-        for img in imgs:
-            if isinstance(img, mx.ndarray.NDArray):
-                img = img.asnumpy()
-            for im_scale in scales:
-                for flip in flips:
-                    if im_scale != 1.0:
-                        im = cv2.resize(img, None, None, fx=im_scale, fy=im_scale, interpolation=cv2.INTER_LINEAR)
-                    else:
-                        im = img.copy()
-                    if flip:
-                        im = im[:, ::-1, :]
-                    if self.nocrop:
-                        if im.shape[0] % 32 == 0:
-                            h = im.shape[0]
-                        else:
-                            h = (im.shape[0] // 32 + 1) * 32
-                        if im.shape[1] % 32 == 0:
-                            w = im.shape[1]
-                        else:
-                            w = (im.shape[1] // 32 + 1) * 32
-                        _im = np.zeros((h, w, 3), dtype=np.float32)
-                        _im[0:im.shape[0], 0:im.shape[1], :] = im
-                        im = _im
-                    else:
-                        im = im.astype(np.float32)
-                    if self.debug:
-                        time_b = datetime.datetime.now()
-                        diff = time_b - timea
-                        print('X1 uses', diff.total_seconds(), 'seconds')
-                    im_info = [im.shape[0], im.shape[1]]
-                    im_tensor = np.zeros((1, 3, im.shape[0], im.shape[1]))
-                    for i in range(3):
-                        im_tensor[0, i, :, :] = (im[:, :, 2 - i] / self.pixel_scale - self.pixel_means[2 - i]) / \
-                                                self.pixel_stds[2 - i]
-                    if self.debug:
-                        time_b = datetime.datetime.now()
-                        diff = time_b - timea
-                        print('X2 uses', diff.total_seconds(), 'seconds')
-                    data = nd.array(im_tensor)
-                    db = mx.io.DataBatch(data=(data,), provide_data=[('data', data.shape)])
-                    if self.debug:
-                        time_b = datetime.datetime.now()
-                        diff = time_b - timea
-                        print('X3 uses', diff.total_seconds(), 'seconds')
-                    self.model.forward(db, is_train=False)
-                    net_out = self.model.get_outputs()
-
-                    sym_idx = 0
-
-                    for _idx, s in enumerate(self._feat_stride_fpn):
-                        # _key = 'stride%s' % s
-                        stride = int(s)
-                        is_cascade = False
-                        if self.cascade:
-                            is_cascade = True
-                        scores = net_out[sym_idx].asnumpy()
-                        if self.cov:
-                            type_scores = net_out[sym_idx + 3].asnumpy()
-                        if self.debug:
-                            time_b = datetime.datetime.now()
-                            diff = time_b - timea
-                            print('A uses', diff.total_seconds(), 'seconds')
-                        A = self._num_anchors['stride%s' % s]
-                        scores = scores[:, A:, :, :]
-                        if self.cov:
-                            mask_scores = type_scores[:, A * 2:, :, :]  # x, A, x, x
-
-                        bbox_deltas = net_out[sym_idx + 1].asnumpy()
-
-                        height, width = bbox_deltas.shape[2], bbox_deltas.shape[3]
-
-                        K = height * width
-                        anchors_fpn = self._anchors_fpn['stride%s' % s]
-                        anchors = anchors_plane(height, width, stride, anchors_fpn)
-                        anchors = anchors.reshape((K * A, 4))
-                        scores = scores.transpose((0, 2, 3, 1)).reshape((-1, 1))
-                        if self.cov:
-                            mask_scores = mask_scores.transpose((0, 2, 3, 1)).reshape((-1, 1))
-
-                        bbox_deltas = bbox_deltas.transpose((0, 2, 3, 1))
-                        bbox_pred_len = bbox_deltas.shape[3] // A
-                        bbox_deltas = bbox_deltas.reshape((-1, bbox_pred_len))
-                        bbox_deltas[:, 0::4] = bbox_deltas[:, 0::4] * self.bbox_stds[0]
-                        bbox_deltas[:, 1::4] = bbox_deltas[:, 1::4] * self.bbox_stds[1]
-                        bbox_deltas[:, 2::4] = bbox_deltas[:, 2::4] * self.bbox_stds[2]
-                        bbox_deltas[:, 3::4] = bbox_deltas[:, 3::4] * self.bbox_stds[3]
-                        proposals = self.bbox_pred(anchors, bbox_deltas)
-
-                        if is_cascade:
-                            cascade_sym_num = 0
-                            cls_cascade = False
-                            bbox_cascade = False
-                            __idx = [3, 4]
-                            if not self.use_landmarks:
-                                __idx = [2, 3]
-                            for diff_idx in __idx:
-                                if sym_idx + diff_idx >= len(net_out):
-                                    break
-                                body = net_out[sym_idx + diff_idx].asnumpy()
-                                if body.shape[1] // A == 2:  # cls branch
-                                    if cls_cascade or bbox_cascade:
-                                        break
-                                    else:
-                                        cascade_scores = body[:, self._num_anchors['stride%s' % s]:, :, :]
-                                        cascade_scores = cascade_scores.transpose((0, 2, 3, 1)).reshape((-1, 1))
-                                        scores = cascade_scores
-                                        cascade_sym_num += 1
-                                        cls_cascade = True
-                                elif body.shape[1] // A == 4:  # bbox branch
-                                    cascade_deltas = body.transpose((0, 2, 3, 1)).reshape((-1, bbox_pred_len))
-                                    cascade_deltas[:, 0::4] = cascade_deltas[:, 0::4] * self.bbox_stds[0]
-                                    cascade_deltas[:, 1::4] = cascade_deltas[:, 1::4] * self.bbox_stds[1]
-                                    cascade_deltas[:, 2::4] = cascade_deltas[:, 2::4] * self.bbox_stds[2]
-                                    cascade_deltas[:, 3::4] = cascade_deltas[:, 3::4] * self.bbox_stds[3]
-                                    proposals = self.bbox_pred(proposals, cascade_deltas)
-                                    cascade_sym_num += 1
-                                    bbox_cascade = True
-
-                        proposals = clip_boxes(proposals, im_info[:2])
-
-                        if stride == 4 and self.decay4 < 1.0:
-                            scores *= self.decay4
-
-                        scores_ravel = scores.ravel()
-                        order = np.where(scores_ravel >= threshold)[0]
-                        proposals = proposals[order, :]
-                        scores = scores[order]
-                        if self.cov:
-                            mask_scores = mask_scores[order]
-                        if flip:
-                            old_x1 = proposals[:, 0].copy()
-                            old_x2 = proposals[:, 2].copy()
-                            proposals[:, 0] = im.shape[1] - old_x2 - 1
-                            proposals[:, 2] = im.shape[1] - old_x1 - 1
-
-                        proposals[:, 0:4] /= im_scale
-
-                        proposals_list.append(proposals)
-                        scores_list.append(scores)
-                        if self.cov:
-                            mask_scores_list.append(mask_scores)
-
-                        if self.nms_threshold < 0.0:
-                            _strides = np.empty(shape=(scores.shape), dtype=np.float32)
-                            _strides.fill(stride)
-                            strides_list.append(_strides)
-
-                        if not self.vote and self.use_landmarks:
-                            landmark_deltas = net_out[sym_idx + 2].asnumpy()
-                            landmark_pred_len = landmark_deltas.shape[1] // A
-                            landmark_deltas = landmark_deltas.transpose((0, 2, 3, 1)).reshape(
-                                (-1, 5, landmark_pred_len // 5))
-                            landmark_deltas *= self.landmark_std
-                            landmarks = self.landmark_pred(anchors, landmark_deltas)
-                            landmarks = landmarks[order, :]
-
-                            if flip:
-                                landmarks[:, :, 0] = im.shape[1] - landmarks[:, :, 0] - 1
-                                order = [1, 0, 2, 4, 3]
-                                flandmarks = landmarks.copy()
-                                for idx, a in enumerate(order):
-                                    flandmarks[:, idx, :] = landmarks[:, a, :]
-                                landmarks = flandmarks
-                            landmarks[:, :, 0:2] /= im_scale
-                            landmarks_list.append(landmarks)
-                        if self.cov:
-                            sym_idx += 4
+    def _im_tensor(self, img, im_scale, flip):
+        """
+        Resize, flip, pad and normalize an image into a (3, H, W) network input.
+        """
+        if im_scale != 1.0:
+            im = cv2.resize(img, None, None, fx=im_scale, fy=im_scale, interpolation=cv2.INTER_LINEAR)
+        else:
+            im = img.copy()
+        if flip:
+            im = im[:, ::-1, :]
+        if self.nocrop:
+            if im.shape[0] % 32 == 0:
+                h = im.shape[0]
+            else:
+                h = (im.shape[0] // 32 + 1) * 32
+            if im.shape[1] % 32 == 0:
+                w = im.shape[1]
+            else:
+                w = (im.shape[1] // 32 + 1) * 32
+            _im = np.zeros((h, w, 3), dtype=np.float32)
+            _im[0:im.shape[0], 0:im.shape[1], :] = im
+            im = _im
+        else:
+            im = im.astype(np.float32)
+        # Normalize in float32, as the per-channel normalization did
+        pixel_means = np.asarray(self.pixel_means[::-1], dtype=np.float32)
+        pixel_stds = np.asarray(self.pixel_stds[::-1], dtype=np.float32)
+        im = (im[:, :, ::-1] / np.float32(self.pixel_scale) - pixel_means) / pixel_stds
+        return im.transpose((2, 0, 1))
+
+    def _forward(self, im_tensor):
+        data = nd.array(im_tensor)
+        db = mx.io.DataBatch(data=(data,), provide_data=[('data', data.shape)])
+        self.model.forward(db, is_train=False)
+        return [out.asnumpy() for out in self.model.get_outputs()]
+
+    def _decode(self, net_out, idx, im_shape, im_scale, flip, threshold):
+        """
+        Decode the outputs of an image of the batch. The scores of all strides are thresholded at once, and only
+        the anchors and deltas of the kept proposals are gathered from the outputs and decoded, in a single pass
+        over the concatenated strides. The proposals are in the order of the strides, and of the anchors in each
+        stride.
+        :param net_out: network outputs of the batch
+        :param idx: index of the image in the batch
+        :param im_shape: (height, width) of the network input
+        :return: proposals, scores, mask scores, strides and landmarks of the image, or None for the outputs which
+            are not produced by the network or the NMS setting
+        """
+        scores_list = []
+        mask_list = []
+        deltas_list = []
+        cascade_list = []
+        landmark_list = []
+        planes = []
+        sym_idx = 0
+        for s in self._feat_stride_fpn:
+            stride = int(s)
+            A = self._num_anchors['stride%s' % s]
+            scores = net_out[sym_idx][idx, A:]
+            bbox_deltas = net_out[sym_idx + 1][idx]
+            height, width = bbox_deltas.shape[1], bbox_deltas.shape[2]
+            K = height * width
+            bbox_pred_len = bbox_deltas.shape[0] // A
+            # outputs are viewed as (A, channels, K), so that the row k * A + a of a stride is [a, :, k]
+            deltas_list.append(bbox_deltas.reshape((A, bbox_pred_len, K)))
+            if self.cov:
+                mask_list.append(net_out[sym_idx + 3][idx, A * 2:].reshape((A, 1, K)))
+
+            cascade_deltas = []
+            cascade_sym_num = 0
+            if self.cascade:
+                cls_cascade = False
+                bbox_cascade = False
+                __idx = [3, 4]
+                if not self.use_landmarks:
+                    __idx = [2, 3]
+                for diff_idx in __idx:
+                    if sym_idx + diff_idx >= len(net_out):
+                        break
+                    body = net_out[sym_idx + diff_idx][idx]
+                    if body.shape[0] // A == 2:  # cls branch
+                        if cls_cascade or bbox_cascade:
+                            break
                         else:
-                            if self.use_landmarks:
-                                sym_idx += 3
-                            else:
-                                sym_idx += 2
-                            if is_cascade:
-                                sym_idx += cascade_sym_num
+                            scores = body[A:]
+                            cascade_sym_num += 1
+                            cls_cascade = True
+                    elif body.shape[0] // A == 4:  # bbox branch
+                        cascade_deltas.append(body.reshape((A, bbox_pred_len, K)))
+                        cascade_sym_num += 1
+                        bbox_cascade = True
+            cascade_list.append(cascade_deltas)
+
+            scores = scores.reshape((A, K)).T.reshape((-1, 1))
+            if stride == 4 and self.decay4 < 1.0:
+                scores = scores * self.decay4
+            scores_list.append(scores)
+            planes.append(self.cached_anchors_plane(stride, height, width))
+
+            if not self.vote and self.use_landmarks:
+                landmark_deltas = net_out[sym_idx + 2][idx]
+                landmark_list.append(landmark_deltas.reshape((A, landmark_deltas.shape[0] // A, K)))
+            if self.cov:
+                sym_idx += 4
+            else:
+                if self.use_landmarks:
+                    sym_idx += 3
+                else:
+                    sym_idx += 2
+                sym_idx += cascade_sym_num
+
+        scores = np.concatenate(scores_list)
+        order = np.where(scores.ravel() >= threshold)[0]
+        offsets = np.cumsum([0] + [plane.shape[0] for plane in planes])
+        bounds = np.searchsorted(order, offsets)
+        rows = [order[bounds[i]:bounds[i + 1]] - offsets[i] for i in range(len(planes))]
+        nums = [len(r) for r in rows]
+
+        def gather(outputs):
+            return np.concatenate([out[r % out.shape[0], :, r // out.shape[0]] for out, r in zip(outputs, rows)])
+
+        scores = scores[order]
+        anchors = np.concatenate([plane[r] for plane, r in zip(planes, rows)])
+        bbox_deltas = gather(deltas_list)
+        bbox_stds = np.resize(np.asarray(self.bbox_stds, dtype=np.float32), bbox_deltas.shape[1])
+        proposals = self.bbox_pred(anchors, bbox_deltas * bbox_stds)
+        for p in range(max(len(c) for c in cascade_list)):
+            cascaded = np.repeat([len(c) > p for c in cascade_list], nums)
+            cascade_deltas = gather([c[p] if len(c) > p else np.zeros_like(d) for c, d in zip(cascade_list, deltas_list)])
+            proposals[cascaded] = self.bbox_pred(proposals[cascaded], cascade_deltas[cascaded] * bbox_stds)
+        proposals = clip_boxes(proposals, im_shape)
+        if flip:
+            old_x1 = proposals[:, 0].copy()
+            old_x2 = proposals[:, 2].copy()
+            proposals[:, 0] = im_shape[1] - old_x2 - 1
+            proposals[:, 2] = im_shape[1] - old_x1 - 1
+        proposals[:, 0:4] /= im_scale
+
+        mask_scores = gather(mask_list) if self.cov else None
+        strides = None
+        if self.nms_threshold < 0.0:
+            strides = np.repeat(np.array(self._feat_stride_fpn, dtype=np.float32), nums).reshape((-1, 1))
 
-        if self.debug:
-            time_b = datetime.datetime.now()
-            diff = time_b - timea
-            print('B uses', diff.total_seconds(), 'seconds')
-        proposals = np.vstack(proposals_list)
+        landmarks = None
+        if not self.vote and self.use_landmarks:
+            landmark_deltas = gather(landmark_list)
+            landmark_deltas = landmark_deltas.reshape((-1, 5, landmark_deltas.shape[1] // 5)) * self.landmark_std
+            landmarks = self.landmark_pred(anchors, landmark_deltas)
+            if flip:
+                landmarks[:, :, 0] = im_shape[1] - landmarks[:, :, 0] - 1
+                landmarks = landmarks[:, [1, 0, 2, 4, 3]]
+            landmarks[:, :, 0:2] /= im_scale
+        return proposals, scores, mask_scores, strides, landmarks
+
+    def _postprocess(self, outputs):
+        """
+        Sort and suppress the proposals decoded from all the scales and flips of an image.
+        :param outputs: outputs of _decode()
+        :return: detections and landmarks
+        """
+        proposals = np.vstack([out[0] for out in outputs])
         landmarks = None
         if proposals.shape[0] == 0:
             if self.use_landmarks:
@@ -394,9 +382,9 @@ class RetinaFace:
                 return np.zeros((0, 6)), landmarks
             else:
                 return np.zeros((0, 5)), landmarks
-        scores = np.vstack(scores_list)
+        scores = np.vstack([out[1] for out in outputs])
         if self.cov:
-            mask_scores = np.vstack(mask_scores_list)
+            mask_scores = np.vstack([out[2] for out in outputs])
         scores_ravel = scores.ravel()
         order = scores_ravel.argsort()[::-1]
         proposals = proposals[order, :]
@@ -404,10 +392,10 @@ class RetinaFace:
         if self.cov:
             mask_scores = mask_scores[order]
         if self.nms_threshold < 0.0:
-            strides = np.vstack(strides_list)
+            strides = np.vstack([out[3] for out in outputs])
             strides = strides[order]
         if not self.vote and self.use_landmarks:
-            landmarks = np.vstack(landmarks_list)
+            landmarks = np.vstack([out[4] for out in outputs])
             landmarks = landmarks[order].astype(np.float32, copy=False)
 
         if self.nms_threshold > 0.0:
@@ -428,13 +416,53 @@ class RetinaFace:
             det = np.hstack((proposals[:, 0:4], scores, strides)).astype(np.float32, copy=False)
         else:
             det = np.hstack((proposals[:, 0:4], scores)).astype(np.float32, copy=False)
-
-        if self.debug:
-            time_b = datetime.datetime.now()
-            diff = time_b - timea
-            print('C uses', diff.total_seconds(), 'seconds')
         return det, landmarks
 
+    def detect(self, img, threshold=0.5, scales=[1.0], do_flip=False):
+        """
+        Detect the faces of an image. When a list of images is given, the detections of all of them are merged,
+        as for the scales and flips of an image.
+        :return: [N, 5] detections, or [N, 6] with the mask scores or the strides, and the [N, 5, 2] landmarks
+        """
+        flips = [0]
+        if do_flip:
+            flips = [0, 1]
+
+        imgs = [img]
+        if isinstance(img, list):
+            imgs = img
+        outputs = []
+        for img in imgs:
+            if isinstance(img, mx.ndarray.NDArray):
+                img = img.asnumpy()
+            for im_scale in scales:
+                for flip in flips:
+                    im_tensor = self._im_tensor(img, im_scale, flip)
+                    net_out = self._forward(im_tensor[np.newaxis])
+                    outputs.append(self._decode(net_out, 0, im_tensor.shape[1:], im_scale, flip, threshold))
+        return self._postprocess(outputs)
+
+    def detect_batch(self, imgs, threshold=0.5, scales=[1.0], do_flip=False):
+        """
+        Detect the faces of images of equal shape, which are run through the network as a single batch for each
+        scale and flip. The detections of each image are the same as the ones of detect() on the image.
+        :return: list of the detections and landmarks of each image
+        """
+        flips = [0]
+        if do_flip:
+            flips = [0, 1]
+
+        imgs = [img.asnumpy() if isinstance(img, mx.ndarray.NDArray) else img for img in imgs]
+        assert len(set(img.shape for img in imgs)) == 1, "The images of a batch must have the same shape."
+        outputs = [[] for _ in imgs]
+        for im_scale in scales:
+            for flip in flips:
+                im_tensor = np.stack([self._im_tensor(img, im_scale, flip) for img in imgs])
+                net_out = self._forward(im_tensor)
+                for i in range(len(imgs)):
+                    outputs[i].append(self._decode(net_out, i, im_tensor.shape[2:], im_scale, flip, threshold))
+        return [self._postprocess(out) for out in outputs]
+
     @staticmethod
     def bbox_pred(boxes, box_deltas):
         """
@@ -447,7 +475,7 @@ class RetinaFace:
         if boxes.shape[0] == 0:
             return np.zeros((0, box_deltas.shape[1]))
 
-        boxes = boxes.astype(np.float, copy=False)
+        boxes = boxes.astype(np.float64, copy=False)
         widths = boxes[:, 2] - boxes[:, 0] + 1.0
         heights = boxes[:, 3] - boxes[:, 1] + 1.0
         ctr_x = boxes[:, 0] + 0.5 * (widths - 1.0)
@@ -481,16 +509,15 @@ class RetinaFace:
     @staticmethod
     def landmark_pred(boxes, landmark_deltas):
         if boxes.shape[0] == 0:
-            return np.zeros((0, landmark_deltas.shape[1]))
-        boxes = boxes.astype(np.float, copy=False)
+            return np.zeros((0,) + landmark_deltas.shape[1:], dtype=landmark_deltas.dtype)
+        boxes = boxes.astype(np.float64, copy=False)
         widths = boxes[:, 2] - boxes[:, 0] + 1.0
         heights = boxes[:, 3] - boxes[:, 1] + 1.0
         ctr_x = boxes[:, 0] + 0.5 * (widths - 1.0)
         ctr_y = boxes[:, 1] + 0.5 * (heights - 1.0)
         pred = landmark_deltas.copy()
-        for i in range(5):
-            pred[:, i, 0] = landmark_deltas[:, i, 0] * widths + ctr_x
-            pred[:, i, 1] = landmark_deltas[:, i, 1] * heights + ctr_y
+        pred[:, :, 0] = landmark_deltas[:, :, 0] * widths[:, np.newaxis] + ctr_x[:, np.newaxis]
+        pred[:, :, 1] = landmark_deltas[:, :, 1] * heights[:, np.newaxis] + ctr_y[:, np.newaxis]
         return pred
 
     def bbox_vote(self, det):
@@ -622,11 +622,13 @@ class RetinaFaceLearner(Learner):
             idx += 1
         return fixed_param_names
 
-    def infer(self, img, threshold=0.8, nms_threshold=0.4, scales=[1024, 1980], mask_thresh=0.8):
+    def infer(self, img, threshold=0.8, nms_threshold=0.4, scales=[1024, 1980], mask_thresh=0.8,
+              return_landmarks=False):
         """
-        Performs inference on a single image and returns the resulting bounding boxes.
-        :param img: image to perform inference on
-        :type img: opendr.engine.data.Image
+        Performs inference on a single image, or on a list of images of equal shape, which are run through the
+        network as a single batch, and returns the resulting bounding boxes.
+        :param img: image, or list of images, to perform inference on
+        :type img: opendr.engine.data.Image or list of opendr.engine.data.Image
         :param threshold: confidence threshold
         :type threshold: float, optional
         :param nms_threshold: NMS threshold
@@ -635,19 +637,23 @@ class RetinaFaceLearner(Learner):
         :type scales: list, optional
         :param mask_thresh: mask confidence threshold, only use when backbone is 'mnet'
         :type mask_thresh: float, optional
-        :return: list of bounding boxes
-        :rtype: BoundingBoxList
+        :param return_landmarks: whether to also return the five facial landmarks (eyes, nose and mouth corners)
+            of each face
+        :type return_landmarks: bool, optional
+        :return: list of bounding boxes, and the (N, 5, 2) array of landmarks in image coordinates if
+            return_landmarks is True, or a list of them for a list of images
+        :rtype: BoundingBoxList, or tuple of BoundingBoxList and numpy.ndarray, or list of them
         """
         if self.detector is None:
             assert "Detector must be loaded with load() before inference."
 
         self.detector.nms_threshold = nms_threshold
 
-        if not isinstance(img, Image):
-            img = Image(img)
-        _img = img.convert("channels_last", "rgb")
+        batch = isinstance(img, list)
+        imgs = img if batch else [img]
+        imgs = [(i if isinstance(i, Image) else Image(i)).convert("channels_last", "rgb") for i in imgs]
 
-        im_shape = _img.shape
+        im_shape = imgs[0].shape
         target_size = scales[0]
         max_size = scales[1]
         im_size_min = np.min(im_shape[0:2])
@@ -660,7 +666,19 @@ class RetinaFaceLearner(Learner):
         scales = [im_scale]
         flip = False
 
-        faces, landmarks = self.detector.detect(_img, threshold, scales=scales, do_flip=flip)
+        if batch:
+            detections = self.detector.detect_batch(imgs, threshold, scales=scales, do_flip=flip)
+        else:
+            detections = [self.detector.detect(imgs[0], threshold, scales=scales, do_flip=flip)]
+
+        results = []
+        for faces, landmarks in detections:
+            bboxes = self.__to_bounding_box_list(faces, mask_thresh)
+            results.append((bboxes, landmarks) if return_landmarks else bboxes)
+        return results if batch else results[0]
+
+    @staticmethod
+    def __to_bounding_box_list(faces, mask_thresh):
         faces = np.hstack([faces, np.zeros((faces.shape[0], 1))])
         bboxes = BoundingBoxList([])
         for face in faces:
@@ -673,8 +691,6 @@ class RetinaFaceLearner(Learner):
                                name=mask, score=face[4])
 
             bboxes.data.append(bbox)
-
-        # return faces, landmarks
         return bboxes
 
     def save(self, path, verbose=False):
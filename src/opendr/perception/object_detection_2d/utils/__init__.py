@@ -1,3 +1,3 @@
-from .eval_utils import DetectionDatasetCOCOEval
+from .eval_utils import DetectionDatasetCOCOEval, MeanAveragePrecision
 
-__all__ = ['DetectionDatasetCOCOEval', ]
+__all__ = ['DetectionDatasetCOCOEval', 'MeanAveragePrecision', ]
@@ -66,144 +66,205 @@ class DetectionEvalMetric:
                as_numpy(gt_boxes), as_numpy(gt_labels), as_numpy(gt_difficult)
 
 
+class _ColumnBuffer:
+    """Growable, contiguous numpy buffer used to accumulate per-box columns without Python lists."""
+    def __init__(self, width, dtype, capacity=1024):
+        self.width = width
+        self.dtype = dtype
+        self.capacity = capacity
+        self.size = 0
+        self.data = np.empty((capacity, width), dtype=dtype)
+
+    def reset(self):
+        self.size = 0
+
+    def append(self, values):
+        values = np.asarray(values, dtype=self.dtype).reshape(-1, self.width)
+        n = values.shape[0]
+        if self.size + n > self.capacity:
+            self.capacity = max(2 * self.capacity, self.size + n)
+            data = np.empty((self.capacity, self.width), dtype=self.dtype)
+            data[:self.size] = self.data[:self.size]
+            self.data = data
+        self.data[self.size:self.size + n] = values
+        self.size += n
+
+    def view(self):
+        return self.data[:self.size]
+
+
 class MeanAveragePrecision(DetectionEvalMetric):
-    def __init__(self, classes, n_val_images):
+    """
+    Mean average precision evaluator for 2D detection (VOC-style greedy matching at IoU > 0.5).
+    Boxes are accumulated in contiguous columnar buffers tagged with their image index, ground truths are
+    grouped once by (image, class) and all detection-to-ground-truth overlaps are computed in vectorized
+    form, so that evaluation cost scales with the size of each (image, class) group instead of the whole
+    dataset.
+    The average precision of a class is the mean of the interpolated precisions at recalls 0.5 to 0.95, which
+    differs from the VOC07 and COCO metrics used by the eval() methods of the SSD, YOLOv3 and CenterNet
+    learners, so this metric is not used by them.
+    """
+    def __init__(self, classes, n_val_images=None, iou_thresh=0.5, chunk_size=4096):
         super().__init__(classes)
-        self.det_boxes = []
-        self.det_labels = []
-        self.det_scores = []
-        self.gt_boxes = []
-        self.gt_labels = []
-        self.gt_difficult = []
         self.n_val_images = n_val_images
         self.n_classes = len(classes)
+        self.iou_thresh = iou_thresh
+        self.chunk_size = chunk_size
+        # Columns: image index, label, score, xmin, ymin, xmax, ymax
+        self._dets = _ColumnBuffer(7, np.float64)
+        # Columns: image index, label, difficult, xmin, ymin, xmax, ymax
+        self._gts = _ColumnBuffer(7, np.float64)
+        self.n_images = 0
         self.average_precisions = np.zeros((self.n_classes))
         self.results = {"map": 0}
 
     def reset(self):
-        self.det_boxes = []
-        self.det_labels = []
-        self.det_scores = []
-        self.gt_boxes = []
-        self.gt_labels = []
-        self.gt_difficult = []
+        self._dets.reset()
+        self._gts.reset()
+        self.n_images = 0
         self.average_precisions = np.zeros((self.n_classes))
 
     def update(self, det_boxes, det_labels, det_scores, gt_boxes, gt_labels, gt_difficult=None):
         det_boxes, det_labels, det_scores, gt_boxes, gt_labels, gt_difficult = \
             self._input_check(det_boxes, det_labels, det_scores, gt_boxes, gt_labels, gt_difficult)
 
-        self.det_boxes.extend(det_boxes)
-        self.det_labels.extend(det_labels)
-        self.det_scores.extend(det_scores)
-        self.gt_boxes.extend(gt_boxes)
-        self.gt_labels.extend(gt_labels)
-        if gt_difficult is not None:
-            self.gt_difficult.extend(np.asarray(gt_difficult))
-        else:
-            self.gt_difficult.extend(np.zeros((len(gt_labels),)))
+        n_batch = len(gt_labels)
+        assert len(det_boxes) == len(det_labels) == len(det_scores) == len(gt_boxes) == n_batch, \
+            "Unequal number of detected and true objects"
+        if gt_difficult is None:
+            gt_difficult = [None] * n_batch
+
+        for i in range(n_batch):
+            image_idx = self.n_images + i
+            self._dets.append(self._columns(image_idx, det_labels[i], det_scores[i], det_boxes[i]))
+            difficult = gt_difficult[i]
+            if difficult is None:
+                difficult = np.zeros(np.asarray(gt_labels[i]).shape[0])
+            self._gts.append(self._columns(image_idx, gt_labels[i], difficult, gt_boxes[i]))
+        self.n_images += n_batch
+
+    @staticmethod
+    def _columns(image_idx, labels, values, boxes):
+        labels = np.asarray(labels)
+        if labels.shape[0] == 0:
+            # Image without detections or ground truths
+            return np.empty((0, 7), dtype=np.float64)
+        labels = labels.reshape(len(labels), -1)[:, 0]
+        values = np.asarray(values).reshape(len(values), -1)[:, 0]
+        boxes = np.asarray(boxes).reshape(-1, 4)
+        # Negative labels mark padding entries and never match any class
+        valid = labels >= 0
+        n_valid = int(valid.sum())
+        columns = np.empty((n_valid, 7), dtype=np.float64)
+        columns[:, 0] = image_idx
+        columns[:, 1] = labels[valid]
+        columns[:, 2] = values[valid]
+        columns[:, 3:] = boxes[valid]
+        return columns
+
+    def _match(self, det_keys, det_boxes, gt_keys, gt_boxes):
+        """
+        For each detection, find the ground truth of the same (image, class) group with the largest overlap.
+        Ground truths must be sorted by key (stably, so that ties resolve to the first box of the image).
+        :return: global index of the best ground truth (-1 if the group is empty) and its overlap
+        """
+        group_start = np.searchsorted(gt_keys, det_keys, side='left')
+        group_size = np.searchsorted(gt_keys, det_keys, side='right') - group_start
+        best_gt = np.full(det_keys.shape[0], -1, dtype=np.int64)
+        best_overlap = np.zeros(det_keys.shape[0], dtype=np.float64)
+        if gt_keys.shape[0] == 0:
+            return best_gt, best_overlap
+
+        for begin in range(0, det_keys.shape[0], self.chunk_size):
+            end = min(begin + self.chunk_size, det_keys.shape[0])
+            starts = group_start[begin:end]
+            sizes = group_size[begin:end]
+            max_size = int(sizes.max()) if sizes.shape[0] > 0 else 0
+            if max_size == 0:
+                continue
+            offsets = np.arange(max_size)
+            valid = offsets[None, :] < sizes[:, None]
+            gt_idx = np.where(valid, starts[:, None] + offsets[None, :], 0)
+            candidates = gt_boxes[gt_idx]
+            boxes = det_boxes[begin:end, None, :]
+
+            lower_bounds = np.maximum(boxes[..., :2], candidates[..., :2])
+            upper_bounds = np.minimum(boxes[..., 2:], candidates[..., 2:])
+            intersection_dims = np.clip(upper_bounds - lower_bounds, a_min=0, a_max=None)
+            intersection = intersection_dims[..., 0] * intersection_dims[..., 1]
+            area_det = (boxes[..., 2] - boxes[..., 0]) * (boxes[..., 3] - boxes[..., 1])
+            area_gt = (candidates[..., 2] - candidates[..., 0]) * (candidates[..., 3] - candidates[..., 1])
+            overlaps = np.where(valid, intersection / (area_det + area_gt - intersection), -np.inf)
+
+            ind = np.argmax(overlaps, axis=1)
+            has_gt = sizes > 0
+            rows = np.arange(end - begin)
+            best_gt[begin:end] = np.where(has_gt, gt_idx[rows, ind], -1)
+            best_overlap[begin:end] = np.where(has_gt, overlaps[rows, ind], 0)
+        return best_gt, best_overlap
 
     def get(self):
         result = {"map": 0}
 
-        assert len(self.det_boxes) == len(self.gt_boxes) == len(self.det_labels) == len(self.gt_labels) == len(
-            self.det_scores) == len(self.gt_difficult) == self.n_val_images, "Unequal number of detected and true objects"
-
-        gt_images = []
-        for i in range(len(self.gt_labels)):
-            gt_images.extend([i] * len(self.gt_labels[i]))
-        gt_images = np.asarray(gt_images)
-        gt_boxes = np.concatenate(self.gt_boxes, axis=0)
-        gt_labels = np.concatenate(self.gt_labels, axis=0)
-        if gt_labels.ndim > 1:
-            gt_labels = gt_labels[:, 0]
-        gt_difficult = np.concatenate(self.gt_difficult, axis=0)
-        if gt_difficult.ndim > 1:
-            gt_difficult = gt_difficult[:, 0]
-
-        det_images = []
-        for i in range(len(self.det_labels)):
-            det_images.extend([i] * len(self.det_labels[i]))
-        det_images = np.asarray(det_images)
-        det_boxes = np.concatenate(self.det_boxes, axis=0)
-        det_labels = np.concatenate(self.det_labels, axis=0)
-        if det_labels.ndim > 1:
-            det_labels = det_labels[:, 0]
-        det_scores = np.concatenate(self.det_scores, axis=0)
-        if det_scores.ndim > 1:
-            det_scores = det_scores[:, 0]
-
-        average_precisions = np.zeros((self.n_classes), dtype=np.float)
-        for c in range(self.n_classes):
-            gt_c_labels = np.where(gt_labels == c)[0]
-            gt_class_images = gt_images[gt_c_labels]
-            gt_class_boxes = gt_boxes[gt_c_labels]
-            gt_class_difficult = gt_difficult[gt_c_labels]
-            n_easy_class_objects = np.sum(1 - gt_class_difficult, dtype=np.uint32)
+        if self.n_val_images is not None:
+            assert self.n_images == self.n_val_images, "Unequal number of detected and true objects"
+
+        dets = self._dets.view()
+        gts = self._gts.view()
+        det_labels = dets[:, 1].astype(np.int64)
+        gt_labels = gts[:, 1].astype(np.int64)
 
-            gt_class_boxes_detected = np.zeros((gt_class_difficult.shape[0]), dtype=np.uint8)
+        # Group ground truths by (image, class) once; stable sort keeps per-image box order for tie-breaking
+        gt_keys = gts[:, 0].astype(np.int64) * self.n_classes + gt_labels
+        gt_order = np.argsort(gt_keys, kind='stable')
+        gt_keys = gt_keys[gt_order]
+        gt_boxes = gts[gt_order, 3:]
+        gt_difficult = gts[gt_order, 2] != 0
+        gt_labels = gt_labels[gt_order]
+
+        det_keys = dets[:, 0].astype(np.int64) * self.n_classes + det_labels
+        best_gt, best_overlap = self._match(det_keys, dets[:, 3:], gt_keys, gt_boxes)
+
+        recall_thresholds = np.arange(0.5, 1., step=.05)
+        average_precisions = np.zeros((self.n_classes), dtype=np.float64)
+        for c in range(self.n_classes):
+            n_easy_class_objects = np.sum((gt_labels == c) & ~gt_difficult)
 
             det_c_labels = np.where(det_labels == c)[0]
-            det_class_images = det_images[det_c_labels]
-            det_class_boxes = det_boxes[det_c_labels]
-            det_class_scores = det_scores[det_c_labels]
-            n_class_detections = det_class_boxes.shape[0]
-            if n_class_detections == 0:
+            n_class_detections = det_c_labels.shape[0]
+            if n_class_detections == 0 or n_easy_class_objects == 0:
                 continue
 
             # sort detection in decreasing order of confidence
-            sort_ind = np.argsort(-det_class_scores, axis=0)
-            # det_class_scores = det_class_scores[sort_ind]
-            det_class_boxes = det_class_boxes[sort_ind]
-            det_class_images = det_class_images[sort_ind]
-
-            true_positives = np.zeros((n_class_detections), dtype=np.float)
-            false_positives = np.zeros((n_class_detections), dtype=np.float)
-            for d in range(n_class_detections):
-                this_detection_box = np.expand_dims(det_class_boxes[d], 0)
-                this_image = det_class_images[d]
-
-                object_boxes = gt_class_boxes[gt_class_images == this_image]
-                object_difficulties = gt_class_difficult[gt_class_images == this_image]
-                if object_boxes.shape[0] == 0:
-                    false_positives[d] = 1
-                    continue
+            sort_ind = det_c_labels[np.argsort(-dets[det_c_labels, 2], axis=0)]
+            matched_gt = best_gt[sort_ind]
+            matched = (matched_gt >= 0) & (best_overlap[sort_ind] > self.iou_thresh)
+            matched_difficult = matched & gt_difficult[np.maximum(matched_gt, 0)]
+
+            # Only the highest scoring match of a non-difficult ground truth is a true positive
+            candidates = np.where(matched & ~matched_difficult)[0]
+            _, first = np.unique(matched_gt[candidates], return_index=True)
+            true_positives = np.zeros((n_class_detections), dtype=np.float64)
+            true_positives[candidates[first]] = 1
+            false_positives = (~matched_difficult).astype(np.float64) - true_positives
 
-                overlaps = find_jaccard_overlap(this_detection_box, object_boxes)[0, :]
-                ind = np.argmax(overlaps, axis=0)
-                max_overlap = overlaps[ind]
-                original_ind = np.arange(0, gt_class_boxes.shape[0])[gt_class_images == this_image][ind]
-
-                if max_overlap > 0.5:
-                    if object_difficulties[ind] == 0:
-                        if gt_class_boxes_detected[original_ind] == 0:
-                            true_positives[d] = 1
-                            gt_class_boxes_detected[original_ind] = 1
-                        else:
-                            false_positives[d] = 1
-                else:
-                    false_positives[d] = 1
             cumul_true_positives = np.cumsum(true_positives, axis=0)
             cumul_false_positives = np.cumsum(false_positives, axis=0)
             cumul_precision = cumul_true_positives / (cumul_true_positives + cumul_false_positives + 1e-10)
             cumul_recall = cumul_true_positives / n_easy_class_objects
 
-            recall_thresholds = np.arange(0.5, 1., step=.05)
-            precisions = np.zeros((len(recall_thresholds)), dtype=np.float)
-            for i, t in enumerate(recall_thresholds):
-                recalls_above_t = cumul_recall >= t
-                if np.any(recalls_above_t):
-                    precisions[i] = cumul_precision[recalls_above_t].max()
-                else:
-                    precisions[i] = 0
+            # Recall is non-decreasing, so the precisions at recall >= t form a suffix of the array
+            suffix_max_precision = np.maximum.accumulate(cumul_precision[::-1])[::-1]
+            first_above = np.searchsorted(cumul_recall, recall_thresholds, side='left')
+            precisions = np.zeros((len(recall_thresholds)), dtype=np.float64)
+            reached = first_above < n_class_detections
+            precisions[reached] = suffix_max_precision[first_above[reached]]
             average_precisions[c] = np.mean(precisions)
 
         mean_average_precision = np.mean(average_precisions)
         result["map"] = mean_average_precision
         self.average_precisions = average_precisions
         self.results = result
-        # for c, class_name in enumerate(self.classes):
-        #     result["ap_{}".format(class_name)] = average_precisions[c]
         return list(result.keys()), list(result.values())
 
 
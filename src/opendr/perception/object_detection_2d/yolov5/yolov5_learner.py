@@ -18,7 +18,12 @@ from opendr.engine.data import Image
 from opendr.engine.target import BoundingBox, BoundingBoxList
 
 # yolov5 imports
+import os
+import json
+import cv2
+import numpy as np
 import torch
+import torchvision
 torch.hub._validate_not_a_forked_repo = lambda a, b, c: True  # workaround for rate limit bug
 
 
@@ -26,42 +31,138 @@ class YOLOv5DetectorLearner(Learner):
     available_models = ['yolov5s', 'yolov5n', 'yolov5m', 'yolov5l', 'yolov5x',
                         'yolov5n6', 'yolov5s6', 'yolov5m6', 'yolov5l6', 'custom']
 
-    def __init__(self, model_name, path=None, device='cuda', temp_path='.', force_reload=False):
+    def __init__(self, model_name, path=None, device='cuda', temp_path='.', force_reload=False,
+                 hub_repo='ultralytics/yolov5:v7.0'):
         super(YOLOv5DetectorLearner, self).__init__(device=device, temp_path=temp_path)
+        self.scripted = False
+        self.input_size = None
+
+        if path is not None and os.path.isdir(path):
+            # TorchScript model exported with save(), the hub repo is not needed
+            self.model_name = model_name
+            self.load(path)
+            return
+
         if model_name not in self.available_models:
             model_name = 'yolov5s'
             print('Unrecognized model name, defaulting to "yolov5s"')
-
-        default_dir = torch.hub.get_dir()
-        torch.hub.set_dir(temp_path)
-
-        if path is None:
-            self.model = torch.hub.load('ultralytics/yolov5:master', 'custom', f'{temp_path}/{model_name}',
-                                        force_reload=force_reload)
+        self.model_name = model_name
+
+        # The weights are downloaded once in temp_path by the yolov5 repo and are reused afterwards
+        weights = path if path is not None else os.path.join(temp_path, model_name)
+        repo_dir = self.__hub_cache_dir(hub_repo, temp_path)
+        if os.path.isdir(repo_dir) and not force_reload:
+            # The pinned version of the repo is already cached, so it is loaded without any network access
+            self.model = torch.hub.load(repo_dir, 'custom', path=weights, source='local')
         else:
-            self.model = torch.hub.load('ultralytics/yolov5:master', 'custom', path=path,
+            default_dir = torch.hub.get_dir()
+            torch.hub.set_dir(temp_path)
+            self.model = torch.hub.load(hub_repo, 'custom', path=weights,
                                         force_reload=force_reload, skip_validation=True)
-        torch.hub.set_dir(default_dir)
+            torch.hub.set_dir(default_dir)
 
         self.model.to(device)
         self.classes = [self.model.names[i] for i in range(len(self.model.names.keys()))]
 
-    def infer(self, img, size=640):
-        if isinstance(img, Image):
-            img = img.convert("channels_last", "rgb")
-
-        results = self.model(img, size=size)
-
-        bounding_boxes = BoundingBoxList([])
-        for idx, box in enumerate(results.xyxy[0]):
-            box = box.cpu().numpy()
-            bbox = BoundingBox(left=box[0], top=box[1],
-                               width=box[2] - box[0],
-                               height=box[3] - box[1],
-                               name=box[5],
-                               score=box[4])
-            bounding_boxes.data.append(bbox)
-        return bounding_boxes
+    @staticmethod
+    def __hub_cache_dir(hub_repo, hub_dir):
+        """
+        Returns the directory in which torch.hub stores the checkout of hub_repo ('owner/name[:ref]').
+        """
+        repo, ref = hub_repo.split(':') if ':' in hub_repo else (hub_repo, 'main')
+        owner, name = repo.split('/')
+        return os.path.join(hub_dir, '_'.join([owner, name, ref.replace('/', '_')]))
+
+    def infer(self, img, size=640, conf_threshold=0.25, iou_threshold=0.45):
+        """
+        Performs inference on a single image or on a list of images, which are processed as a single batch.
+
+        :param img: image or list of images to run inference on
+        :type img: engine.data.Image or numpy.ndarray or list
+        :param size: size of the images fed to the model, ignored for TorchScript models which use the export size
+        :type size: int
+        :param conf_threshold: confidence threshold of the detections
+        :type conf_threshold: float
+        :param iou_threshold: IoU threshold of non-maximum suppression
+        :type iou_threshold: float
+        :return: detected bounding boxes, as a list with one BoundingBoxList per image if a list was given
+        :rtype: engine.target.BoundingBoxList or list of engine.target.BoundingBoxList
+        """
+        single = not isinstance(img, (list, tuple))
+        images = [img] if single else img
+        if len(images) == 0:
+            return []
+        images = [image.convert("channels_last", "rgb") if isinstance(image, Image) else image for image in images]
+
+        if self.scripted:
+            detections = self.__infer_scripted(images, conf_threshold, iou_threshold)
+        else:
+            self.model.conf = conf_threshold
+            self.model.iou = iou_threshold
+            results = self.model(images, size=size)
+            detections = torch.cat([torch.cat([torch.full_like(boxes[:, :1], i), boxes], dim=1)
+                                    for i, boxes in enumerate(results.xyxy)])
+
+        # Single device-to-host copy of (image, x1, y1, x2, y2, score, class) for all detections, sorted by image
+        detections = detections.cpu().numpy()
+        splits = np.searchsorted(detections[:, 0], np.arange(1, len(images)))
+
+        bounding_boxes = []
+        for boxes in np.split(detections[:, 1:], splits):
+            bounding_boxes.append(BoundingBoxList([BoundingBox(left=box[0], top=box[1],
+                                                               width=box[2] - box[0],
+                                                               height=box[3] - box[1],
+                                                               name=box[5],
+                                                               score=box[4]) for box in boxes]))
+        return bounding_boxes[0] if single else bounding_boxes
+
+    def __infer_scripted(self, images, conf_threshold, iou_threshold, max_det=1000):
+        """
+        Runs a TorchScript model on a batch of RGB images, with letterboxing and non-maximum suppression following
+        the yolov5 AutoShape wrapper.
+        """
+        size = self.input_size
+        batch = np.full((len(images), size, size, 3), 114, dtype=np.uint8)
+        # Letterbox gain, padding and original size of each image
+        transforms = np.zeros((len(images), 5), dtype=np.float32)
+        for i, image in enumerate(images):
+            height, width = image.shape[:2]
+            gain = min(size / height, size / width)
+            new_width, new_height = int(round(width * gain)), int(round(height * gain))
+            pad_x, pad_y = (size - new_width) // 2, (size - new_height) // 2
+            if (new_width, new_height) != (width, height):
+                image = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+            batch[i, pad_y:pad_y + new_height, pad_x:pad_x + new_width] = image[..., :3]
+            transforms[i] = gain, pad_x, pad_y, width, height
+
+        with torch.no_grad():
+            batch = torch.from_numpy(batch).to(self.device).permute(0, 3, 1, 2).float() / 255
+            prediction = self.model(batch)[0]
+
+            image_idx, anchor_idx = torch.nonzero(prediction[..., 4] > conf_threshold, as_tuple=True)
+            candidates = prediction[image_idx, anchor_idx]
+            scores, labels = (candidates[:, 5:] * candidates[:, 4:5]).max(dim=1)
+            keep = scores > conf_threshold
+            image_idx, candidates, scores, labels = image_idx[keep], candidates[keep], scores[keep], labels[keep]
+            boxes = torch.cat([candidates[:, :2] - candidates[:, 2:4] / 2,
+                               candidates[:, :2] + candidates[:, 2:4] / 2], dim=1)
+
+            # A single NMS call for the whole batch, grouping the boxes per image and class
+            num_classes = prediction.shape[2] - 5
+            keep = torchvision.ops.batched_nms(boxes, scores, image_idx * num_classes + labels, iou_threshold)
+            keep = keep[torch.sort(image_idx[keep], stable=True)[1]]
+            image_idx = image_idx[keep]
+            # Keep the max_det highest scoring detections of each image
+            counts = torch.bincount(image_idx, minlength=len(images))
+            rank = torch.arange(len(keep), device=keep.device) - (torch.cumsum(counts, 0) - counts)[image_idx]
+            keep, image_idx = keep[rank < max_det], image_idx[rank < max_det]
+
+            # Undo the letterbox
+            transforms = torch.from_numpy(transforms).to(boxes.device)[image_idx]
+            boxes = (boxes[keep] - transforms[:, [1, 2, 1, 2]]) / transforms[:, :1]
+            boxes = torch.min(boxes.clamp(min=0), transforms[:, [3, 4, 3, 4]])
+            return torch.cat([image_idx.unsqueeze(1).float(), boxes, scores[keep].unsqueeze(1),
+                              labels[keep].unsqueeze(1).float()], dim=1)
 
     def fit(self):
         """This method is not used in this implementation."""
@@ -79,10 +180,68 @@ class YOLOv5DetectorLearner(Learner):
         """This method is not used in this implementation."""
         return NotImplementedError
 
-    def load(self):
-        """This method is not used in this implementation."""
-        return NotImplementedError
-
-    def save(self):
-        """This method is not used in this implementation."""
-        return NotImplementedError
+    def load(self, path, verbose=False):
+        """
+        Loads a TorchScript model exported with save() from the path provided, based on the metadata .json file
+        included. The yolov5 hub repo is not needed to run the loaded model.
+        :param path: path of the directory where the model was saved
+        :type path: str
+        :param verbose: whether to print a success message or not, defaults to False
+        :type verbose: bool, optional
+        """
+        model_name = os.path.basename(os.path.normpath(path))
+        if verbose:
+            print("Model name:", model_name, "-->", os.path.join(path, model_name + ".json"))
+        with open(os.path.join(path, model_name + ".json")) as f:
+            metadata = json.load(f)
+
+        self.model = torch.jit.load(os.path.join(path, metadata["model_paths"][0]), map_location=self.device)
+        self.model.eval()
+        self.scripted = True
+        self.input_size = metadata["inference_params"]["size"]
+        self.classes = metadata["classes"]
+        if verbose:
+            print("Loaded TorchScript model and metadata.")
+        return True
+
+    def save(self, path, size=640, verbose=False):
+        """
+        Exports the current model to TorchScript in the path provided, along with its metadata. The exported model
+        runs on a fixed square input of the given size.
+        :param path: path to folder where model will be saved
+        :type path: str
+        :param size: input size of the exported model
+        :type size: int, optional
+        :param verbose: whether to print a success message or not, defaults to False
+        :type verbose: bool, optional
+        """
+        os.makedirs(path, exist_ok=True)
+        model_name = os.path.basename(os.path.normpath(path))
+        metadata = {"model_paths": [model_name + ".pt"], "framework": "pytorch", "format": "torchscript",
+                    "has_data": False, "inference_params": {"size": size}, "optimized": True,
+                    "optimizer_info": {}, "classes": self.classes}
+
+        if self.scripted:
+            metadata["inference_params"]["size"] = self.input_size
+            torch.jit.save(self.model, os.path.join(path, metadata["model_paths"][0]))
+        else:
+            # AutoShape -> DetectMultiBackend -> DetectionModel
+            model = self.model.model.model
+            detect_layers = [m for m in model.modules() if type(m).__name__ in ('Detect', 'Segment')]
+            inplace = [m.inplace for m in detect_layers]
+            for m in detect_layers:
+                m.inplace, m.export, m.dynamic = False, True, False
+            with torch.no_grad():
+                dummy = torch.zeros(1, 3, size, size, device=next(model.parameters()).device)
+                scripted_model = torch.jit.trace(model, dummy, strict=False)
+            for m, m_inplace in zip(detect_layers, inplace):
+                m.inplace, m.export = m_inplace, False
+            torch.jit.save(scripted_model, os.path.join(path, metadata["model_paths"][0]))
+        if verbose:
+            print("TorchScript model saved.")
+
+        with open(os.path.join(path, model_name + '.json'), 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, ensure_ascii=False, indent=4)
+        if verbose:
+            print("Model metadata saved.")
+        return True
@@ -3,6 +3,7 @@ from opendr.perception.object_tracking_2d.fair_mot.object_tracking_2d_fair_mot_l
 from opendr.perception.object_tracking_2d.deep_sort.object_tracking_2d_deep_sort_learner import \
     ObjectTracking2DDeepSortLearner
 from opendr.perception.object_tracking_2d.siamrpn.siamrpn_learner import SiamRPNLearner
+from opendr.perception.object_tracking_2d.siamrpn.multi_target_tracker import SiamRPNMultiTargetTracker
 
 from opendr.perception.object_tracking_2d.datasets.mot_dataset import (
     MotDataset,
@@ -18,4 +19,4 @@ from opendr.perception.object_tracking_2d.datasets.market1501_dataset import (
 
 __all__ = ['ObjectTracking2DFairMotLearner', 'ObjectTracking2DDeepSortLearner', 'MotDataset', 'MotDatasetIterator',
            'RawMotDatasetIterator', 'RawMotWithDetectionsDatasetIterator', 'Market1501Dataset', 'Market1501DatasetIterator',
-           'SiamRPNLearner']
+           'SiamRPNLearner', 'SiamRPNMultiTargetTracker']
@@ -0,0 +1,225 @@
+# Copyright 2020-2023 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from collections import OrderedDict
+from typing import Dict, Hashable, List
+
+import numpy as np
+from mxnet import nd
+from gluoncv.model_zoo.siamrpn.siamrpn_tracker import SiamRPNTracker
+
+from opendr.engine.data import Image
+from opendr.engine.target import TrackingAnnotation
+
+
+class SiamRPNMultiTargetTracker:
+    def __init__(self, learner):
+        """
+        Tracks many targets in the same video with a single SiamRPNLearner.
+
+        Each target is identified by a hashable target id. When a target is added, the template crop is passed
+        through the backbone and the template branches of the RPN head once, and the resulting correlation kernels
+        are kept in a bank of shape (N, C, h, w). On each frame, the search regions of all targets are cropped,
+        stacked into one batch and passed through the backbone and RPN head together, with the depthwise
+        cross-correlation of each search region and its own kernels computed as a single grouped convolution.
+        The scale, aspect ratio and cosine window penalties and the box updates are then applied to all targets at
+        once. The tracking of each target follows the single target SiamRPNTracker of GluonCV.
+        The kernels are computed with the model of the learner at the time a target is added, so targets should be
+        added again after loading new weights.
+
+        :param learner: learner whose model is used for tracking
+        :type learner: SiamRPNLearner
+        """
+        self.learner = learner
+        # single target tracker of GluonCV, used for its configuration, anchors, window and cropping
+        self._tracker = SiamRPNTracker(learner._model)
+        self._ids = OrderedDict()
+        self._center_pos = np.zeros((0, 2))
+        self._size = np.zeros((0, 2))
+        self._channel_average = np.zeros((0, 3))
+        self._cls_kernels = None
+        self._loc_kernels = None
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, target_id: Hashable):
+        return target_id in self._ids
+
+    @property
+    def target_ids(self) -> List[Hashable]:
+        return list(self._ids.keys())
+
+    @staticmethod
+    def _to_opencv(img):
+        if isinstance(img, Image):
+            return img.opencv()
+        return img
+
+    def add(self, target_id: Hashable, img, init_box: TrackingAnnotation):
+        """
+        Start tracking a target, or restart it if the target id is already tracked.
+        :param target_id: id of the target
+        :type target_id: Hashable
+        :param img: image in which the target is initialized
+        :type img: opendr.engine.data.Image or np.ndarray
+        :param init_box: box of the target in the image
+        :type init_box: TrackingAnnotation
+        """
+        if target_id in self._ids:
+            self.remove(target_id)
+        img = self._to_opencv(img)
+        tracker = self._tracker
+        bbox = [init_box.left, init_box.top, init_box.width, init_box.height]
+        center_pos = np.array([bbox[0] + (bbox[2] - 1) / 2, bbox[1] + (bbox[3] - 1) / 2])
+        size = np.array([bbox[2], bbox[3]])
+        w_z = size[0] + tracker.CONTEXT_AMOUNT * np.sum(size)
+        h_z = size[1] + tracker.CONTEXT_AMOUNT * np.sum(size)
+        s_z = round(np.sqrt(w_z * h_z))
+        channel_average = np.mean(img, axis=(0, 1))
+        z_crop = tracker.get_subwindow(img, center_pos, tracker.EXEMPLAR_SIZE, s_z, channel_average,
+                                       self.learner.ctx)
+
+        model = self.learner._model
+        template = model.backbone(z_crop)
+        cls_kernel = model.rpn_head.cls.conv_kernel(template)
+        loc_kernel = model.rpn_head.loc.conv_kernel(template)
+        if self._cls_kernels is None:
+            self._cls_kernels, self._loc_kernels = cls_kernel, loc_kernel
+        else:
+            self._cls_kernels = nd.concat(self._cls_kernels, cls_kernel, dim=0)
+            self._loc_kernels = nd.concat(self._loc_kernels, loc_kernel, dim=0)
+        self._ids[target_id] = len(self._ids)
+        self._center_pos = np.concatenate([self._center_pos, center_pos[np.newaxis]])
+        self._size = np.concatenate([self._size, size[np.newaxis]])
+        self._channel_average = np.concatenate([self._channel_average, channel_average[np.newaxis]])
+
+    def remove(self, target_id: Hashable):
+        """
+        Stop tracking a target.
+        :param target_id: id of the target
+        :type target_id: Hashable
+        """
+        if target_id not in self._ids:
+            return
+        index = self._ids.pop(target_id)
+        self._ids = OrderedDict((t, i - (i > index)) for t, i in self._ids.items())
+        keep = np.delete(np.arange(len(self._center_pos)), index)
+        self._center_pos = self._center_pos[keep]
+        self._size = self._size[keep]
+        self._channel_average = self._channel_average[keep]
+        if len(keep) == 0:
+            self._cls_kernels, self._loc_kernels = None, None
+        else:
+            keep = nd.array(keep, ctx=self._cls_kernels.context)
+            self._cls_kernels = nd.take(self._cls_kernels, keep)
+            self._loc_kernels = nd.take(self._loc_kernels, keep)
+
+    @staticmethod
+    def _xcorr(xcorr, kernels, search):
+        """
+        Depthwise cross-correlation of a DepthwiseXCorr block of the RPN head, for a batch of search features and
+        the kernels of the corresponding targets.
+        """
+        search = xcorr.conv_search(search)
+        batch, channels, kernel_h, kernel_w = kernels.shape
+        search_h, search_w = search.shape[2:]
+        out = nd.Convolution(data=search.reshape((1, batch * channels, search_h, search_w)),
+                             weight=kernels.reshape((batch * channels, 1, kernel_h, kernel_w)),
+                             kernel=(kernel_h, kernel_w), no_bias=True,
+                             num_filter=batch * channels, num_group=batch * channels)
+        out = out.reshape((batch, channels, search_h - kernel_h + 1, search_w - kernel_w + 1))
+        return xcorr.head(out)
+
+    def track(self, img) -> Dict[Hashable, TrackingAnnotation]:
+        """
+        Update the positions of all targets with a new frame.
+        :param img: new frame
+        :type img: opendr.engine.data.Image or np.ndarray
+        :return: box of each target, keyed by target id, with the confidence of the tracker as score
+        :rtype: Dict[Hashable, TrackingAnnotation]
+        """
+        if len(self._ids) == 0:
+            return {}
+        img = self._to_opencv(img)
+        tracker = self._tracker
+        w_z = self._size[:, 0] + tracker.CONTEXT_AMOUNT * np.sum(self._size, axis=1)
+        h_z = self._size[:, 1] + tracker.CONTEXT_AMOUNT * np.sum(self._size, axis=1)
+        s_z = np.sqrt(w_z * h_z)
+        scale_z = tracker.EXEMPLAR_SIZE / s_z
+        s_x = s_z * (tracker.INSTANCE_SIZE / tracker.EXEMPLAR_SIZE)
+        x_crops = nd.concat(*[
+            tracker.get_subwindow(img, center_pos, tracker.INSTANCE_SIZE, round(s), channel_average,
+                                  self.learner.ctx)
+            for center_pos, s, channel_average in zip(self._center_pos, s_x, self._channel_average)
+        ], dim=0)
+
+        model = self.learner._model
+        search = model.backbone(x_crops)
+        cls = self._xcorr(model.rpn_head.cls, self._cls_kernels, search)
+        loc = self._xcorr(model.rpn_head.loc, self._loc_kernels, search)
+
+        batch = len(self._ids)
+        # softmax over the two classes of each anchor, as in SiamRPNTracker._convert_score()
+        score = nd.softmax(cls.reshape((batch, 2, -1)), axis=1)[:, 1].asnumpy()
+        delta = loc.reshape((batch, 4, -1)).asnumpy()
+        anchors = tracker.anchors
+        pred_bbox = np.stack([
+            delta[:, 0] * anchors[:, 2] + anchors[:, 0],
+            delta[:, 1] * anchors[:, 3] + anchors[:, 1],
+            np.exp(delta[:, 2]) * anchors[:, 2],
+            np.exp(delta[:, 3]) * anchors[:, 3],
+        ], axis=1)
+
+        def change(hw_r):
+            return np.maximum(hw_r, 1. / hw_r)
+
+        def get_scale(bbox_w, bbox_h):
+            pad = (bbox_w + bbox_h) * 0.5
+            return np.sqrt((bbox_w + pad) * (bbox_h + pad))
+
+        size = self._size[:, :, np.newaxis]
+        s_c = change(get_scale(pred_bbox[:, 2], pred_bbox[:, 3]) /
+                     get_scale(size[:, 0] * scale_z[:, np.newaxis], size[:, 1] * scale_z[:, np.newaxis]))
+        r_c = change((size[:, 0] / size[:, 1]) / (pred_bbox[:, 2] / pred_bbox[:, 3]))
+        penalty = np.exp(-(r_c * s_c - 1) * tracker.PENALTY_K)
+        pscore = penalty * score
+        pscore = pscore * (1 - tracker.WINDOW_INFLUENCE) + tracker.window * tracker.WINDOW_INFLUENCE
+        best_idx = np.argmax(pscore, axis=1)
+
+        targets = np.arange(batch)
+        bbox = pred_bbox[targets, :, best_idx] / scale_z[:, np.newaxis]
+        best_score = score[targets, best_idx]
+        penalty_lr = penalty[targets, best_idx] * best_score * tracker.LR
+        center_x = bbox[:, 0] + self._center_pos[:, 0]
+        center_y = bbox[:, 1] + self._center_pos[:, 1]
+        width = self._size[:, 0] * (1 - penalty_lr) + bbox[:, 2] * penalty_lr
+        height = self._size[:, 1] * (1 - penalty_lr) + bbox[:, 3] * penalty_lr
+
+        # keep the centers in the image, as SiamRPNTracker._bbox_clip()
+        img_h, img_w = img.shape[:2]
+        center_x = np.maximum(0, np.minimum(center_x, img_w))
+        center_y = np.maximum(0, np.minimum(center_y, img_h))
+        width = np.maximum(10, np.minimum(width, img_w))
+        height = np.maximum(10, np.minimum(height, img_h))
+        self._center_pos = np.stack([center_x, center_y], axis=1)
+        self._size = np.stack([width, height], axis=1)
+
+        results = {}
+        for target_id, i in self._ids.items():
+            pred_bbox = list(map(int, [center_x[i] - width[i] / 2, center_y[i] - height[i] / 2, width[i], height[i]]))
+            results[target_id] = TrackingAnnotation(left=pred_bbox[0], top=pred_bbox[1], width=pred_bbox[2],
+                                                    height=pred_bbox[3], name=0, id=target_id,
+                                                    score=float(best_score[i]))
+        return results
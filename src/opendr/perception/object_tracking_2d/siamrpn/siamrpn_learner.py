@@ -42,6 +42,7 @@ from opendr.engine.target import TrackingAnnotation
 from opendr.engine.datasets import ExternalDataset
 from opendr.engine.constants import OPENDR_SERVER_URL
 from opendr.engine.datasets import DatasetIterator
+from opendr.perception.object_tracking_2d.siamrpn.multi_target_tracker import SiamRPNMultiTargetTracker
 
 gutils.random.seed(0)
 os.environ['MXNET_CUDNN_AUTOTUNE_DEFAULT'] = '0'
@@ -330,6 +331,15 @@ class SiamRPNLearner(Learner):
         return TrackingAnnotation(left=pred_bbox[0], top=pred_bbox[1],
                                   width=pred_bbox[2], height=pred_bbox[3], name=0, id=0)
 
+    def multi_target_tracker(self):
+        """
+        Creates a tracker which tracks many targets in the same video with the model of the learner. The search
+        regions of all targets are passed through the network as a single batch on each frame.
+        :return: tracker without targets, which are added with its `add` method
+        :rtype: SiamRPNMultiTargetTracker
+        """
+        return SiamRPNMultiTargetTracker(self)
+
     def save(self, path, verbose=False):
         """
         Method for saving the current model in the path provided.
@@ -379,6 +389,7 @@ class SiamRPNLearner(Learner):
         self._model.load_parameters(os.path.join(path, metadata["model_paths"][0]))
         self._model.collect_params().reset_ctx(self.ctx)
         self._model.hybridize(static_alloc=True, static_shape=True)
+        self.tracker = build_tracker(self._model)
         if verbose:
             print("Loaded parameters and metadata.")
         return True
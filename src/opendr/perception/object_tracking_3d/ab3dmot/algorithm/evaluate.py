@@ -19,6 +19,7 @@ import math
 import numpy as np
 from typing import List
 from munkres import Munkres
+from scipy.optimize import linear_sum_assignment
 from collections import defaultdict
 from opendr.engine.target import TrackingAnnotation3DList
 
@@ -39,6 +40,32 @@ except (CudaSupportError, ValueError):
         return np.ones((boxes.shape[0], qboxes.shape[0]))
 
 
+def _scalar_overlap_type(iou):
+    """
+        Returns the type of the overlaps 1 - (1 - iou) that TrackingEvaluator computes and sums one pair at a time.
+        It follows the promotion of Python and numpy scalars, which differs between numpy versions.
+    """
+
+    return type(1 - iou.dtype.type(0))
+
+
+def _loaded_classes(cls, loading_groundtruth):
+    """
+        Classes that should be loaded for evaluating cls (ignored neighboring classes).
+    """
+
+    if "car" in cls.lower():
+        classes = ["car", "van"]
+    elif "pedestrian" in cls.lower():
+        classes = ["pedestrian", "person_sitting"]
+    else:
+        classes = [cls.lower()]
+
+    if loading_groundtruth:
+        classes += ["dontcare"]
+    return classes
+
+
 class TrackingData:
     """
         Utility class to load data.
@@ -101,6 +128,61 @@ class TrackingData:
         return "\n".join("%s: %s" % item for item in attrs.items())
 
 
+class TrackingColumns:
+    """
+        Columnar counterpart of TrackingData, holding the objects of a sequence as arrays sorted by frame.
+    """
+
+    fields = ("frame", "track_id", "obj_type", "truncation", "occlusion", "bbox2d", "dimensions", "location", "yaw")
+
+    def __init__(self, annotations, n_frames):
+        """
+            Constructor, gathers the fields of a list of TrackingAnnotation3D in KITTI format.
+        """
+
+        self.n_frames = n_frames
+        self.frame = np.array([int(a.frame) for a in annotations], dtype=np.int64)
+        self.track_id = np.array([int(a.id) for a in annotations], dtype=np.int64)
+        self.obj_type = np.array([a.name.lower() for a in annotations], dtype=str)
+        self.truncation = np.array([int(a.truncated) for a in annotations], dtype=np.int64)
+        self.occlusion = np.array([int(a.occluded) for a in annotations], dtype=np.int64)
+        # x1, y1, x2, y2 [px]
+        self.bbox2d = np.array([a.bbox2d for a in annotations], dtype=np.float64).reshape(-1, 4)
+        # h, w, l [m]
+        self.dimensions = np.array([a.dimensions for a in annotations], dtype=np.float64).reshape(-1, 3)
+        # X, Y, Z [m]
+        self.location = np.array([a.location for a in annotations], dtype=np.float64).reshape(-1, 3)
+        self.yaw = np.array([a.rotation_y for a in annotations], dtype=np.float64)
+
+    def __len__(self):
+        return len(self.frame)
+
+    def take(self, indices):
+        """
+            Returns the objects at the given indices.
+        """
+
+        result = copy.copy(self)
+        for field in self.fields:
+            setattr(result, field, getattr(self, field)[indices])
+        return result
+
+    def bounds(self):
+        """
+            Returns the start of the objects of each frame and the end of the objects of the last frame.
+        """
+
+        return np.searchsorted(self.frame, np.arange(self.n_frames + 1))
+
+    def iou_boxes(self):
+        """
+            Returns the boxes of all objects, in the layout that box_overlap_3d gives to iou3D for a single object.
+        """
+
+        corners = center_to_corner_box3d(self.location, self.dimensions, self.yaw)
+        return np.concatenate([corners[:, 0], corners[:, 1, :2]], axis=1)
+
+
 class TrackingEvaluator(object):
     """ tracking statistics (CLEAR MOT, id-switches, fragments, ML/PT/MT, precision/recall)
              MOTA	- Multi-object tracking accuracy in [0,100]
@@ -255,16 +337,7 @@ class TrackingEvaluator(object):
             Loads detections in KITTI format from textfiles.
         """
 
-        # classes that should be loaded (ignored neighboring classes)
-        if "car" in cls.lower():
-            classes = ["car", "van"]
-        elif "pedestrian" in cls.lower():
-            classes = ["pedestrian", "person_sitting"]
-        else:
-            classes = [cls.lower()]
-
-        if loading_groundtruth:
-            classes += ["dontcare"]
+        classes = _loaded_classes(cls, loading_groundtruth)
 
         # construct objectDetections object to hold detection data
         t_data = TrackingData()
@@ -840,6 +913,13 @@ class TrackingEvaluator(object):
                     tmpPT += 1
                     self.PT += 1
 
+        return self._compute_metrics(n_ignored_tr_total)
+
+    def _compute_metrics(self, n_ignored_tr_total):
+        """
+            Computes MT/PT/ML ratios, precision/recall and CLEAR MOT metrics from the accumulated statistics.
+        """
+
         if (self.n_gt_trajectories - n_ignored_tr_total) == 0:
             self.MT = 0.0
             self.PT = 0.0
@@ -1002,12 +1082,309 @@ class TrackingEvaluator(object):
         return s_out
 
 
+class VectorizedTrackingEvaluator(TrackingEvaluator):
+    """ TrackingEvaluator that keeps the objects of each sequence in columnar arrays instead of TrackingData objects.
+        The overlaps of all (ground truth, tracker) pairs of a frame are computed with a single iou3D call and
+        associated with scipy's linear_sum_assignment, and the remaining statistics are computed over all the frames
+        and trajectories of a sequence at once. The results and the summary are the same as the ones of
+        TrackingEvaluator.
+    """
+
+    def _load_data(
+        self, input_sequences: List[TrackingAnnotation3DList], cls, min_score=-1000, loading_groundtruth=False
+    ):
+        """
+            Generic loader for ground truth and tracking data, which are stored as TrackingColumns.
+        """
+
+        classes = _loaded_classes(cls, loading_groundtruth)
+
+        eval_2d = True
+        eval_3d = True
+
+        seq_data = []
+        n_trajectories_seq = []
+        for seq, input_seq_data in enumerate(input_sequences):
+            data = TrackingColumns(
+                [box for box_list in input_seq_data for box in box_list.boxes if box.name.lower() in classes],
+                len(input_seq_data),
+            )
+
+            # do not consider objects marked as invalid
+            data = data.take((data.track_id != -1) | (data.obj_type == "dontcare"))
+
+            out_of_range = np.flatnonzero(data.frame >= data.n_frames)
+            if len(out_of_range) > 0:
+                raise ValueError("Frame " + str(data.frame[out_of_range[0]]) + " is out of range")
+
+            if not loading_groundtruth:
+                # the first object whose (frame, track id) occured before
+                order = np.lexsort((np.arange(len(data)), data.track_id, data.frame))
+                repeated = order[1:][
+                    (data.frame[order[1:]] == data.frame[order[:-1]]) &
+                    (data.track_id[order[1:]] == data.track_id[order[:-1]])
+                ]
+                if len(repeated) > 0:
+                    first = repeated.min()
+                    raise ValueError(
+                        "track ids are not unique for sequence %d: frame %d"
+                        % (seq, data.frame[first]) + (
+                            " track id %d occured at least twice for this frame"
+                            % data.track_id[first]
+                        )
+                    )
+
+                # check if uploaded data provides information for 2D and 3D evaluation
+                eval_2d = eval_2d and not np.any(data.bbox2d == -1)
+                eval_3d = eval_3d and not np.any(data.location == -1000)
+
+            n_trajectories_seq.append(len(np.unique(data.track_id[data.obj_type != "dontcare"])))
+            seq_data.append(data.take(np.argsort(data.frame, kind="stable")))
+
+        if not loading_groundtruth:
+            self.tracker = seq_data
+            self.n_tr_trajectories = sum(n_trajectories_seq)
+            self.eval_2d = eval_2d
+            self.eval_3d = eval_3d
+            self.n_tr_seq = n_trajectories_seq
+            if self.n_tr_trajectories == 0:
+                return False
+        else:
+            # split ground truth and DontCare areas
+            self.dcareas = [data.take(data.obj_type == "dontcare") for data in seq_data]
+            self.groundtruth = [data.take(data.obj_type != "dontcare") for data in seq_data]
+            self.n_gt_seq = n_trajectories_seq
+            self.n_gt_trajectories = sum(n_trajectories_seq)
+        return True
+
+    def _neighboring_class(self, obj_type):
+        return (
+            ((self.cls == "car") & (obj_type == "van")) |
+            ((self.cls == "pedestrian") & (obj_type == "person_sitting"))
+        )
+
+    def compute(self):
+        """
+            Computes the same metrics as TrackingEvaluator.compute().
+        """
+
+        max_cost = 1e9
+
+        # overlaps of the true positives, in the order of their association
+        tp_overlaps = []
+        n_ignored_tr_total = 0
+        for seq_idx in range(len(self.groundtruth)):
+            self.log(
+                Logger.LOG_WHEN_NORMAL, "Computing metrics " + self.cls +
+                "[" + str(seq_idx + 1) + "/" + str(len(self.groundtruth)) + "]", end='\r'
+            )
+            g = self.groundtruth[seq_idx]
+            dc = self.dcareas[seq_idx]  # don't care areas
+            n_frames = g.n_frames
+            g_bounds = g.bounds()
+            dc_bounds = dc.bounds()
+            # tracker detections after the last ground truth frame are not evaluated
+            t = self.tracker[seq_idx]
+            t = t.take(slice(0, np.searchsorted(t.frame, n_frames)))
+            t_bounds = np.searchsorted(t.frame, np.arange(n_frames + 1))
+
+            g_boxes = g.iou_boxes()
+            dc_boxes = dc.iou_boxes()
+            t_boxes = t.iou_boxes()
+
+            # index of the tracker detection associated with each ground truth detection, or -1
+            association = np.full(len(g), -1)
+            overlap = np.zeros(len(g))
+            overlap_type = np.float64
+            dc_overlap = np.zeros(len(t), dtype=bool)
+            for f in range(n_frames):
+                g_start, g_end = g_bounds[f], g_bounds[f + 1]
+                t_start, t_end = t_bounds[f], t_bounds[f + 1]
+
+                # use hungarian method to associate, using boxoverlap 0..1 as cost, with gating
+                iou = iou3D(g_boxes[g_start:g_end], t_boxes[t_start:t_end])
+                overlap_type = _scalar_overlap_type(iou)
+                cost = 1 - iou.astype(overlap_type)
+                cost[cost > self.min_overlap] = max_cost
+                rows, cols = linear_sum_assignment(cost)
+                valid = cost[rows, cols] < max_cost
+                rows, cols = rows[valid], cols[valid]
+                association[g_start + rows] = t_start + cols
+                overlap[g_start + rows] = 1 - cost[rows, cols]
+
+                dc_overlap[t_start:t_end] = np.any(
+                    iou3D(t_boxes[t_start:t_end], dc_boxes[dc_bounds[f]:dc_bounds[f + 1]]) > 0.5, axis=1
+                )
+
+            tp = association >= 0
+            g_tracker = np.full(len(g), -1)
+            g_tracker[tp] = t.track_id[association[tp]]
+            t_valid = np.zeros(len(t), dtype=bool)
+            t_valid[association[tp]] = True
+            if np.any(tp):
+                tp_overlaps.append(overlap[tp].astype(overlap_type))
+
+            # ignore tracker detections in neighboring classes, smaller or equal to the minimum height,
+            # or in DontCare areas
+            t_height = np.abs(t.bbox2d[:, 1] - t.bbox2d[:, 3])
+            t_ignored = ~t_valid & (self._neighboring_class(t.obj_type) | (t_height <= self.min_height) | dc_overlap)
+
+            # ignored FN/TP (truncation or neighboring object class)
+            g_ignored = (
+                (g.occlusion > self.max_occlusion) |
+                (g.truncation > self.max_truncation) |
+                self._neighboring_class(g.obj_type)
+            )
+            ignored_fn = g_ignored & (g_tracker < 0)
+            ignored_tp = g_ignored & (g_tracker >= 0)
+            # ignored true positives whose associated tracker detection is also ignored
+            ignored_pairs = np.zeros(len(g), dtype=bool)
+            ignored_pairs[ignored_tp] = t_ignored[association[ignored_tp]]
+
+            def per_frame(frame, mask):
+                return np.bincount(frame[mask], minlength=n_frames)
+
+            n_g = np.diff(g_bounds)
+            n_t = np.diff(t_bounds)
+            n_tp = per_frame(g.frame, tp)
+            n_ignored_fn = per_frame(g.frame, ignored_fn)
+            n_ignored_tp = per_frame(g.frame, ignored_tp)
+            n_ignored_pairs = per_frame(g.frame, ignored_pairs)
+            n_ignored_tracker = per_frame(t.frame, t_ignored)
+
+            # see TrackingEvaluator.compute() for the meaning of the statistics
+            tmptp = n_tp - n_ignored_tp
+            tmpfn = n_g - n_tp - n_ignored_fn
+            tmpfp = n_t - tmptp - n_ignored_tracker - n_ignored_tp + n_ignored_pairs
+            if np.any(tmptp < 0):
+                raise NameError("Something went wrong! TP is negative")
+            if np.any(tmpfn < 0):
+                raise NameError("Something went wrong! FN is negative")
+            if np.any(tmpfp < 0):
+                raise NameError("Something went wrong! FP is negative")
+
+            self.n_gt += int(n_g.sum() - n_ignored_fn.sum() - n_ignored_tp.sum())
+            self.n_tr += int(n_t.sum())
+            self.tp += int(n_tp.sum())
+            self.itp += int(n_ignored_tp.sum())
+            self.n_igt += int(n_ignored_fn.sum() + n_ignored_tp.sum())
+            self.n_itr += int(n_ignored_tracker.sum())
+            self.n_igttr += int(n_ignored_pairs.sum())
+            self.fn += int(tmpfn.sum())
+            self.ifn += int(n_ignored_fn.sum())
+            self.fp += int(tmpfp.sum())
+
+            # MODP_t, with the overlaps of the ignored true positives subtracted in the order of the original loop
+            for f in range(n_frames):
+                if tmptp[f] == 0:
+                    self.MODP_t.append(1)
+                    continue
+                frame = slice(g_bounds[f], g_bounds[f + 1])
+                tmpc = np.cumsum(
+                    np.concatenate([overlap[frame][tp[frame]], -overlap[frame][ignored_tp[frame]]]).astype(overlap_type)
+                )[-1]
+                self.MODP_t.append(tmpc / float(tmptp[f]))
+
+            # gather statistics for "per sequence" statistics.
+            self.n_gts.append(int(n_g.sum()))
+            self.n_trs.append(int(n_t.sum()))
+            self.tps.append(int(tmptp.sum()))
+            self.itps.append(int(n_ignored_tp.sum()))
+            self.fps.append(int(tmpfp.sum()))
+            self.fns.append(int(tmpfn.sum()))
+            self.ifns.append(int(n_ignored_fn.sum()))
+            self.n_igts.append(int(n_ignored_fn.sum() + n_ignored_tp.sum()))
+            self.n_itrs.append(int(n_ignored_tracker.sum()))
+
+            if len(g) == 0:
+                continue
+
+            # compute MT/PT/ML, fragments, idswitches for all groundtruth trajectories of the sequence,
+            # with the frames of each trajectory being consecutive
+            order = np.argsort(g.track_id, kind="stable")
+            track_id = g.track_id[order]
+            tracker = g_tracker[order]
+            ignored = g_ignored[order]
+            first = np.concatenate([[True], track_id[1:] != track_id[:-1]])
+            last = np.concatenate([first[1:], [True]])
+            trajectory = np.cumsum(first) - 1
+            length = np.bincount(trajectory)
+            n_ignored = np.bincount(trajectory, ignored)
+            n_lost = np.bincount(trajectory, tracker == -1)
+
+            # all frames of the trajectory are ignored
+            all_ignored = n_ignored == length
+            # all frames of the trajectory are not assigned to any detections
+            all_lost = ~all_ignored & (n_lost == length)
+            evaluated = ~all_ignored & ~all_lost
+
+            # the last tracker id of the trajectory after each frame, which is reset by ignored frames
+            updated = first | ignored | (tracker != -1)
+            last_id = np.where(first | ~ignored, tracker, -1)
+            last_id = last_id[np.maximum.accumulate(np.where(updated, np.arange(len(tracker)), 0))]
+            previous_last_id = np.concatenate([[-1], last_id[:-1]])
+            previous = np.concatenate([[-1], tracker[:-1]])
+            following = np.concatenate([tracker[1:], [-1]])
+            checked = evaluated[trajectory] & ~first & ~ignored
+
+            id_switches = (
+                checked &
+                (previous_last_id != tracker) &
+                (previous_last_id != -1) &
+                (tracker != -1) &
+                (previous != -1)
+            )
+            fragments = (
+                checked &
+                ~last &
+                (previous != tracker) &
+                (previous_last_id != -1) &
+                (tracker != -1) &
+                (following != -1)
+            )
+            # last frame of the trajectory
+            last_fragments = (
+                checked &
+                last &
+                (previous != tracker) &
+                (last_id != -1) &
+                (tracker != -1)
+            )
+            self.id_switches += int(id_switches.sum())
+            self.fragments += int(fragments.sum() + last_fragments.sum())
+
+            # first detection (necessary to be in gt_trajectories) is always tracked
+            tracked = (tracker[first] >= 0) + np.bincount(trajectory, checked & (tracker != -1))
+            with np.errstate(divide="ignore", invalid="ignore"):
+                tracking_ratio = tracked / (length - n_ignored)
+            self.MT += int(np.sum(evaluated & (tracking_ratio > 0.8)))
+            self.ML += int(np.sum(all_lost) + np.sum(evaluated & (tracking_ratio < 0.2)))
+            self.PT += int(np.sum(evaluated & (tracking_ratio >= 0.2) & (tracking_ratio <= 0.8)))
+            n_ignored_tr_total += int(np.sum(all_ignored))
+
+        if self.tp > 0:
+            # summed one by one in the type of the scalar overlaps, as in TrackingEvaluator.compute()
+            self.total_cost = self.total_cost + np.cumsum(np.concatenate(tp_overlaps))[-1]
+
+        return self._compute_metrics(n_ignored_tr_total)
+
+
 def evaluate(
     predictions: List[List[TrackingAnnotation3DList]],
     ground_truths: List[List[TrackingAnnotation3DList]],
-    log=print
+    log=print,
+    backend="vectorized",
 ):
 
+    evaluators = {
+        "munkres": TrackingEvaluator,
+        "vectorized": VectorizedTrackingEvaluator,
+    }
+    if backend not in evaluators:
+        raise ValueError(
+            "Unsupported evaluation backend " + str(backend) + ", should be one of " + str(list(evaluators))
+        )
+
     results = {
         "car": None,
         "pedestrian": None,
@@ -1015,7 +1392,7 @@ def evaluate(
     }
 
     for c in ("car", "pedestrian", "cyclist"):
-        evaluator = TrackingEvaluator(
+        evaluator = evaluators[backend](
             cls=c, n_sequences=len(ground_truths),
             n_frames=[len(a) for a in ground_truths],
             log=log,
@@ -0,0 +1,125 @@
+# Copyright 2020-2023 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import multiprocessing as mp
+from typing import Dict, List
+
+import numpy as np
+from opendr.engine.target import TrackingAnnotation3D, TrackingAnnotation3DList
+
+# learner and dataset of a worker process, inherited from the parent process when it is forked
+_worker_learner = None
+_worker_dataset = None
+
+
+def pack_tracking_annotations(frames: List[TrackingAnnotation3DList]) -> Dict[str, np.ndarray]:
+    """
+    Packs the tracking annotations of the frames of a sequence into a dictionary of arrays, with a row per box.
+    :param frames: annotations of each frame
+    :type frames: List[TrackingAnnotation3DList]
+    :return: fields of all the boxes, and the number of boxes of each frame as "lengths"
+    :rtype: Dict[str, np.ndarray]
+    """
+    boxes = [box for frame in frames for box in frame.boxes]
+    return {
+        "lengths": np.array([len(frame.boxes) for frame in frames], dtype=np.int64),
+        "name": np.array([box.name for box in boxes], dtype=str),
+        "truncated": np.array([box.truncated for box in boxes], dtype=np.float64),
+        "occluded": np.array([box.occluded for box in boxes], dtype=np.float64),
+        "alpha": np.array([box.alpha for box in boxes], dtype=np.float64),
+        "bbox2d": np.array([box.bbox2d for box in boxes], dtype=np.float64).reshape(-1, 4),
+        "dimensions": np.array([box.dimensions for box in boxes], dtype=np.float64).reshape(-1, 3),
+        "location": np.array([box.location for box in boxes], dtype=np.float64).reshape(-1, 3),
+        "rotation_y": np.array([box.rotation_y for box in boxes], dtype=np.float64),
+        "id": np.array([box.id for box in boxes], dtype=np.int64),
+        "score": np.array([box.confidence for box in boxes], dtype=np.float64),
+        "frame": np.array([box.frame for box in boxes], dtype=np.int64),
+    }
+
+
+def unpack_tracking_annotations(arrays: Dict[str, np.ndarray]) -> List[TrackingAnnotation3DList]:
+    """
+    Restores the tracking annotations of a sequence packed with pack_tracking_annotations().
+    :param arrays: packed annotations
+    :type arrays: Dict[str, np.ndarray]
+    :return: annotations of each frame
+    :rtype: List[TrackingAnnotation3DList]
+    """
+    boxes = [
+        TrackingAnnotation3D(
+            str(name), truncated, occluded, alpha, bbox2d, dimensions, location, rotation_y, int(id), score,
+            int(frame)
+        )
+        for name, truncated, occluded, alpha, bbox2d, dimensions, location, rotation_y, id, score, frame in zip(
+            arrays["name"], arrays["truncated"], arrays["occluded"], arrays["alpha"], arrays["bbox2d"],
+            arrays["dimensions"], arrays["location"], arrays["rotation_y"], arrays["id"], arrays["score"],
+            arrays["frame"]
+        )
+    ]
+    starts = np.concatenate([[0], np.cumsum(arrays["lengths"])])
+    return [TrackingAnnotation3DList(boxes[start:end]) for start, end in zip(starts[:-1], starts[1:])]
+
+
+def _init_worker(learner, dataset):
+    global _worker_learner, _worker_dataset
+    _worker_learner = learner
+    _worker_dataset = dataset
+
+
+def _track_sequence(index):
+    learner = _worker_learner
+    infers_count, infers_time = learner.infers_count, learner.infers_time
+    learner.reset()
+    input, ground_truth = _worker_dataset[index]
+    predictions = learner.infer(input)
+    return (
+        index,
+        pack_tracking_annotations(predictions),
+        pack_tracking_annotations(ground_truth),
+        learner.infers_count - infers_count,
+        learner.infers_time - infers_time,
+    )
+
+
+def track_sequences(learner, dataset, indices, num_workers):
+    """
+    Tracks the sequences of a dataset in forked worker processes. Each worker holds its own copy of the learner
+    and of the dataset, and tracks whole sequences, which are sent back as packed arrays.
+    :param learner: learner whose tracker is used, with its reset() and infer() methods
+    :type learner: ObjectTracking3DAb3dmotLearner
+    :param dataset: dataset of (input, ground truth) sequences
+    :type dataset: DatasetIterator
+    :param indices: indices of the sequences to track
+    :type indices: List[int]
+    :param num_workers: number of worker processes
+    :type num_workers: int
+    :return: (index, predictions, ground truth, number of inferences, inference time) for each sequence, in the
+        order in which they are completed
+    :rtype: Iterator[Tuple[int, List[TrackingAnnotation3DList], List[TrackingAnnotation3DList], int, float]]
+    """
+    if "fork" not in mp.get_all_start_methods():
+        raise ValueError("Tracking sequences in worker processes requires the fork start method")
+
+    context = mp.get_context("fork")
+    with context.Pool(processes=num_workers, initializer=_init_worker, initargs=(learner, dataset)) as pool:
+        for index, predictions, ground_truth, infers_count, infers_time in pool.imap_unordered(
+            _track_sequence, indices
+        ):
+            yield (
+                index,
+                unpack_tracking_annotations(predictions),
+                unpack_tracking_annotations(ground_truth),
+                infers_count,
+                infers_time,
+            )
@@ -18,6 +18,7 @@ from opendr.engine.datasets import DatasetIterator
 from opendr.engine.target import BoundingBox3DList
 from opendr.perception.object_tracking_3d.ab3dmot.algorithm.ab3dmot import AB3DMOT
 from opendr.perception.object_tracking_3d.ab3dmot.algorithm.evaluate import evaluate as evaluate_kitti_tracking
+from opendr.perception.object_tracking_3d.ab3dmot.algorithm.parallel_eval import track_sequences
 from opendr.perception.object_tracking_3d.ab3dmot.logger import Logger
 
 
@@ -84,7 +85,8 @@ class ObjectTracking3DAb3dmotLearner(Learner):
         logging_path=None,
         silent=False,
         verbose=False,
-        count=None
+        count=None,
+        num_workers=1,
     ):
 
         logger = Logger(silent, verbose, logging_path)
@@ -95,16 +97,34 @@ class ObjectTracking3DAb3dmotLearner(Learner):
         if count is None:
             count = len(dataset)
 
-        predictions = []
-        ground_truths = []
-
-        for i in range(count):
-            self.reset()
-            input, ground_truth = dataset[i]
-            predictions.append(self.infer(input))
-            ground_truths.append(ground_truth)
-
-            logger.log(Logger.LOG_WHEN_NORMAL, "Computing tracklets [" + str(i + 1) + "/" + str(count) + "]", end='\r')
+        predictions = [None] * count
+        ground_truths = [None] * count
+
+        if num_workers > 1:
+            # sequences are independent, so that they are tracked in forked workers and merged in order
+            sequences = track_sequences(self, dataset, range(count), num_workers)
+            for i, (index, sequence_predictions, ground_truth, infers_count, infers_time) in enumerate(sequences):
+                predictions[index] = sequence_predictions
+                ground_truths[index] = ground_truth
+                self.infers_count += infers_count
+                self.infers_time += infers_time
+
+                logger.log(
+                    Logger.LOG_WHEN_NORMAL, "Computing tracklets [" + str(i + 1) + "/" + str(count) + "]", end='\r'
+                )
+        else:
+            for i in range(count):
+                self.reset()
+                input, ground_truth = dataset[i]
+                predictions[i] = self.infer(input)
+                ground_truths[i] = ground_truth
+
+                logger.log(
+                    Logger.LOG_WHEN_NORMAL, "Computing tracklets [" + str(i + 1) + "/" + str(count) + "]", end='\r'
+                )
+
+        # the tracker is left reset, whether the sequences were tracked here or in worker processes
+        self.reset()
 
         result = evaluate_kitti_tracking(predictions, ground_truths, log=logger.log)
 
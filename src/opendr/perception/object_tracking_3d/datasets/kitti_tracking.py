@@ -18,6 +18,7 @@
 # (frame,objectType,truncation,occlusion,alpha,x1,y1,x2,y2,h,w,l,X,Y,Z,ry,[score])
 
 import os
+import struct
 import time
 from zipfile import ZipFile
 from urllib.request import urlretrieve
@@ -35,6 +36,8 @@ from skimage import io
 
 from opendr.perception.object_detection_3d.datasets.kitti import parse_calib
 
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
 
 class KittiTrackingDatasetIterator(DatasetIterator):
     def __init__(
@@ -161,6 +164,7 @@ class LabeledTrackingPointCloudsDatasetIterator(DatasetIterator):
         image_path=None,
         labels_format="tracking",  # detection, tracking
         num_point_features=4,
+        index_path=None,
     ):
         super().__init__()
 
@@ -169,6 +173,7 @@ class LabeledTrackingPointCloudsDatasetIterator(DatasetIterator):
         self.calib_path = calib_path
         self.image_path = image_path
         self.num_point_features = num_point_features
+        self.index_path = index_path
 
         self.lidar_files = sorted(os.listdir(self.lidar_path))
         # self.label_files = sorted(os.listdir(self.label_path))
@@ -179,31 +184,89 @@ class LabeledTrackingPointCloudsDatasetIterator(DatasetIterator):
             else None
         )
 
-        self.labels, self.max_id = load_tracking_file(
+        self.labels = TrackingLabelTable(
             self.label_path, "tracking", labels_format,
         )
+        self.max_id = self.labels.max_id
         self.calib = parse_calib(self.calib_path)
 
+        self.points = None
+        self.point_offsets = None
+        self.image_shapes = None
+
+        if self.index_path is not None:
+            self.build_index(self.index_path)
+
+    def build_index(self, index_path):
+        """
+        Indexes the sequence for fast iteration. The point clouds of all frames are concatenated in a single
+        file, which is memory-mapped and sliced with per-frame offsets, and the image shapes are read from the
+        image headers. An existing index of the same frames is reused.
+        :param index_path: directory of the index files
+        :type index_path: str
+        """
+
+        os.makedirs(index_path, exist_ok=True)
+        points_path = os.path.join(index_path, "points.bin")
+        offsets_path = os.path.join(index_path, "point_offsets.npy")
+        image_shapes_path = os.path.join(index_path, "image_shapes.npy")
+        point_size = self.num_point_features * np.dtype(np.float32).itemsize
+
+        offsets = np.load(offsets_path) if os.path.exists(offsets_path) else None
+        if (
+            offsets is None or
+            len(offsets) != len(self.lidar_files) + 1 or
+            not os.path.exists(points_path) or
+            os.path.getsize(points_path) != offsets[-1] * point_size
+        ):
+            sizes = [0]
+            with open(points_path, "wb") as points_file:
+                for lidar_file in self.lidar_files:
+                    with open(os.path.join(self.lidar_path, lidar_file), "rb") as f:
+                        data = f.read()
+                    points_file.write(data)
+                    sizes.append(len(data) // point_size)
+            offsets = np.cumsum(sizes)
+            np.save(offsets_path, offsets)
+
+        self.point_offsets = offsets
+        if offsets[-1] > 0:
+            self.points = np.memmap(
+                points_path, dtype=np.float32, mode="r", shape=(int(offsets[-1]), self.num_point_features)
+            )
+        else:
+            self.points = np.zeros((0, self.num_point_features), dtype=np.float32)
+
+        if self.image_files is not None:
+            image_shapes = np.load(image_shapes_path) if os.path.exists(image_shapes_path) else None
+            if image_shapes is None or len(image_shapes) != len(self.image_files):
+                image_shapes = np.array([
+                    read_image_shape(os.path.join(self.image_path, image_file))
+                    for image_file in self.image_files
+                ], dtype=np.int32).reshape(-1, 2)
+                np.save(image_shapes_path, image_shapes)
+            self.image_shapes = image_shapes
+
     def __getitem__(self, idx):
-        points = np.fromfile(
-            os.path.join(self.lidar_path, self.lidar_files[idx]),
-            dtype=np.float32,
-            count=-1,
-        ).reshape([-1, self.num_point_features])
+        if self.points is not None:
+            points = self.points[self.point_offsets[idx]:self.point_offsets[idx + 1]]
+        else:
+            points = np.fromfile(
+                os.path.join(self.lidar_path, self.lidar_files[idx]),
+                dtype=np.float32,
+                count=-1,
+            ).reshape([-1, self.num_point_features])
         target = self.labels[idx] if len(self.labels) > idx else TrackingAnnotation3DList([])
 
-        image_shape = (
-            None
-            if self.image_files is None
-            else (
-                np.array(
-                    io.imread(
-                        os.path.join(self.image_path, self.image_files[idx])
-                    ).shape[:2],
-                    dtype=np.int32,
-                )
+        if self.image_files is None:
+            image_shape = None
+        elif self.image_shapes is not None:
+            image_shape = self.image_shapes[idx]
+        else:
+            image_shape = np.array(
+                read_image_shape(os.path.join(self.image_path, self.image_files[idx])),
+                dtype=np.int32,
             )
-        )
 
         result = (
             PointCloudWithCalibration(points, self.calib, image_shape),
@@ -216,6 +279,136 @@ class LabeledTrackingPointCloudsDatasetIterator(DatasetIterator):
         return len(self.lidar_files)
 
 
+def read_image_shape(image_path):
+    """
+    Returns the (height, width) of an image. For PNG images, only the header is read, other images are decoded.
+    """
+
+    with open(image_path, "rb") as f:
+        header = f.read(24)
+
+    if header[:8] == _PNG_SIGNATURE and header[12:16] == b"IHDR":
+        width, height = struct.unpack(">II", header[16:24])
+        return height, width
+
+    return io.imread(image_path).shape[:2]
+
+
+class TrackingLabelTable:
+    """
+    Labels of a KITTI tracking file, parsed into a structured array with a row per box. The TrackingAnnotation3DList
+    (or BoundingBox3DList) of a frame is only created when the frame is accessed, and holds the same boxes as
+    the corresponding element of the list returned by load_tracking_file(), with float scores.
+    """
+
+    dtype = np.dtype([
+        ("frame", np.int64),
+        ("id", np.int64),
+        ("name", object),
+        ("truncated", np.int64),
+        ("occluded", np.int64),
+        ("alpha", np.float64),
+        ("bbox2d", np.float64, (4,)),
+        ("dimensions", np.float64, (3,)),
+        ("location", np.float64, (3,)),
+        ("rotation_y", np.float64),
+        ("score", np.float64),
+    ])
+
+    def __init__(self, file_path, format, return_format, remove_dontcare=False):
+
+        if format not in ("tracking", "detection"):
+            raise ValueError("format should be tracking or detection")
+        if return_format not in ("tracking", "detection"):
+            raise ValueError("return_format should be tracking or detection")
+
+        self.return_format = return_format
+
+        with open(file_path) as f:
+            lines = [x.strip() for x in f.readlines()]
+        fields = [line.split(" ") for line in lines if len(line) > 0]
+
+        # the detection format has no track id column
+        first = 2 if format == "tracking" else 1
+        n_columns = first + 16
+        # missing scores are 0
+        columns = np.array(
+            [f[:n_columns] + ["0"] * (n_columns - len(f)) for f in fields], dtype=str
+        ).reshape(-1, n_columns)
+        numbers = columns[:, [0] + list(range(first + 1, n_columns))].astype(np.float64)
+
+        table = np.zeros(len(fields), dtype=self.dtype)
+        table["frame"] = numbers[:, 0]
+        table["id"] = columns[:, 1].astype(np.float64) if format == "tracking" else -1
+        table["name"] = columns[:, first]
+        table["truncated"] = numbers[:, 1]
+        table["occluded"] = numbers[:, 2]
+        table["alpha"] = numbers[:, 3]
+        table["bbox2d"] = numbers[:, 4:8]
+        # h, w, l are stored as l, h, w
+        table["dimensions"] = numbers[:, [10, 8, 9]]
+        table["location"] = numbers[:, 11:14]
+        table["rotation_y"] = numbers[:, 14]
+        table["score"] = numbers[:, 15]
+
+        # frames are counted before removing DontCare areas, and the last frame is left out
+        self.n_frames = max(int(table["frame"].max()), 0) if len(table) > 0 else 0
+
+        if remove_dontcare:
+            table = table[table["name"] != "DontCare"]
+
+        self.max_id = max(0, int(table["id"].max())) if return_format == "tracking" and len(table) > 0 else 0
+
+        order = np.argsort(table["frame"], kind="stable")
+        self.table = table[order]
+        self.bounds = np.searchsorted(self.table["frame"], np.arange(self.n_frames + 1))
+
+    def __len__(self):
+        return self.n_frames
+
+    def __getitem__(self, idx):
+
+        if idx < 0:
+            idx += self.n_frames
+        if idx < 0 or idx >= self.n_frames:
+            raise IndexError("Frame " + str(idx) + " is out of range")
+
+        rows = self.table[self.bounds[idx]:self.bounds[idx + 1]]
+
+        if self.return_format == "tracking":
+            return TrackingAnnotation3DList([
+                TrackingAnnotation3D(
+                    name=row["name"],
+                    truncated=int(row["truncated"]),
+                    occluded=int(row["occluded"]),
+                    alpha=float(row["alpha"]),
+                    bbox2d=row["bbox2d"].tolist(),
+                    dimensions=row["dimensions"].tolist(),
+                    location=row["location"].tolist(),
+                    rotation_y=float(row["rotation_y"]),
+                    score=float(row["score"]),
+                    frame=int(row["frame"]),
+                    id=int(row["id"]),
+                )
+                for row in rows
+            ])
+
+        return BoundingBox3DList([
+            BoundingBox3D(
+                name=row["name"],
+                truncated=int(row["truncated"]),
+                occluded=int(row["occluded"]),
+                alpha=float(row["alpha"]),
+                bbox2d=row["bbox2d"].tolist(),
+                dimensions=row["dimensions"].tolist(),
+                location=row["location"].tolist(),
+                rotation_y=float(row["rotation_y"]),
+                score=float(row["score"]),
+            )
+            for row in rows
+        ])
+
+
 def load_tracking_file(
     file_path, format, return_format, remove_dontcare=False
 ):
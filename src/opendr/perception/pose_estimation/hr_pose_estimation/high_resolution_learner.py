@@ -34,7 +34,9 @@ from opendr.perception.pose_estimation.lightweight_open_pose.lightweight_open_po
 from opendr.perception.pose_estimation.lightweight_open_pose.algorithm.modules.load_state import \
     load_state
 from opendr.perception.pose_estimation.lightweight_open_pose.algorithm.modules.keypoints import \
-    extract_keypoints, group_keypoints
+    extract_keypoints, group_keypoints, extract_keypoints_batched, group_keypoints_vectorized, assemble_poses
+from opendr.perception.pose_estimation.lightweight_open_pose.algorithm.modules.device_keypoints import \
+    extract_keypoints_on_device, SparsePafs
 from opendr.perception.pose_estimation.lightweight_open_pose.algorithm.val import \
     convert_to_coco_format, run_coco_eval, normalize, pad_width
 
@@ -97,7 +99,8 @@ class HighResolutionPoseEstimationLearner(LightweightOpenPoseLearner):
 
     def __second_pass(self, img, net_input_height_size, max_width, stride, upsample_ratio,
                       pad_value=(0, 0, 0),
-                      img_mean=np.array([128, 128, 128], np.float32), img_scale=np.float32(1 / 256)):
+                      img_mean=np.array([128, 128, 128], np.float32), img_scale=np.float32(1 / 256),
+                      postprocess_on_device=False):
         """
         This method detects the keypoints and estimates the pose of humans using the cropped image from the
         previous step (__first_pass_).
@@ -112,6 +115,9 @@ class HighResolutionPoseEstimationLearner(LightweightOpenPoseLearner):
         :param upsample_ratio: Defines the amount of upsampling to be performed on the heatmaps and PAFs when resizing,
             defaults to 4
         :type upsample_ratio: int, optional
+        :param postprocess_on_device: If True, the heatmaps are returned as the network output tensor and the pafs as a
+            SparsePafs object, both kept on the inference device and not upsampled
+        :type postprocess_on_device: bool, optional
 
          :returns: the heatmap of human figures, the part affinity filed (pafs), the scale of the resized image compred
             to the initial and the pad arround the image
@@ -142,11 +148,14 @@ class HighResolutionPoseEstimationLearner(LightweightOpenPoseLearner):
         stages_output = self.model(tensor_img)
 
         stage2_heatmaps = stages_output[-2]
+        stage2_pafs = stages_output[-1]
+        if postprocess_on_device:
+            return stage2_heatmaps, SparsePafs(stage2_pafs, upsample_ratio), scale, pad
+
         heatmaps = np.transpose(stage2_heatmaps.squeeze().cpu().data.numpy(), (1, 2, 0))
         heatmaps = heatmaps.astype(np.float32)
         heatmaps = cv2.resize(heatmaps, (0, 0), fx=upsample_ratio, fy=upsample_ratio, interpolation=cv2.INTER_CUBIC)
 
-        stage2_pafs = stages_output[-1]
         pafs = np.transpose(stage2_pafs.squeeze().cpu().data.numpy(), (1, 2, 0))
         pafs = pafs.astype(np.float32)
         pafs = cv2.resize(pafs, (0, 0), fx=upsample_ratio, fy=upsample_ratio, interpolation=cv2.INTER_CUBIC)
@@ -182,8 +191,10 @@ class HighResolutionPoseEstimationLearner(LightweightOpenPoseLearner):
         raise NotImplementedError
 
     def reset(self):
-        """This method is not used in this implementation."""
-        return NotImplementedError
+        """
+        Resets the pose tracking state, e.g. before running inference on a new video stream.
+        """
+        self.pose_tracker.reset()
 
     def save(self, path, verbose=False):
         """This method is not used in this implementation."""
@@ -415,8 +426,8 @@ class HighResolutionPoseEstimationLearner(LightweightOpenPoseLearner):
                 print("Evaluation ended with no detections.")
             return {"average_precision": [0.0 for _ in range(5)], "average_recall": [0.0 for _ in range(5)]}
 
-    def infer(self, img, upsample_ratio=4, stride=8, track=True, smooth=True,
-              multiscale=False):
+    def infer(self, img, upsample_ratio=4, stride=8, track=False, smooth=False,
+              multiscale=False, postprocess_on_device=False):
         """
                 This method is used to perform pose estimation on an image.
 
@@ -428,12 +439,17 @@ class HighResolutionPoseEstimationLearner(LightweightOpenPoseLearner):
                 :param stride: Defines the stride value for creating a padded image
                 :type stride: int,optional
                 :param track: If True, infer propagates poses ids from previous frame results to track poses,
-                    defaults to 'True'
+                    which makes consecutive calls stateful, defaults to 'False'
                 :type track: bool, optional
-                :param smooth: If True, smoothing is performed on pose keypoints between frames, defaults to 'True'
+                :param smooth: If True and track is True, smoothing is performed on pose keypoints between frames,
+                    defaults to 'False'
                 :type smooth: bool, optional
                 :param multiscale: Specifies whether evaluation will run in the predefined multiple scales setup or not.
                 :type multiscale: bool,optional
+                :param postprocess_on_device: If True, heatmap upsampling and peak detection run on the inference device
+                    and only the detected peaks and the PAF samples needed for grouping are transferred to the host,
+                    defaults to 'False'
+                :type postprocess_on_device: bool, optional
 
                 :return: Returns a list of engine.target.Pose objects, where each holds a pose, or returns an empty list
                     if no detections were made.
@@ -513,38 +529,29 @@ class HighResolutionPoseEstimationLearner(LightweightOpenPoseLearner):
 
             # ------- Second pass of the image, inference for pose estimation -------
             avg_heatmaps, avg_pafs, scale, pad = self.__second_pass(crop_img, self.second_pass_height,
-                                                                    max_width, stride, upsample_ratio)
-
-            total_keypoints_num = 0
-            all_keypoints_by_type = []
-            for kpt_idx in range(18):
-                total_keypoints_num += extract_keypoints(avg_heatmaps[:, :, kpt_idx], all_keypoints_by_type,
-                                                         total_keypoints_num)
-
-            pose_entries, all_keypoints = group_keypoints(all_keypoints_by_type, avg_pafs)
-
-            for kpt_id in range(all_keypoints.shape[0]):
-                all_keypoints[kpt_id, 0] = (all_keypoints[kpt_id, 0] * stride / upsample_ratio - pad[1]) / scale
-                all_keypoints[kpt_id, 1] = (all_keypoints[kpt_id, 1] * stride / upsample_ratio - pad[0]) / scale
-
-            for i in range(all_keypoints.shape[0]):
-                for j in range(all_keypoints.shape[1]):
-                    if j == 0:  # Adjust offset if needed for evaluation on our HR datasets
-                        all_keypoints[i][j] = round((all_keypoints[i][j] + xmin) - offset)
-                    if j == 1:  # Adjust offset if needed for evaluation on our HR datasets
-                        all_keypoints[i][j] = round((all_keypoints[i][j] + ymin) - offset)
-
-            current_poses = []
-            for n in range(len(pose_entries)):
-                if len(pose_entries[n]) == 0:
-                    continue
-                pose_keypoints = np.ones((num_keypoints, 2), dtype=np.int32) * -1
-                for kpt_id in range(num_keypoints):
-                    if pose_entries[n][kpt_id] != -1.0:  # keypoint was found
-                        pose_keypoints[kpt_id, 0] = int(all_keypoints[int(pose_entries[n][kpt_id]), 0])
-                        pose_keypoints[kpt_id, 1] = int(all_keypoints[int(pose_entries[n][kpt_id]), 1])
-                pose = Pose(pose_keypoints, pose_entries[n][18])
-                current_poses.append(pose)
+                                                                    max_width, stride, upsample_ratio,
+                                                                    postprocess_on_device=postprocess_on_device)
+
+            if postprocess_on_device:
+                all_keypoints_by_type, _ = extract_keypoints_on_device(avg_heatmaps, upsample_ratio, 18)
+            else:
+                all_keypoints_by_type, _ = extract_keypoints_batched(avg_heatmaps, 18)
+
+            pose_entries, all_keypoints = group_keypoints_vectorized(all_keypoints_by_type, avg_pafs)
+
+            all_keypoints[:, 0] = (all_keypoints[:, 0] * stride / upsample_ratio - pad[1]) / scale
+            all_keypoints[:, 1] = (all_keypoints[:, 1] * stride / upsample_ratio - pad[0]) / scale
+
+            # Adjust offset if needed for evaluation on our HR datasets
+            all_keypoints[:, 0] = np.round((all_keypoints[:, 0] + xmin) - offset)
+            all_keypoints[:, 1] = np.round((all_keypoints[:, 1] + ymin) - offset)
+
+            poses_keypoints, poses_confidence = assemble_poses(pose_entries, all_keypoints, num_keypoints)
+            current_poses = [Pose(pose_keypoints, confidence)
+                             for pose_keypoints, confidence in zip(poses_keypoints, poses_confidence)]
+
+        if track:
+            self.pose_tracker.update(current_poses, smooth=smooth)
 
         return current_poses
 
@@ -0,0 +1,76 @@
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+from opendr.perception.pose_estimation.lightweight_open_pose.algorithm.modules.keypoints import keypoints_from_peaks
+
+
+def extract_keypoints_on_device(heatmaps, upsample_ratio, num_keypoints=18, threshold=0.1, nms_radius=6):
+    """
+    Upsamples the heatmaps and detects their peaks on the device they already reside on, so that only the sparse
+    list of peaks is transferred to the host, where the final radius suppression is performed.
+
+    :param heatmaps: network heatmaps of shape (1, C, h, w)
+    :type heatmaps: torch.Tensor
+    :param upsample_ratio: upsampling factor of the heatmaps
+    :type upsample_ratio: int
+    :return: list with one (K, 4) float64 array (x, y, score, id) per keypoint type, in the upsampled coordinate
+        frame, and the total number of keypoints
+    :rtype: list of numpy.ndarray, int
+    """
+    with torch.no_grad():
+        heatmaps = heatmaps.detach()[0, :num_keypoints].float().unsqueeze(0)
+        heatmaps = F.interpolate(heatmaps, scale_factor=upsample_ratio, mode='bicubic', align_corners=False)[0]
+        heatmaps = heatmaps.masked_fill(heatmaps < threshold, 0)
+
+        # A peak is strictly larger than its 4-neighbourhood, with zeros outside the map
+        padded = F.pad(heatmaps, (1, 1, 1, 1))
+        peaks = (heatmaps > padded[:, 1:-1, 2:]) & (heatmaps > padded[:, 1:-1, :-2]) & \
+                (heatmaps > padded[:, 2:, 1:-1]) & (heatmaps > padded[:, :-2, 1:-1])
+        peaks_idx = torch.nonzero(peaks)
+        scores = heatmaps[peaks_idx[:, 0], peaks_idx[:, 1], peaks_idx[:, 2]]
+        # Single device-to-host copy of channel, y, x and score of every peak
+        peaks = torch.cat([peaks_idx.double(), scores.double().unsqueeze(1)], dim=1).cpu().numpy()
+
+    channels, ys, xs = (peaks[:, i].astype(np.int64) for i in range(3))
+    scores = peaks[:, 3].astype(np.float32)
+    return keypoints_from_peaks(ys, xs, channels, scores, num_keypoints, nms_radius)
+
+
+class SparsePafs:
+    """
+    Part affinity fields that stay on the inference device at network resolution. They are indexed like the
+    (H, W, C) numpy array obtained by bicubically upsampling them by upsample_ratio, but only the requested points
+    are interpolated and transferred to the host, which is all group_keypoints_vectorized() needs.
+    """
+    def __init__(self, pafs, upsample_ratio):
+        """
+        :param pafs: network PAFs of shape (1, C, h, w)
+        :type pafs: torch.Tensor
+        :param upsample_ratio: upsampling factor the indices refer to
+        :type upsample_ratio: int
+        """
+        self.pafs = pafs.detach()[:1].float()
+        self.upsample_ratio = upsample_ratio
+        _, channels, height, width = self.pafs.shape
+        self.shape = (height * upsample_ratio, width * upsample_ratio, channels)
+
+    def __getitem__(self, index):
+        ys, xs, channels = np.broadcast_arrays(*index)
+        out_shape = ys.shape
+        ys, xs, channels = ys.ravel(), xs.ravel(), channels.ravel()
+
+        # Sample every distinct point once for all channels and keep only the requested channel of each point
+        points, inverse = np.unique(ys.astype(np.int64) * self.shape[1] + xs, return_inverse=True)
+        point_ys, point_xs = np.divmod(points, self.shape[1])
+        _, _, height, width = self.pafs.shape
+        # Source coordinates of F.interpolate(..., align_corners=False), normalized for grid_sample
+        grid = np.stack([(2 * point_xs + 1) / (self.upsample_ratio * width) - 1,
+                         (2 * point_ys + 1) / (self.upsample_ratio * height) - 1], axis=-1)
+        grid = torch.from_numpy(grid).to(device=self.pafs.device, dtype=self.pafs.dtype).view(1, 1, -1, 2)
+        with torch.no_grad():
+            samples = F.grid_sample(self.pafs, grid, mode='bicubic', padding_mode='border', align_corners=False)
+            samples = samples[0, :, 0]
+            values = samples[torch.from_numpy(channels.astype(np.int64)).to(samples.device),
+                             torch.from_numpy(inverse.reshape(-1)).to(samples.device)]
+        return values.cpu().numpy().reshape(out_shape)
@@ -157,3 +157,179 @@ def group_keypoints(all_keypoints_by_type, pafs, pose_entry_size=20, min_paf_sco
         filtered_entries.append(pose_entries[i])
     pose_entries = np.asarray(filtered_entries)
     return pose_entries, all_keypoints
+
+
+def extract_keypoints_batched(heatmaps, num_keypoints=18, threshold=0.1, nms_radius=6):
+    """
+    Vectorized equivalent of calling extract_keypoints() on the first num_keypoints channels of heatmaps.
+    Peaks of all channels are found at once and the distance-based suppression is computed with a
+    pairwise distance matrix per channel instead of a scalar double loop.
+
+    :return: list with one (K, 4) float64 array (x, y, score, id) per keypoint type and the total number of
+        keypoints
+    """
+    heatmaps = heatmaps[:, :, :num_keypoints]
+    heatmaps[heatmaps < threshold] = 0
+    heatmap_with_borders = np.pad(heatmaps, [(2, 2), (2, 2), (0, 0)], mode='constant')
+    heatmap_center = heatmap_with_borders[1:-1, 1:-1]
+    heatmap_peaks = (heatmap_center > heatmap_with_borders[1:-1, 2:]) & \
+                    (heatmap_center > heatmap_with_borders[1:-1, :-2]) & \
+                    (heatmap_center > heatmap_with_borders[2:, 1:-1]) & \
+                    (heatmap_center > heatmap_with_borders[:-2, 1:-1])
+    heatmap_peaks = heatmap_peaks[1:-1, 1:-1]
+
+    ys, xs, channels = np.nonzero(heatmap_peaks)
+    return keypoints_from_peaks(ys, xs, channels, heatmaps[ys, xs, channels], num_keypoints, nms_radius)
+
+
+def keypoints_from_peaks(ys, xs, channels, scores, num_keypoints=18, nms_radius=6):
+    """
+    Suppresses peaks that lie closer than nms_radius to a previously kept peak of the same keypoint type, in the
+    same order as extract_keypoints(), and assigns consecutive ids to the remaining ones.
+
+    :return: list with one (K, 4) float64 array (x, y, score, id) per keypoint type and the total number of
+        keypoints
+    """
+    # Same ordering as extract_keypoints(): per channel, by x and then by y
+    order = np.lexsort((ys, xs, channels))
+    ys, xs, channels, scores = ys[order], xs[order], channels[order], scores[order]
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(channels, minlength=num_keypoints))])
+
+    all_keypoints_by_type = []
+    total_keypoint_num = 0
+    for kpt_idx in range(num_keypoints):
+        x = xs[bounds[kpt_idx]:bounds[kpt_idx + 1]]
+        y = ys[bounds[kpt_idx]:bounds[kpt_idx + 1]]
+        dist = (x[:, None] - x[None, :]) ** 2 + (y[:, None] - y[None, :]) ** 2
+        close = np.triu(dist < nms_radius ** 2, 1)
+        suppressed = np.zeros(x.shape[0], dtype=bool)
+        keep = []
+        for i in range(x.shape[0]):
+            if suppressed[i]:
+                continue
+            keep.append(i)
+            suppressed |= close[i]
+        keep = np.asarray(keep, dtype=np.int64)
+
+        keypoints = np.empty((keep.shape[0], 4), dtype=np.float64)
+        keypoints[:, 0] = x[keep]
+        keypoints[:, 1] = y[keep]
+        keypoints[:, 2] = scores[bounds[kpt_idx]:bounds[kpt_idx + 1]][keep]
+        keypoints[:, 3] = total_keypoint_num + np.arange(keep.shape[0])
+        all_keypoints_by_type.append(keypoints)
+        total_keypoint_num += keep.shape[0]
+    return all_keypoints_by_type, total_keypoint_num
+
+
+def group_keypoints_vectorized(all_keypoints_by_type, pafs, pose_entry_size=20, min_paf_score=0.05):
+    """
+    Array-based equivalent of group_keypoints(), expecting the output of extract_keypoints_batched().
+    The PAF line integrals of the candidate limbs of all body parts are scored in a single gather and
+    pose entries are kept in a single array that is updated with masks instead of per-entry loops.
+    """
+    points_per_limb = 10
+    grid = np.arange(points_per_limb, dtype=np.float32).reshape(1, -1, 1)
+    if len(all_keypoints_by_type) > 0:
+        all_keypoints = np.concatenate(all_keypoints_by_type, axis=0)
+    else:
+        all_keypoints = np.zeros((0, 4), dtype=np.float64)
+    all_keypoints_by_type = [keypoints.astype(np.float32) for keypoints in all_keypoints_by_type]
+
+    # Build the candidate limb vectors of all body parts and score them against the PAFs at once.
+    starts, vectors, channels, limb_sizes = [], [], [], []
+    for part_id in range(len(BODY_PARTS_PAF_IDS)):
+        kpts_a = all_keypoints_by_type[BODY_PARTS_KPT_IDS[part_id][0]]
+        kpts_b = all_keypoints_by_type[BODY_PARTS_KPT_IDS[part_id][1]]
+        n, m = len(kpts_a), len(kpts_b)
+        limb_sizes.append(n * m)
+        if n == 0 or m == 0:
+            continue
+        a = np.broadcast_to(kpts_a[None, :, :2], (m, n, 2))
+        starts.append(a.reshape(-1, 1, 2))
+        vectors.append((kpts_b[:, None, :2] - a).reshape(-1, 1, 2))
+        channels.append(np.broadcast_to(np.asarray(BODY_PARTS_PAF_IDS[part_id])[None], (n * m, 2)))
+    limb_bounds = np.concatenate([[0], np.cumsum(limb_sizes)])
+
+    if len(vectors) > 0:
+        vec_raw = np.concatenate(vectors, axis=0)
+        steps = (1 / (points_per_limb - 1) * vec_raw)
+        points = steps * grid + np.concatenate(starts, axis=0)
+        points = points.round().astype(dtype=np.int32)
+        channels = np.concatenate(channels, axis=0)
+        field = pafs[points[..., 1:], points[..., :1], channels[:, None, :]]
+        vec_norm = np.linalg.norm(vec_raw, ord=2, axis=-1, keepdims=True)
+        vec = vec_raw / (vec_norm + 1e-6)
+        all_affinity_scores = (field * vec).sum(-1).reshape(-1, points_per_limb)
+        valid_affinity_scores = all_affinity_scores > min_paf_score
+        valid_num = valid_affinity_scores.sum(1)
+        all_affinity_scores = (all_affinity_scores * valid_affinity_scores).sum(1) / (valid_num + 1e-6)
+        all_success_ratio = valid_num / points_per_limb
+
+    pose_entries = np.zeros((0, pose_entry_size), dtype=np.float64)
+    for part_id in range(len(BODY_PARTS_PAF_IDS)):
+        if limb_sizes[part_id] == 0:
+            continue
+        kpt_a_id, kpt_b_id = BODY_PARTS_KPT_IDS[part_id]
+        kpts_a = all_keypoints_by_type[kpt_a_id]
+        kpts_b = all_keypoints_by_type[kpt_b_id]
+        affinity_scores = all_affinity_scores[limb_bounds[part_id]:limb_bounds[part_id + 1]]
+        success_ratio = all_success_ratio[limb_bounds[part_id]:limb_bounds[part_id + 1]]
+
+        # Get a list of limbs according to the obtained affinity score.
+        valid_limbs = np.where(np.logical_and(affinity_scores > 0, success_ratio > 0.8))[0]
+        if len(valid_limbs) == 0:
+            continue
+        b_idx, a_idx = np.divmod(valid_limbs, len(kpts_a))
+        affinity_scores = affinity_scores[valid_limbs]
+
+        # Suppress incompatible connections.
+        a_idx, b_idx, affinity_scores = connections_nms(a_idx, b_idx, affinity_scores)
+        conn_a = kpts_a[a_idx, 3].astype(np.int32)
+        conn_b = kpts_b[b_idx, 3].astype(np.int32)
+        if len(conn_a) == 0:
+            continue
+
+        # After connections_nms every keypoint takes part in at most one connection, so each pose entry
+        # can be extended by at most one connection of the current limb.
+        if part_id == 17 or part_id == 18:
+            entry_a = pose_entries[:, kpt_a_id]
+            entry_b = pose_entries[:, kpt_b_id]
+            rows, conns = np.nonzero((entry_a[:, None] == conn_a[None, :]) & (entry_b == -1)[:, None])
+            rows_b, conns_b = np.nonzero((entry_b[:, None] == conn_b[None, :]) & (entry_a == -1)[:, None])
+            pose_entries[rows, kpt_b_id] = conn_b[conns]
+            pose_entries[rows_b, kpt_a_id] = conn_a[conns_b]
+            continue
+
+        new_entries = np.ones((len(conn_a), pose_entry_size)) * -1
+        new_entries[:, kpt_a_id] = conn_a
+        new_entries[:, kpt_b_id] = conn_b
+        new_entries[:, -1] = 2
+        new_entries[:, -2] = all_keypoints[conn_a, 2] + all_keypoints[conn_b, 2] + affinity_scores
+        if part_id == 0:
+            pose_entries = new_entries
+            continue
+
+        rows, conns = np.nonzero(pose_entries[:, kpt_a_id][:, None] == conn_a[None, :])
+        pose_entries[rows, kpt_b_id] = conn_b[conns]
+        pose_entries[rows, -1] += 1
+        pose_entries[rows, -2] += all_keypoints[conn_b[conns], 2] + affinity_scores[conns]
+        unmatched = np.ones(len(conn_a), dtype=bool)
+        unmatched[conns] = False
+        pose_entries = np.concatenate([pose_entries, new_entries[unmatched]], axis=0)
+
+    keep = (pose_entries[:, -1] >= 3) & (pose_entries[:, -2] / np.maximum(pose_entries[:, -1], 1) >= 0.2)
+    return pose_entries[keep], all_keypoints
+
+
+def assemble_poses(pose_entries, all_keypoints, num_keypoints=18):
+    """
+    Gathers the keypoint coordinates of the grouped pose entries.
+
+    :return: (P, num_keypoints, 2) int32 array of keypoint coordinates, where missing keypoints are -1, and
+        the (P,) array of pose confidences
+    """
+    kpt_ids = pose_entries[:, :num_keypoints]
+    found = kpt_ids != -1
+    pose_keypoints = np.ones((pose_entries.shape[0], num_keypoints, 2), dtype=np.int32) * -1
+    pose_keypoints[found] = all_keypoints[kpt_ids[found].astype(np.int64), :2].astype(np.int32)
+    return pose_keypoints, pose_entries[:, num_keypoints]
@@ -1,4 +1,5 @@
 import math
+import numpy as np
 
 
 def get_alpha(rate=30, cutoff=1):
@@ -43,6 +44,66 @@ class OneEuroFilter:
         return x_filtered
 
 
+class OneEuroFilterBank:
+    """
+    Array-based bank of OneEuroFilter instances. Filter states are stored in arrays with one row per track, so a whole
+    frame of keypoints is filtered with a few array operations. Rows whose state is not valid behave like freshly
+    created OneEuroFilter objects.
+    """
+    def __init__(self, shape=(18, 2), freq=15, mincutoff=1, beta=0.05, dcutoff=1):
+        self.shape = tuple(shape)
+        self.freq = freq
+        self.mincutoff = mincutoff
+        self.beta = beta
+        self.dcutoff = dcutoff
+        self.alpha_d = get_alpha(self.freq, self.dcutoff)
+        self.x_previous = np.zeros((0,) + self.shape)
+        self.dx_smoothed = np.zeros((0,) + self.shape)
+        self.x_filtered = np.zeros((0,) + self.shape)
+
+    def __len__(self):
+        return self.x_previous.shape[0]
+
+    def take(self, rows):
+        """
+        Reorders the filter states, e.g. to follow the order of the tracks matched in a new frame.
+        Rows equal to -1 get an empty state.
+
+        :param rows: for each output row, the index of the state to carry over, or -1
+        :type rows: numpy.ndarray
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        for name in ["x_previous", "dx_smoothed", "x_filtered"]:
+            state = getattr(self, name)
+            new_state = np.zeros((rows.shape[0],) + self.shape)
+            new_state[rows >= 0] = state[rows[rows >= 0]]
+            setattr(self, name, new_state)
+
+    def __call__(self, x, valid):
+        """
+        Filters one new sample per filter.
+
+        :param x: new samples, of shape (len(self),) + self.shape
+        :type x: numpy.ndarray
+        :param valid: boolean mask of the filters that hold a state from the previous sample, the rest are
+            (re)initialized with x
+        :type valid: numpy.ndarray
+        :return: filtered samples
+        :rtype: numpy.ndarray
+        """
+        x = np.asarray(x, dtype=np.float64)
+        dx = np.where(valid, (x - self.x_previous) * self.freq, 0)
+        dx_smoothed = np.where(valid, self.alpha_d * dx + (1 - self.alpha_d) * self.dx_smoothed, dx)
+        cutoff = self.mincutoff + self.beta * np.abs(dx_smoothed)
+        tau = 1 / (2 * math.pi * cutoff)
+        alpha = 1 / (1 + tau / (1 / self.freq))
+        x_filtered = np.where(valid, alpha * x + (1 - alpha) * self.x_filtered, x)
+        self.x_previous = x
+        self.dx_smoothed = dx_smoothed
+        self.x_filtered = x_filtered
+        return x_filtered
+
+
 if __name__ == '__main__':
     filter = OneEuroFilter(freq=15, beta=0.1)
     for val in range(10):
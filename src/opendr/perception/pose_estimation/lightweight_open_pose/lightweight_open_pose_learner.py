@@ -37,8 +37,7 @@ from opendr.engine.target import Pose
 from opendr.engine.constants import OPENDR_SERVER_URL
 
 # OpenDR lightweight_open_pose imports
-from opendr.perception.pose_estimation.lightweight_open_pose.filtered_pose import FilteredPose
-from opendr.perception.pose_estimation.lightweight_open_pose.utilities import track_poses
+from opendr.perception.pose_estimation.lightweight_open_pose.utilities import PoseTracker
 from opendr.perception.pose_estimation.lightweight_open_pose.algorithm.models.with_mobilenet import \
     PoseEstimationWithMobileNet
 from opendr.perception.pose_estimation.lightweight_open_pose.algorithm.models.with_mobilenet_v2 import \
@@ -51,7 +50,9 @@ from opendr.perception.pose_estimation.lightweight_open_pose.algorithm.modules.l
     load_state  # , load_from_mobilenet
 from opendr.perception.pose_estimation.lightweight_open_pose.algorithm.modules.loss import l2_loss
 from opendr.perception.pose_estimation.lightweight_open_pose.algorithm.modules.keypoints import \
-    extract_keypoints, group_keypoints
+    extract_keypoints, group_keypoints, extract_keypoints_batched, group_keypoints_vectorized, assemble_poses
+from opendr.perception.pose_estimation.lightweight_open_pose.algorithm.modules.device_keypoints import \
+    extract_keypoints_on_device, SparsePafs
 from opendr.perception.pose_estimation.lightweight_open_pose.algorithm.datasets.coco import CocoTrainDataset
 from opendr.perception.pose_estimation.lightweight_open_pose.algorithm.datasets.coco import CocoValDataset
 from opendr.perception.pose_estimation.lightweight_open_pose.algorithm.datasets.transformations import \
@@ -122,7 +123,7 @@ class LightweightOpenPoseLearner(Learner):
         self.img_mean = img_mean
         self.img_scale = img_scale
         self.pad_value = pad_value
-        self.previous_poses = []
+        self.pose_tracker = PoseTracker()
 
         self.ort_session = None  # ONNX runtime inference session
         self.model_train_state = True
@@ -587,7 +588,7 @@ class LightweightOpenPoseLearner(Learner):
                 print("Evaluation ended with no detections.")
             return {"average_precision": [0.0 for _ in range(5)], "average_recall": [0.0 for _ in range(5)]}
 
-    def infer(self, img, upsample_ratio=4, track=True, smooth=True):
+    def infer(self, img, upsample_ratio=4, track=True, smooth=True, postprocess_on_device=False):
         """
         This method is used to perform pose estimation on an image.
 
@@ -600,6 +601,10 @@ class LightweightOpenPoseLearner(Learner):
         :type track: bool, optional
         :param smooth: If True, smoothing is performed on pose keypoints between frames, defaults to 'True'
         :type smooth: bool, optional
+        :param postprocess_on_device: If True, heatmap upsampling and peak detection run on the inference device and
+            only the detected peaks and the PAF samples needed for grouping are transferred to the host, instead of the
+            full upsampled heatmaps and PAFs, defaults to 'False'
+        :type postprocess_on_device: bool, optional
         :return: Returns a list of engine.target.Pose objects, where each holds a pose, or returns an empty list if no
             detections were made.
         :rtype: list of engine.target.Pose objects
@@ -638,45 +643,32 @@ class LightweightOpenPoseLearner(Learner):
             stage2_heatmaps = stages_output[-2]
             stage2_pafs = stages_output[-1]
 
-        heatmaps = np.transpose(stage2_heatmaps.squeeze().cpu().data.numpy(), (1, 2, 0))
-        if self.half:
-            heatmaps = np.float32(heatmaps)
-        heatmaps = cv2.resize(heatmaps, (0, 0), fx=upsample_ratio, fy=upsample_ratio, interpolation=cv2.INTER_CUBIC)
+        num_keypoints = 18  # 19th for bg
+        if postprocess_on_device:
+            all_keypoints_by_type, _ = extract_keypoints_on_device(stage2_heatmaps, upsample_ratio, num_keypoints)
+            pafs = SparsePafs(stage2_pafs, upsample_ratio)
+        else:
+            heatmaps = np.transpose(stage2_heatmaps.squeeze().cpu().data.numpy(), (1, 2, 0))
+            if self.half:
+                heatmaps = np.float32(heatmaps)
+            heatmaps = cv2.resize(heatmaps, (0, 0), fx=upsample_ratio, fy=upsample_ratio,
+                                  interpolation=cv2.INTER_CUBIC)
 
-        pafs = np.transpose(stage2_pafs.squeeze().cpu().data.numpy(), (1, 2, 0))
-        if self.half:
-            pafs = np.float32(pafs)
-        pafs = cv2.resize(pafs, (0, 0), fx=upsample_ratio, fy=upsample_ratio, interpolation=cv2.INTER_CUBIC)
-
-        total_keypoints_num = 0
-        all_keypoints_by_type = []
-        num_keypoints = 18
-        for kpt_idx in range(num_keypoints):  # 19th for bg
-            total_keypoints_num += extract_keypoints(heatmaps[:, :, kpt_idx], all_keypoints_by_type,
-                                                     total_keypoints_num)
-
-        pose_entries, all_keypoints = group_keypoints(all_keypoints_by_type, pafs)
-        for kpt_id in range(all_keypoints.shape[0]):
-            all_keypoints[kpt_id, 0] = (all_keypoints[kpt_id, 0] * self.stride / upsample_ratio - pad[1]) / scale
-            all_keypoints[kpt_id, 1] = (all_keypoints[kpt_id, 1] * self.stride / upsample_ratio - pad[0]) / scale
-        current_poses = []
-        for n in range(len(pose_entries)):
-            if len(pose_entries[n]) == 0:
-                continue
-            pose_keypoints = np.ones((num_keypoints, 2), dtype=np.int32) * -1
-            for kpt_id in range(num_keypoints):
-                if pose_entries[n][kpt_id] != -1.0:  # keypoint was found
-                    pose_keypoints[kpt_id, 0] = int(all_keypoints[int(pose_entries[n][kpt_id]), 0])
-                    pose_keypoints[kpt_id, 1] = int(all_keypoints[int(pose_entries[n][kpt_id]), 1])
-            if smooth:
-                pose = FilteredPose(pose_keypoints, pose_entries[n][18])
-            else:
-                pose = Pose(pose_keypoints, pose_entries[n][18])
-            current_poses.append(pose)
+            pafs = np.transpose(stage2_pafs.squeeze().cpu().data.numpy(), (1, 2, 0))
+            if self.half:
+                pafs = np.float32(pafs)
+            pafs = cv2.resize(pafs, (0, 0), fx=upsample_ratio, fy=upsample_ratio, interpolation=cv2.INTER_CUBIC)
+            all_keypoints_by_type, _ = extract_keypoints_batched(heatmaps, num_keypoints)
+
+        pose_entries, all_keypoints = group_keypoints_vectorized(all_keypoints_by_type, pafs)
+        all_keypoints[:, 0] = (all_keypoints[:, 0] * self.stride / upsample_ratio - pad[1]) / scale
+        all_keypoints[:, 1] = (all_keypoints[:, 1] * self.stride / upsample_ratio - pad[0]) / scale
+        poses_keypoints, poses_confidence = assemble_poses(pose_entries, all_keypoints, num_keypoints)
+        current_poses = [Pose(pose_keypoints, confidence)
+                         for pose_keypoints, confidence in zip(poses_keypoints, poses_confidence)]
 
         if track:
-            track_poses(self.previous_poses, current_poses, smooth=smooth)
-            self.previous_poses = current_poses
+            self.pose_tracker.update(current_poses, smooth=smooth)
         return current_poses
 
     def save(self, path, verbose=False):
@@ -900,8 +892,10 @@ class LightweightOpenPoseLearner(Learner):
         self.__load_from_onnx(os.path.join(self.temp_path, "onnx_model_temp.onnx"))
 
     def reset(self):
-        """This method is not used in this implementation."""
-        return NotImplementedError
+        """
+        Resets the pose tracking state, e.g. before running inference on a new video stream.
+        """
+        self.pose_tracker.reset()
 
     def count_parameters(self):
         """
@@ -15,6 +15,8 @@
 import numpy as np
 import cv2
 from opendr.engine.target import Pose
+from opendr.perception.pose_estimation.lightweight_open_pose.algorithm.modules.one_euro_filter import \
+    OneEuroFilterBank
 
 # More information on body-part id naming on target.py - Pose class.
 # For in-depth explanation of BODY_PARTS_KPT_IDS and BODY_PARTS_PAF_IDS see
@@ -151,3 +153,133 @@ def track_poses(previous_poses, current_poses, threshold=3, smooth=False):
                     current_pose.filters[kpt_id] = previous_poses[best_matched_id].filters[kpt_id]
                 current_pose.data[kpt_id, 0] = current_pose.filters[kpt_id][0](current_pose.data[kpt_id, 0])
                 current_pose.data[kpt_id, 1] = current_pose.filters[kpt_id][1](current_pose.data[kpt_id, 1])
+
+
+def get_similarity_matrix(poses_a, poses_b, threshold=0.5):
+    """
+    Calculates get_similarity() between every pose of poses_a and every pose of poses_b at once.
+
+    :param poses_a: keypoints of the first set of poses, of shape (N, num_kpts, 2), where missing keypoints are -1
+    :type poses_a: numpy.ndarray
+    :param poses_b: keypoints of the second set of poses, of shape (M, num_kpts, 2)
+    :type poses_b: numpy.ndarray
+    :param threshold: the similarity threshold to consider the keypoints similar
+    :type threshold: float
+    :return: (N, M) matrix with the number of similar keypoints
+    :rtype: numpy.ndarray
+    """
+    def get_areas(poses):
+        # Same area as the cv2.boundingRect() of the found keypoints used by get_bbox()
+        found = (poses[:, :, 0] != -1)[:, :, None]
+        lower = np.where(found, poses, np.iinfo(np.int64).max).min(axis=1)
+        upper = np.where(found, poses, np.iinfo(np.int64).min).max(axis=1)
+        sides = np.where(found.any(axis=1), upper - lower + 1, 0)
+        return sides[:, 0] * sides[:, 1]
+
+    poses_a = np.asarray(poses_a, dtype=np.int64).reshape(-1, Pose.num_kpts, 2)
+    poses_b = np.asarray(poses_b, dtype=np.int64).reshape(-1, Pose.num_kpts, 2)
+    area = np.maximum(get_areas(poses_a)[:, None], get_areas(poses_b)[None, :])
+    distance = np.sum((poses_a[:, None] - poses_b[None, :]) ** 2, axis=-1)
+    similarity = np.exp(-distance / (2 * (area[:, :, None] + np.spacing(1)) * vars_))
+    both_found = (poses_a[:, None, :, 0] != -1) & (poses_b[None, :, :, 0] != -1)
+    return np.sum(both_found & (similarity > threshold), axis=-1)
+
+
+class PoseTracker:
+    """
+    Array-based counterpart of track_poses(). Keypoint similarities between the poses of the current and the previous
+    frame are computed as one matrix, ids are assigned either greedily, in the same order as track_poses(), or with
+    the Hungarian algorithm, and keypoints are smoothed with a OneEuroFilterBank whose rows follow the tracks.
+    One tracker should be used per input stream.
+    """
+    def __init__(self, threshold=3, similarity_threshold=0.5, assignment="greedy", freq=15, mincutoff=1, beta=0.05,
+                 dcutoff=1):
+        """
+        :param threshold: minimal number of similar keypoints between poses to propagate an id
+        :type threshold: int
+        :param similarity_threshold: the similarity threshold to consider two keypoints similar
+        :type similarity_threshold: float
+        :param assignment: either "greedy" or "hungarian"
+        :type assignment: str
+        """
+        if assignment not in ["greedy", "hungarian"]:
+            raise UserWarning("assignment should be either 'greedy' or 'hungarian'")
+        self.threshold = threshold
+        self.similarity_threshold = similarity_threshold
+        self.assignment = assignment
+        self.filters = OneEuroFilterBank((Pose.num_kpts, 2), freq=freq, mincutoff=mincutoff, beta=beta,
+                                         dcutoff=dcutoff)
+        self.previous_keypoints = np.zeros((0, Pose.num_kpts, 2), dtype=np.int32)
+        self.previous_ids = []
+        self.previous_filtered = np.zeros((0, Pose.num_kpts), dtype=bool)
+
+    def reset(self):
+        """
+        Forgets all tracks.
+        """
+        self.filters.take(np.zeros(0))
+        self.previous_keypoints = np.zeros((0, Pose.num_kpts, 2), dtype=np.int32)
+        self.previous_ids = []
+        self.previous_filtered = np.zeros((0, Pose.num_kpts), dtype=bool)
+
+    def __assign(self, similarity):
+        """
+        :return: for each current pose, the index of the matched previous pose or -1
+        """
+        matches = np.full(similarity.shape[0], -1, dtype=np.int64)
+        if similarity.shape[0] == 0 or similarity.shape[1] == 0:
+            return matches
+        if self.assignment == "hungarian":
+            from scipy.optimize import linear_sum_assignment
+            rows, cols = linear_sum_assignment(similarity, maximize=True)
+            accepted = (similarity[rows, cols] > 0) & (similarity[rows, cols] >= self.threshold)
+            matches[rows[accepted]] = cols[accepted]
+        else:
+            available = np.ones(similarity.shape[1], dtype=bool)
+            for i in range(similarity.shape[0]):
+                candidates = np.where(available, similarity[i], 0)
+                best = int(np.argmax(candidates))
+                if candidates[best] > 0 and candidates[best] >= self.threshold:
+                    matches[i] = best
+                    available[best] = False
+        return matches
+
+    def update(self, poses, smooth=True):
+        """
+        Propagates ids from the poses of the previous call to the provided poses and, if smooth is True, smooths
+        their keypoints in place.
+
+        :param poses: poses from the current frame
+        :type poses: list of engine.target.Pose objects
+        :param smooth: smooth pose keypoints between frames
+        :type smooth: bool
+        """
+        # Match confident poses first
+        order = sorted(range(len(poses)), key=lambda i: poses[i].confidence, reverse=True)
+        poses = [poses[i] for i in order]
+        keypoints = np.zeros((len(poses), Pose.num_kpts, 2), dtype=np.int32)
+        for i, pose in enumerate(poses):
+            keypoints[i] = pose.data
+
+        similarity = get_similarity_matrix(keypoints, self.previous_keypoints, self.similarity_threshold)
+        matches = self.__assign(similarity)
+        ids = []
+        for pose, match in zip(poses, matches):
+            update_id(pose, self.previous_ids[match] if match >= 0 else None)
+            ids.append(pose.id)
+
+        found = keypoints[:, :, 0] != -1
+        if smooth:
+            # A filter state is carried over only if the keypoint was found and filtered in the matched previous pose
+            previously_filtered = np.zeros_like(found)
+            previously_filtered[matches >= 0] = self.previous_filtered[matches[matches >= 0]]
+            self.filters.take(matches)
+            filtered = self.filters(keypoints, previously_filtered[:, :, None])
+            keypoints = np.where(found[:, :, None], filtered, keypoints).astype(np.int32)
+            for pose, pose_keypoints in zip(poses, keypoints):
+                pose.data[:] = pose_keypoints
+            found = keypoints[:, :, 0] != -1
+
+        self.previous_keypoints = keypoints
+        self.previous_ids = ids
+        self.previous_filtered = found & smooth
@@ -54,7 +54,7 @@ class PIFuGeneratorLearner(Learner):
         self.load(checkpoint_dir)
         self.evaluator = Evaluator(self.opt, self.netG, self.netC, self.cuda)
 
-    def infer(self, imgs_rgb=None, imgs_msk=None, obj_path=None, extract_pose=False):
+    def infer(self, imgs_rgb=None, imgs_msk=None, obj_path=None, extract_pose=False, narrow_band=False):
         if os.getenv('DISPLAY') is None and extract_pose is True:
             raise ValueError('Pose can\'t be extracted without rendering the generated'
                              'model on a display...')
@@ -77,7 +77,8 @@ class PIFuGeneratorLearner(Learner):
             os.mkdir(os.path.dirname(obj_path))
         try:
             [imgs_rgb[0], imgs_msk[0]] = process_imgs(imgs_rgb[0], imgs_msk[0])
-            [verts, faces, colors] = self.evaluator.eval(self.evaluator.load_image(imgs_rgb[0], imgs_msk[0]), use_octree=True)
+            [verts, faces, colors] = self.evaluator.eval(self.evaluator.load_image(imgs_rgb[0], imgs_msk[0]), use_octree=True,
+                                                         narrow_band=narrow_band)
             model_3D = Model_3D(verts, faces, vert_colors=colors)
             if obj_path is not None:
                 model_3D.save_obj_mesh(obj_path)
@@ -42,7 +42,7 @@ class Evaluator:
             'b_max': B_MAX,
         }
 
-    def eval(self, data, use_octree=False):
+    def eval(self, data, use_octree=False, narrow_band=False):
         '''
         Evaluate a data point
         :param data: a dict containing at least ['name'], ['image'], ['calib'], ['b_min'] and ['b_max'] tensors.
@@ -54,4 +54,5 @@ class Evaluator:
             if self.netC:
                 self.netC.eval()
             # save_path = '%s/%s.obj' % (opt.results_path, data['name'])
-            return gen_mesh_color(opt, self.netG, self.netC, self.cuda, data, use_octree=use_octree)
+            return gen_mesh_color(opt, self.netG, self.netC, self.cuda, data, use_octree=use_octree,
+                                  narrow_band=narrow_band)
@@ -1,13 +1,14 @@
 from skimage import measure
 import numpy as np
 import torch
-from .sdf import create_grid, eval_grid_octree, eval_grid
+from .sdf import create_grid, eval_grid_octree, eval_grid_narrow_band, eval_grid
+from opendr.simulation.human_model_generation.utilities.mesh_io import save_obj
 from skimage import measure
 
 
 def reconstruction(net, cuda, calib_tensor,
                    resolution, b_min, b_max,
-                   use_octree=False, num_samples=10000, transform=None):
+                   use_octree=False, num_samples=10000, transform=None, narrow_band=False):
     '''
     Reconstruct meshes from sdf predicted by the network.
     :param net: a BasePixImpNet object. call image filter beforehead.
@@ -18,6 +19,7 @@ def reconstruction(net, cuda, calib_tensor,
     :param b_max: bounding box corner [x_max, y_max, z_max]
     :param use_octree: whether to use octree acceleration
     :param num_samples: how many points to query each gpu iteration
+    :param narrow_band: whether the octree only subdivides the cells close to the surface
     :return: marching cubes results.
     '''
     # First we create a grid by resolution
@@ -35,7 +37,9 @@ def reconstruction(net, cuda, calib_tensor,
         return pred.detach().cpu().numpy()
 
     # Then we evaluate the grid
-    if use_octree:
+    if use_octree and narrow_band:
+        sdf = eval_grid_narrow_band(coords, eval_func, level=0.5, num_samples=num_samples)
+    elif use_octree:
         sdf = eval_grid_octree(coords, eval_func, num_samples=num_samples)
     else:
         sdf = eval_grid(coords, eval_func, num_samples=num_samples)
@@ -53,39 +57,12 @@ def reconstruction(net, cuda, calib_tensor,
 
 
 def save_obj_mesh(mesh_path, verts, faces):
-    file = open(mesh_path, 'w')
-
-    for v in verts:
-        file.write('v %.4f %.4f %.4f\n' % (v[0], v[1], v[2]))
-    for f in faces:
-        f_plus = f + 1
-        file.write('f %d %d %d\n' % (f_plus[0], f_plus[2], f_plus[1]))
-    file.close()
+    save_obj(mesh_path, verts, faces)
 
 
 def save_obj_mesh_with_color(mesh_path, verts, faces, colors):
-    file = open(mesh_path, 'w')
-
-    for idx, v in enumerate(verts):
-        c = colors[idx]
-        file.write('v %.4f %.4f %.4f %.4f %.4f %.4f\n' % (v[0], v[1], v[2], c[0], c[1], c[2]))
-    for f in faces:
-        f_plus = f + 1
-        file.write('f %d %d %d\n' % (f_plus[0], f_plus[2], f_plus[1]))
-    file.close()
+    save_obj(mesh_path, verts, faces, colors=colors)
 
 
 def save_obj_mesh_with_uv(mesh_path, verts, faces, uvs):
-    file = open(mesh_path, 'w')
-
-    for idx, v in enumerate(verts):
-        vt = uvs[idx]
-        file.write('v %.4f %.4f %.4f\n' % (v[0], v[1], v[2]))
-        file.write('vt %.4f %.4f\n' % (vt[0], vt[1]))
-
-    for f in faces:
-        f_plus = f + 1
-        file.write('f %d/%d %d/%d %d/%d\n' % (f_plus[0], f_plus[0],
-                                              f_plus[2], f_plus[2],
-                                              f_plus[1], f_plus[1]))
-    file.close()
+    save_obj(mesh_path, verts, faces, uvs=uvs)
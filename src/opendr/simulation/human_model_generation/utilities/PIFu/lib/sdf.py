@@ -48,9 +48,67 @@ def eval_grid(coords, eval_func, num_samples=512 * 512 * 512):
     return sdf.reshape(resolution)
 
 
-def eval_grid_octree(coords, eval_func,
-                     init_resolution=64, threshold=0.01,
-                     num_samples=512 * 512 * 512):
+def _cell_views(grid, reso, num_cells):
+    """
+    Returns the 8 strided views of the corners of all cells of size reso starting at the lattice points
+    """
+    lattice = grid[:num_cells[0] * reso + 1:reso, :num_cells[1] * reso + 1:reso, :num_cells[2] * reso + 1:reso]
+    return [lattice[i:i + num_cells[0], j:j + num_cells[1], k:k + num_cells[2]]
+            for i in (0, 1) for j in (0, 1) for k in (0, 1)]
+
+
+def _cell_blocks(grid, reso, num_cells):
+    """
+    Returns a (n0, reso, n1, reso, n2, reso) view of the grid, splitting it in the blocks covered by each cell
+    """
+    blocks = grid[:num_cells[0] * reso, :num_cells[1] * reso, :num_cells[2] * reso]
+    return blocks.reshape(num_cells[0], reso, num_cells[1], reso, num_cells[2], reso)
+
+
+def _dilate(mask, iterations):
+    """
+    Binary dilation of a 3D mask with a 3x3x3 cube, done separately along each axis
+    """
+    for _ in range(iterations):
+        for axis in range(3):
+            dilated = mask.copy()
+            head = [slice(None)] * 3
+            tail = [slice(None)] * 3
+            head[axis], tail[axis] = slice(1, None), slice(None, -1)
+            dilated[tuple(head)] |= mask[tuple(tail)]
+            dilated[tuple(tail)] |= mask[tuple(head)]
+            mask = dilated
+    return mask
+
+
+def _octree_pass(sdf, dirty, reso, threshold, level=None, band=1):
+    """
+    Fills all the cells of size reso whose center is dirty and that do not need to be subdivided with the mean of
+    their extreme corner values. A cell is subdivided if its corners differ by at least threshold or, if level is
+    given, if it lies in the band of cells around the level set.
+    """
+    resolution = sdf.shape
+    num_cells = [len(range(0, resolution[i] - reso, reso)) for i in range(3)]
+    if min(num_cells) == 0:
+        return
+
+    corners = _cell_views(sdf, reso, num_cells)
+    v_min = np.minimum.reduce(corners)
+    v_max = np.maximum.reduce(corners)
+    center = reso // 2
+    uniform = dirty[center:num_cells[0] * reso:reso, center:num_cells[1] * reso:reso, center:num_cells[2] * reso:reso]
+    if level is None:
+        uniform = uniform & ((v_max - v_min) < threshold)
+    else:
+        surface = _dilate((v_min <= level) & (v_max >= level), band)
+        uniform = uniform & (((v_max - v_min) < threshold) | ~surface)
+
+    mask = uniform[:, None, :, None, :, None]
+    np.copyto(_cell_blocks(sdf, reso, num_cells), ((v_max + v_min) / 2)[:, None, :, None, :, None], where=mask)
+    np.copyto(_cell_blocks(dirty, reso, num_cells), False, where=mask)
+
+
+def _eval_octree(coords, eval_func, init_resolution, threshold, num_samples, level=None, band=1):
     resolution = coords.shape[1:4]
 
     sdf = np.zeros(resolution)
@@ -65,7 +123,6 @@ def eval_grid_octree(coords, eval_func,
         grid_mask[0:resolution[0]:reso, 0:resolution[1]:reso, 0:resolution[2]:reso] = True
         # test samples in this iteration
         test_mask = np.logical_and(grid_mask, dirty)
-        #print('step size:', reso, 'test sample size:', test_mask.sum())
         points = coords[:, test_mask]
 
         sdf[test_mask] = batch_eval(points, eval_func, num_samples=num_samples)
@@ -74,27 +131,28 @@ def eval_grid_octree(coords, eval_func,
         # do interpolation
         if reso <= 1:
             break
-        for x in range(0, resolution[0] - reso, reso):
-            for y in range(0, resolution[1] - reso, reso):
-                for z in range(0, resolution[2] - reso, reso):
-                    # if center marked, return
-                    if not dirty[x + reso // 2, y + reso // 2, z + reso // 2]:
-                        continue
-                    v0 = sdf[x, y, z]
-                    v1 = sdf[x, y, z + reso]
-                    v2 = sdf[x, y + reso, z]
-                    v3 = sdf[x, y + reso, z + reso]
-                    v4 = sdf[x + reso, y, z]
-                    v5 = sdf[x + reso, y, z + reso]
-                    v6 = sdf[x + reso, y + reso, z]
-                    v7 = sdf[x + reso, y + reso, z + reso]
-                    v = np.array([v0, v1, v2, v3, v4, v5, v6, v7])
-                    v_min = v.min()
-                    v_max = v.max()
-                    # this cell is all the same
-                    if (v_max - v_min) < threshold:
-                        sdf[x:x + reso, y:y + reso, z:z + reso] = (v_max + v_min) / 2
-                        dirty[x:x + reso, y:y + reso, z:z + reso] = False
+        _octree_pass(sdf, dirty, reso, threshold, level=level, band=band)
         reso //= 2
 
     return sdf.reshape(resolution)
+
+
+def eval_grid_octree(coords, eval_func,
+                     init_resolution=64, threshold=0.01,
+                     num_samples=512 * 512 * 512):
+    return _eval_octree(coords, eval_func, init_resolution, threshold, num_samples)
+
+
+def eval_grid_narrow_band(coords, eval_func, level=0.5, band=1,
+                          init_resolution=64, threshold=0.01,
+                          num_samples=512 * 512 * 512):
+    """
+    Octree evaluation that only subdivides the cells around the level set. The cells whose corners lie on the same
+    side of level are filled without being evaluated, unless they are within band cells of one that is crossed by it,
+    so only points close to the surface are sent to eval_func.
+    :param level: iso value of the surface extracted by marching cubes
+    :param band: number of neighbouring cells around the surface that are subdivided as well
+    :return: [resX, resY, resZ] sdf values, which match eval_grid_octree on the side of level of every point close
+    to the surface
+    """
+    return _eval_octree(coords, eval_func, init_resolution, threshold, num_samples, level=level, band=band)
@@ -71,7 +71,7 @@ def gen_mesh(opt, net, cuda, data, save_path, use_octree=True):
         print('Can not create marching cubes at this time.')
 
 
-def gen_mesh_color(opt, netG, netC, cuda, data, use_octree=True):
+def gen_mesh_color(opt, netG, netC, cuda, data, use_octree=True, narrow_band=False):
     image_tensor = data['img'].to(device=cuda)
     calib_tensor = data['calib'].to(device=cuda)
 
@@ -90,7 +90,7 @@ def gen_mesh_color(opt, netG, netC, cuda, data, use_octree=True):
         # Image.fromarray(np.uint8(save_img[:,:,::-1])).save(save_img_path)
 
         verts, faces, _, _ = reconstruction(
-            netG, cuda, calib_tensor, opt.resolution, b_min, b_max, use_octree=use_octree)
+            netG, cuda, calib_tensor, opt.resolution, b_min, b_max, use_octree=use_octree, narrow_band=narrow_band)
 
         # Now Getting colors
         verts_tensor = torch.from_numpy(verts.T).unsqueeze(0).to(device=cuda).float()
@@ -0,0 +1,176 @@
+# Copyright 2020-2023 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+
+_PLY_TYPES = {'char': 'i1', 'uchar': 'u1', 'short': '<i2', 'ushort': '<u2', 'int': '<i4', 'uint': '<u4',
+              'float': '<f4', 'double': '<f8'}
+
+
+def _format_rows(fmt, rows):
+    """
+    Formats all the rows of a 2D array with a single string formatting operation, instead of one per row.
+    """
+    rows = np.asarray(rows)
+    if rows.shape[0] == 0:
+        return ''
+    return (fmt * rows.shape[0]) % tuple(rows.ravel().tolist())
+
+
+def save_obj(mesh_path, verts, faces, colors=None, uvs=None):
+    """
+    Saves a mesh in OBJ format. The vertex colors or the texture coordinates of the vertices are optionally saved
+    along with the vertices. The faces are written with reversed winding, following the PIFu convention.
+    :param mesh_path: path of the OBJ file
+    :type mesh_path: str
+    :param verts: vertices of the mesh
+    :type verts: numpy.ndarray (Nx3)
+    :param faces: vertex indices of the faces of the mesh
+    :type faces: numpy.ndarray (Mx3)
+    :param colors: RGB colors of the vertices
+    :type colors: numpy.ndarray (Nx3), optional
+    :param uvs: texture coordinates of the vertices
+    :type uvs: numpy.ndarray (Nx2), optional
+    """
+    verts = np.asarray(verts)
+    faces = np.asarray(faces, dtype=np.int64)[:, [0, 2, 1]] + 1
+    if colors is not None:
+        vert_lines = _format_rows('v %.4f %.4f %.4f %.4f %.4f %.4f\n', np.hstack([verts[:, :3], colors[:, :3]]))
+    elif uvs is not None:
+        vert_lines = _format_rows('v %.4f %.4f %.4f\nvt %.4f %.4f\n', np.hstack([verts[:, :3], uvs[:, :2]]))
+    else:
+        vert_lines = _format_rows('v %.4f %.4f %.4f\n', verts[:, :3])
+    if uvs is not None and colors is None:
+        face_lines = _format_rows('f %d/%d %d/%d %d/%d\n', np.repeat(faces, 2, axis=1))
+    else:
+        face_lines = _format_rows('f %d %d %d\n', faces)
+
+    with open(mesh_path, 'w', buffering=1 << 20) as file:
+        file.write(vert_lines)
+        file.write(face_lines)
+
+
+def save_ply(mesh_path, verts, faces, colors=None):
+    """
+    Saves a mesh in binary little endian PLY format. The vertices are stored as 32-bit floats and the vertex colors,
+    given in [0, 1], as 8-bit values. The faces are written with reversed winding, as in save_obj().
+    :param mesh_path: path of the PLY file
+    :type mesh_path: str
+    :param verts: vertices of the mesh
+    :type verts: numpy.ndarray (Nx3)
+    :param faces: vertex indices of the faces of the mesh
+    :type faces: numpy.ndarray (Mx3)
+    :param colors: RGB colors of the vertices
+    :type colors: numpy.ndarray (Nx3), optional
+    """
+    vertex_fields = [('x', '<f4'), ('y', '<f4'), ('z', '<f4')]
+    if colors is not None:
+        vertex_fields += [('red', 'u1'), ('green', 'u1'), ('blue', 'u1')]
+    vertex_data = np.empty(len(verts), dtype=vertex_fields)
+    for i, axis in enumerate('xyz'):
+        vertex_data[axis] = verts[:, i]
+    if colors is not None:
+        colors = np.clip(np.round(np.asarray(colors)[:, :3] * 255), 0, 255)
+        for i, channel in enumerate(('red', 'green', 'blue')):
+            vertex_data[channel] = colors[:, i]
+
+    face_data = np.empty(len(faces), dtype=[('count', 'u1'), ('vertex_indices', '<i4', (3,))])
+    face_data['count'] = 3
+    face_data['vertex_indices'] = np.asarray(faces)[:, [0, 2, 1]]
+
+    header = ['ply', 'format binary_little_endian 1.0', 'element vertex %d' % len(verts)]
+    inv_types = {v: k for k, v in _PLY_TYPES.items()}
+    header += ['property %s %s' % (inv_types[dtype], name) for name, dtype in vertex_fields]
+    header += ['element face %d' % len(faces), 'property list uchar int vertex_indices', 'end_header']
+    with open(mesh_path, 'wb') as file:
+        file.write(('\n'.join(header) + '\n').encode('ascii'))
+        file.write(vertex_data.tobytes())
+        file.write(face_data.tobytes())
+
+
+def load_ply(mesh_path):
+    """
+    Loads a triangle mesh saved in binary little endian PLY format, such as the ones written by save_ply().
+    :param mesh_path: path of the PLY file
+    :type mesh_path: str
+    :return: vertices, faces and vertex colors in [0, 1] of the mesh, or None if the file has no colors
+    :rtype: tuple of numpy.ndarray
+    """
+    with open(mesh_path, 'rb') as file:
+        if file.readline().strip() != b'ply':
+            raise ValueError('%s is not a PLY file' % mesh_path)
+        elements = []
+        while True:
+            line = file.readline().decode('ascii').split()
+            if not line or line[0] == 'end_header':
+                break
+            if line[0] == 'format' and line[1] != 'binary_little_endian':
+                raise ValueError('Only binary little endian PLY files are supported, got %s' % line[1])
+            elif line[0] == 'element':
+                elements.append((line[1], int(line[2]), []))
+            elif line[0] == 'property' and line[1] == 'list':
+                if line[2:4] != ['uchar', 'int']:
+                    raise ValueError('Only uchar/int face lists are supported')
+                elements[-1][2].append(('count', 'u1'))
+                elements[-1][2].append((line[4], '<i4', (3,)))
+            elif line[0] == 'property':
+                elements[-1][2].append((line[2], _PLY_TYPES[line[1]]))
+        data = file.read()
+
+    arrays, offset = {}, 0
+    for name, count, fields in elements:
+        dtype = np.dtype(fields)
+        arrays[name] = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+        offset += dtype.itemsize * count
+    if 'face' in arrays and np.any(arrays['face']['count'] != 3):
+        raise ValueError('Only triangle meshes are supported')
+
+    vertex_data = arrays['vertex']
+    verts = np.stack([vertex_data['x'], vertex_data['y'], vertex_data['z']], axis=1)
+    faces = np.ascontiguousarray(arrays['face']['vertex_indices'][:, [0, 2, 1]])
+    colors = None
+    if 'red' in vertex_data.dtype.names:
+        colors = np.stack([vertex_data['red'], vertex_data['green'], vertex_data['blue']], axis=1) / 255.0
+    return verts, faces, colors
+
+
+def save_npz(mesh_path, verts, faces, colors=None):
+    """
+    Saves the arrays of a mesh without any loss of precision in a compressed NumPy archive.
+    :param mesh_path: path of the NPZ file
+    :type mesh_path: str
+    :param verts: vertices of the mesh
+    :type verts: numpy.ndarray (Nx3)
+    :param faces: vertex indices of the faces of the mesh
+    :type faces: numpy.ndarray (Mx3)
+    :param colors: RGB colors of the vertices
+    :type colors: numpy.ndarray (Nx3), optional
+    """
+    arrays = {'verts': verts, 'faces': faces}
+    if colors is not None:
+        arrays['colors'] = colors
+    np.savez_compressed(mesh_path, **arrays)
+
+
+def load_npz(mesh_path):
+    """
+    Loads a mesh saved with save_npz().
+    :param mesh_path: path of the NPZ file
+    :type mesh_path: str
+    :return: vertices, faces and vertex colors of the mesh, or None if the file has no colors
+    :rtype: tuple of numpy.ndarray
+    """
+    with np.load(mesh_path) as arrays:
+        colors = arrays['colors'] if 'colors' in arrays.files else None
+        return arrays['verts'], arrays['faces'], colors
@@ -13,6 +13,7 @@
 # limitations under the License.
 
 import os
+from opendr.simulation.human_model_generation.utilities.mesh_io import save_obj, save_ply, save_npz, load_ply, load_npz
 if os.getenv('DISPLAY') is not None:
     from opendr.simulation.human_model_generation.utilities.visualizer import Visualizer
 
@@ -33,21 +34,26 @@ class Model_3D:
         return self.faces
 
     def save_obj_mesh(self, mesh_path):
-        file = open(mesh_path, 'w')
-        if self.use_vert_color:
-            for idx, v in enumerate(self.verts):
-                c = self.vert_colors[idx]
-                file.write('v %.4f %.4f %.4f %.4f %.4f %.4f\n' % (v[0], v[1], v[2], c[0], c[1], c[2]))
-            for f in self.faces:
-                f_plus = f + 1
-                file.write('f %d %d %d\n' % (f_plus[0], f_plus[2], f_plus[1]))
+        save_obj(mesh_path, self.verts, self.faces, colors=self.vert_colors if self.use_vert_color else None)
+
+    def save_ply_mesh(self, mesh_path):
+        save_ply(mesh_path, self.verts, self.faces, colors=self.vert_colors if self.use_vert_color else None)
+
+    def save_npz_mesh(self, mesh_path):
+        save_npz(mesh_path, self.verts, self.faces, colors=self.vert_colors if self.use_vert_color else None)
+
+    @staticmethod
+    def load(mesh_path):
+        """
+        Loads a 3D model saved with save_ply_mesh() or save_npz_mesh(), based on the extension of the file.
+        """
+        if mesh_path.endswith('.ply'):
+            verts, faces, vert_colors = load_ply(mesh_path)
+        elif mesh_path.endswith('.npz'):
+            verts, faces, vert_colors = load_npz(mesh_path)
         else:
-            for v in self.verts:
-                file.write('v %.4f %.4f %.4f\n' % (v[0], v[1], v[2]))
-            for f in self.faces:
-                f_plus = f + 1
-                file.write('f %d %d %d\n' % (f_plus[0], f_plus[2], f_plus[1]))
-            file.close()
+            raise ValueError('Only .ply and .npz meshes can be loaded...')
+        return Model_3D(verts, faces, vert_colors=vert_colors)
 
     def get_img_views(self, rotations=None, human_pose_3D=None, plot_kps=False):
         if os.getenv('DISPLAY') is None:
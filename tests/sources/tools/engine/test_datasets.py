@@ -0,0 +1,73 @@
+# Copyright 2020-2023 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+import numpy as np
+
+from opendr.engine.data import Image, PointCloud
+from opendr.engine.datasets import DatasetIterator, PrefetchDatasetIterator
+from opendr.engine.target import Category
+
+
+class RandomDatasetIterator(DatasetIterator):
+    def __init__(self, size):
+        super().__init__()
+        self.size = size
+
+    def __getitem__(self, idx):
+        if not 0 <= idx < self.size:
+            raise IndexError(idx)
+        rng = np.random.RandomState(idx)
+        if idx % 2 == 0:
+            return PointCloud(rng.rand(100, 4).astype(np.float32)), Category(idx)
+        return Image(rng.randint(0, 255, (3, 16, 12), dtype=np.uint8), guess_format=False), Category(idx)
+
+    def __len__(self):
+        return self.size
+
+
+class TestDatasets(unittest.TestCase):
+
+    def assertSameSample(self, sample, expected):
+        self.assertIs(type(sample[0]), type(expected[0]))
+        self.assertEqual(sample[0].data.dtype, expected[0].data.dtype)
+        self.assertTrue(np.array_equal(sample[0].data, expected[0].data))
+        self.assertEqual(sample[1].data, expected[1].data)
+
+    def test_prefetch_dataset_iterator(self):
+        print("\n\n**********************************\nTEST engine.datasets \n**********************************")
+        dataset = RandomDatasetIterator(20)
+        expected = [dataset[i] for i in range(len(dataset))]
+
+        for backend in ["process", "thread"]:
+            with PrefetchDatasetIterator(dataset, num_workers=2, backend=backend) as prefetched:
+                self.assertEqual(len(prefetched), len(dataset))
+
+                samples = list(prefetched)
+                self.assertEqual(len(samples), len(expected))
+                for sample, expected_sample in zip(samples, expected):
+                    self.assertSameSample(sample, expected_sample)
+
+                for idx in [5, 3, 19, 0, -1, 6, 7]:
+                    self.assertSameSample(prefetched[idx], expected[idx])
+
+                with self.assertRaises(IndexError):
+                    prefetched[len(dataset)]
+
+        with self.assertRaises(ValueError):
+            PrefetchDatasetIterator(dataset, backend="gpu")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -115,6 +115,63 @@ class TestCoTransEncLearner(unittest.TestCase):
             results3 = self.learner.infer(Vector(tensor[:, i]))
         assert torch.allclose(results1.confidence, results3.confidence, atol=1e-4)
 
+    def test_state_pool(self):
+        dl = torch.utils.data.DataLoader(self.val_ds, batch_size=2, num_workers=0)
+        tensors = next(iter(dl))[0]
+
+        # Reference outputs of the whole sequences
+        references = [self.learner.infer(tensor.to(device)) for tensor in tensors]
+
+        pool = self.learner.state_pool(max_streams=2)
+        for i in range(63):
+            results = pool.step({"s0": tensors[0][:, i], "s1": Vector(tensors[1][:, i])})
+            assert results["s0"].data == -1  # Warming up
+        snapshot = pool.state_dict()
+        results = pool.step({"s0": tensors[0][:, 63], "s1": tensors[1][:, 63]})
+        for stream_id, reference in zip(["s0", "s1"], references):
+            assert torch.allclose(results[stream_id].confidence, reference.confidence, atol=1e-4)
+
+        # Restored streams continue without warm-up
+        restored = self.learner.state_pool()
+        restored.load_state_dict(snapshot)
+        assert restored.steps("s0") == 63
+        results = restored.step({"s0": tensors[0][:, 63]})
+        assert torch.allclose(results["s0"].confidence, references[0].confidence, atol=1e-4)
+
+        # The least recently stepped stream is evicted
+        pool.step({"s2": tensors[0][:, 0]})
+        assert set(pool.stream_ids) == {"s1", "s2"}
+
+    def test_state_pool_staggered_streams(self):
+        # Continual multi-head attention states hold num_heads rows per stream
+        for num_heads, num_layers in [(1, 1), (2, 1), (2, 2)]:
+            learner = CoTransEncLearner(
+                device=device,
+                input_dims=8,
+                hidden_dims=32,
+                sequence_len=16,
+                num_heads=num_heads,
+                num_layers=num_layers,
+                num_classes=4,
+                temp_path=str(self.temp_dir),
+            )
+            starts = [0, 0, 3, 7]
+            tensors = torch.randn(len(starts), 8, 24)
+
+            # Streams which join at different steps must match streams stepped on their own
+            pool = learner.state_pool()
+            references = [learner.state_pool() for _ in starts]
+            for t in range(24 + max(starts)):
+                inputs = {s: tensors[s][:, t - start] for s, start in enumerate(starts) if 0 <= t - start < 24}
+                results = pool.step(inputs)
+                for s, x in inputs.items():
+                    reference = references[s].step({s: x})[s]
+                    assert results[s].data == reference.data
+                    assert torch.allclose(results[s].confidence, reference.confidence, atol=1e-5)
+                    if pool.steps(s) == 16:  # = sequence_len
+                        full = learner.infer(tensors[s][:, :16].to(device))
+                        assert torch.allclose(results[s].confidence, full.confidence, atol=1e-4)
+
     def test_optimize(self):
         torch_ok = int(torch.__version__.split(".")[1]) >= 10
         co_ok = int(getattr(continual, "__version__", "0.0.0").split(".")[0]) >= 1
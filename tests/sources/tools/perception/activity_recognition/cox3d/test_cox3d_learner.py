@@ -123,6 +123,19 @@ class TestCoX3DLearner(unittest.TestCase):
         assert results1[0].data == results3[0].data
         assert results1[1].data == results3[1].data
 
+    def test_infer_online(self):
+        self.learner.load(self.temp_dir / "weights" / f"x3d_{_BACKBONE}.pyth")
+        self.learner.reset()
+
+        frames = torch.randint(0, 256, (self.learner.model.receptive_field + 2, 3, 120, 160), dtype=torch.uint8)
+        results = [self.learner.infer_online(frame) for frame in frames]
+
+        # No predictions during warm-up, then one prediction per frame
+        assert results[0] is None
+        assert isinstance(results[-1], Category)
+        assert torch.isclose(torch.sum(results[-1].confidence), torch.tensor(1.0))
+        self.learner.reset()
+
     def test_optimize(self):
         self.learner.ort_session = None
         self.learner.load(self.temp_dir / "weights" / f"x3d_{_BACKBONE}.pyth")
@@ -136,6 +149,12 @@ class TestCoX3DLearner(unittest.TestCase):
         step_output = self.learner.infer(step_input)
         assert isinstance(step_output[0], Category)
 
+        # Reset restores the state the ONNX session started with
+        self.learner.infer(step_input)
+        self.learner.reset()
+        reset_output = self.learner.infer(step_input)
+        assert torch.allclose(reset_output[0].confidence, step_output[0].confidence)
+
         # Clean up
         self.learner.ort_session = None
 
@@ -19,6 +19,7 @@ import unittest
 from opendr.perception.activity_recognition import X3DLearner
 from opendr.perception.activity_recognition import KineticsDataset
 from opendr.engine.data import Video
+from opendr.engine.target import Category
 from pathlib import Path
 from logging import getLogger
 
@@ -120,6 +121,38 @@ class TestX3DLearner(unittest.TestCase):
             for (r1, r3) in zip(results1, results3)
         ])
 
+    def test_frame_store(self):
+        store_path = self.temp_dir / "frame_store"
+        KineticsDataset.preprocess(self.dataset_path, store_path, split="test", short_side=182)
+        ds = KineticsDataset(path=self.dataset_path, frames_per_clip=4, split="test")
+        stored_ds = KineticsDataset(path=self.dataset_path, frames_per_clip=4, split="test", frame_store=store_path)
+
+        assert len(stored_ds) == len(ds)
+        assert stored_ds.classes == ds.classes
+        video, label = stored_ds[0]
+        assert video.shape == ds[0][0].shape
+        assert label == ds[0][1]
+
+    def test_infer_online(self):
+        self.learner.load(self.temp_dir / "weights" / f"x3d_{_BACKBONE}.pyth")
+        self.learner.reset()
+
+        frames = torch.randint(0, 256, (5, 3, 120, 160), dtype=torch.uint8)
+        results = [self.learner.infer_online(frame, temporal_stride=2) for frame in frames]
+        assert all([isinstance(r, Category) for r in results[::2]])
+        assert all([r is None for r in results[1::2]])
+
+        # The ring buffer holds the last preprocessed frames in chronological order
+        T = self.learner.model_hparams["frames_per_clip"]
+        clip = torch.stack([self.learner._frame_preprocess(f) for f in frames[-T:]], dim=1)
+        assert torch.allclose(self.learner._frame_buffer.clip(), clip)
+
+        # The last prediction matches inference on the full clip
+        result = self.learner.infer(clip.unsqueeze(0))[0]
+        assert result.data == results[-1].data
+        assert torch.allclose(result.confidence, results[-1].confidence, atol=1e-6)
+        self.learner.reset()
+
     def test_optimize(self):
         self.learner._ort_session = None
         self.learner.load(self.temp_dir / "weights" / f"x3d_{_BACKBONE}.pyth")
@@ -165,6 +165,32 @@ class TestMultilinearCompressiveLearner(unittest.TestCase):
         self.assertTrue(pred.confidence <= 1,
                         msg="Confidence of prediction must be less or equal than 1")
 
+    def test_optimize(self):
+        learner, input_shape, compressed_shape, n_class, pretrained_backbone, init_backbone = get_random_learner()
+        imgs = [Image(np.float32(np.random.rand(*input_shape)), dtype=np.float32) for _ in range(3)]
+        measurements = [Image(np.float32(np.random.rand(*compressed_shape)), dtype=np.float32) for _ in range(3)]
+        preds = learner.infer(imgs)
+        measurement_preds = learner.infer_from_compressed_measurement(measurements)
+        self.assertTrue(isinstance(preds, list) and len(preds) == 3)
+
+        learner.optimize()
+        fused_preds = learner.infer(imgs)
+        fused_measurement_preds = learner.infer_from_compressed_measurement(measurements)
+        for pred, fused_pred in zip(preds + measurement_preds, fused_preds + fused_measurement_preds):
+            self.assertAlmostEqual(pred.confidence, fused_pred.confidence, delta=1e-3,
+                                   msg="Predictions of the optimized model must match the ones of the original model")
+
+        with torch.no_grad():
+            x = torch.from_numpy(np.stack([img.data for img in imgs])).to(learner.device)
+            y = torch.from_numpy(np.stack([measurement.data for measurement in measurements])).to(learner.device)
+            logits = torch.cat([learner.model(x), learner.model.infer_from_measurement(y)])
+            fused_logits = torch.cat([learner.model.backbone(learner.fused_transforms[0](x)),
+                                      learner.model.backbone(learner.fused_transforms[1](y))])
+        # The rounding errors of the fused transforms grow with the scale of the logits of untrained backbones
+        error = float((logits - fused_logits).abs().max())
+        self.assertLess(error, 1e-4 * (1 + float(logits.abs().max())),
+                        msg="Logits of the optimized model must match the ones of the original model")
+
     def test_save_load(self):
         learner, input_shape, compressed_shape, n_class, _, _ = get_random_learner()
         temp_dir = tempfile.TemporaryDirectory()
@@ -12,10 +12,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import cv2
 import numpy as np
 import shutil
+import torch
+import torchvision.transforms as transforms
 import unittest
+from PIL import Image as PILImage
 from opendr.perception.face_recognition import FaceRecognitionLearner
+from opendr.perception.face_recognition.face_analysis_pipeline import warp_faces
+from opendr.perception.face_recognition.algorithm.align.align_trans import get_reference_facial_points, \
+    get_similarity_transforms_batch
 from opendr.engine.datasets import ExternalDataset
 import os
 
@@ -91,6 +98,43 @@ class TestFaceRecognitionLearner(unittest.TestCase):
         rmfile(os.path.join(self.temp_dir, 'reference', 'reference.pkl'))
         rmdir(os.path.join(self.temp_dir, 'reference'))
 
+    def test_infer_batch(self):
+        imgs = os.path.join(self.temp_dir, 'test_data/images')
+        save_path = os.path.join(self.temp_dir, 'reference')
+        self.recognizer.load(self.temp_dir)
+        self.recognizer.fit_reference(imgs, save_path)
+        files = [os.path.join(imgs, subdir, sorted(os.listdir(os.path.join(imgs, subdir)))[0])
+                 for subdir in sorted(os.listdir(imgs))]
+        faces = [cv2.imread(file) for file in files]
+        # Same preprocessing as infer()
+        transform = transforms.Compose([transforms.Resize([128, 128]), transforms.CenterCrop([112, 112]),
+                                        transforms.ToTensor(), transforms.Normalize([0.5] * 3, [0.5] * 3)])
+        batch = torch.stack([transform(PILImage.fromarray(cv2.cvtColor(face, cv2.COLOR_BGR2RGB))) for face in faces])
+        results = self.recognizer.infer_batch(batch)
+        self.assertEqual(len(results), len(faces))
+        for face, result in zip(faces, results):
+            self.assertEqual(result.data, self.recognizer.infer(face).data)
+        # The optimized model has a fixed batch size of 1
+        self.recognizer.optimize()
+        for onnx_result, result in zip(self.recognizer.infer_batch(batch), results):
+            self.assertEqual(onnx_result.data, result.data)
+        self.recognizer.ort_backbone_session = None
+        # Cleanup
+        rmfile(os.path.join(self.temp_dir, 'onnx_' + self.recognizer.backbone + '_backbone_model.onnx'))
+        rmfile(os.path.join(self.temp_dir, 'reference', 'reference.pkl'))
+        rmdir(os.path.join(self.temp_dir, 'reference'))
+
+    def test_warp_faces(self):
+        rng = np.random.default_rng(0)
+        img = cv2.GaussianBlur(rng.integers(0, 256, (240, 320, 3), dtype=np.uint8), (9, 9), 3)
+        reference = get_reference_facial_points(default_square=True)
+        landmarks = reference[None] * rng.uniform(1, 2, (4, 1, 1)) + rng.uniform(0, 80, (4, 1, 2))
+        tfms = get_similarity_transforms_batch(landmarks, reference)
+        crops = warp_faces(torch.from_numpy(img).permute(2, 0, 1).float(), tfms, 112)
+        for tfm, crop in zip(tfms, crops):
+            expected = cv2.warpAffine(img, tfm, (112, 112)).astype(np.float32)
+            self.assertLess(np.abs(crop.permute(1, 2, 0).numpy() - expected).max(), 1.0)
+
     def test_eval(self):
         self.recognizer.load(self.temp_dir)
         dataset_path = os.path.join(self.temp_dir, 'test_data/images')
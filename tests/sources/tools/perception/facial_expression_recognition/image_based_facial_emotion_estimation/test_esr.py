@@ -110,6 +110,29 @@ class TestFacialEmotionLearner(unittest.TestCase):
         self.assertNotEqual((sum(sum(ensemble_dimension_results))).numpy(), 0.0,
                             msg="overall ensembled dimension results are zero")
 
+    def test_infer_early_exit(self):
+        print("\n\n**********************************\nTest ESR early exit infer function \n*"
+              "*********************************")
+        self.learner.ensemble_size = 9
+        self.learner.init_model(num_branches=9)
+        self.learner.load(ensemble_size=9, path_to_saved_network=self.pretrained_path)
+        val_data = datasets.AffectNetCategorical(idx_set=2,
+                                                 max_loaded_images_per_label=2,
+                                                 transforms=None,
+                                                 is_norm_by_mean_std=False,
+                                                 base_path_to_affectnet=self.dataset_path)
+        val_loader = DataLoader(val_data, batch_size=32, shuffle=False, num_workers=8)
+        batch = next(iter(val_loader))[0]
+        ensemble_emotion_results, _ = self.learner.infer(batch)
+        self.learner.branch_statistics(reset=True)
+        early_exit_results, _ = self.learner.infer(batch, early_exit=True)
+        statistics = self.learner.branch_statistics(reset=True)
+        self.learner.ensemble_size = 1
+        self.assertEqual([e.data for e in early_exit_results], [e.data for e in ensemble_emotion_results],
+                         msg="Early exit changed the ensemble predictions")
+        self.assertEqual(statistics["images"], batch.shape[0])
+        self.assertLessEqual(statistics["average_branches"], 9)
+
     def test_save_load(self):
         print("\n\n**********************************\nTest ESR save_load function \n*"
               "*********************************")
@@ -134,6 +134,13 @@ class TestGatedRecurrentUnitLearner(unittest.TestCase):
                         msg="Predicted class label must be 0")
         self.assertTrue(pred.confidence <= 1,
                         msg="Confidence of prediction must be less or equal than 1")
+
+        # a list of series is processed as a batch
+        preds = learner.infer([train_set[i][0] for i in range(3)])
+        self.assertTrue(isinstance(preds, list) and len(preds) == 3)
+        self.assertTrue(preds[0].data == pred.data,
+                        msg="Batched prediction must match the single series prediction")
+        self.assertAlmostEqual(preds[0].confidence, pred.confidence, places=4)
         temp_dir.cleanup()
 
     def test_save_load(self):
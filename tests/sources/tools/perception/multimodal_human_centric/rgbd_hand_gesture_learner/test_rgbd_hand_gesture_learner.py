@@ -135,6 +135,14 @@ class TestRgbdHandGestureLearner(unittest.TestCase):
                         msg="Predicted class label must be 12")
         self.assertTrue(pred.confidence <= 1,
                         msg="Confidence of prediction must be less or equal than 1")
+
+        # a list of images is processed as a batch
+        preds = learner.infer([img, img])
+        self.assertTrue(isinstance(preds, list) and len(preds) == 2)
+        for batch_pred in preds:
+            self.assertTrue(batch_pred.data == pred.data,
+                            msg="Batched prediction must match the single image prediction")
+            self.assertAlmostEqual(batch_pred.confidence, pred.confidence, places=4)
         temp_dir.cleanup()
 
     def test_save_load(self):
@@ -15,11 +15,13 @@
 import sys
 import unittest
 import shutil
+import numpy as np
 import torch
 import warnings
 from torch.jit import TracerWarning
 from opendr.engine.datasets import ExternalDataset
 from opendr.perception.object_detection_2d import DetrLearner
+from opendr.perception.object_detection_2d.detr.algorithm.util.detect import label_map_polygons
 from PIL import Image
 import os
 
@@ -152,6 +154,79 @@ class TestDetrLearner(unittest.TestCase):
 
         self.assertGreater(len(result), 0)
 
+    def test_infer_batch(self):
+        self.learner.model = None
+        self.learner.ort_session = None
+
+        self.learner.download(verbose=False)
+
+        image_path = os.path.join(
+            self.dataset_path,
+            "image",
+            "000000391895.jpg",
+        )
+
+        image = Image.open(image_path)
+
+        result = self.learner.infer(image)
+        results = self.learner.infer([image, image.transpose(Image.FLIP_LEFT_RIGHT)])
+
+        self.assertEqual(len(results), 2)
+        self.assertEqual(len(results[0]), len(result))
+        for box, batch_box in zip(result, results[0]):
+            self.assertEqual(box.name, batch_box.name)
+            self.assertAlmostEqual(box.left, batch_box.left, delta=1e-2)
+            self.assertAlmostEqual(box.top, batch_box.top, delta=1e-2)
+
+        with self.assertRaises(UserWarning):
+            self.learner.infer(image, return_label_map=True)
+
+    def test_label_map_polygons(self):
+        # segments without holes, whose first contour is their outer one, and no segment for id 2
+        label_map = np.zeros((12, 16), dtype=np.int64)
+        label_map[:7, 5:11] = 1
+        label_map[7:, 5:11] = 3
+        label_map[:, 11:] = 4
+
+        polygons = label_map_polygons(label_map)
+
+        self.assertEqual(len(polygons), 5)
+        self.assertEqual(polygons[2], [])
+        for segment_id in [0, 1, 3, 4]:
+            polygon = np.array(polygons[segment_id]).reshape(-1, 2)
+            self.assertGreater(len(polygon), 0)
+            # the vertices are pixels of the segment, and reach its border pixels on every side
+            self.assertTrue(np.all(label_map[polygon[:, 1], polygon[:, 0]] == segment_id))
+            ys, xs = np.nonzero(label_map == segment_id)
+            self.assertEqual((polygon[:, 0].min(), polygon[:, 0].max()), (xs.min(), xs.max()))
+            self.assertEqual((polygon[:, 1].min(), polygon[:, 1].max()), (ys.min(), ys.max()))
+
+    def test_infer_label_map(self):
+        learner = DetrLearner(temp_path=self.temp_dir, backbone=self.model_backbone, device=DEVICE,
+                              num_classes=250, panoptic_segmentation=True)
+        learner.download(verbose=False)
+
+        image = Image.open(os.path.join(self.dataset_path, "image", "000000391895.jpg"))
+
+        boxes, label_map = learner.infer(image, return_label_map=True)
+        self.assertGreater(len(boxes), 0)
+        self.assertEqual(label_map.data.shape, (image.height, image.width))
+        # the polygons of the boxes are the ones of the segments of the label map
+        polygons = label_map_polygons(label_map.data)
+        for segment_id in np.unique(label_map.data):
+            self.assertGreater(len(polygons[segment_id]), 0)
+        if len(polygons) == len(boxes):
+            for box, polygon in zip(boxes, polygons):
+                self.assertEqual(box.segmentation, polygon)
+
+        results = learner.infer([image, image], return_label_map=True)
+        self.assertEqual(len(results), 2)
+        for result_boxes, result_label_map in results:
+            self.assertEqual(len(result_boxes), len(boxes))
+            self.assertEqual(result_label_map.data.shape, label_map.data.shape)
+
+        del learner
+
     def test_save(self):
         self.learner.model = None
         self.learner.ort_session = None
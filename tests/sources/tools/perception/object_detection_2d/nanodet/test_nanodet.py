@@ -12,14 +12,20 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import copy
 import cv2
+import random
 import unittest
 import gc
 import shutil
 import os
 import numpy as np
+import torch
 from opendr.perception.object_detection_2d import NanodetLearner
 from opendr.engine.datasets import ExternalDataset
+from opendr.perception.object_detection_2d.nanodet.algorithm.nanodet.data.collate import naive_collate
+from opendr.perception.object_detection_2d.nanodet.algorithm.nanodet.data.dataset import build_dataset
+from opendr.perception.object_detection_2d.nanodet.algorithm.nanodet.util import distance2bbox, multi_apply
 
 device = os.getenv('TEST_DEVICE') if os.getenv('TEST_DEVICE') else 'cpu'
 
@@ -69,6 +75,91 @@ class TestNanodetLearner(unittest.TestCase):
         gc.collect()
         print('Finished cleaning for Nanodet...')
 
+    def test_batch_assign(self):
+        print('Starting batched label assignment test for Nanodet...')
+        head = self.detector.model.head
+        num_classes = head.num_classes
+        rng = np.random.RandomState(0)
+        for batch_size in [1, 4, 8]:
+            center_priors = torch.cat([
+                head.get_single_level_center_priors(batch_size, (416 // stride, 416 // stride), stride,
+                                                    dtype=torch.float32, device=device)
+                for stride in head.strides
+            ], dim=1)
+            num_priors = center_priors.shape[1]
+            cls_preds = torch.randn(batch_size, num_priors, num_classes, device=device)
+            reg_preds = torch.randn(batch_size, num_priors, 4 * (head.reg_max + 1), device=device)
+            decoded_bboxes = distance2bbox(center_priors[..., :2],
+                                           head.distribution_project(reg_preds) * center_priors[..., 2, None])
+            gt_bboxes, gt_labels = [], []
+            for i in range(batch_size):
+                # The first image has no ground truth
+                num_gts = 0 if i == 0 and batch_size > 1 else rng.randint(1, 12)
+                top_left = rng.rand(num_gts, 2) * 350
+                size = rng.rand(num_gts, 2) * 150 + 4
+                gt_bboxes.append(np.concatenate([top_left, np.minimum(top_left + size, 416)], 1).astype(np.float32))
+                gt_labels.append(rng.randint(0, num_classes, num_gts).astype(np.int64))
+
+            expected = multi_apply(head.target_assign_single_img, cls_preds, center_priors, decoded_bboxes,
+                                   gt_bboxes, gt_labels)
+            result = head.target_assign_batch(cls_preds, center_priors, decoded_bboxes, gt_bboxes, gt_labels)
+            self.assertEqual(list(expected[4]), list(result[4]), msg="Number of positive priors differs.")
+            for expected_targets, targets in zip(expected[:4], result[:4]):
+                for expected_target, target in zip(expected_targets, targets):
+                    self.assertEqual(expected_target.dtype, target.dtype)
+                    self.assertTrue(torch.allclose(expected_target.float(), target.float(), atol=1e-5),
+                                    msg="Batched label assignment differs from per-image assignment.")
+        print('Finished batched label assignment test for Nanodet...')
+
+    def test_batch_augment(self):
+        print('Starting batch augmentation test for Nanodet...')
+        dataset = ExternalDataset(path=os.path.join(self.temp_dir, "test_data"), dataset_type="voc")
+        data_cfg = dict(self.detector.cfg.data.val)
+        source = build_dataset(data_cfg, dataset, self.detector.cfg.class_names, "val", verbose=False)
+        batched = build_dataset(dict(data_cfg, pipeline=dict(data_cfg["pipeline"], batch_augment=True)), dataset,
+                                self.detector.cfg.class_names, "val", verbose=False)
+        indices = list(range(min(4, len(source))))
+        expected = source.pipeline.collate_fn([source[idx] for idx in indices])
+        result = batched.pipeline.collate_fn([batched[idx] for idx in indices])
+        # the images of the batch have the same size, and only differ from the per-sample ones by rounding,
+        # which is coarser on the border pixels that cv2 interpolates with the constant border
+        self.assertEqual(len(set(img.shape for img in result["img"])), 1)
+        for expected_img, img in zip(expected["img"], result["img"]):
+            height, width = expected_img.shape[1:]
+            self.assertTrue(torch.allclose(expected_img[:, 1:-1, 1:-1], img[:, 1:height - 1, 1:width - 1], atol=0.02))
+            self.assertTrue(torch.allclose(expected_img, img[:, :height, :width], atol=0.1))
+            self.assertEqual(float(img[:, height:].abs().sum() + img[:, :, width:].abs().sum()), 0.0)
+        for expected_bboxes, bboxes in zip(expected["gt_bboxes"], result["gt_bboxes"]):
+            self.assertTrue(np.allclose(expected_bboxes, bboxes, atol=1e-3))
+
+        # the random warps and color jitter of the train pipeline are deterministic for seeded generators
+        train_cfg = dict(self.detector.cfg.data.train)
+        train_cfg["pipeline"] = dict(train_cfg["pipeline"], batch_augment=True)
+        augmented = build_dataset(train_cfg, dataset, self.detector.cfg.class_names, "train", verbose=False)
+        indices = list(range(min(4, len(augmented))))
+
+        def augmented_batch(seed):
+            random.seed(seed)
+            torch.manual_seed(seed)
+            return augmented.pipeline.collate_fn([augmented[idx] for idx in indices])
+
+        first, second, other = augmented_batch(0), augmented_batch(0), augmented_batch(1)
+        for first_img, second_img, other_img in zip(first["img"], second["img"], other["img"]):
+            self.assertTrue(first_img.equal(second_img))
+            self.assertFalse(first_img.shape == other_img.shape and first_img.equal(other_img))
+        for first_bboxes, second_bboxes in zip(first["gt_bboxes"], second["gt_bboxes"]):
+            self.assertTrue(np.array_equal(first_bboxes, second_bboxes))
+
+        # with the same warps, the color jitter follows the generator passed to the transform
+        random.seed(0)
+        raw = naive_collate([augmented[idx] for idx in indices])
+        jittered = [augmented.pipeline.batch_transform(copy.deepcopy(raw), torch.Generator().manual_seed(seed))["img"]
+                    for seed in [0, 0, 1]]
+        for first_img, second_img, other_img in zip(*jittered):
+            self.assertTrue(first_img.equal(second_img))
+            self.assertFalse(first_img.equal(other_img))
+        print('Finished batch augmentation test for Nanodet...')
+
     def test_fit(self):
         print('Starting training test for Nanodet...')
         training_dataset = ExternalDataset(path=os.path.join(self.temp_dir, "test_data"), dataset_type="voc")
@@ -104,11 +195,47 @@ class TestNanodetLearner(unittest.TestCase):
         print('Starting inference test for Nanodet...')
         self.detector.load(os.path.join(self.temp_dir, "nanodet_{}".format(_DEFAULT_MODEL)), verbose=False)
         img = cv2.imread(os.path.join(self.temp_dir, "000000000036.jpg"))
-        self.assertIsNotNone(self.detector.infer(input=img, verbose=False),
-                             msg="Returned empty BoundingBoxList.")
+        expected = self.detector.infer(input=img, verbose=False)
+        self.assertIsNotNone(expected, msg="Returned empty BoundingBoxList.")
+
+        # the batch level augmentation of the dataloaders is not applied to single images
+        self.detector.cfg.defrost()
+        self.detector.cfg.data.val.pipeline.batch_augment = True
+        try:
+            result = self.detector.infer(input=img, verbose=False)
+        finally:
+            self.detector.cfg.data.val.pipeline.pop("batch_augment")
+            self.detector.cfg.freeze()
+        self.assertEqual(len(expected), len(result))
+        for expected_box, box in zip(expected, result):
+            self.assertEqual(expected_box.name, box.name)
+            self.assertTrue(np.allclose([expected_box.left, expected_box.top, expected_box.width, expected_box.height,
+                                         expected_box.confidence],
+                                        [box.left, box.top, box.width, box.height, box.confidence]))
         gc.collect()
         print('Finished inference test for Nanodet...')
 
+    def test_packed_dataset(self):
+        print('Starting packed dataset test for Nanodet...')
+        dataset = ExternalDataset(path=os.path.join(self.temp_dir, "test_data"), dataset_type="voc")
+        pack_path = os.path.join(self.temp_dir, "packs")
+        data_cfg = dict(self.detector.cfg.data.val)
+        source = build_dataset(data_cfg, dataset, self.detector.cfg.class_names, "val", verbose=False)
+        for storage in ["encoded", "resized"]:
+            packed = build_dataset(dict(data_cfg, pack_path=pack_path, pack_storage=storage), dataset,
+                                   self.detector.cfg.class_names, "val", verbose=False)
+            self.assertEqual(len(packed), len(source))
+            for idx in range(len(source)):
+                expected, sample = source[idx], packed[idx]
+                self.assertEqual(expected["img_info"], sample["img_info"])
+                self.assertTrue(np.allclose(expected["gt_bboxes"], sample["gt_bboxes"]))
+                self.assertTrue(np.allclose(expected["warp_matrix"], sample["warp_matrix"]))
+                if storage == "encoded":
+                    self.assertTrue(expected["img"].equal(sample["img"]))
+            rmdir(os.path.join(pack_path, "val"))
+        rmdir(pack_path)
+        print('Finished packed dataset test for Nanodet...')
+
     def test_save_load(self):
         print('Starting save/load test for Nanodet...')
         self.detector.save(path=os.path.join(self.temp_dir, "test_model"), verbose=False)
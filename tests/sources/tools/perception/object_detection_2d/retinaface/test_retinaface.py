@@ -99,6 +99,39 @@ class TestRetinaFaceLearner(unittest.TestCase):
         gc.collect()
         print('Finished inference test for RetinaFace...')
 
+    def test_infer_batch(self):
+        print('Starting batched inference test for RetinaFace...')
+        self.detector.load(os.path.join(self.temp_dir, "retinaface_resnet"))
+        img = cv2.imread(os.path.join(self.temp_dir, "cov4.jpg"))
+        expected_boxes, expected_landmarks = self.detector.infer(img, return_landmarks=True)
+        results = self.detector.infer([img, img[:, ::-1].copy(), img], return_landmarks=True)
+        self.assertEqual(len(results), 3)
+        for boxes, landmarks in [results[0], results[2]]:
+            self.assertEqual(len(boxes), len(expected_boxes))
+            for box, expected_box in zip(boxes, expected_boxes):
+                self.assertTrue(np.allclose([box.left, box.top, box.width, box.height, box.confidence],
+                                            [expected_box.left, expected_box.top, expected_box.width,
+                                             expected_box.height, expected_box.confidence], atol=1e-3))
+            self.assertTrue(np.allclose(landmarks, expected_landmarks, atol=1e-3))
+        del img, results
+        gc.collect()
+        print('Finished batched inference test for RetinaFace...')
+
+    def test_im_tensor(self):
+        self.detector.load(os.path.join(self.temp_dir, "retinaface_resnet"))
+        model = self.detector.detector
+        img = cv2.imread(os.path.join(self.temp_dir, "cov4.jpg"))
+        im = img.astype(np.float32)
+        expected = np.zeros((3, im.shape[0], im.shape[1]), dtype=np.float32)
+        for i in range(3):
+            expected[i, :, :] = (im[:, :, 2 - i] / model.pixel_scale - model.pixel_means[2 - i]) / model.pixel_stds[2 - i]
+        im_tensor = model._im_tensor(img, 1.0, False)
+        self.assertEqual(im_tensor.dtype, np.float32)
+        self.assertTrue(np.array_equal(im_tensor, expected),
+                        msg="Network input differs from the per-channel normalization.")
+        del img
+        gc.collect()
+
     def test_save_load(self):
         print('Starting save/load test for RetinaFace...')
         self.detector.save(os.path.join(self.temp_dir, "test_model"))
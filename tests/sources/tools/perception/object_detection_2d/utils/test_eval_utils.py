@@ -0,0 +1,137 @@
+# Copyright 2020-2023 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+import numpy as np
+
+from opendr.perception.object_detection_2d.utils.eval_utils import MeanAveragePrecision, find_jaccard_overlap
+
+
+def reference_average_precisions(det_boxes, det_labels, det_scores, gt_boxes, gt_labels, gt_difficult, n_classes):
+    """Per-detection greedy matching, as in the original implementation of MeanAveragePrecision"""
+    gt_images = np.concatenate([[i] * len(labels) for i, labels in enumerate(gt_labels)]).astype(np.int64)
+    det_images = np.concatenate([[i] * len(labels) for i, labels in enumerate(det_labels)]).astype(np.int64)
+    gt_boxes, gt_labels = np.concatenate(gt_boxes), np.concatenate(gt_labels)
+    gt_difficult = np.concatenate(gt_difficult)
+    det_boxes, det_labels, det_scores = np.concatenate(det_boxes), np.concatenate(det_labels), np.concatenate(det_scores)
+
+    average_precisions = np.zeros(n_classes)
+    for c in range(n_classes):
+        gt_c = np.where(gt_labels == c)[0]
+        gt_class_images, gt_class_boxes, gt_class_difficult = gt_images[gt_c], gt_boxes[gt_c], gt_difficult[gt_c]
+        n_easy_class_objects = np.sum(1 - gt_class_difficult)
+        detected = np.zeros(len(gt_c), dtype=np.uint8)
+
+        det_c = np.where(det_labels == c)[0]
+        if len(det_c) == 0:
+            continue
+        sort_ind = np.argsort(-det_scores[det_c], axis=0)
+        det_class_boxes, det_class_images = det_boxes[det_c][sort_ind], det_images[det_c][sort_ind]
+
+        true_positives = np.zeros(len(det_c))
+        false_positives = np.zeros(len(det_c))
+        for d in range(len(det_c)):
+            in_image = gt_class_images == det_class_images[d]
+            object_boxes = gt_class_boxes[in_image]
+            if object_boxes.shape[0] == 0:
+                false_positives[d] = 1
+                continue
+            overlaps = find_jaccard_overlap(det_class_boxes[d][None], object_boxes)[0, :]
+            ind = np.argmax(overlaps, axis=0)
+            original_ind = np.arange(len(gt_c))[in_image][ind]
+            if overlaps[ind] > 0.5:
+                if gt_class_difficult[in_image][ind] == 0:
+                    if detected[original_ind] == 0:
+                        true_positives[d] = 1
+                        detected[original_ind] = 1
+                    else:
+                        false_positives[d] = 1
+            else:
+                false_positives[d] = 1
+        cumul_true_positives = np.cumsum(true_positives)
+        cumul_false_positives = np.cumsum(false_positives)
+        cumul_precision = cumul_true_positives / (cumul_true_positives + cumul_false_positives + 1e-10)
+        cumul_recall = cumul_true_positives / n_easy_class_objects
+        precisions = [cumul_precision[cumul_recall >= t].max() if np.any(cumul_recall >= t) else 0
+                      for t in np.arange(0.5, 1., step=.05)]
+        average_precisions[c] = np.mean(precisions)
+    return average_precisions
+
+
+def random_image(rng, n_boxes, n_classes):
+    corners = rng.rand(n_boxes, 2) * 80
+    sizes = rng.rand(n_boxes, 2) * 30 + 5
+    boxes = np.concatenate([corners, corners + sizes], axis=1)
+    return boxes, rng.randint(0, n_classes, n_boxes)
+
+
+def pad(arrays, width, value):
+    """Stacks the per-image arrays of a batch, padded to the largest number of boxes"""
+    size = max(len(a) for a in arrays)
+    batch = np.full((len(arrays), size, width), value, dtype=np.float64)
+    for i, a in enumerate(arrays):
+        batch[i, :len(a)] = np.reshape(a, (len(a), width))
+    return batch
+
+
+class TestMeanAveragePrecision(unittest.TestCase):
+
+    def test_empty_images(self):
+        print("\n\n**********************************\nTEST MeanAveragePrecision \n**********************************")
+        metric = MeanAveragePrecision(["a", "b"], n_val_images=3)
+        boxes = np.array([[[10., 10., 50., 50.]]])
+        # an image without detections and ground truth, an image with a false positive, and a detected image
+        metric.update(np.zeros((1, 0, 4)), np.zeros((1, 0, 1)), np.zeros((1, 0, 1)),
+                      np.zeros((1, 0, 4)), np.zeros((1, 0, 1)))
+        metric.update(boxes, np.array([[[0]]]), np.array([[[0.9]]]), np.zeros((1, 0, 4)), np.zeros((1, 0, 1)))
+        metric.update(boxes, np.array([[[1]]]), np.array([[[0.8]]]), boxes, np.array([[[1]]]))
+        names, values = metric.get()
+        self.assertEqual(names, ["map"])
+        self.assertEqual(metric.average_precisions[0], 0.0)
+        self.assertAlmostEqual(metric.average_precisions[1], 1.0, places=6)
+        self.assertAlmostEqual(values[0], 0.5, places=6)
+
+    def test_reference_parity(self):
+        n_classes = 4
+        for seed in range(5):
+            rng = np.random.RandomState(seed)
+            gts, dets = [], []
+            for _ in range(30):
+                gt_boxes, gt_labels = random_image(rng, rng.randint(0, 6), n_classes)
+                gt_difficult = (rng.rand(len(gt_labels)) < 0.2).astype(np.float64)
+                # detections close to the ground truths, and some random ones
+                jitter = gt_boxes + rng.randn(*gt_boxes.shape) * 3
+                random_boxes, random_labels = random_image(rng, rng.randint(0, 4), n_classes)
+                det_boxes = np.concatenate([jitter, random_boxes])
+                det_labels = np.concatenate([gt_labels, random_labels])
+                det_scores = rng.rand(len(det_labels))
+                gts.append((gt_boxes, gt_labels, gt_difficult))
+                dets.append((det_boxes, det_labels, det_scores))
+
+            metric = MeanAveragePrecision([str(c) for c in range(n_classes)], n_val_images=len(gts))
+            for start in range(0, len(gts), 8):
+                batch_dets, batch_gts = dets[start:start + 8], gts[start:start + 8]
+                # batches are padded with boxes of label -1, as the outputs of the detectors
+                metric.update(pad([d[0] for d in batch_dets], 4, -1), pad([d[1] for d in batch_dets], 1, -1),
+                              pad([d[2] for d in batch_dets], 1, -1), pad([g[0] for g in batch_gts], 4, -1),
+                              pad([g[1] for g in batch_gts], 1, -1), pad([g[2] for g in batch_gts], 1, 0))
+            metric.get()
+
+            expected = reference_average_precisions(*[[d[i] for d in dets] for i in range(3)],
+                                                    *[[g[i] for g in gts] for i in range(3)], n_classes)
+            np.testing.assert_allclose(metric.average_precisions, expected, rtol=1e-12, atol=1e-12)
+
+
+if __name__ == "__main__":
+    unittest.main()
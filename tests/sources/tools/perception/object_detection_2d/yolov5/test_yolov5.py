@@ -69,10 +69,37 @@ class TestYOLOv5DetectorLearner(unittest.TestCase):
         img = cv2.imread(os.path.join(self.temp_dir, "zidane.jpg"))
         self.assertIsNotNone(self.detector.infer(img),
                              msg="Returned empty BoundingBoxList.")
+
+        results = self.detector.infer([img, img[::2, ::2].copy()])
+        self.assertEqual(len(results), 2, msg="Batched inference did not return one BoundingBoxList per image.")
+        self.assertEqual(len(results[0].data), len(self.detector.infer(img).data),
+                         msg="Batched inference returned different detections than single image inference.")
+        self.assertEqual(self.detector.infer([]), [], msg="Inference on an empty batch did not return an empty list.")
         del img
         gc.collect()
         print('Finished inference test for YOLOv5...')
 
+    def test_save_load(self):
+        print('Starting save/load test for YOLOv5...')
+        torch.hub.download_url_to_file('https://ultralytics.com/images/zidane.jpg', os.path.join(self.temp_dir, 'zidane.jpg'))
+        img = cv2.imread(os.path.join(self.temp_dir, "zidane.jpg"))
+        model_dir = os.path.join(self.temp_dir, "test_model")
+        self.detector.save(model_dir)
+
+        # The exported TorchScript model is loaded without the hub repo
+        scripted_detector = YOLOv5DetectorLearner(model_name='yolov5s', path=model_dir, device=device)
+        self.assertTrue(scripted_detector.scripted, msg="TorchScript model was not loaded.")
+        self.assertEqual(scripted_detector.classes, self.detector.classes, msg="Classes were not loaded correctly.")
+
+        results = scripted_detector.infer([img, img])
+        self.assertEqual(len(results), 2, msg="Batched inference did not return one BoundingBoxList per image.")
+        self.assertGreater(len(results[0].data), 0, msg="TorchScript model returned empty BoundingBoxList.")
+        self.assertEqual(scripted_detector.infer([]), [],
+                         msg="Inference on an empty batch did not return an empty list.")
+        del scripted_detector, img
+        gc.collect()
+        print('Finished save/load test for YOLOv5...')
+
 
 if __name__ == "__main__":
     unittest.main()
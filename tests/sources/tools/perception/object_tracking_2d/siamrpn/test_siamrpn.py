@@ -106,6 +106,37 @@ class TestSiamRPNLearner(unittest.TestCase):
         gc.collect()
         print('Finished inference test for SiamRPN...')
 
+    def test_multi_target_tracker(self):
+        print('Starting multi-target tracking test for SiamRPN...')
+        self.learner._model = None
+        self.learner.load(os.path.join(self.temp_dir, "siamrpn_opendr"))
+        imgs = [cv2.imread(os.path.join(self.temp_dir, "test_data", "Basketball", "img", f"{i:04d}.jpg"))
+                for i in range(1, 6)]
+        init_boxes = [TrackingAnnotation(left=198, top=214, width=34, height=81, id=0, name=0),
+                      TrackingAnnotation(left=50, top=50, width=60, height=60, id=1, name=0)]
+        # single target tracking of each target
+        expected = []
+        for init_box in init_boxes:
+            self.learner.infer(imgs[0], init_box=init_box)
+            expected.append([self.learner.infer(img) for img in imgs[1:]])
+
+        tracker = self.learner.multi_target_tracker()
+        for target_id, init_box in enumerate(init_boxes):
+            tracker.add(target_id, imgs[0], init_box)
+        self.assertEqual(tracker.target_ids, [0, 1])
+        for i, img in enumerate(imgs[1:]):
+            results = tracker.track(img)
+            for target_id, result in results.items():
+                box = expected[target_id][i]
+                self.assertTrue(np.allclose([result.left, result.top, result.width, result.height],
+                                            [box.left, box.top, box.width, box.height], atol=1),
+                                msg="Multi-target tracking differs from single target tracking.")
+        tracker.remove(0)
+        self.assertEqual(list(tracker.track(imgs[-1]).keys()), [1])
+        del imgs, tracker
+        gc.collect()
+        print('Finished multi-target tracking test for SiamRPN...')
+
     def test_save_load(self):
         print('Starting save/load test for SiamRPN...')
         self.learner.save(os.path.join(self.temp_dir, "test_model"))
@@ -16,8 +16,14 @@ import sys
 import unittest
 import shutil
 import os
+import numpy as np
+from skimage import io
 from opendr.perception.object_tracking_3d import ObjectTracking3DAb3dmotLearner
 from opendr.perception.object_tracking_3d import KittiTrackingDatasetIterator
+from opendr.perception.object_tracking_3d.ab3dmot.algorithm.evaluate import evaluate as evaluate_kitti_tracking
+from opendr.perception.object_tracking_3d.datasets.kitti_tracking import (
+    load_tracking_file, TrackingLabelTable, LabeledTrackingPointCloudsDatasetIterator, read_image_shape
+)
 
 
 def rmfile(path):
@@ -93,6 +99,121 @@ class TestObjectTracking3DAb3dmot(unittest.TestCase):
             self.assertTrue("pedestrian" in results)
             self.assertTrue("cyclist" in results)
 
+    def test_eval_parallel(self):
+
+        learner = ObjectTracking3DAb3dmotLearner()
+        expected = learner.eval(self.dataset, count=2)
+        results = learner.eval(self.dataset, count=2, num_workers=2)
+
+        # the sequences tracked in worker processes give the same results as the serial evaluation
+        self.assertEqual(expected, results)
+
+        # both evaluations leave the tracker reset
+        for num_workers in [1, 2]:
+            learner.infer(self.dataset[0][0][:5])
+            learner.eval(self.dataset, count=2, num_workers=num_workers)
+            self.assertEqual(learner.model.tracklets, [])
+            self.assertEqual(learner.model.frame, learner.model.starting_frame)
+
+    def test_eval_backends(self):
+
+        learner = ObjectTracking3DAb3dmotLearner()
+        input, ground_truth = self.dataset[0]
+        predictions = [learner.infer(input)]
+
+        expected = evaluate_kitti_tracking(predictions, [ground_truth], backend="munkres")
+        results = evaluate_kitti_tracking(predictions, [ground_truth], backend="vectorized")
+
+        # the summaries of both evaluators are identical
+        self.assertEqual(expected, results)
+
+        with self.assertRaises(ValueError):
+            evaluate_kitti_tracking(predictions, [ground_truth], backend="unknown")
+
+    def test_label_table(self):
+
+        label_path = os.path.join(self.dataset.ground_truths_path, sorted(self.dataset.ground_truths_files)[0])
+        expected, max_id = load_tracking_file(label_path, "tracking", "tracking")
+        table = TrackingLabelTable(label_path, "tracking", "tracking")
+
+        # the boxes of each frame are created on access, with the same fields as the ones of load_tracking_file
+        self.assertEqual(len(expected), len(table))
+        self.assertEqual(max_id, table.max_id)
+        for expected_boxes, boxes in zip(expected, (table[i] for i in range(len(table)))):
+            self.assertEqual(len(expected_boxes), len(boxes))
+            for expected_box, box in zip(expected_boxes.boxes, boxes.boxes):
+                self.assertEqual(expected_box.data, box.data)
+
+    def test_build_index(self):
+
+        sequence_path = os.path.join(self.temp_dir, "index_sequence")
+        lidar_path = os.path.join(sequence_path, "velodyne")
+        image_path = os.path.join(sequence_path, "image_02")
+        index_path = os.path.join(sequence_path, "index")
+        calib_path = os.path.join(sequence_path, "calib.txt")
+        label_path = os.path.join(self.dataset.ground_truths_path, sorted(self.dataset.ground_truths_files)[0])
+        os.makedirs(lidar_path)
+        os.makedirs(image_path)
+
+        with open(calib_path, "w") as f:
+            for name in ["P0:", "P1:", "P2:", "P3:"]:
+                f.write(" ".join([name] + ["1.0"] * 12) + "\n")
+            f.write(" ".join(["R_rect"] + ["1.0"] * 9) + "\n")
+            f.write(" ".join(["Tr_velo_cam"] + ["1.0"] * 12) + "\n")
+            f.write(" ".join(["Tr_imu_velo"] + ["1.0"] * 12) + "\n")
+
+        rng = np.random.RandomState(0)
+
+        def add_frame(frame, num_points, image_shape, extension):
+            rng.rand(num_points, 4).astype(np.float32).tofile(os.path.join(lidar_path, "%06d.bin" % frame))
+            image = rng.randint(0, 256, image_shape + (3,)).astype(np.uint8)
+            io.imsave(os.path.join(image_path, "%06d.%s" % (frame, extension)), image, check_contrast=False)
+
+        def check_sequence(dataset):
+            lidar_files = sorted(os.listdir(lidar_path))
+            image_files = sorted(os.listdir(image_path))
+            self.assertEqual(len(dataset), len(lidar_files))
+            self.assertEqual(len(dataset.point_offsets), len(lidar_files) + 1)
+            image_shapes = np.load(os.path.join(index_path, "image_shapes.npy"))
+            for i, (lidar_file, image_file) in enumerate(zip(lidar_files, image_files)):
+                expected_points = np.fromfile(os.path.join(lidar_path, lidar_file), dtype=np.float32).reshape(-1, 4)
+                expected_shape = io.imread(os.path.join(image_path, image_file)).shape[:2]
+                point_cloud, _ = dataset[i]
+                self.assertTrue(np.array_equal(expected_points, point_cloud.data))
+                self.assertEqual(tuple(read_image_shape(os.path.join(image_path, image_file))), expected_shape)
+                self.assertEqual(tuple(image_shapes[i]), expected_shape)
+                self.assertEqual(tuple(point_cloud.image_shape), expected_shape)
+
+        try:
+            add_frame(0, 120, (37, 50), "png")
+            add_frame(1, 0, (20, 31), "jpg")
+            add_frame(2, 75, (41, 23), "png")
+
+            dataset = LabeledTrackingPointCloudsDatasetIterator(
+                lidar_path, label_path, calib_path, image_path, index_path=index_path
+            )
+            self.assertIsInstance(dataset.points, np.memmap)
+            check_sequence(dataset)
+
+            # an index of the same frames is reused
+            points_mtime = os.stat(os.path.join(index_path, "points.bin")).st_mtime_ns
+            marker = np.full((3, 2), -1, dtype=np.int32)
+            np.save(os.path.join(index_path, "image_shapes.npy"), marker)
+            dataset = LabeledTrackingPointCloudsDatasetIterator(
+                lidar_path, label_path, calib_path, image_path, index_path=index_path
+            )
+            self.assertEqual(os.stat(os.path.join(index_path, "points.bin")).st_mtime_ns, points_mtime)
+            self.assertTrue(np.array_equal(dataset.image_shapes, marker))
+
+            # and it is rebuilt when frames are added
+            add_frame(3, 33, (16, 64), "png")
+            dataset = LabeledTrackingPointCloudsDatasetIterator(
+                lidar_path, label_path, calib_path, image_path, index_path=index_path
+            )
+            check_sequence(dataset)
+        finally:
+            rmdir(sequence_path)
+
     def test_infer(self):
 
         learner = ObjectTracking3DAb3dmotLearner()
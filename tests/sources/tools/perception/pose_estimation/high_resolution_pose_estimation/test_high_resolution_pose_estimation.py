@@ -90,6 +90,23 @@ class TestLightweightOpenPoseLearner(unittest.TestCase):
         self.assertGreater(len(self.pose_estimator.infer(img)[0].data), 0,
                            msg="Returned pose must have non-zero number of keypoints.")
 
+    def test_reset(self):
+        self.pose_estimator.model = None
+        self.pose_estimator.load(os.path.join(self.temp_dir, "openpose_default"))
+
+        img = Image.open(os.path.join(self.temp_dir, "dataset", "image", "000000000785_1080.jpg"))
+        self.pose_estimator.reset()
+        first_ids = [pose.id for pose in self.pose_estimator.infer(img, track=True)]
+        self.assertGreater(len(first_ids), 0, msg="Returned poses must not be empty.")
+        # Tracks are propagated between consecutive frames
+        self.assertEqual(sorted(pose.id for pose in self.pose_estimator.infer(img, track=True)), sorted(first_ids),
+                         msg="Tracked pose ids must be propagated to the next frame.")
+        # After a reset, the same poses start new tracks
+        self.pose_estimator.reset()
+        new_ids = [pose.id for pose in self.pose_estimator.infer(img, track=True)]
+        self.assertEqual(len(new_ids), len(first_ids))
+        self.assertGreater(min(new_ids), max(first_ids), msg="Pose ids must start over after reset.")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -14,10 +14,16 @@
 
 import unittest
 import shutil
+import numpy as np
 import torch
 from opendr.perception.pose_estimation import LightweightOpenPoseLearner
 from opendr.engine.datasets import ExternalDataset
 from opendr.engine.data import Image
+from opendr.engine.target import Pose
+from opendr.perception.pose_estimation.lightweight_open_pose.filtered_pose import FilteredPose
+from opendr.perception.pose_estimation.lightweight_open_pose.utilities import track_poses, PoseTracker
+from opendr.perception.pose_estimation.lightweight_open_pose.algorithm.modules.keypoints import \
+    extract_keypoints, group_keypoints, extract_keypoints_batched, group_keypoints_vectorized
 import warnings
 import os
 
@@ -99,6 +105,68 @@ class TestLightweightOpenPoseLearner(unittest.TestCase):
         # Default pretrained mobilenet model detects 18 keypoints on img with id 785
         self.assertGreater(len(self.pose_estimator.infer(img)[0].data), 0,
                            msg="Returned pose must have non-zero number of keypoints.")
+        self.assertGreater(len(self.pose_estimator.infer(img, postprocess_on_device=True)[0].data), 0,
+                           msg="Returned pose must have non-zero number of keypoints.")
+
+        # On-device postprocessing only differs from the default one by interpolation rounding
+        poses = self.pose_estimator.infer(img, track=False)
+        poses_on_device = self.pose_estimator.infer(img, track=False, postprocess_on_device=True)
+        self.assertEqual(len(poses), len(poses_on_device),
+                         msg="On-device postprocessing must return the same number of poses.")
+        for pose, pose_on_device in zip(poses, poses_on_device):
+            np.testing.assert_allclose(pose_on_device.data, pose.data, atol=1.0,
+                                       err_msg="On-device postprocessing must return the same keypoints.")
+            self.assertAlmostEqual(pose_on_device.confidence, pose.confidence, delta=1e-3)
+
+    def test_vectorized_postprocessing(self):
+        rng = np.random.RandomState(0)
+        heatmaps = (rng.rand(96, 128, 19) ** 8).astype(np.float32)
+        pafs = rng.uniform(-1, 1, (96, 128, 38)).astype(np.float32)
+
+        total_keypoints_num = 0
+        all_keypoints_by_type = []
+        for kpt_idx in range(18):
+            total_keypoints_num += extract_keypoints(heatmaps.copy()[:, :, kpt_idx], all_keypoints_by_type,
+                                                     total_keypoints_num)
+        pose_entries, all_keypoints = group_keypoints(all_keypoints_by_type, pafs, min_paf_score=-1)
+
+        all_keypoints_by_type, keypoints_num = extract_keypoints_batched(heatmaps.copy(), 18)
+        pose_entries_vec, all_keypoints_vec = group_keypoints_vectorized(all_keypoints_by_type, pafs, min_paf_score=-1)
+        self.assertEqual(total_keypoints_num, keypoints_num)
+        self.assertTrue(np.array_equal(all_keypoints.reshape(-1, 4), all_keypoints_vec),
+                        msg="Vectorized keypoint extraction differs from the reference implementation.")
+        self.assertTrue(np.array_equal(pose_entries.reshape(-1, 20), pose_entries_vec),
+                        msg="Vectorized keypoint grouping differs from the reference implementation.")
+
+    def test_pose_tracker(self):
+        rng = np.random.RandomState(0)
+        centers = rng.uniform(50, 500, (6, 1, 2))
+        frames = []
+        for t in range(20):
+            frame = []
+            for i in rng.permutation(6)[:rng.randint(0, 7)]:
+                keypoints = (centers[i] + 3 * t + rng.normal(0, 20, (18, 2))).astype(np.int32)
+                keypoints[rng.rand(18) < 0.2] = -1
+                frame.append((keypoints, rng.rand()))
+            frames.append(frame)
+
+        Pose.last_id = -1
+        previous_poses, reference = [], []
+        for frame in frames:
+            current_poses = [FilteredPose(keypoints.copy(), confidence) for keypoints, confidence in frame]
+            track_poses(previous_poses, current_poses, smooth=True)
+            previous_poses = current_poses
+            reference.append([(pose.id, pose.data) for pose in current_poses])
+
+        Pose.last_id = -1
+        tracker = PoseTracker()
+        for frame, reference_poses in zip(frames, reference):
+            current_poses = [Pose(keypoints.copy(), confidence) for keypoints, confidence in frame]
+            tracker.update(current_poses, smooth=True)
+            for pose, (reference_id, reference_data) in zip(current_poses, reference_poses):
+                self.assertEqual(pose.id, reference_id, msg="PoseTracker ids differ from track_poses.")
+                self.assertTrue(np.array_equal(pose.data, reference_data),
+                                msg="PoseTracker smoothing differs from track_poses.")
 
     def test_save_load(self):
         self.pose_estimator.model = None
@@ -81,6 +81,19 @@ class TestBisenetLearner(unittest.TestCase):
         self.assertIsNotNone(self.learner.infer(img),
                              msg="Returned empty Heatmap.")
 
+    def test_infer_batch(self):
+        self.learner.load(os.path.join(self.temp_dir, "bisenet_camvid"))
+        img = cv2.imread(os.path.join(self.temp_dir, "test1.png"))
+        single = self.learner.infer(img)
+        heatmaps = self.learner.infer([img, img])
+        self.assertEqual(len(heatmaps), 2, msg="Expected one Heatmap per image.")
+        self.assertEqual(heatmaps[0].data.shape, (self.learner.crop_height, self.learner.crop_width))
+        self.assertGreater((heatmaps[1].data == single.data).mean(), 0.99,
+                           msg="Batched inference differs from single image inference.")
+
+        small = self.learner.infer(img, output_scale=0.5)
+        self.assertEqual(small.data.shape, (self.learner.crop_height // 2, self.learner.crop_width // 2))
+
     def test_save_load(self):
         self.learner.save(os.path.join(self.temp_dir, "test_model"))
         self.learner.model = None
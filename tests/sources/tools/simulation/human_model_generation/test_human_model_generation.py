@@ -16,7 +16,11 @@ import unittest
 from opendr.engine.data import Image
 import shutil
 import os
+import numpy as np
 from opendr.simulation.human_model_generation import PIFuGeneratorLearner
+from opendr.simulation.human_model_generation.utilities.model_3D import Model_3D
+from opendr.simulation.human_model_generation.utilities.PIFu.lib.sdf import create_grid, eval_grid, \
+    eval_grid_octree, eval_grid_narrow_band
 
 
 def rmdir(_dir):
@@ -54,6 +58,39 @@ class TestPIFuGeneratorLearner(unittest.TestCase):
         self.assertGreater(model_3D.get_vertices().shape[0], 52260,
                            msg="The generated 3D must have more than 52260 vertices.")
 
+    def test_octree(self):
+        coords, _ = create_grid(64, 64, 64, np.array([-1, -1, -1]), np.array([1, 1, 1]))
+
+        def eval_func(points):
+            # Occupancy of a sphere, smoothed around its surface
+            return 1 / (1 + np.exp(40 * (np.linalg.norm(points, axis=0) - 0.6)))
+
+        sdf = eval_grid(coords, eval_func)
+        sdf_octree = eval_grid_octree(coords, eval_func, init_resolution=16)
+        sdf_narrow_band = eval_grid_narrow_band(coords, eval_func, level=0.5, init_resolution=16)
+        self.assertTrue(np.array_equal(sdf > 0.5, sdf_octree > 0.5),
+                        msg="The octree changed the occupancy of the grid.")
+        self.assertTrue(np.array_equal(sdf > 0.5, sdf_narrow_band > 0.5),
+                        msg="The narrow band octree changed the occupancy of the grid.")
+
+    def test_save_load_mesh(self):
+        os.makedirs(self.temp_dir, exist_ok=True)
+        verts = np.random.rand(100, 3)
+        faces = np.random.randint(0, 100, (200, 3))
+        colors = np.random.rand(100, 3)
+        model_3D = Model_3D(verts, faces, vert_colors=colors)
+
+        model_3D.save_npz_mesh(os.path.join(self.temp_dir, "model.npz"))
+        loaded = Model_3D.load(os.path.join(self.temp_dir, "model.npz"))
+        self.assertTrue(np.array_equal(loaded.get_vertices(), verts) and np.array_equal(loaded.get_faces(), faces) and
+                        np.array_equal(loaded.vert_colors, colors), msg="The NPZ mesh was not loaded correctly.")
+
+        model_3D.save_ply_mesh(os.path.join(self.temp_dir, "model.ply"))
+        loaded = Model_3D.load(os.path.join(self.temp_dir, "model.ply"))
+        self.assertTrue(np.allclose(loaded.get_vertices(), verts, atol=1e-6), msg="The PLY vertices were not loaded correctly.")
+        self.assertTrue(np.array_equal(loaded.get_faces(), faces), msg="The PLY faces were not loaded correctly.")
+        self.assertTrue(np.allclose(loaded.vert_colors, colors, atol=1 / 255), msg="The PLY colors were not loaded correctly.")
+
 
 if __name__ == "__main__":
     unittest.main()